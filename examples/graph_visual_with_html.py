@@ -5,12 +5,14 @@ if not pm.is_installed("pyvis"):
 if not pm.is_installed("networkx"):
     pm.install("networkx")
 
-import networkx as nx
 from pyvis.network import Network
 import random
 
-# Load the GraphML file
-G = nx.read_graphml("./dickens/graph_chunk_entity_relation.graphml")
+from lightrag.kg.graph_snapshot import GraphDeltaLog, read_snapshot
+
+# Load the graph snapshot and apply the changes logged since
+G, generation = read_snapshot("./dickens/graph_chunk_entity_relation.snapshot.npz")
+GraphDeltaLog("./dickens/graph_chunk_entity_relation.delta").replay(G, generation)
 
 # Create a Pyvis network
 net = Network(height="100vh", notebook=True)
@@ -298,6 +298,17 @@ def parse_args() -> argparse.Namespace:
     # Select Document loading tool (DOCLING, DEFAULT)
     args.document_loading_engine = get_env_value("DOCUMENT_LOADING_ENGINE", "DEFAULT")
 
+    # Document parsing in worker processes
+    args.parse_workers = get_env_value("PARSE_WORKERS", 2, int)
+    args.parse_timeout = get_env_value("PARSE_TIMEOUT", 600, int)
+    # Docling maps large model libraries, so its workers are not limited by default
+    args.parse_memory_limit_mb = get_env_value(
+        "PARSE_MEMORY_LIMIT_MB",
+        0 if args.document_loading_engine == "DOCLING" else 4096,
+        int,
+    )
+    args.parse_enqueue_batch_size = get_env_value("PARSE_ENQUEUE_BATCH_SIZE", 16, int)
+
     # Add environment variables that were previously read directly
     args.cors_origins = get_env_value("CORS_ORIGINS", "*")
     args.summary_language = get_env_value("SUMMARY_LANGUAGE", "English")
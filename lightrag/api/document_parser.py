@@ -0,0 +1,320 @@
+"""
+Text extraction for uploaded and scanned documents
+
+Parsing PDF and Office files is CPU bound and can take minutes for large
+files, which froze the whole server when it ran inside the request handler.
+Binary formats are now parsed in a bounded pool of worker processes:
+
+- at most max_workers files are parsed at once
+- every file gets a time limit, enforced by SIGALRM in the worker and by the
+  event loop as a backstop for native code that never yields
+- every worker gets an address space limit, so a runaway parse fails with a
+  MemoryError instead of taking the server down
+- each worker builds the docling DocumentConverter once and reuses it
+
+This module must not import lightrag.api.config: workers are spawned and
+import it afresh.
+"""
+
+import asyncio
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+import pipmaster as pm
+
+from lightrag.utils import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TEXT_EXTENSIONS = frozenset(
+    {
+        ".txt",
+        ".md",
+        ".html",
+        ".htm",
+        ".tex",
+        ".json",
+        ".xml",
+        ".yaml",
+        ".yml",
+        ".rtf",
+        ".odt",
+        ".epub",
+        ".csv",
+        ".log",
+        ".conf",
+        ".ini",
+        ".properties",
+        ".sql",
+        ".bat",
+        ".sh",
+        ".c",
+        ".cpp",
+        ".py",
+        ".java",
+        ".js",
+        ".ts",
+        ".swift",
+        ".go",
+        ".rb",
+        ".php",
+        ".css",
+        ".scss",
+        ".less",
+        ".mermaid",
+    }
+)
+
+# pip packages of the default engine per binary format, alternatives in order
+BINARY_FORMAT_PACKAGES = {
+    ".pdf": ("pypdf2",),
+    ".docx": ("python-docx", "docx"),
+    ".pptx": ("python-pptx",),
+    ".xlsx": ("openpyxl",),
+}
+
+# Extra seconds the event loop waits before killing a worker stuck in native code
+TIMEOUT_GRACE = 30
+
+
+class DocumentParseError(Exception):
+    """Raised when no text can be extracted from a file"""
+
+
+# Worker process state, set up by _init_worker
+_loading_engine = "DEFAULT"
+_docling_converter = None
+
+
+def _init_worker(loading_engine: str, memory_limit_mb: int) -> None:
+    global _loading_engine
+    _loading_engine = loading_engine
+    if memory_limit_mb > 0 and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _get_docling_converter():
+    global _docling_converter
+    if _docling_converter is None:
+        from docling.document_converter import DocumentConverter  # type: ignore
+
+        _docling_converter = DocumentConverter()
+    return _docling_converter
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError
+
+
+def _parse_in_worker(file_path: str, timeout: int) -> str:
+    """Pool entry point: extract_text under the per-file time limit"""
+    path = Path(file_path)
+    use_alarm = timeout > 0 and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+    try:
+        return extract_text(path, _loading_engine)
+    except TimeoutError:
+        raise DocumentParseError(f"Timed out after {timeout}s parsing {path.name}")
+    except MemoryError:
+        raise DocumentParseError(f"Ran out of memory parsing {path.name}")
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+def extract_text(file_path: Path, loading_engine: str = "DEFAULT") -> str:
+    """Extract the text of a file
+
+    Args:
+        file_path: Path to the file
+        loading_engine: DEFAULT or DOCLING, the engine used for binary formats
+    Returns:
+        str: The extracted text, possibly empty
+    Raises:
+        DocumentParseError: If the file type is unsupported or the file is not
+            valid text
+    """
+    ext = file_path.suffix.lower()
+
+    if ext in TEXT_EXTENSIONS:
+        try:
+            content = file_path.read_bytes().decode("utf-8")
+        except UnicodeDecodeError:
+            raise DocumentParseError(
+                f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
+            )
+        if not content or len(content.strip()) == 0:
+            raise DocumentParseError(f"Empty content in file: {file_path.name}")
+        # Check if content looks like binary data string representation
+        if content.startswith("b'") or content.startswith('b"'):
+            raise DocumentParseError(
+                f"File {file_path.name} appears to contain binary data representation instead of text"
+            )
+        return content
+
+    if ext not in BINARY_FORMAT_PACKAGES:
+        raise DocumentParseError(
+            f"Unsupported file type: {file_path.name} (extension {ext})"
+        )
+
+    if loading_engine == "DOCLING":
+        result = _get_docling_converter().convert(file_path)
+        return result.document.export_to_markdown()
+
+    file = BytesIO(file_path.read_bytes())
+    content = ""
+    match ext:
+        case ".pdf":
+            from PyPDF2 import PdfReader  # type: ignore
+
+            reader = PdfReader(file)
+            for page in reader.pages:
+                content += page.extract_text() + "\n"
+        case ".docx":
+            from docx import Document  # type: ignore
+
+            doc = Document(file)
+            content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        case ".pptx":
+            from pptx import Presentation  # type: ignore
+
+            prs = Presentation(file)
+            for slide in prs.slides:
+                for shape in slide.shapes:
+                    if hasattr(shape, "text"):
+                        content += shape.text + "\n"
+        case ".xlsx":
+            from openpyxl import load_workbook  # type: ignore
+
+            wb = load_workbook(file)
+            for sheet in wb:
+                content += f"Sheet: {sheet.title}\n"
+                for row in sheet.iter_rows(values_only=True):
+                    content += (
+                        "\t".join(str(cell) if cell is not None else "" for cell in row)
+                        + "\n"
+                    )
+                content += "\n"
+    return content
+
+
+class DocumentParser:
+    """Extracts text from files without blocking the event loop
+
+    Text formats are decoded in a thread. Binary formats are parsed in a
+    ProcessPoolExecutor that is started on first use.
+
+    Args:
+        max_workers: Number of worker processes, and of files parsed at once
+        timeout: Seconds allowed per file, 0 for no limit
+        memory_limit_mb: Address space limit of each worker, 0 for no limit
+        loading_engine: DEFAULT or DOCLING
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        timeout: int,
+        memory_limit_mb: int,
+        loading_engine: str = "DEFAULT",
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.loading_engine = loading_engine
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._install_lock = threading.Lock()
+
+    async def parse(self, file_path: Path) -> str:
+        """Extract the text of a file
+
+        Raises:
+            DocumentParseError: If the file cannot be parsed in time, within
+                the memory limit, or at all
+        """
+        ext = file_path.suffix.lower()
+        if ext not in BINARY_FORMAT_PACKAGES:
+            return await asyncio.to_thread(extract_text, file_path)
+
+        await asyncio.to_thread(self._install_packages, ext)
+        async with self._slots:
+            executor = self._get_executor()
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, _parse_in_worker, str(file_path), self.timeout
+            )
+            try:
+                if self.timeout > 0:
+                    return await asyncio.wait_for(future, self.timeout + TIMEOUT_GRACE)
+                return await future
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Parser worker stuck on {file_path.name}, restarting the parser pool"
+                )
+                self._reset_executor(executor)
+                raise DocumentParseError(
+                    f"Timed out after {self.timeout}s parsing {file_path.name}"
+                )
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                raise DocumentParseError(
+                    f"Parser worker died while parsing {file_path.name}"
+                )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, cancelling queued files"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Forking a process running an event loop and threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.loading_engine, self.memory_limit_mb),
+            )
+        return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of a broken or stuck pool; the next parse starts a
+        new one. Files still running in it fail with BrokenProcessPool."""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        # ProcessPoolExecutor cannot cancel a running call, so kill its workers
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _install_packages(self, ext: str) -> None:
+        # Installed here rather than in the workers, so concurrent workers do
+        # not run pip at the same time
+        with self._install_lock:
+            if self.loading_engine == "DOCLING":
+                if not pm.is_installed("docling"):  # type: ignore
+                    pm.install("docling")
+                return
+            package, *alternatives = BINARY_FORMAT_PACKAGES[ext]
+            if pm.is_installed(package):  # type: ignore
+                return
+            try:
+                pm.install(package)
+            except Exception:
+                if not alternatives:
+                    raise
+                pm.install(alternatives[0])
@@ -42,6 +42,7 @@ from lightrag.constants import (
 from lightrag.api.routers.document_routes import (
     DocumentManager,
     create_document_routes,
+    document_parser,
     run_scanning_process,
 )
 from lightrag.api.routers.query_routes import create_query_routes
@@ -54,6 +55,7 @@ from lightrag.api.asset_manifest import load_asset_manifest, materialize_aliases
 from lightrag.utils import logger, set_verbose_debug
 from lightrag.kg.shared_storage import (
     get_namespace_data,
+    get_lock_metrics,
     get_pipeline_status_lock,
     initialize_pipeline_status,
 )
@@ -163,6 +165,8 @@ def create_app(args):
             yield
 
         finally:
+            # Stop the document parser workers
+            document_parser.shutdown()
             # Clean up database connections
             await rag.finalize_storages()
 
@@ -634,6 +638,8 @@ def create_app(args):
                 },
                 "auth_mode": auth_mode,
                 "pipeline_busy": pipeline_status.get("busy", False),
+                "storage_locks": get_lock_metrics(),
+                "persistence": rag.persistence.status(),
                 "core_version": core_version,
                 "api_version": __api_version__,
                 "webui_title": webui_title,
@@ -239,7 +239,7 @@ async def handle_binary_file_upload(
                 logger.warning(f"Invalid JSON parameters: {parameters}")
 
         # Check if request already exists and create new document request with file info
-        async with get_storage_lock():
+        async with get_storage_lock(DOCUMENT_REQUESTS_NS):
             if request_id in db:
                 raise HTTPException(
                     status_code=409,
@@ -289,7 +289,7 @@ async def handle_json_request(
         # Check if this is a completion notification (Type B)
         if request.action:
             # Type B: Completion notification
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 if request_id not in db:
                     raise HTTPException(
                         status_code=404,
@@ -322,7 +322,7 @@ async def handle_json_request(
 
         else:
             # Type A: Initial request
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 # Check if request already exists
                 if request_id in db:
                     raise HTTPException(
@@ -378,7 +378,7 @@ async def handle_form_completion_notification(
         if not request_id:
             raise HTTPException(status_code=400, detail="requestId is required")
 
-        async with get_storage_lock():
+        async with get_storage_lock(DOCUMENT_REQUESTS_NS):
             if request_id not in db:
                 raise HTTPException(
                     status_code=404,
@@ -459,7 +459,7 @@ async def handle_form_initial_request(
                 logger.warning(f"Invalid JSON parameters: {parameters}")
 
         # Check if request already exists and create new document request
-        async with get_storage_lock():
+        async with get_storage_lock(DOCUMENT_REQUESTS_NS):
             if request_id in db:
                 raise HTTPException(
                     status_code=409,
@@ -599,7 +599,7 @@ def create_document_request_routes(api_key: Optional[str] = None):
             # Always create a new workflow/request locally
             db = await get_namespace_data(DOCUMENT_REQUESTS_NS)
             request_id = request.requestId or str(uuid.uuid4())
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 if request_id in db:
                     # Ensure uniqueness by regenerating
                     request_id = str(uuid.uuid4())
@@ -701,7 +701,7 @@ def create_document_request_routes(api_key: Optional[str] = None):
 
             request_ids: List[str] = []
 
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 for row in payload.rows:
                     document_type = str(
                         row.get("doc_type")
@@ -744,7 +744,7 @@ def create_document_request_routes(api_key: Optional[str] = None):
                             link = url
                             break
 
-                    async with get_storage_lock():
+                    async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                         if link:
                             # derive file name from URL path
                             path = urlparse(link).path
@@ -814,7 +814,7 @@ def create_document_request_routes(api_key: Optional[str] = None):
             db = await get_namespace_data(DOCUMENT_REQUESTS_NS)
             updated_count = 0
 
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 if requestId:
                     targets = [requestId] if requestId in db else []
                 elif clientBatchId:
@@ -1028,7 +1028,7 @@ def create_document_request_routes(api_key: Optional[str] = None):
         """
         try:
             db = await get_namespace_data(DOCUMENT_REQUESTS_NS)
-            async with get_storage_lock():
+            async with get_storage_lock(DOCUMENT_REQUESTS_NS):
                 if request_id not in db:
                     raise HTTPException(
                         status_code=404,
@@ -5,10 +5,8 @@ This module contains all document-related routes for the LightRAG API.
 import asyncio
 from pyuca import Collator
 from lightrag.utils import logger
-import aiofiles
 import shutil
 import traceback
-import pipmaster as pm
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Literal
@@ -16,7 +14,8 @@ from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Up
 from pydantic import BaseModel, Field, field_validator
 
 from lightrag import LightRAG
-from lightrag.base import DocProcessingStatus, DocStatus
+from lightrag.base import DocProcessingStatus, DocSortField, DocStatus
+from lightrag.api.document_parser import DocumentParseError, DocumentParser
 from lightrag.api.utils_api import get_combined_auth_dependency
 from ..config import global_args
 
@@ -54,6 +53,14 @@ router = APIRouter(
 # Temporary file prefix
 temp_prefix = "__tmp__"
 
+# Extracts text from uploaded and scanned files in worker processes
+document_parser = DocumentParser(
+    max_workers=global_args.parse_workers,
+    timeout=global_args.parse_timeout,
+    memory_limit_mb=global_args.parse_memory_limit_mb,
+    loading_engine=global_args.document_loading_engine,
+)
+
 
 class ScanResponse(BaseModel):
     """Response model for document scanning operation
@@ -380,6 +387,113 @@ class DocsStatusesResponse(BaseModel):
         }
 
 
+class DocumentsRequest(BaseModel):
+    """Request model for a page of documents
+
+    Attributes:
+        status_filter: Only list documents of this status (optional)
+        page: Page number, starting at 1
+        page_size: Number of documents per page
+        sort_field: Field the documents are sorted by
+        sort_direction: Sort direction, asc or desc
+    """
+
+    status_filter: Optional[DocStatus] = Field(
+        default=None, description="Only list documents of this status"
+    )
+    page: int = Field(default=1, ge=1, description="Page number, starting at 1")
+    page_size: int = Field(
+        default=50, ge=1, le=200, description="Number of documents per page"
+    )
+    sort_field: DocSortField = Field(
+        default="updated_at", description="Field the documents are sorted by"
+    )
+    sort_direction: Literal["asc", "desc"] = Field(
+        default="desc", description="Sort direction"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status_filter": "processed",
+                "page": 1,
+                "page_size": 50,
+                "sort_field": "updated_at",
+                "sort_direction": "desc",
+            }
+        }
+
+
+class PaginationInfo(BaseModel):
+    """Position of a page within all matching documents"""
+
+    page: int = Field(description="Current page number")
+    page_size: int = Field(description="Number of documents per page")
+    total_count: int = Field(description="Number of documents matching the filter")
+    total_pages: int = Field(description="Number of pages")
+    has_next: bool = Field(description="Whether a next page exists")
+    has_prev: bool = Field(description="Whether a previous page exists")
+
+
+class PaginatedDocsResponse(BaseModel):
+    """Response model for a page of documents
+
+    Attributes:
+        documents: Documents of the page
+        pagination: Position of the page within all matching documents
+        status_counts: Number of documents in each status
+    """
+
+    documents: List[DocStatusResponse] = Field(description="Documents of the page")
+    pagination: PaginationInfo = Field(
+        description="Position of the page within all matching documents"
+    )
+    status_counts: Dict[str, int] = Field(
+        description="Number of documents in each status"
+    )
+
+
+class StatusCountsResponse(BaseModel):
+    """Response model for document status counts
+
+    Attributes:
+        status_counts: Number of documents in each status
+    """
+
+    status_counts: Dict[str, int] = Field(
+        description="Number of documents in each status"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status_counts": {
+                    "pending": 3,
+                    "processing": 1,
+                    "processed": 120,
+                    "failed": 2,
+                }
+            }
+        }
+
+
+def to_doc_status_response(
+    doc_id: str, doc_status: DocProcessingStatus
+) -> DocStatusResponse:
+    return DocStatusResponse(
+        id=doc_id,
+        content_summary=doc_status.content_summary,
+        content_length=doc_status.content_length,
+        status=doc_status.status,
+        created_at=format_datetime(doc_status.created_at),
+        updated_at=format_datetime(doc_status.updated_at),
+        chunks_count=doc_status.chunks_count,
+        error=doc_status.error,
+        metadata=doc_status.metadata,
+        file_path=doc_status.file_path,
+    )
+
+
 class PipelineStatusResponse(BaseModel):
     """Response model for pipeline status
 
@@ -488,190 +602,26 @@ class DocumentManager:
         return any(filename.lower().endswith(ext) for ext in self.supported_extensions)
 
 
-async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
-    """Add a file to the queue for processing
+async def parse_file(file_path: Path) -> Optional[str]:
+    """Extract the text of a file in the parser pool
+
+    Temporary upload files are deleted once parsed.
 
     Args:
-        rag: LightRAG instance
         file_path: Path to the saved file
     Returns:
-        bool: True if the file was successfully enqueued, False otherwise
+        Optional[str]: The extracted text, or None if nothing could be extracted
     """
-
     try:
-        content = ""
-        ext = file_path.suffix.lower()
-
-        file = None
-        async with aiofiles.open(file_path, "rb") as f:
-            file = await f.read()
-
-        # Process based on file type
-        match ext:
-            case (
-                ".txt"
-                | ".md"
-                | ".html"
-                | ".htm"
-                | ".tex"
-                | ".json"
-                | ".xml"
-                | ".yaml"
-                | ".yml"
-                | ".rtf"
-                | ".odt"
-                | ".epub"
-                | ".csv"
-                | ".log"
-                | ".conf"
-                | ".ini"
-                | ".properties"
-                | ".sql"
-                | ".bat"
-                | ".sh"
-                | ".c"
-                | ".cpp"
-                | ".py"
-                | ".java"
-                | ".js"
-                | ".ts"
-                | ".swift"
-                | ".go"
-                | ".rb"
-                | ".php"
-                | ".css"
-                | ".scss"
-                | ".less"
-                | ".mermaid"
-            ):
-                try:
-                    # Try to decode as UTF-8
-                    content = file.decode("utf-8")
-
-                    # Validate content
-                    if not content or len(content.strip()) == 0:
-                        logger.error(f"Empty content in file: {file_path.name}")
-                        return False
-
-                    # Check if content looks like binary data string representation
-                    if content.startswith("b'") or content.startswith('b"'):
-                        logger.error(
-                            f"File {file_path.name} appears to contain binary data representation instead of text"
-                        )
-                        return False
-
-                except UnicodeDecodeError:
-                    logger.error(
-                        f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
-                    )
-                    return False
-            case ".pdf":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("pypdf2"):  # type: ignore
-                        pm.install("pypdf2")
-                    from PyPDF2 import PdfReader  # type: ignore
-                    from io import BytesIO
-
-                    pdf_file = BytesIO(file)
-                    reader = PdfReader(pdf_file)
-                    for page in reader.pages:
-                        content += page.extract_text() + "\n"
-            case ".docx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-docx"):  # type: ignore
-                        try:
-                            pm.install("python-docx")
-                        except Exception:
-                            pm.install("docx")
-                    from docx import Document  # type: ignore
-                    from io import BytesIO
-
-                    docx_file = BytesIO(file)
-                    doc = Document(docx_file)
-                    content = "\n".join(
-                        [paragraph.text for paragraph in doc.paragraphs]
-                    )
-            case ".pptx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-pptx"):  # type: ignore
-                        pm.install("pptx")
-                    from pptx import Presentation  # type: ignore
-                    from io import BytesIO
-
-                    pptx_file = BytesIO(file)
-                    prs = Presentation(pptx_file)
-                    for slide in prs.slides:
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text"):
-                                content += shape.text + "\n"
-            case ".xlsx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("openpyxl"):  # type: ignore
-                        pm.install("openpyxl")
-                    from openpyxl import load_workbook  # type: ignore
-                    from io import BytesIO
-
-                    xlsx_file = BytesIO(file)
-                    wb = load_workbook(xlsx_file)
-                    for sheet in wb:
-                        content += f"Sheet: {sheet.title}\n"
-                        for row in sheet.iter_rows(values_only=True):
-                            content += (
-                                "\t".join(
-                                    str(cell) if cell is not None else ""
-                                    for cell in row
-                                )
-                                + "\n"
-                            )
-                        content += "\n"
-            case _:
-                logger.error(
-                    f"Unsupported file type: {file_path.name} (extension {ext})"
-                )
-                return False
-
-        # Insert into the RAG queue
-        if content:
-            await rag.apipeline_enqueue_documents(content, file_paths=file_path.name)
-            logger.info(f"Successfully fetched and enqueued file: {file_path.name}")
-            return True
-        else:
+        content = await document_parser.parse(file_path)
+        if not content:
             logger.error(f"No content could be extracted from file: {file_path.name}")
-
+            return None
+        return content
+    except DocumentParseError as e:
+        logger.error(str(e))
     except Exception as e:
-        logger.error(f"Error processing or enqueueing file {file_path.name}: {str(e)}")
+        logger.error(f"Error processing file {file_path.name}: {str(e)}")
         logger.error(traceback.format_exc())
     finally:
         if file_path.name.startswith(temp_prefix):
@@ -679,6 +629,28 @@ async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
                 file_path.unlink()
             except Exception as e:
                 logger.error(f"Error deleting file {file_path}: {str(e)}")
+    return None
+
+
+async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
+    """Add a file to the queue for processing
+
+    Args:
+        rag: LightRAG instance
+        file_path: Path to the saved file
+    Returns:
+        bool: True if the file was successfully enqueued, False otherwise
+    """
+    content = await parse_file(file_path)
+    if content is None:
+        return False
+    try:
+        await rag.apipeline_enqueue_documents(content, file_paths=file_path.name)
+        logger.info(f"Successfully fetched and enqueued file: {file_path.name}")
+        return True
+    except Exception as e:
+        logger.error(f"Error enqueueing file {file_path.name}: {str(e)}")
+        logger.error(traceback.format_exc())
     return False
 
 
@@ -699,7 +671,12 @@ async def pipeline_index_file(rag: LightRAG, file_path: Path):
 
 
 async def pipeline_index_files(rag: LightRAG, file_paths: List[Path]):
-    """Index multiple files sequentially to avoid high CPU load
+    """Index multiple files
+
+    Files are parsed concurrently in the parser pool. Extracted texts are
+    enqueued in batches in collation order of the paths, each as soon as all
+    earlier files are parsed, and each batch starts the processing pipeline,
+    so indexing overlaps with parsing of the remaining files.
 
     Args:
         rag: LightRAG instance
@@ -707,21 +684,49 @@ async def pipeline_index_files(rag: LightRAG, file_paths: List[Path]):
     """
     if not file_paths:
         return
-    try:
-        enqueued = False
+    processing: List[asyncio.Task] = []
+    contents: List[str] = []
+    names: List[str] = []
+
+    async def enqueue_batch():
+        try:
+            await rag.apipeline_enqueue_documents(contents, file_paths=names)
+            logger.info(f"Enqueued {len(names)} files")
+        except Exception as e:
+            logger.error(f"Error enqueueing files {', '.join(names)}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return
+        finally:
+            contents.clear()
+            names.clear()
+        # Returns at once if the pipeline is busy; it then picks up the batch
+        processing.append(
+            asyncio.create_task(rag.apipeline_process_enqueue_documents())
+        )
 
+    try:
         # Create Collator for Unicode sorting
         collator = Collator()
         sorted_file_paths = sorted(file_paths, key=lambda p: collator.sort_key(str(p)))
 
-        # Process files sequentially
-        for file_path in sorted_file_paths:
-            if await pipeline_enqueue_file(rag, file_path):
-                enqueued = True
-
-        # Process the queue only if at least one file was successfully enqueued
-        if enqueued:
-            await rag.apipeline_process_enqueue_documents()
+        # The parser bounds how many files are parsed at once; the results are
+        # consumed in sorted order, not in order of completion
+        parsed = [
+            asyncio.create_task(parse_file(file_path))
+            for file_path in sorted_file_paths
+        ]
+        for file_path, parse_task in zip(sorted_file_paths, parsed):
+            content = await parse_task
+            if content is None:
+                continue
+            contents.append(content)
+            names.append(file_path.name)
+            if len(contents) >= global_args.parse_enqueue_batch_size:
+                await enqueue_batch()
+
+        if contents:
+            await enqueue_batch()
+        await asyncio.gather(*processing)
     except Exception as e:
         logger.error(f"Error indexing files: {str(e)}")
         logger.error(traceback.format_exc())
@@ -1196,7 +1201,7 @@ def create_document_routes(
 
                     request_id = str(uuid.uuid4())
                     db = await get_namespace_data("document_requests")
-                    async with get_storage_lock():
+                    async with get_storage_lock("document_requests"):
                         db[request_id] = {
                             "requestId": request_id,
                             "status": "Processing",
@@ -1238,7 +1243,9 @@ def create_document_routes(
                                             "document_requests"
                                         )
                                         if request_id in db_inner:
-                                            async with get_storage_lock():
+                                            async with get_storage_lock(
+                                                "document_requests"
+                                            ):
                                                 db_inner[request_id].update(
                                                     {
                                                         "status": "Ready",
@@ -1257,7 +1264,9 @@ def create_document_routes(
                                             "document_requests"
                                         )
                                         if request_id in db_inner:
-                                            async with get_storage_lock():
+                                            async with get_storage_lock(
+                                                "document_requests"
+                                            ):
                                                 db_inner[request_id].update(
                                                     {
                                                         "status": "Failed",
@@ -1282,7 +1291,7 @@ def create_document_routes(
                         # Timeout - mark as failed
                         db_inner = await get_namespace_data("document_requests")
                         if request_id in db_inner:
-                            async with get_storage_lock():
+                            async with get_storage_lock("document_requests"):
                                 db_inner[request_id].update(
                                     {
                                         "status": "Failed",
@@ -1378,11 +1387,13 @@ def create_document_routes(
             storages = [
                 rag.text_chunks,
                 rag.full_docs,
+                rag.doc_graph_index,
                 rag.entities_vdb,
                 rag.relationships_vdb,
                 rag.chunks_vdb,
                 rag.chunk_entity_relation_graph,
                 rag.doc_status,
+                rag.graph_analytics,
             ]
 
             # Log storage drop start
@@ -1631,18 +1642,7 @@ def create_document_routes(
                     if status not in response.statuses:
                         response.statuses[status] = []
                     response.statuses[status].append(
-                        DocStatusResponse(
-                            id=doc_id,
-                            content_summary=doc_status.content_summary,
-                            content_length=doc_status.content_length,
-                            status=doc_status.status,
-                            created_at=format_datetime(doc_status.created_at),
-                            updated_at=format_datetime(doc_status.updated_at),
-                            chunks_count=doc_status.chunks_count,
-                            error=doc_status.error,
-                            metadata=doc_status.metadata,
-                            file_path=doc_status.file_path,
-                        )
+                        to_doc_status_response(doc_id, doc_status)
                     )
 
             cached_resp = DocsStatusesResponse(statuses=response.statuses)
@@ -1654,6 +1654,84 @@ def create_document_routes(
             logger.error(traceback.format_exc())
             raise HTTPException(status_code=500, detail=str(e))
 
+    @router.post(
+        "/paginated",
+        response_model=PaginatedDocsResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def documents_paginated(request: DocumentsRequest) -> PaginatedDocsResponse:
+        """
+        Get one page of documents, sorted and optionally filtered by status.
+
+        Only the documents of the requested page are read from the document
+        status storage, and document content is never read, so the cost of a
+        request does not grow with the number of documents in the system.
+
+        Args:
+            request (DocumentsRequest): Status filter, page, page size and sort order.
+
+        Returns:
+            PaginatedDocsResponse: The documents of the page, the pagination info
+                and the number of documents in each status.
+
+        Raises:
+            HTTPException: If an error occurs while retrieving documents (500).
+        """
+        try:
+            (docs, total_count), status_counts = await asyncio.gather(
+                rag.aget_docs_paginated(
+                    status_filter=request.status_filter,
+                    page=request.page,
+                    page_size=request.page_size,
+                    sort_field=request.sort_field,
+                    sort_direction=request.sort_direction,
+                ),
+                rag.get_processing_status(),
+            )
+            total_pages = (total_count + request.page_size - 1) // request.page_size
+            return PaginatedDocsResponse(
+                documents=[
+                    to_doc_status_response(doc_id, doc_status)
+                    for doc_id, doc_status in docs
+                ],
+                pagination=PaginationInfo(
+                    page=request.page,
+                    page_size=request.page_size,
+                    total_count=total_count,
+                    total_pages=total_pages,
+                    has_next=request.page < total_pages,
+                    has_prev=request.page > 1,
+                ),
+                status_counts=status_counts,
+            )
+        except Exception as e:
+            logger.error(f"Error getting paginated documents: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @router.get(
+        "/status_counts",
+        response_model=StatusCountsResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def get_document_status_counts() -> StatusCountsResponse:
+        """
+        Get the number of documents in each status.
+
+        Returns:
+            StatusCountsResponse: The number of documents in each status.
+
+        Raises:
+            HTTPException: If an error occurs while counting documents (500).
+        """
+        try:
+            status_counts = await rag.get_processing_status()
+            return StatusCountsResponse(status_counts=status_counts)
+        except Exception as e:
+            logger.error(f"Error getting document status counts: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
     @router.post(
         "/clear_cache",
         response_model=ClearCacheResponse,
@@ -4,14 +4,14 @@ Provides analytics and insights from the knowledge graph.
 """
 
 import traceback
-from collections import Counter, defaultdict
 from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from lightrag import LightRAG
 from lightrag.api.utils_api import get_combined_auth_dependency
+from lightrag.base import DocStatus
 from lightrag.utils import logger
 
 router = APIRouter(
@@ -98,6 +98,14 @@ class KnowledgeGapResponse(BaseModel):
     )
 
 
+class RebuildAnalyticsResponse(BaseModel):
+    """Response model for graph analytics rebuild"""
+
+    status: str = Field(description="Rebuild status")
+    total_entities: int = Field(description="Entities after rebuild")
+    total_relationships: int = Field(description="Relationships after rebuild")
+
+
 def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
     combined_auth = get_combined_auth_dependency(api_key)
 
@@ -120,99 +128,23 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
             HTTPException: If error occurs while computing statistics (500)
         """
         try:
-            # Get all entities and relationships from the graph
-            entities_data = await rag.entities_vdb.get_by_ids(
-                list(await rag.entities_vdb.index_done_callback())
-            )
-            relationships_data = await rag.relationships_vdb.get_by_ids(
-                list(await rag.relationships_vdb.index_done_callback())
-            )
-
-            # Get processed documents count
-            processed_docs = await rag.get_docs_by_status("processed")
-            documents_processed = len(processed_docs)
-
-            # Calculate entity statistics
-            entity_types = Counter()
-            entity_connections = defaultdict(int)
-            entities_info = {}
-
-            for entity_id, entity_data in entities_data.items():
-                if entity_data and "entity_type" in entity_data:
-                    entity_type = entity_data.get("entity_type", "unknown")
-                    entity_types[entity_type] += 1
-
-                    entities_info[entity_id] = {
-                        "name": entity_data.get("entity_name", entity_id),
-                        "type": entity_type,
-                        "description": entity_data.get("description", ""),
-                        "degree": 0,
-                    }
-
-            # Calculate relationship statistics
-            relationship_strengths = []
-
-            for rel_id, rel_data in relationships_data.items():
-                if rel_data:
-                    src_id = rel_data.get("src_id", "")
-                    tgt_id = rel_data.get("tgt_id", "")
-                    weight = rel_data.get("weight", 0.0)
-
-                    # Count connections
-                    entity_connections[src_id] += 1
-                    entity_connections[tgt_id] += 1
-
-                    # Store relationship info
-                    relationship_strengths.append(
-                        {
-                            "source": entities_info.get(src_id, {}).get("name", src_id),
-                            "target": entities_info.get(tgt_id, {}).get("name", tgt_id),
-                            "relationship": rel_data.get("description", ""),
-                            "weight": weight,
-                        }
-                    )
-
-            # Update entity degrees
-            for entity_id in entities_info:
-                entities_info[entity_id]["degree"] = entity_connections[entity_id]
-
-            # Get top connected entities
-            most_connected = sorted(
-                entities_info.values(), key=lambda x: x["degree"], reverse=True
-            )[:10]
-
-            # Get strongest relationships
-            strongest_rels = sorted(
-                relationship_strengths, key=lambda x: x["weight"], reverse=True
-            )[:10]
-
-            # Calculate averages
-            total_entities = len(entities_info)
-            total_relationships = len(relationship_strengths)
-            avg_connections = (
-                sum(entity_connections.values()) / total_entities
-                if total_entities > 0
-                else 0
-            )
+            summary = await rag.graph_analytics.get_summary(top_k=10)
+            status_counts = await rag.doc_status.get_status_counts()
 
             return GraphStatsResponse(
-                total_entities=total_entities,
-                total_relationships=total_relationships,
-                entity_types=dict(entity_types),
-                avg_connections_per_entity=avg_connections,
+                total_entities=summary["total_entities"],
+                total_relationships=summary["total_relationships"],
+                entity_types=summary["entity_types"],
+                avg_connections_per_entity=summary["avg_connections_per_entity"],
                 most_connected_entities=[
-                    EntityInsight(
-                        name=entity["name"],
-                        type=entity["type"],
-                        degree=entity["degree"],
-                        description=entity["description"],
-                    )
-                    for entity in most_connected
+                    EntityInsight(**entity)
+                    for entity in summary["most_connected_entities"]
                 ],
                 strongest_relationships=[
-                    RelationshipInsight(**rel) for rel in strongest_rels
+                    RelationshipInsight(**rel)
+                    for rel in summary["strongest_relationships"]
                 ],
-                documents_processed=documents_processed,
+                documents_processed=status_counts.get(DocStatus.PROCESSED.value, 0),
             )
 
         except Exception as e:
@@ -239,99 +171,15 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
             HTTPException: If error occurs during cluster analysis (500)
         """
         try:
-            # Get graph data
-            entities_data = await rag.entities_vdb.get_by_ids(
-                list(await rag.entities_vdb.index_done_callback())
-            )
-            relationships_data = await rag.relationships_vdb.get_by_ids(
-                list(await rag.relationships_vdb.index_done_callback())
-            )
-
-            # Build adjacency graph
-            graph = defaultdict(set)
-            for rel_id, rel_data in relationships_data.items():
-                if rel_data:
-                    src_id = rel_data.get("src_id", "")
-                    tgt_id = rel_data.get("tgt_id", "")
-                    if src_id and tgt_id:
-                        graph[src_id].add(tgt_id)
-                        graph[tgt_id].add(src_id)
-
-            # Simple clustering using connected components
-            visited = set()
-            clusters = []
-
-            def dfs_cluster(node, cluster):
-                if node in visited:
-                    return
-                visited.add(node)
-                cluster.add(node)
-                for neighbor in graph[node]:
-                    dfs_cluster(neighbor, cluster)
-
-            for entity_id in entities_data.keys():
-                if entity_id not in visited:
-                    cluster = set()
-                    dfs_cluster(entity_id, cluster)
-                    if len(cluster) > 1:  # Only include clusters with multiple entities
-                        clusters.append(cluster)
-
-            # Analyze clusters
-            topic_clusters = []
-            for i, cluster in enumerate(clusters[:10]):  # Limit to top 10 clusters
-                # Find central entity (most connected within cluster)
-                cluster_connections = {
-                    entity: len(graph[entity] & cluster) for entity in cluster
-                }
-                central_entity = max(cluster_connections, key=cluster_connections.get)
-
-                # Get entity names and extract keywords
-                entity_names = []
-                topic_keywords = []
-
-                for entity_id in cluster:
-                    entity_info = entities_data.get(entity_id, {})
-                    name = entity_info.get("entity_name", entity_id)
-                    entity_names.append(name)
-
-                    # Extract keywords from entity descriptions
-                    description = entity_info.get("description", "")
-                    if description:
-                        words = description.lower().split()
-                        topic_keywords.extend([w for w in words if len(w) > 3])
-
-                # Get most common keywords
-                keyword_counts = Counter(topic_keywords)
-                top_keywords = [word for word, _ in keyword_counts.most_common(5)]
-
-                topic_clusters.append(
-                    TopicCluster(
-                        cluster_id=i,
-                        entities=entity_names,
-                        central_entity=entities_data.get(central_entity, {}).get(
-                            "entity_name", central_entity
-                        ),
-                        topic_keywords=top_keywords,
-                        document_count=len(
-                            [
-                                e
-                                for e in cluster
-                                if "source_id" in entities_data.get(e, {})
-                            ]
-                        ),
-                    )
-                )
-
-            total_entities = len(entities_data)
-            clustered_entities = sum(len(cluster) for cluster in clusters)
-            coverage_percentage = (
-                (clustered_entities / total_entities * 100) if total_entities > 0 else 0
-            )
+            result = await rag.graph_analytics.get_clusters(limit=10)
 
             return TopicClustersResponse(
-                clusters=topic_clusters,
-                total_clusters=len(clusters),
-                coverage_percentage=coverage_percentage,
+                clusters=[
+                    TopicCluster(cluster_id=i, **cluster)
+                    for i, cluster in enumerate(result["clusters"])
+                ],
+                total_clusters=result["total_clusters"],
+                coverage_percentage=result["coverage_percentage"],
             )
 
         except Exception as e:
@@ -344,12 +192,23 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
         response_model=List[DocumentConnectivityResponse],
         dependencies=[Depends(combined_auth)],
     )
-    async def get_document_connectivity():
+    async def get_document_connectivity(
+        offset: int = Query(0, ge=0, description="Number of documents to skip"),
+        limit: int = Query(
+            20, ge=1, le=1000, description="Maximum number of documents to return"
+        ),
+    ):
         """
         Analyze how well documents are connected in the knowledge graph.
 
         Identifies documents that contribute most to graph connectivity and
-        those that might be isolated or poorly integrated.
+        those that might be isolated or poorly integrated. Connectivity for all
+        processed documents is computed in a single pass over the graph and cached
+        until the next pipeline batch or document deletion.
+
+        Args:
+            offset (int): Number of documents to skip, ordered by connectivity score
+            limit (int): Maximum number of documents to return
 
         Returns:
             List[DocumentConnectivityResponse]: Document connectivity analysis
@@ -358,58 +217,17 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
             HTTPException: If error occurs during connectivity analysis (500)
         """
         try:
-            # Get processed documents
-            processed_docs = await rag.get_docs_by_status("processed")
-
-            document_connectivity = []
-
-            for doc_id, doc_status in processed_docs.items():
-                # Get entities from this document
-                entities_in_doc = []
-                relationships_in_doc = []
-
-                # Query entities by source document
-                entities_data = await rag.entities_vdb.get_by_ids(
-                    list(await rag.entities_vdb.index_done_callback())
-                )
-                relationships_data = await rag.relationships_vdb.get_by_ids(
-                    list(await rag.relationships_vdb.index_done_callback())
-                )
-
-                for entity_id, entity_data in entities_data.items():
-                    if entity_data and entity_data.get("source_id") == doc_id:
-                        entities_in_doc.append(
-                            entity_data.get("entity_name", entity_id)
-                        )
-
-                for rel_id, rel_data in relationships_data.items():
-                    if rel_data and rel_data.get("source_id") == doc_id:
-                        relationships_in_doc.append(rel_data)
-
-                # Calculate connectivity score
-                entity_count = len(entities_in_doc)
-                relationship_count = len(relationships_in_doc)
-                connectivity_score = (
-                    relationship_count * 2
-                ) + entity_count  # Weight relationships higher
-
-                # Get key entities (most mentioned)
-                key_entities = entities_in_doc[:5]  # Top 5 entities
-
-                document_connectivity.append(
-                    DocumentConnectivityResponse(
-                        document_id=doc_id,
-                        entities_mentioned=entity_count,
-                        relationships_formed=relationship_count,
-                        connectivity_score=connectivity_score,
-                        key_entities=key_entities,
-                    )
-                )
-
-            # Sort by connectivity score
-            document_connectivity.sort(key=lambda x: x.connectivity_score, reverse=True)
-
-            return document_connectivity[:20]  # Return top 20 most connected documents
+            document_connectivity = await rag.document_connectivity.get(
+                rag.chunk_entity_relation_graph,
+                rag.doc_graph_index,
+                rag.text_chunks,
+                rag.doc_status,
+            )
+
+            return [
+                DocumentConnectivityResponse(**doc)
+                for doc in document_connectivity[offset : offset + limit]
+            ]
 
         except Exception as e:
             logger.error(f"Error analyzing document connectivity: {str(e)}")
@@ -435,99 +253,14 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
             HTTPException: If error occurs during gap analysis (500)
         """
         try:
-            # Get all entities and relationships
-            entities_data = await rag.entities_vdb.get_by_ids(
-                list(await rag.entities_vdb.index_done_callback())
-            )
-            relationships_data = await rag.relationships_vdb.get_by_ids(
-                list(await rag.relationships_vdb.index_done_callback())
-            )
-
-            # Count connections for each entity
-            entity_connections = defaultdict(int)
-            entity_neighbors = defaultdict(set)
-
-            for rel_data in relationships_data.values():
-                if rel_data:
-                    src_id = rel_data.get("src_id", "")
-                    tgt_id = rel_data.get("tgt_id", "")
-                    if src_id and tgt_id:
-                        entity_connections[src_id] += 1
-                        entity_connections[tgt_id] += 1
-                        entity_neighbors[src_id].add(tgt_id)
-                        entity_neighbors[tgt_id].add(src_id)
-
-            # Identify isolated entities (low connectivity)
-            isolated_entities = []
-            for entity_id, entity_data in entities_data.items():
-                if entity_data:
-                    connections = entity_connections[entity_id]
-                    if connections <= 2:  # Very few connections
-                        isolated_entities.append(
-                            EntityInsight(
-                                name=entity_data.get("entity_name", entity_id),
-                                type=entity_data.get("entity_type", "unknown"),
-                                degree=connections,
-                                description=entity_data.get("description", ""),
-                            )
-                        )
-
-            # Identify potential missing connections
-            # Look for entities that should be connected based on co-occurrence
-            missing_connections = []
-            entity_types = defaultdict(list)
-
-            for entity_id, entity_data in entities_data.items():
-                if entity_data:
-                    entity_type = entity_data.get("entity_type", "unknown")
-                    entity_types[entity_type].append(entity_id)
-
-            # Look for entities of same type that aren't connected
-            for entity_type, entity_list in entity_types.items():
-                if len(entity_list) > 1 and entity_type in [
-                    "person",
-                    "organization",
-                    "location",
-                ]:
-                    for i, entity1 in enumerate(entity_list):
-                        for entity2 in entity_list[i + 1 :]:
-                            if entity2 not in entity_neighbors[entity1]:
-                                name1 = entities_data[entity1].get(
-                                    "entity_name", entity1
-                                )
-                                name2 = entities_data[entity2].get(
-                                    "entity_name", entity2
-                                )
-                                missing_connections.append((name1, name2))
-                                if len(missing_connections) >= 10:  # Limit results
-                                    break
-                        if len(missing_connections) >= 10:
-                            break
-                    if len(missing_connections) >= 10:
-                        break
-
-            # Identify underrepresented topics
-            type_counts = Counter()
-            for entity_data in entities_data.values():
-                if entity_data:
-                    entity_type = entity_data.get("entity_type", "unknown")
-                    type_counts[entity_type] += 1
-
-            # Find types with very few entities
-            total_entities = sum(type_counts.values())
-            underrepresented_topics = []
-            for entity_type, count in type_counts.items():
-                if count / total_entities < 0.05:  # Less than 5% of entities
-                    underrepresented_topics.append(entity_type)
+            gaps = await rag.graph_analytics.get_knowledge_gaps(limit=10)
 
             return KnowledgeGapResponse(
-                isolated_entities=isolated_entities[:10],  # Top 10 isolated
-                missing_connections=missing_connections[
-                    :10
-                ],  # Top 10 potential connections
-                underrepresented_topics=underrepresented_topics[
-                    :5
-                ],  # Top 5 underrepresented
+                isolated_entities=[
+                    EntityInsight(**entity) for entity in gaps["isolated_entities"]
+                ],
+                missing_connections=gaps["missing_connections"],
+                underrepresented_topics=gaps["underrepresented_topics"][:5],
             )
 
         except Exception as e:
@@ -535,4 +268,38 @@ def create_insights_routes(rag: LightRAG, api_key: Optional[str] = None):
             logger.error(traceback.format_exc())
             raise HTTPException(status_code=500, detail=str(e))
 
+    @router.post(
+        "/rebuild",
+        response_model=RebuildAnalyticsResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def rebuild_graph_analytics():
+        """
+        Rebuild the materialized graph analytics from the knowledge graph.
+
+        The analytics behind /graph-stats, /topic-clusters and /knowledge-gaps are
+        maintained incrementally during ingestion and editing. This endpoint forces
+        a full rescan of the graph storage, e.g. after the graph was modified
+        outside of LightRAG or analytics were enabled on an existing workspace.
+
+        Returns:
+            RebuildAnalyticsResponse: Status and resulting entity/relationship counts
+
+        Raises:
+            HTTPException: If error occurs while rebuilding (500)
+        """
+        try:
+            await rag.graph_analytics.rebuild(rag.chunk_entity_relation_graph)
+            summary = await rag.graph_analytics.get_summary(top_k=0)
+            return RebuildAnalyticsResponse(
+                status="success",
+                total_entities=summary["total_entities"],
+                total_relationships=summary["total_relationships"],
+            )
+
+        except Exception as e:
+            logger.error(f"Error rebuilding graph analytics: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
     return router
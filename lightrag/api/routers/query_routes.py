@@ -106,6 +106,11 @@ class QueryRequest(BaseModel):
         description="Guidance lens configuration mirroring connector toggles.",
     )
 
+    include_trace: Optional[bool] = Field(
+        default=None,
+        description="If True, the response includes the duration in seconds of each query stage and the storage round trips of the query.",
+    )
+
     @field_validator("query", mode="after")
     @classmethod
     def query_strip_after(cls, query: str) -> str:
@@ -128,7 +133,9 @@ class QueryRequest(BaseModel):
     def to_query_params(self, is_stream: bool) -> "QueryParam":
         """Converts a QueryRequest instance into a QueryParam instance."""
         # Use Pydantic's `.model_dump(exclude_none=True)` to remove None values automatically
-        request_data = self.model_dump(exclude_none=True, exclude={"query", "lens"})
+        request_data = self.model_dump(
+            exclude_none=True, exclude={"query", "lens", "include_trace"}
+        )
 
         # Ensure `mode` and `stream` are set explicitly
         param = QueryParam(**request_data)
@@ -149,6 +156,10 @@ class QueryResponse(BaseModel):
     sources_used: Optional[List[str]] = Field(
         default=None, description="Enabled source connectors during retrieval"
     )
+    trace: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Duration in seconds of each query stage, and the storage round trips per namespace under storage_round_trips",
+    )
 
 
 DOCUMENT_TYPE_ALIASES: Dict[str, List[str]] = {
@@ -275,6 +286,8 @@ def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
             param.lens_mode = lens_resolution.mode
             param.include_document_types = lens_resolution.document_types
             param.lens_sources = lens_resolution.enabled_sources
+            if request.include_trace:
+                param.trace = {}
             response = await rag.aquery(request.query, param=param)
 
             # If response is a string (e.g. cache hit), return directly
@@ -284,6 +297,7 @@ def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
                     lens_mode=param.lens_mode,
                     document_types=param.include_document_types or None,
                     sources_used=lens_resolution.enabled_sources,
+                    trace=param.trace,
                 )
 
             if isinstance(response, dict):
@@ -293,6 +307,7 @@ def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
                     lens_mode=param.lens_mode,
                     document_types=param.include_document_types or None,
                     sources_used=lens_resolution.enabled_sources,
+                    trace=param.trace,
                 )
             else:
                 return QueryResponse(
@@ -300,6 +315,7 @@ def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
                     lens_mode=param.lens_mode,
                     document_types=param.include_document_types or None,
                     sources_used=lens_resolution.enabled_sources,
+                    trace=param.trace,
                 )
         except Exception as e:
             trace_exception(e)
@@ -28,6 +28,9 @@ from lightrag.kg.shared_storage import get_storage_lock
 
 router = APIRouter(tags=["sdr"])
 
+# Storage lock namespace guarding sdr_requests.json
+SDR_REQUESTS_NS = "sdr_requests"
+
 
 class SDRLink(BaseModel):
     name: str = Field(description="Display name for the link")
@@ -127,7 +130,7 @@ def create_sdr_routes(api_key: Optional[str] = None) -> APIRouter:
             lastUpdate=_now_iso(),
         )
 
-        async with get_storage_lock():
+        async with get_storage_lock(SDR_REQUESTS_NS):
             db = _load_db()
             db[key] = record.model_dump()
             _save_db(db)
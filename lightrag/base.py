@@ -4,15 +4,16 @@ from abc import ABC, abstractmethod
 from enum import Enum
 import os
 from dotenv import load_dotenv
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from typing import (
     Any,
+    AsyncIterator,
     Literal,
     TypedDict,
     TypeVar,
     Callable,
 )
-from .utils import EmbeddingFunc
+from .utils import EmbeddingFunc, generate_cache_key
 from .types import KnowledgeGraph
 
 # use the .env that is inside the current folder
@@ -107,6 +108,9 @@ class QueryParam:
     lens_sources: list[str] = field(default_factory=list)
     """Human-friendly list of enabled sources (ifrs, gaap, firm) for downstream telemetry."""
 
+    trace: dict[str, Any] | None = None
+    """Pass a dict to collect the duration in seconds of each stage of a local, global, hybrid or mix query, and the storage round trips per namespace under "storage_round_trips"."""
+
 
 @dataclass
 class StorageNameSpace(ABC):
@@ -160,9 +164,18 @@ class BaseVectorStorage(StorageNameSpace, ABC):
 
     @abstractmethod
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
-        """Query the vector storage and retrieve top_k results."""
+        """Query the vector storage and retrieve top_k results.
+
+        ``document_types`` restricts the search to records of these document types
+        (see ``utils.get_document_types``). The filter is applied while searching,
+        so up to top_k matching records are returned however rare they are.
+        """
 
     @abstractmethod
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
@@ -287,6 +300,39 @@ class BaseKVStorage(StorageNameSpace, ABC):
              False: if the cache drop failed, or the cache mode is not supported
         """
 
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict[str, Any] | None:
+        """Get one cached LLM response, stored under its flat (mode, args_hash) key
+
+        Returns:
+            {id: cache_entry} if found, otherwise None
+        """
+        cache_entry = await self.get_by_id(generate_cache_key(mode, id))
+        return {id: cache_entry} if cache_entry else None
+
+    async def get_cache_by_mode(self, mode: str) -> dict[str, dict[str, Any]]:
+        """Get all cached LLM responses of a mode, keyed by args_hash
+
+        Storages holding the LLM response cache should override this, the
+        default implementation returns nothing.
+        """
+        return {}
+
+    async def evict_cache(self, max_entries: int, ttl: int) -> list[str]:
+        """Evict LLM cache entries beyond the size cap or older than the TTL
+
+        Called after every cache write, so implementations must be cheap when
+        nothing needs to be evicted.
+
+        Args:
+            max_entries: Maximum number of entries to keep, least recently used
+                entries are evicted first (0 = unlimited)
+            ttl: Seconds after which an entry expires (0 = never)
+
+        Returns:
+            Cache keys of the evicted entries
+        """
+        return []
+
 
 @dataclass
 class BaseGraphStorage(StorageNameSpace, ABC):
@@ -481,6 +527,32 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Insert or update multiple nodes as a batch
+
+        Default implementation upserts nodes one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            nodes: Mapping of node ID to its node properties
+        """
+        for node_id, node_data in nodes.items():
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """Insert or update multiple edges as a batch
+
+        Default implementation upserts edges one by one.
+        Override this method for better performance in storage backends
+        that support batch operations. Both nodes of every edge must exist.
+
+        Args:
+            edges: Mapping of (source, target) tuples to their edge properties
+        """
+        for (src_id, tgt_id), edge_data in edges.items():
+            await self.upsert_edge(src_id, tgt_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
@@ -528,6 +600,55 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             A list of all node labels in the graph, sorted alphabetically
         """
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Iterate over all nodes of the graph, one page at a time
+
+        Default implementation pages through get_all_labels with
+        get_nodes_batch. Override this method to page natively.
+
+        Args:
+            batch_size: Maximum number of nodes per page
+
+        Yields:
+            Lists of (node_id, node properties) tuples
+        """
+        labels = await self.get_all_labels()
+        for start in range(0, len(labels), batch_size):
+            page = labels[start : start + batch_size]
+            nodes = await self.get_nodes_batch(page)
+            yield [(node_id, nodes[node_id]) for node_id in page if node_id in nodes]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Iterate over all edges of the graph, one page at a time
+
+        Every edge is yielded once. Default implementation reads the edges of
+        a page of nodes with get_nodes_edges_batch and keeps each edge at its
+        smaller endpoint. Override this method to page natively.
+
+        Args:
+            batch_size: Maximum number of nodes whose edges make up a page
+
+        Yields:
+            Lists of (source_id, target_id, edge properties) tuples
+        """
+        labels = await self.get_all_labels()
+        for start in range(0, len(labels), batch_size):
+            page = labels[start : start + batch_size]
+            nodes_edges = await self.get_nodes_edges_batch(page)
+            pairs = {}
+            for node_id, edges in nodes_edges.items():
+                for src_id, tgt_id in edges:
+                    if node_id == min(src_id, tgt_id):
+                        pairs[(src_id, tgt_id)] = {"src": src_id, "tgt": tgt_id}
+            if not pairs:
+                continue
+            edges = await self.get_edges_batch(list(pairs.values()))
+            yield [(src_id, tgt_id, data) for (src_id, tgt_id), data in edges.items()]
+
     @abstractmethod
     async def get_knowledge_graph(
         self, node_label: str, max_depth: int = 3, max_nodes: int = 1000
@@ -555,12 +676,20 @@ class DocStatus(str, Enum):
     FAILED = "failed"
 
 
+DocSortField = Literal["created_at", "updated_at", "id", "file_path"]
+
+
+def doc_sort_key(doc_id: str, record: dict[str, Any], sort_field: DocSortField) -> str:
+    """Sort key of a document status record, missing values sort first"""
+    if sort_field == "id":
+        return doc_id
+    return str(record.get(sort_field) or "")
+
+
 @dataclass
 class DocProcessingStatus:
     """Document processing status data structure"""
 
-    content: str
-    """Original content of the document"""
     content_summary: str
     """First 100 chars of document content, used for preview"""
     content_length: int
@@ -579,6 +708,8 @@ class DocProcessingStatus:
     """Error message if failed"""
     metadata: dict[str, Any] = field(default_factory=dict)
     """Additional metadata"""
+    content: str | None = None
+    """Deprecated: the document body is stored in full_docs, status storages leave it unset"""
 
 
 @dataclass
@@ -595,6 +726,41 @@ class DocStatusStorage(BaseKVStorage, ABC):
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: DocSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Get one page of documents, sorted
+
+        Default implementation loads the documents of every requested status
+        and sorts them. Override this method to sort and page in the backend.
+
+        Args:
+            status_filter: Only list documents with this status, None for all
+            page: Page number, starting at 1
+            page_size: Number of documents per page
+            sort_field: Field to sort by
+            sort_direction: "asc" or "desc"
+
+        Returns:
+            The (doc_id, status) pairs of the page and the total number of
+            documents matching the filter
+        """
+        statuses = [status_filter] if status_filter else list(DocStatus)
+        docs: list[tuple[str, DocProcessingStatus]] = []
+        for status in statuses:
+            docs.extend((await self.get_docs_by_status(status)).items())
+        docs.sort(
+            key=lambda item: doc_sort_key(item[0], asdict(item[1]), sort_field),
+            reverse=sort_direction == "desc",
+        )
+        start = (page - 1) * page_size
+        return docs[start : start + page_size], len(docs)
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Drop cache is not supported for Doc Status storage"""
         return False
@@ -12,6 +12,13 @@ DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE = 6
 DEFAULT_WOKERS = 2
 DEFAULT_TIMEOUT = 150
 
+# Minimum number of seconds between two LLM cache eviction sweeps of a storage
+LLM_CACHE_EVICTION_INTERVAL = 60
+
+# Seconds an LLM cache entry's access_time may lag behind its last hit, bounds
+# how often hits are written back to storages that persist them
+LLM_CACHE_ACCESS_TIME_RESOLUTION = 60
+
 # Logging configuration defaults
 DEFAULT_LOG_MAX_BYTES = 10485760  # Default 10MB
 DEFAULT_LOG_BACKUP_COUNT = 5  # Default 5 backups
@@ -0,0 +1,799 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, final
+
+from .base import (
+    BaseGraphStorage,
+    BaseKVStorage,
+    DocStatus,
+    DocStatusStorage,
+    StorageNameSpace,
+)
+from .prompt import GRAPH_FIELD_SEP
+from .utils import logger
+from .kg.json_wal import JsonWriteAheadLog
+from .kg.shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+    try_initialize_namespace,
+)
+
+# Maximum number of characters of an entity description kept for keyword extraction
+DESCRIPTION_SNIPPET_SIZE = 512
+
+# Number of strongest relationships tracked by the weight heap
+STRONGEST_EDGES_CAPACITY = 100
+
+
+def _edge_key(src: str, tgt: str) -> tuple[str, str]:
+    return (src, tgt) if src <= tgt else (tgt, src)
+
+
+# Ids of the persisted node and edge records
+def _node_record_id(name: str) -> str:
+    return f"n:{name}"
+
+
+def _edge_record_id(key: tuple[str, str]) -> str:
+    return f"e:{json.dumps(key, ensure_ascii=False)}"
+
+
+@final
+@dataclass
+class GraphAnalyticsStore(StorageNameSpace):
+    """Materialized analytics over the knowledge graph.
+
+    Keeps per-entity degree, entity type counts, connected-component membership
+    and top-k structures up to date as entities and relations are merged or
+    deleted, so that insight queries are answered in O(result size) instead of
+    rescanning the whole graph.
+
+    Only the raw nodes and edges are persisted, as one record each in a
+    snapshot (``<namespace>.json``) plus write-ahead log segments, so a flush
+    appends just the records changed since the previous one. Every derived
+    index is rebuilt in memory when the records are loaded, and the analytics
+    are rebuilt from the graph when there are no records yet.
+    """
+
+    graph: BaseGraphStorage = field(default=None)
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        self._file_name = os.path.join(working_dir, f"{self.namespace}.json")
+        self._wal = JsonWriteAheadLog(self.namespace, self._file_name)
+        self._storage_lock = None
+        self.storage_updated = None
+        # Entities and relations changed since the last flush
+        self._changed_nodes: set[str] = set()
+        self._changed_edges: set[tuple[str, str]] = set()
+        self._reset()
+
+    @property
+    def _dirty(self) -> bool:
+        return bool(self._changed_nodes or self._changed_edges)
+
+    def _reset(self) -> None:
+        # entity name -> {"type", "description", "has_source"}
+        self._nodes: dict[str, dict[str, Any]] = {}
+        # entity name -> neighbour names
+        self._adjacency: dict[str, set[str]] = {}
+        # sorted (src, tgt) -> {"weight", "description"}
+        self._edges: dict[tuple[str, str], dict[str, Any]] = {}
+        # entity type -> entity names
+        self._type_members: dict[str, set[str]] = {}
+        # degree -> entity names
+        self._degree_buckets: dict[int, set[str]] = {}
+        # union-find over entities, only valid while not _components_dirty
+        self._parent: dict[str, str] = {}
+        self._component_members: dict[str, set[str]] = {}
+        # component size -> component roots
+        self._component_size_buckets: dict[int, set[str]] = {}
+        self._components_dirty = False
+        # min-heap of (weight, src, tgt) holding the strongest relationships,
+        # one entry per edge; when not full it holds every edge
+        self._strongest_edges: list[tuple[float, str, str]] = []
+        self._strongest_keys: set[tuple[str, str]] = set()
+        self._strongest_dirty = False
+
+    async def initialize(self):
+        """Load the persisted analytics and build the in-memory indexes
+
+        Without persisted analytics, e.g. for a graph built before they
+        existed, they are rebuilt from a non-empty graph storage.
+        """
+        self.storage_updated = await get_update_flag(self.namespace)
+        self._storage_lock = get_storage_lock(self.namespace)
+        await self._wal.initialize()
+        need_init = await try_initialize_namespace(self.namespace)
+        async with self._storage_lock:
+            missing = self._wal.is_empty()
+            if need_init:
+                if self._load(await self._wal.load()):
+                    # Rewritten as records with the next flush
+                    self._changed_nodes = set(self._nodes)
+                    self._changed_edges = set(self._edges)
+                    await self._wal.record_delete(["nodes", "edges"])
+            else:
+                self._load(self._wal.replay()[0])
+        if self._dirty:
+            await self.index_done_callback()
+        if missing and need_init and self.graph is not None:
+            if await self.graph.get_all_labels():
+                await self.rebuild(self.graph)
+
+    def _load(self, records: dict[str, Any]) -> bool:
+        """Build the indexes from persisted records, returns whether they were
+        in the format used before the write-ahead log"""
+        self._reset()
+        # Snapshots written before the write-ahead log held nodes and edges whole
+        legacy_nodes = records.pop("nodes", None)
+        legacy_edges = records.pop("edges", None)
+        if legacy_nodes is not None or legacy_edges is not None:
+            for name, node in (legacy_nodes or {}).items():
+                records[_node_record_id(name)] = node
+            for src, tgt, weight, description in legacy_edges or []:
+                records[_edge_record_id(_edge_key(src, tgt))] = {
+                    "weight": weight,
+                    "description": description,
+                }
+        for record_id, record in records.items():
+            if record_id.startswith("n:"):
+                name = record_id[2:]
+                self._put_node(name, record.get("type"), record.get("description", ""))
+                self._nodes[name]["has_source"] = record.get("has_source", False)
+        for record_id, record in records.items():
+            if record_id.startswith("e:"):
+                src, tgt = json.loads(record_id[2:])
+                self._put_edge(src, tgt, record["weight"], record["description"])
+        self._changed_nodes = set()
+        self._changed_edges = set()
+        logger.info(
+            f"Process {os.getpid()} graph analytics {self.namespace} loaded with {len(self._nodes)} entities, {len(self._edges)} relations"
+        )
+        return legacy_nodes is not None or legacy_edges is not None
+
+    async def _check_reload(self) -> None:
+        """Reload analytics written by another process (call with lock held)"""
+        if self.storage_updated.value:
+            logger.info(
+                f"Process {os.getpid()} reloading graph analytics {self.namespace} due to update by another process"
+            )
+            self._load(self._wal.replay()[0])
+            self.storage_updated.value = False
+
+    # ------------------------------------------------------------------
+    # Internal index maintenance
+    # ------------------------------------------------------------------
+
+    def _set_degree(self, name: str, old: int | None, new: int | None) -> None:
+        if old is not None:
+            bucket = self._degree_buckets.get(old)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del self._degree_buckets[old]
+        if new is not None:
+            self._degree_buckets.setdefault(new, set()).add(name)
+
+    def _find(self, name: str) -> str:
+        root = name
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # path compression
+        while self._parent[name] != root:
+            self._parent[name], name = root, self._parent[name]
+        return root
+
+    def _set_component_size(self, root: str, old: int | None, new: int | None):
+        if old is not None:
+            bucket = self._component_size_buckets.get(old)
+            if bucket is not None:
+                bucket.discard(root)
+                if not bucket:
+                    del self._component_size_buckets[old]
+        if new is not None:
+            self._component_size_buckets.setdefault(new, set()).add(root)
+
+    def _union(self, a: str, b: str) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        members_a = self._component_members[root_a]
+        members_b = self._component_members[root_b]
+        # union by size, merging the smaller member set into the larger one
+        if len(members_a) < len(members_b):
+            root_a, root_b = root_b, root_a
+            members_a, members_b = members_b, members_a
+        self._set_component_size(root_a, len(members_a), None)
+        self._set_component_size(root_b, len(members_b), None)
+        self._parent[root_b] = root_a
+        members_a |= members_b
+        del self._component_members[root_b]
+        self._set_component_size(root_a, None, len(members_a))
+
+    def _rebuild_components(self) -> None:
+        self._parent = {}
+        self._component_members = {}
+        self._component_size_buckets = {}
+        for name in self._nodes:
+            if name in self._parent:
+                continue
+            members = {name}
+            stack = [name]
+            while stack:
+                current = stack.pop()
+                for neighbour in self._adjacency.get(current, ()):
+                    if neighbour not in members:
+                        members.add(neighbour)
+                        stack.append(neighbour)
+            for member in members:
+                self._parent[member] = name
+            self._component_members[name] = members
+            self._set_component_size(name, None, len(members))
+        self._components_dirty = False
+
+    def _push_strongest(self, weight: float, src: str, tgt: str) -> None:
+        item = (weight, src, tgt)
+        if len(self._strongest_edges) < STRONGEST_EDGES_CAPACITY:
+            heapq.heappush(self._strongest_edges, item)
+        elif item > self._strongest_edges[0]:
+            _, evicted_src, evicted_tgt = heapq.heapreplace(self._strongest_edges, item)
+            self._strongest_keys.discard((evicted_src, evicted_tgt))
+        else:
+            return
+        self._strongest_keys.add((src, tgt))
+
+    def _rebuild_strongest(self) -> None:
+        self._strongest_edges = heapq.nlargest(
+            STRONGEST_EDGES_CAPACITY,
+            ((edge["weight"], key[0], key[1]) for key, edge in self._edges.items()),
+        )
+        heapq.heapify(self._strongest_edges)
+        self._strongest_keys = {(src, tgt) for _, src, tgt in self._strongest_edges}
+        self._strongest_dirty = False
+
+    def _put_node(
+        self, name: str, entity_type: str | None, description: str = ""
+    ) -> None:
+        entity_type = entity_type or "UNKNOWN"
+        node = self._nodes.get(name)
+        if node is None:
+            node = {"type": entity_type, "description": "", "has_source": False}
+            self._nodes[name] = node
+            self._adjacency[name] = set()
+            self._set_degree(name, None, 0)
+            if not self._components_dirty:
+                self._parent[name] = name
+                self._component_members[name] = {name}
+                self._set_component_size(name, None, 1)
+        elif node["type"] != entity_type:
+            members = self._type_members.get(node["type"])
+            if members is not None:
+                members.discard(name)
+                if not members:
+                    del self._type_members[node["type"]]
+            node["type"] = entity_type
+        self._type_members.setdefault(entity_type, set()).add(name)
+        if description:
+            node["description"] = description[:DESCRIPTION_SNIPPET_SIZE]
+        self._changed_nodes.add(name)
+
+    def _put_edge(
+        self, src: str, tgt: str, weight: float, description: str = ""
+    ) -> None:
+        if src == tgt:
+            return
+        for name in (src, tgt):
+            if name not in self._nodes:
+                self._put_node(name, "UNKNOWN")
+        key = _edge_key(src, tgt)
+        previous = self._edges.get(key)
+        if not description and previous is not None:
+            description = previous["description"]
+        self._edges[key] = {
+            "weight": float(weight),
+            "description": (description or "")[:DESCRIPTION_SNIPPET_SIZE],
+        }
+        self._changed_edges.add(key)
+        if previous is None:
+            for name, other in ((src, tgt), (tgt, src)):
+                degree = len(self._adjacency[name])
+                self._adjacency[name].add(other)
+                self._set_degree(name, degree, degree + 1)
+            if not self._components_dirty:
+                self._union(src, tgt)
+        elif float(weight) == previous["weight"]:
+            return
+        elif key in self._strongest_keys:
+            # the heap entry holds the old weight, rebuild on next read
+            self._strongest_dirty = True
+        if not self._strongest_dirty:
+            self._push_strongest(float(weight), key[0], key[1])
+
+    def _drop_edge(self, src: str, tgt: str) -> bool:
+        key = _edge_key(src, tgt)
+        if self._edges.pop(key, None) is None:
+            return False
+        self._changed_edges.add(key)
+        for name, other in ((src, tgt), (tgt, src)):
+            degree = len(self._adjacency[name])
+            self._adjacency[name].discard(other)
+            self._set_degree(name, degree, degree - 1)
+        # union-find cannot split components, recompute lazily on next read
+        self._components_dirty = True
+        self._strongest_dirty = True
+        return True
+
+    def _drop_node(self, name: str) -> bool:
+        node = self._nodes.get(name)
+        if node is None:
+            return False
+        for neighbour in list(self._adjacency.get(name, ())):
+            self._drop_edge(name, neighbour)
+        self._set_degree(name, 0, None)
+        members = self._type_members.get(node["type"])
+        if members is not None:
+            members.discard(name)
+            if not members:
+                del self._type_members[node["type"]]
+        del self._nodes[name]
+        del self._adjacency[name]
+        self._changed_nodes.add(name)
+        self._components_dirty = True
+        return True
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    async def record_entities(self, entities: list[dict[str, Any]]) -> None:
+        """Record merged entities: node properties plus ``entity_name``"""
+        if not entities:
+            return
+        async with self._storage_lock:
+            await self._check_reload()
+            for entity in entities:
+                name = entity.get("entity_name") or entity.get("entity_id")
+                if not name:
+                    continue
+                self._put_node(
+                    name, entity.get("entity_type"), entity.get("description", "")
+                )
+                if entity.get("source_id"):
+                    self._nodes[name]["has_source"] = True
+
+    async def record_relations(self, relations: list[dict[str, Any]]) -> None:
+        """Record merged relations: edge properties plus ``src_id`` and ``tgt_id``"""
+        if not relations:
+            return
+        async with self._storage_lock:
+            await self._check_reload()
+            for relation in relations:
+                src, tgt = relation.get("src_id"), relation.get("tgt_id")
+                if not src or not tgt:
+                    continue
+                self._put_edge(
+                    src,
+                    tgt,
+                    float(relation.get("weight") or 1.0),
+                    relation.get("description", ""),
+                )
+
+    async def remove_entities(self, entity_names: list[str]) -> None:
+        """Remove entities together with all of their relations"""
+        async with self._storage_lock:
+            await self._check_reload()
+            for name in entity_names:
+                self._drop_node(name)
+
+    async def remove_relations(self, edges: list[tuple[str, str]]) -> None:
+        """Remove relations given as (source, target) pairs"""
+        async with self._storage_lock:
+            await self._check_reload()
+            for src, tgt in edges:
+                self._drop_edge(src, tgt)
+
+    async def rebuild(self, graph: BaseGraphStorage, batch_size: int = 1000) -> None:
+        """Rebuild all analytics from the graph storage (full scan)"""
+        labels = await graph.get_all_labels()
+        nodes: dict[str, dict] = {}
+        edge_keys: set[tuple[str, str]] = set()
+        for start in range(0, len(labels), batch_size):
+            batch = labels[start : start + batch_size]
+            nodes.update(await graph.get_nodes_batch(batch))
+            nodes_edges = await graph.get_nodes_edges_batch(batch)
+            for node_edges in nodes_edges.values():
+                for src, tgt in node_edges or []:
+                    edge_keys.add(_edge_key(src, tgt))
+
+        edge_keys_list = list(edge_keys)
+        edges: dict[tuple[str, str], dict] = {}
+        for start in range(0, len(edge_keys_list), batch_size):
+            batch = edge_keys_list[start : start + batch_size]
+            edges.update(
+                await graph.get_edges_batch([{"src": s, "tgt": t} for s, t in batch])
+            )
+
+        await self._wal.wait_for_compaction()
+        async with self._storage_lock:
+            # Start over from an empty snapshot, every record is appended again
+            await self._wal.reset()
+            self._reset()
+            for name, node in nodes.items():
+                self._put_node(
+                    name, node.get("entity_type"), node.get("description", "")
+                )
+                self._nodes[name]["has_source"] = bool(node.get("source_id"))
+            for (src, tgt), edge in edges.items():
+                self._put_edge(
+                    src,
+                    tgt,
+                    float(edge.get("weight", 1.0) or 1.0),
+                    edge.get("description", ""),
+                )
+
+        logger.info(
+            f"Graph analytics {self.namespace} rebuilt with {len(nodes)} entities, {len(edges)} relations"
+        )
+        await self.index_done_callback()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _entity_insight(self, name: str) -> dict[str, Any]:
+        node = self._nodes[name]
+        return {
+            "name": name,
+            "type": node["type"],
+            "degree": len(self._adjacency[name]),
+            "description": node["description"],
+        }
+
+    async def get_summary(self, top_k: int = 10) -> dict[str, Any]:
+        """Totals, type histogram, most connected entities and strongest relations"""
+        async with self._storage_lock:
+            await self._check_reload()
+            if self._strongest_dirty:
+                self._rebuild_strongest()
+
+            most_connected = []
+            for degree in sorted(self._degree_buckets, reverse=True):
+                if len(most_connected) >= top_k:
+                    break
+                for name in self._degree_buckets[degree]:
+                    if len(most_connected) >= top_k:
+                        break
+                    most_connected.append(self._entity_insight(name))
+
+            strongest = []
+            for weight, src, tgt in sorted(self._strongest_edges, reverse=True)[:top_k]:
+                edge = self._edges[(src, tgt)]
+                strongest.append(
+                    {
+                        "source": src,
+                        "target": tgt,
+                        "relationship": edge["description"],
+                        "weight": weight,
+                    }
+                )
+
+            total_entities = len(self._nodes)
+            return {
+                "total_entities": total_entities,
+                "total_relationships": len(self._edges),
+                "entity_types": {t: len(m) for t, m in self._type_members.items()},
+                "avg_connections_per_entity": (
+                    2 * len(self._edges) / total_entities if total_entities else 0
+                ),
+                "most_connected_entities": most_connected,
+                "strongest_relationships": strongest,
+            }
+
+    async def get_clusters(
+        self, limit: int = 10, keyword_count: int = 5
+    ) -> dict[str, Any]:
+        """Largest connected components with their central entity and keywords"""
+        async with self._storage_lock:
+            await self._check_reload()
+            if self._components_dirty:
+                self._rebuild_components()
+
+            clusters = []
+            total_clusters = 0
+            clustered_entities = 0
+            for size in sorted(self._component_size_buckets, reverse=True):
+                if size < 2:
+                    break
+                roots = self._component_size_buckets[size]
+                total_clusters += len(roots)
+                clustered_entities += size * len(roots)
+                for root in roots:
+                    if len(clusters) >= limit:
+                        break
+                    members = self._component_members[root]
+                    central = max(members, key=lambda n: len(self._adjacency[n]))
+                    keywords = Counter()
+                    for name in members:
+                        description = self._nodes[name]["description"]
+                        keywords.update(
+                            word
+                            for word in description.replace(GRAPH_FIELD_SEP, " ")
+                            .lower()
+                            .split()
+                            if len(word) > 3
+                        )
+                    clusters.append(
+                        {
+                            "entities": list(members),
+                            "central_entity": central,
+                            "topic_keywords": [
+                                word for word, _ in keywords.most_common(keyword_count)
+                            ],
+                            "document_count": sum(
+                                1 for name in members if self._nodes[name]["has_source"]
+                            ),
+                        }
+                    )
+
+            total_entities = len(self._nodes)
+            return {
+                "clusters": clusters,
+                "total_clusters": total_clusters,
+                "coverage_percentage": (
+                    clustered_entities / total_entities * 100 if total_entities else 0
+                ),
+            }
+
+    async def get_knowledge_gaps(
+        self,
+        limit: int = 10,
+        max_degree: int = 2,
+        gap_entity_types: tuple[str, ...] = ("person", "organization", "location"),
+        underrepresented_ratio: float = 0.05,
+    ) -> dict[str, Any]:
+        """Poorly connected entities, unlinked same-type pairs and rare entity types"""
+        async with self._storage_lock:
+            await self._check_reload()
+
+            isolated = []
+            for degree in range(max_degree + 1):
+                for name in self._degree_buckets.get(degree, ()):
+                    isolated.append(self._entity_insight(name))
+                    if len(isolated) >= limit:
+                        break
+                if len(isolated) >= limit:
+                    break
+
+            missing: list[tuple[str, str]] = []
+            for entity_type, members in self._type_members.items():
+                if len(missing) >= limit:
+                    break
+                if entity_type.lower() not in gap_entity_types or len(members) < 2:
+                    continue
+                ordered = list(members)
+                for i, first in enumerate(ordered):
+                    neighbours = self._adjacency[first]
+                    for second in ordered[i + 1 :]:
+                        if second not in neighbours:
+                            missing.append((first, second))
+                            if len(missing) >= limit:
+                                break
+                    if len(missing) >= limit:
+                        break
+
+            total_entities = len(self._nodes)
+            underrepresented = [
+                entity_type
+                for entity_type, members in self._type_members.items()
+                if total_entities
+                and len(members) / total_entities < underrepresented_ratio
+            ]
+
+            return {
+                "isolated_entities": isolated,
+                "missing_connections": missing,
+                "underrepresented_topics": underrepresented,
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _records(self) -> dict[str, dict[str, Any]]:
+        """Every node and edge as a persisted record"""
+        records = {
+            _node_record_id(name): dict(node) for name, node in self._nodes.items()
+        }
+        for key, edge in self._edges.items():
+            records[_edge_record_id(key)] = dict(edge)
+        return records
+
+    async def index_done_callback(self) -> None:
+        async with self._storage_lock:
+            if self._dirty:
+                upserts, deletes = {}, []
+                for name in self._changed_nodes:
+                    node = self._nodes.get(name)
+                    if node is None:
+                        deletes.append(_node_record_id(name))
+                    else:
+                        upserts[_node_record_id(name)] = node
+                for key in self._changed_edges:
+                    edge = self._edges.get(key)
+                    if edge is None:
+                        deletes.append(_edge_record_id(key))
+                    else:
+                        upserts[_edge_record_id(key)] = edge
+                await self._wal.record_delete(deletes)
+                await self._wal.record_upsert(upserts)
+                self._changed_nodes = set()
+                self._changed_edges = set()
+                record_count = await self._wal.flush()
+                logger.debug(
+                    f"Process {os.getpid()} graph analytics appended {record_count} records to {self.namespace} WAL"
+                )
+                # Notify other processes that the analytics have changed
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+            if await self._wal.needs_compaction():
+                await self._wal.schedule_compaction(self._records(), self._storage_lock)
+
+    async def finalize(self):
+        await self._wal.wait_for_compaction()
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            await self._wal.wait_for_compaction()
+            async with self._storage_lock:
+                await self._wal.reset()
+                self._reset()
+                self._changed_nodes = set()
+                self._changed_edges = set()
+                await set_all_update_flags(self.namespace)
+                self.storage_updated.value = False
+            logger.info(
+                f"Process {os.getpid()} drop graph analytics {self.namespace} (file:{self._file_name})"
+            )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping graph analytics {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+
+async def compute_document_connectivity(
+    graph: BaseGraphStorage,
+    doc_graph_index: BaseKVStorage,
+    text_chunks: BaseKVStorage,
+    doc_ids: list[str],
+    key_entity_count: int = 5,
+    batch_size: int = 1000,
+) -> list[dict[str, Any]]:
+    """Compute connectivity for all documents in a single pass over the graph
+
+    Chunks are mapped to their full_doc_id through the doc→chunks index (with a
+    single text_chunks scan for documents ingested before the index existed).
+    Every entity and relation is then visited once and attributed to the
+    documents owning the chunks listed in its ``source_id``.
+
+    Returns:
+        One record per document, sorted by descending connectivity score
+    """
+    chunk_to_docs: dict[str, set[str]] = {}
+    unindexed_doc_ids = set()
+    for doc_id, entry in zip(doc_ids, await doc_graph_index.get_by_ids(doc_ids)):
+        if entry and entry.get("chunk_ids"):
+            for chunk_id in entry["chunk_ids"]:
+                chunk_to_docs.setdefault(chunk_id, set()).add(doc_id)
+        else:
+            unindexed_doc_ids.add(doc_id)
+    if unindexed_doc_ids:
+        for chunk_id, chunk_data in (await text_chunks.get_all()).items():
+            if (
+                isinstance(chunk_data, dict)
+                and chunk_data.get("full_doc_id") in unindexed_doc_ids
+            ):
+                chunk_to_docs.setdefault(chunk_id, set()).add(chunk_data["full_doc_id"])
+
+    def docs_of(source_id: str | None) -> set[str]:
+        docs = set()
+        for chunk_id in (source_id or "").split(GRAPH_FIELD_SEP):
+            docs.update(chunk_to_docs.get(chunk_id, ()))
+        return docs
+
+    doc_entities: dict[str, set[str]] = {doc_id: set() for doc_id in doc_ids}
+    doc_relations: dict[str, int] = {doc_id: 0 for doc_id in doc_ids}
+    degrees: Counter = Counter()
+    edge_keys: set[tuple[str, str]] = set()
+
+    labels = await graph.get_all_labels()
+    for start in range(0, len(labels), batch_size):
+        batch = labels[start : start + batch_size]
+        nodes = await graph.get_nodes_batch(batch)
+        for name, node in nodes.items():
+            for doc_id in docs_of(node.get("source_id")):
+                doc_entities[doc_id].add(name)
+        nodes_edges = await graph.get_nodes_edges_batch(batch)
+        for node_edges in nodes_edges.values():
+            for src, tgt in node_edges or []:
+                edge_keys.add(_edge_key(src, tgt))
+
+    edge_keys_list = list(edge_keys)
+    for start in range(0, len(edge_keys_list), batch_size):
+        batch = edge_keys_list[start : start + batch_size]
+        edges = await graph.get_edges_batch([{"src": s, "tgt": t} for s, t in batch])
+        for (src, tgt), edge in edges.items():
+            degrees[src] += 1
+            degrees[tgt] += 1
+            for doc_id in docs_of(edge.get("source_id")):
+                doc_relations[doc_id] += 1
+
+    results = []
+    for doc_id in doc_ids:
+        entities = doc_entities[doc_id]
+        relationship_count = doc_relations[doc_id]
+        results.append(
+            {
+                "document_id": doc_id,
+                "entities_mentioned": len(entities),
+                "relationships_formed": relationship_count,
+                # Weight relationships higher than entities
+                "connectivity_score": relationship_count * 2 + len(entities),
+                "key_entities": heapq.nlargest(
+                    key_entity_count, entities, key=lambda n: (degrees[n], n)
+                ),
+            }
+        )
+    results.sort(key=lambda r: r["connectivity_score"], reverse=True)
+    return results
+
+
+class DocumentConnectivityCache:
+    """Per-process cache of the document connectivity aggregation
+
+    The cached result is dropped when ``invalidate`` is called in any process
+    (via the shared update flags), e.g. when the pipeline finishes a batch or
+    documents are deleted.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._result: list[dict[str, Any]] | None = None
+        self._lock = asyncio.Lock()
+        self.storage_updated = None
+
+    async def initialize(self):
+        self.storage_updated = await get_update_flag(self.namespace)
+
+    async def invalidate(self) -> None:
+        self._result = None
+        await set_all_update_flags(self.namespace)
+
+    async def get(
+        self,
+        graph: BaseGraphStorage,
+        doc_graph_index: BaseKVStorage,
+        text_chunks: BaseKVStorage,
+        doc_status: DocStatusStorage,
+    ) -> list[dict[str, Any]]:
+        """Return the cached aggregation, recomputing it when stale"""
+        async with self._lock:
+            if self.storage_updated is not None and self.storage_updated.value:
+                self._result = None
+                self.storage_updated.value = False
+            if self._result is None:
+                processed_docs = await doc_status.get_docs_by_status(
+                    DocStatus.PROCESSED
+                )
+                self._result = await compute_document_connectivity(
+                    graph, doc_graph_index, text_chunks, list(processed_docs.keys())
+                )
+            return self._result
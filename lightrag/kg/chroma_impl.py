@@ -14,6 +14,16 @@ if not pm.is_installed("chromadb"):
 from chromadb import HttpClient, PersistentClient  # type: ignore
 from chromadb.config import Settings  # type: ignore
 
+# Chroma metadata holds scalars only: a record's list of document types is
+# stored as one boolean flag per type
+DOCUMENT_TYPE_FLAG_PREFIX = "document_type:"
+
+
+def _document_type_flags(metadata: dict[str, Any]) -> dict[str, Any]:
+    document_types = metadata.pop("document_types", None) or []
+    metadata.update({f"{DOCUMENT_TYPE_FLAG_PREFIX}{t}": True for t in document_types})
+    return metadata
+
 
 @final
 @dataclass
@@ -121,11 +131,12 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             ids = list(data.keys())
             documents = [v["content"] for v in data.values()]
             metadatas = [
-                {
-                    **{k: v for k, v in item.items() if k in self.meta_fields},
-                    "created_at": current_time,
-                }
-                or {"_default": "true", "created_at": current_time}
+                _document_type_flags(
+                    {
+                        **{k: v for k, v in item.items() if k in self.meta_fields},
+                        "created_at": current_time,
+                    }
+                )
                 for item in data.values()
             ]
 
@@ -164,10 +175,33 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             logger.error(f"Error during ChromaDB upsert: {str(e)}")
             raise
 
+    def _document_type_where(self, document_types: list[str]) -> dict[str, Any]:
+        """Metadata filter matching records of any of the document types"""
+        clauses = []
+        if "document_type" in self.meta_fields:
+            clauses.append({"document_type": {"$in": list(document_types)}})
+        if "document_types" in self.meta_fields:
+            clauses.extend(
+                {f"{DOCUMENT_TYPE_FLAG_PREFIX}{t}": True} for t in document_types
+            )
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$or": clauses}
+
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         try:
+            where = None
+            if document_types:
+                if not {"document_type", "document_types"} & self.meta_fields:
+                    return []
+                where = self._document_type_where(document_types)
+
             embedding = await self.embedding_func(
                 [query], _priority=5
             )  # higher priority for query
@@ -177,6 +211,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
                 if not isinstance(embedding, list)
                 else embedding,
                 n_results=top_k * 2,  # Request more results to allow for filtering
+                where=where,
                 include=["metadatas", "distances", "documents"],
             )
 
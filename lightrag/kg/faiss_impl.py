@@ -8,11 +8,12 @@ import numpy as np
 from dataclasses import dataclass
 import pipmaster as pm
 
-from lightrag.utils import logger, compute_mdhash_id
+from lightrag.utils import logger, compute_mdhash_id, get_document_types
 from lightrag.base import BaseVectorStorage
 
 from .shared_storage import (
     get_storage_lock,
+    get_storage_read_lock,
     get_update_flag,
     set_all_update_flags,
 )
@@ -25,6 +26,17 @@ FAISS_PACKAGE = "faiss-gpu" if USE_GPU else "faiss-cpu"
 if not pm.is_installed(FAISS_PACKAGE):
     pm.install(FAISS_PACKAGE)
 
+# Supported values of the "index_type" vector_db_storage_cls_kwargs entry
+FAISS_INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+# HNSW graphs cannot remove vectors: removed ids are skipped at query time and
+# the graph is rebuilt once they exceed this share of the index
+HNSW_REBUILD_RATIO = 0.25
+
+# Queries restricted to document types score partitions up to this many vectors
+# exactly, larger ones are searched in the index with an id selector
+PARTITION_EXACT_SEARCH_MAX = 10000
+
 
 @final
 @dataclass
@@ -32,6 +44,16 @@ class FaissVectorDBStorage(BaseVectorStorage):
     """
     A Faiss-based Vector DB Storage for LightRAG.
     Uses cosine similarity by storing normalized vectors in a Faiss index with inner product search.
+
+    Vectors are stored under stable int64 faiss ids, and a custom id -> faiss id map
+    keeps lookups, upserts and deletes proportional to the batch size. The index type
+    is chosen with ``vector_db_storage_cls_kwargs``:
+
+    - ``index_type``: ``"flat"`` (exact, default), ``"ivf"`` or ``"hnsw"``
+    - ``ivf_nlist`` / ``ivf_nprobe``: IVF clusters and clusters probed per query.
+      The IVF index is trained once ``ivf_nlist * 39`` vectors are stored; an exact
+      index is used until then.
+    - ``hnsw_m`` / ``hnsw_ef_search``: HNSW graph degree and search depth
     """
 
     def __post_init__(self):
@@ -44,35 +66,79 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
+        self._index_type = kwargs.get("index_type", "flat")
+        if self._index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(
+                f"index_type must be one of {FAISS_INDEX_TYPES}, got {self._index_type}"
+            )
+        self._ivf_nlist = int(kwargs.get("ivf_nlist", 1024))
+        self._ivf_nprobe = int(kwargs.get("ivf_nprobe", 16))
+        self._hnsw_m = int(kwargs.get("hnsw_m", 32))
+        self._hnsw_ef_search = int(kwargs.get("hnsw_ef_search", 64))
+
         # Where to save index file if you want persistent storage
         self._faiss_index_file = os.path.join(
             self.global_config["working_dir"], f"faiss_index_{self.namespace}.index"
         )
-        self._meta_file = self._faiss_index_file + ".meta.json"
+        self._meta_file = self._faiss_index_file + ".meta.npz"
+        # Metadata file written by earlier versions
+        self._legacy_meta_file = self._faiss_index_file + ".meta.json"
 
         self._max_batch_size = self.global_config["embedding_batch_num"]
         # Embedding dimension (e.g. 768) must match your embedding function
         self._dim = self.embedding_func.embedding_dim
 
-        # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
-        # If you have a large number of vectors, you might want IVF or other indexes.
-        # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
-        # Keep a local store for metadata, IDs, etc.
-        # Maps <int faiss_id> → metadata (including your original ID).
-        self._id_to_meta = {}
-
+        self._reset()
         self._load_faiss_index()
 
+    def _reset(self):
+        """Start with an empty index and empty metadata"""
+        self._index_kind = "hnsw" if self._index_type == "hnsw" else "flat"
+        self._index = self._new_index(self._index_kind)
+        # Maps <int faiss_id> → metadata (including your original ID).
+        self._id_to_meta: dict[int, dict[str, Any]] = {}
+        # Maps custom ID → <int faiss_id>
+        self._custom_id_to_fid: dict[str, int] = {}
+        # Maps entity name → faiss ids of the relations it takes part in
+        self._entity_to_fids: dict[str, set[int]] = {}
+        # Maps document type → faiss ids of its vectors
+        self._document_type_to_fids: dict[str, set[int]] = {}
+        # Faiss ids still present in an HNSW graph but no longer valid
+        self._tombstones: set[int] = set()
+        self._next_fid = 0
+
+    def _new_index(self, kind: str):
+        if kind == "ivf":
+            quantizer = faiss.IndexFlatIP(self._dim)
+            index = faiss.IndexIVFFlat(
+                quantizer, self._dim, self._ivf_nlist, faiss.METRIC_INNER_PRODUCT
+            )
+            # The direct map lets the IVF index remove and reconstruct by id
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            index.nprobe = self._ivf_nprobe
+            return index
+        if kind == "hnsw":
+            base = faiss.IndexHNSWFlat(
+                self._dim, self._hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+            base.hnsw.efSearch = self._hnsw_ef_search
+        else:
+            base = faiss.IndexFlatIP(self._dim)
+        return faiss.IndexIDMap2(base)
+
     async def initialize(self):
         """Initialize storage data"""
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = get_storage_lock(self.namespace)
+        self._read_lock = get_storage_read_lock(self.namespace)
 
     async def _get_index(self):
         """Check if the shtorage should be reloaded"""
+        # Only a reload needs the lock, skip it while no other process wrote
+        if not self.storage_updated.value:
+            return self._index
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if storage was updated by another process
@@ -81,8 +147,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset()
                 self._load_faiss_index()
                 self.storage_updated.value = False
             return self._index
@@ -138,42 +203,49 @@ class FaissVectorDBStorage(BaseVectorStorage):
             return []
 
         # Convert to float32 and normalize embeddings for cosine similarity (in-place)
-        embeddings = embeddings.astype(np.float32)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         faiss.normalize_L2(embeddings)
 
         # Upsert logic:
-        # 1. Identify which vectors to remove if they exist
-        # 2. Remove them
-        # 3. Add the new vectors
-        existing_ids_to_remove = []
-        for meta, emb in zip(list_data, embeddings):
-            faiss_internal_id = self._find_faiss_id_by_custom_id(meta["__id__"])
-            if faiss_internal_id is not None:
-                existing_ids_to_remove.append(faiss_internal_id)
-
-        if existing_ids_to_remove:
-            await self._remove_faiss_ids(existing_ids_to_remove)
-
-        # Step 2: Add new vectors
-        index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
+        # 1. Remove the vectors of ids that already exist
+        # 2. Add the new vectors under fresh faiss ids
+        existing_ids_to_remove = [
+            fid
+            for fid in (
+                self._find_faiss_id_by_custom_id(meta["__id__"]) for meta in list_data
+            )
+            if fid is not None
+        ]
+
+        await self._get_index()
+        async with self._storage_lock:
+            if existing_ids_to_remove:
+                self._remove_faiss_ids(existing_ids_to_remove)
+
+            fids = np.arange(
+                self._next_fid, self._next_fid + len(list_data), dtype=np.int64
+            )
+            self._next_fid += len(list_data)
+            self._maybe_train_ivf(len(list_data), embeddings)
+            self._index.add_with_ids(embeddings, fids)
 
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+            # Store metadata for each new ID
+            for fid, meta in zip(fids.tolist(), list_data):
+                self._add_meta(fid, meta)
 
         logger.info(f"Upserted {len(list_data)} vectors into Faiss index.")
         return [m["__id__"] for m in list_data]
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         """
         Search by a textual query; returns top_k results with their metadata + similarity distance.
+        ``document_types`` limits the search to the vectors of those document types.
         """
         embedding = await self.embedding_func(
             [query], _priority=5
@@ -188,30 +260,41 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         # Perform the similarity search
         index = await self._get_index()
-        distances, indices = index.search(embedding, top_k)
-
-        distances = distances[0]
-        indices = indices[0]
-
-        results = []
-        for dist, idx in zip(distances, indices):
-            if idx == -1:
-                # Faiss returns -1 if no neighbor
-                continue
-
-            # Cosine similarity threshold
-            if dist < self.cosine_better_than_threshold:
-                continue
-
-            meta = self._id_to_meta.get(idx, {})
-            results.append(
-                {
-                    **meta,
-                    "id": meta.get("__id__"),
-                    "distance": float(dist),
-                    "created_at": meta.get("__created_at__"),
-                }
-            )
+        async with self._read_lock:
+            if document_types:
+                distances, indices = self._search_partition(
+                    embedding, top_k, document_types
+                )
+            else:
+                # Over-fetch so that removed HNSW entries cannot crowd out live ones
+                k = min(top_k + len(self._tombstones), index.ntotal)
+                if k <= 0:
+                    return []
+                distances, indices = index.search(embedding, k)
+
+            results = []
+            for dist, fid in zip(distances[0], indices[0]):
+                if fid == -1:
+                    # Faiss returns -1 if no neighbor
+                    continue
+
+                # Cosine similarity threshold
+                if dist < self.cosine_better_than_threshold:
+                    continue
+
+                meta = self._id_to_meta.get(int(fid))
+                if meta is None:
+                    continue
+                results.append(
+                    {
+                        **meta,
+                        "id": meta.get("__id__"),
+                        "distance": float(dist),
+                        "created_at": meta.get("__created_at__"),
+                    }
+                )
+                if len(results) >= top_k:
+                    break
 
         return results
 
@@ -237,7 +320,9 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 to_remove.append(fid)
 
         if to_remove:
-            await self._remove_faiss_ids(to_remove)
+            await self._get_index()
+            async with self._storage_lock:
+                self._remove_faiss_ids(to_remove)
         logger.debug(
             f"Successfully deleted {len(to_remove)} vectors from {self.namespace}"
         )
@@ -261,53 +346,137 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Searching relations for entity {entity_name}")
-        relations = []
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name:
-                relations.append(fid)
+        relations = list(self._entity_to_fids.get(entity_name, ()))
 
         logger.debug(f"Found {len(relations)} relations for {entity_name}")
         if relations:
-            await self._remove_faiss_ids(relations)
+            await self._get_index()
+            async with self._storage_lock:
+                self._remove_faiss_ids(relations)
             logger.debug(f"Deleted {len(relations)} relations for {entity_name}")
 
     # --------------------------------------------------------------------------------
     # Internal helper methods
     # --------------------------------------------------------------------------------
 
+    def _search_partition(
+        self, embedding: np.ndarray, top_k: int, document_types: list[str]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest vectors among those of the given document types, in the shape
+        of ``index.search`` results (call with the read lock held)"""
+        fids = set()
+        for document_type in document_types:
+            fids.update(self._document_type_to_fids.get(document_type, ()))
+        fids = np.fromiter(fids, dtype=np.int64, count=len(fids))
+        if not len(fids):
+            return np.zeros((1, 0), dtype=np.float32), np.zeros((1, 0), dtype=np.int64)
+
+        k = min(top_k, len(fids))
+        if len(fids) <= PARTITION_EXACT_SEARCH_MAX:
+            scores = self._index.reconstruct_batch(fids) @ embedding[0]
+            order = np.argsort(-scores)[:k]
+            return scores[order][None, :], fids[order][None, :]
+
+        selector = faiss.IDSelectorBatch(fids)
+        if self._index_kind == "ivf":
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self._ivf_nprobe)
+        elif self._index_kind == "hnsw":
+            params = faiss.SearchParametersHNSW(
+                sel=selector, efSearch=max(self._hnsw_ef_search, k)
+            )
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return self._index.search(embedding, k, params=params)
+
     def _find_faiss_id_by_custom_id(self, custom_id: str):
         """
         Return the Faiss internal ID for a given custom ID, or None if not found.
         """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
-
-    async def _remove_faiss_ids(self, fid_list):
+        return self._custom_id_to_fid.get(custom_id)
+
+    def _add_meta(self, fid: int, meta: dict[str, Any]) -> None:
+        self._id_to_meta[fid] = meta
+        self._custom_id_to_fid[meta["__id__"]] = fid
+        for entity_name in {meta.get("src_id"), meta.get("tgt_id")} - {None}:
+            self._entity_to_fids.setdefault(entity_name, set()).add(fid)
+        for document_type in get_document_types(meta):
+            self._document_type_to_fids.setdefault(document_type, set()).add(fid)
+
+    def _remove_meta(self, fid: int) -> None:
+        meta = self._id_to_meta.pop(fid, None)
+        if meta is None:
+            return
+        if self._custom_id_to_fid.get(meta["__id__"]) == fid:
+            del self._custom_id_to_fid[meta["__id__"]]
+        for entity_name in {meta.get("src_id"), meta.get("tgt_id")} - {None}:
+            fids = self._entity_to_fids.get(entity_name)
+            if fids is not None:
+                fids.discard(fid)
+                if not fids:
+                    del self._entity_to_fids[entity_name]
+        for document_type in get_document_types(meta):
+            fids = self._document_type_to_fids.get(document_type)
+            if fids is not None:
+                fids.discard(fid)
+                if not fids:
+                    del self._document_type_to_fids[document_type]
+
+    def _remove_faiss_ids(self, fid_list):
         """
-        Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
+        Remove a list of Faiss IDs from the index (call with the storage lock held).
+        Flat and IVF indexes remove the vectors in place; HNSW graphs do not support
+        removal, so the ids are tombstoned and the graph is rebuilt once they pile up.
         """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
+        fids = [fid for fid in set(fid_list) if fid in self._id_to_meta]
+        for fid in fids:
+            self._remove_meta(fid)
+        if fids:
+            self._remove_faiss_ids_from_index(fids)
+
+    def _remove_faiss_ids_from_index(self, fids: list[int]) -> None:
+        if self._index_kind != "hnsw":
+            self._index.remove_ids(np.array(fids, dtype=np.int64))
+            return
 
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
+        self._tombstones.update(fids)
+        if len(self._tombstones) > HNSW_REBUILD_RATIO * max(self._index.ntotal, 1):
+            live_fids, vectors = self._live_vectors()
+            self._index = self._new_index("hnsw")
+            if len(live_fids):
+                self._index.add_with_ids(vectors, live_fids)
+            self._tombstones = set()
+            logger.info(
+                f"Rebuilt FAISS HNSW index {self.namespace} with {len(live_fids)} vectors"
+            )
 
-        async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
+    def _live_vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        """Faiss ids and vectors of every live entry of an IndexIDMap2 index"""
+        all_fids = faiss.vector_to_array(self._index.id_map)
+        vectors = self._index.index.reconstruct_n(0, self._index.ntotal)
+        keep = np.array(
+            [fid in self._id_to_meta for fid in all_fids.tolist()], dtype=bool
+        )
+        return all_fids[keep], np.ascontiguousarray(vectors[keep])
 
-            self._id_to_meta = new_id_to_meta
+    def _maybe_train_ivf(self, n_new: int, new_vectors: np.ndarray) -> None:
+        """Switch from the exact index to IVF once there is enough training data"""
+        if self._index_type != "ivf" or self._index_kind == "ivf":
+            return
+        if self._index.ntotal + n_new < self._ivf_nlist * 39:
+            return
+        live_fids, vectors = self._live_vectors()
+        training = (
+            np.concatenate([vectors, new_vectors]) if len(vectors) else new_vectors
+        )
+        index = self._new_index("ivf")
+        index.train(training)
+        if len(live_fids):
+            index.add_with_ids(vectors, live_fids)
+        self._index = index
+        self._index_kind = "ivf"
+        logger.info(
+            f"Trained FAISS IVF index {self.namespace} on {len(training)} vectors"
+        )
 
     def _save_faiss_index(self):
         """
@@ -315,15 +484,28 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         faiss.write_index(self._index, self._faiss_index_file)
 
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
-
-        with open(self._meta_file, "w", encoding="utf-8") as f:
-            json.dump(serializable_dict, f)
+        # Metadata is saved as one blob of JSON records with their offsets,
+        # keyed by faiss id
+        fids = np.fromiter(self._id_to_meta.keys(), dtype=np.int64)
+        encoded = [
+            json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            for meta in self._id_to_meta.values()
+        ]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        tmp_file = self._meta_file + ".tmp.npz"
+        np.savez(
+            tmp_file,
+            fids=fids,
+            offsets=offsets,
+            meta=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            tombstones=np.fromiter(self._tombstones, dtype=np.int64),
+            next_fid=np.int64(self._next_fid),
+            index_kind=np.array(self._index_kind),
+        )
+        os.replace(tmp_file, self._meta_file)
+        if os.path.exists(self._legacy_meta_file):
+            os.remove(self._legacy_meta_file)
 
     def _load_faiss_index(self):
         """
@@ -335,17 +517,32 @@ class FaissVectorDBStorage(BaseVectorStorage):
             return
 
         try:
+            if not os.path.exists(self._meta_file) and os.path.exists(
+                self._legacy_meta_file
+            ):
+                self._load_legacy_faiss_index()
+                return
+
             # Load the Faiss index
             self._index = faiss.read_index(self._faiss_index_file)
             # Load metadata
-            with open(self._meta_file, "r", encoding="utf-8") as f:
-                stored_dict = json.load(f)
-
-            # Convert string keys back to int
-            self._id_to_meta = {}
-            for fid_str, meta in stored_dict.items():
-                fid = int(fid_str)
-                self._id_to_meta[fid] = meta
+            with np.load(self._meta_file, allow_pickle=False) as stored:
+                fids = stored["fids"].tolist()
+                offsets = stored["offsets"]
+                blob = stored["meta"].tobytes()
+                self._tombstones = set(stored["tombstones"].tolist())
+                self._next_fid = int(stored["next_fid"])
+                self._index_kind = str(stored["index_kind"])
+            for i, fid in enumerate(fids):
+                self._add_meta(
+                    fid, json.loads(blob[offsets[i] : offsets[i + 1]].decode("utf-8"))
+                )
+            if self._index_kind == "ivf":
+                self._index.nprobe = self._ivf_nprobe
+            elif self._index_kind == "hnsw":
+                faiss.downcast_index(
+                    self._index.index
+                ).hnsw.efSearch = self._hnsw_ef_search
 
             logger.info(
                 f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
@@ -353,8 +550,32 @@ class FaissVectorDBStorage(BaseVectorStorage):
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
+            self._reset()
+
+    def _load_legacy_faiss_index(self):
+        """Convert an IndexFlatIP with positional ids and a JSON metadata dict"""
+        legacy_index = faiss.read_index(self._faiss_index_file)
+        with open(self._legacy_meta_file, "r", encoding="utf-8") as f:
+            stored_dict = json.load(f)
+
+        # Positional ids of the old index become the faiss ids
+        vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+        self._index = self._new_index(self._index_kind)
+        self._index.add_with_ids(
+            vectors, np.arange(legacy_index.ntotal, dtype=np.int64)
+        )
+        for fid_str, meta in stored_dict.items():
+            meta.pop("__vector__", None)
+            self._add_meta(int(fid_str), meta)
+        self._next_fid = legacy_index.ntotal
+        stale = [
+            fid for fid in range(legacy_index.ntotal) if fid not in self._id_to_meta
+        ]
+        if stale:
+            self._remove_faiss_ids_from_index(stale)
+        logger.info(
+            f"Faiss index converted with {len(self._id_to_meta)} vectors from {self._legacy_meta_file}"
+        )
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
@@ -364,8 +585,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset()
                 self._load_faiss_index()
                 self.storage_updated.value = False
                 return False  # Return error
@@ -457,17 +677,16 @@ class FaissVectorDBStorage(BaseVectorStorage):
         try:
             async with self._storage_lock:
                 # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset()
 
                 # Remove storage files if they exist
-                if os.path.exists(self._faiss_index_file):
-                    os.remove(self._faiss_index_file)
-                if os.path.exists(self._meta_file):
-                    os.remove(self._meta_file)
-
-                self._id_to_meta = {}
-                self._load_faiss_index()
+                for file_name in (
+                    self._faiss_index_file,
+                    self._meta_file,
+                    self._legacy_meta_file,
+                ):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
 
                 # Notify other processes
                 await set_all_update_flags(self.namespace)
@@ -0,0 +1,304 @@
+"""Binary snapshot and delta log persistence for NetworkX graphs.
+
+A snapshot stores the graph as CSR adjacency over interned node ids. Node and
+edge attributes are kept in columns: each column holds one code per row
+pointing into a table of distinct JSON-encoded values. Loading a snapshot only
+builds the adjacency; attribute dicts are decoded the first time they are
+touched.
+
+Changes made after a snapshot are appended to a JSON-lines delta log whose
+header names the snapshot generation it applies to, so readers can replay only
+the records they have not seen yet.
+"""
+
+import json
+import os
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+
+import networkx as nx
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+# The delta log is folded into a new snapshot once it is larger than both this
+# size and the snapshot itself
+GRAPH_DELTA_COMPACTION_MIN_BYTES = int(
+    os.getenv("GRAPH_DELTA_COMPACTION_MIN_BYTES", 16 * 1024 * 1024)
+)
+
+
+class _StringTable:
+    """Interned values addressed by code: offsets into one utf-8 blob"""
+
+    def __init__(self, offsets: np.ndarray, blob: bytes):
+        self.offsets = offsets
+        self.blob = blob
+
+    def get(self, code: int) -> str:
+        return self.blob[self.offsets[code] : self.offsets[code + 1]].decode("utf-8")
+
+    @staticmethod
+    def build(values: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in values], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(values), dtype=np.uint8)
+
+
+class _AttributeColumns:
+    """Attribute columns of all nodes (or all edges) of a snapshot"""
+
+    def __init__(
+        self, names: list[str], codes: list[np.ndarray], tables: list[_StringTable]
+    ):
+        self.names = names
+        self.codes = codes
+        self.tables = tables
+
+    def row(self, row: int) -> dict[str, Any]:
+        data = {}
+        for name, codes, table in zip(self.names, self.codes, self.tables):
+            code = int(codes[row])
+            if code >= 0:
+                data[name] = json.loads(table.get(code))
+        return data
+
+    @staticmethod
+    def encode(
+        rows: list[dict[str, Any]], prefix: str, arrays: dict[str, np.ndarray]
+    ) -> list[str]:
+        """Add the columns of rows to arrays, returns the column names"""
+        names = sorted({name for data in rows for name in data})
+        for i, name in enumerate(names):
+            interned: dict[bytes, int] = {}
+            codes = np.full(len(rows), -1, dtype=np.int32)
+            for row, data in enumerate(rows):
+                if name in data:
+                    value = json.dumps(data[name], ensure_ascii=False).encode("utf-8")
+                    codes[row] = interned.setdefault(value, len(interned))
+            offsets, blob = _StringTable.build(list(interned))
+            arrays[f"{prefix}{i}.codes"] = codes
+            arrays[f"{prefix}{i}.offsets"] = offsets
+            arrays[f"{prefix}{i}.blob"] = blob
+        return names
+
+    @staticmethod
+    def decode(names: list[str], prefix: str, stored) -> "_AttributeColumns":
+        return _AttributeColumns(
+            names,
+            [stored[f"{prefix}{i}.codes"] for i in range(len(names))],
+            [
+                _StringTable(
+                    stored[f"{prefix}{i}.offsets"],
+                    stored[f"{prefix}{i}.blob"].tobytes(),
+                )
+                for i in range(len(names))
+            ],
+        )
+
+
+class LazyAttrs(MutableMapping):
+    """Attribute dict of a node or edge, decoded from its snapshot row on first use"""
+
+    __slots__ = ("_columns", "_row", "_data")
+
+    def __init__(self, columns: _AttributeColumns, row: int):
+        self._columns = columns
+        self._row = row
+        self._data: dict[str, Any] | None = None
+
+    def data(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = self._columns.row(self._row)
+            self._columns = None
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+    def __setitem__(self, key, value):
+        self.data()[key] = value
+
+    def __delitem__(self, key):
+        del self.data()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data())
+
+    def __len__(self) -> int:
+        return len(self.data())
+
+    def copy(self) -> dict[str, Any]:
+        return dict(self.data())
+
+    def __repr__(self) -> str:
+        return repr(self.data())
+
+
+def materialize(attrs) -> dict[str, Any] | None:
+    """Plain dict behind an attribute mapping returned by the graph"""
+    return attrs.data() if isinstance(attrs, LazyAttrs) else attrs
+
+
+def write_snapshot(graph: nx.Graph, file_name: str, generation: int) -> int:
+    """Write graph as a snapshot of the given generation, returns its size in bytes"""
+    node_ids = list(graph.nodes)
+    node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    # Store every undirected edge once, from its lower to its higher node index
+    sources, targets, edge_rows = [], [], []
+    for u, v, data in graph.edges(data=True):
+        ui, vi = node_index[u], node_index[v]
+        if ui > vi:
+            ui, vi = vi, ui
+        sources.append(ui)
+        targets.append(vi)
+        edge_rows.append(materialize(data))
+    sources = np.array(sources, dtype=np.int64)
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(node_ids)), out=indptr[1:])
+
+    arrays: dict[str, np.ndarray] = {}
+    arrays["node_ids.offsets"], arrays["node_ids.blob"] = _StringTable.build(
+        [str(node_id).encode("utf-8") for node_id in node_ids]
+    )
+    arrays["indptr"] = indptr
+    arrays["indices"] = np.array(targets, dtype=np.int64)[order]
+    node_columns = _AttributeColumns.encode(
+        [materialize(graph._node[node_id]) for node_id in node_ids], "node", arrays
+    )
+    edge_columns = _AttributeColumns.encode(
+        [edge_rows[i] for i in order.tolist()], "edge", arrays
+    )
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "node_columns": node_columns,
+        "edge_columns": edge_columns,
+    }
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+
+    tmp_file = f"{file_name}.tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_file, file_name)
+    return os.path.getsize(file_name)
+
+
+def snapshot_generation(file_name: str) -> int | None:
+    """Generation of a snapshot without loading it"""
+    if not os.path.exists(file_name):
+        return None
+    with np.load(file_name, allow_pickle=False) as stored:
+        return json.loads(stored["meta"].tobytes())["generation"]
+
+
+def read_snapshot(file_name: str) -> tuple[nx.Graph, int]:
+    """Load a snapshot, returns the graph and its generation"""
+    graph = nx.Graph()
+    with np.load(file_name, allow_pickle=False) as stored:
+        meta = json.loads(stored["meta"].tobytes())
+        ids_table = _StringTable(
+            stored["node_ids.offsets"], stored["node_ids.blob"].tobytes()
+        )
+        node_ids = [ids_table.get(i) for i in range(len(ids_table.offsets) - 1)]
+        indptr = stored["indptr"].tolist()
+        indices = stored["indices"].tolist()
+        node_columns = _AttributeColumns.decode(meta["node_columns"], "node", stored)
+        edge_columns = _AttributeColumns.decode(meta["edge_columns"], "edge", stored)
+
+    # Fill the graph's dicts directly: the same structures add_node/add_edge
+    # build, without per-call overhead on large graphs
+    adj = graph._adj
+    for i, node_id in enumerate(node_ids):
+        graph._node[node_id] = LazyAttrs(node_columns, i)
+        adj[node_id] = {}
+    for u in range(len(node_ids)):
+        source = node_ids[u]
+        for row in range(indptr[u], indptr[u + 1]):
+            target = node_ids[indices[row]]
+            adj[source][target] = adj[target][source] = LazyAttrs(edge_columns, row)
+    return graph, meta["generation"]
+
+
+class GraphDeltaLog:
+    """Append-only log of graph changes made since the snapshot it applies to
+
+    The first line is a header with the snapshot generation, every other line is
+    one change: a node or edge with its full attributes, or its removal.
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+
+    def size(self) -> int:
+        return os.path.getsize(self.file_name) if os.path.exists(self.file_name) else 0
+
+    def reset(self, generation: int) -> int:
+        """Start an empty log for a snapshot generation, returns the replay offset"""
+        tmp_file = f"{self.file_name}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(json.dumps({"generation": generation}).encode("utf-8") + b"\n")
+        os.replace(tmp_file, self.file_name)
+        return self.size()
+
+    def append(self, records: list[dict[str, Any]], offset: int) -> int:
+        """Append records after offset, returns the new end of the log
+
+        Anything past offset is a torn write the replay stopped at, it is cut
+        off so the records do not end up on the same line.
+        """
+        payload = b"".join(
+            json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            for record in records
+        )
+        with open(self.file_name, "r+b") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(payload)
+        return offset + len(payload)
+
+    def replay(self, graph: nx.Graph, generation: int, offset: int = 0) -> int | None:
+        """Apply the records after offset to graph
+
+        Returns:
+            The offset to continue from, or None if the log belongs to another
+            snapshot generation
+        """
+        if not os.path.exists(self.file_name):
+            return None
+        with open(self.file_name, "rb") as f:
+            header = f.readline()
+            try:
+                if json.loads(header)["generation"] != generation:
+                    return None
+            except (json.JSONDecodeError, KeyError):
+                return None
+            f.seek(max(offset, len(header)))
+            position = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write at the end of the log
+                    break
+                apply_record(graph, json.loads(line))
+                position += len(line)
+        return position
+
+
+def apply_record(graph: nx.Graph, record: dict[str, Any]) -> None:
+    op = record["op"]
+    if op == "node":
+        graph.add_node(record["id"])
+        graph._node[record["id"]] = record["data"]
+    elif op == "del_node":
+        if graph.has_node(record["id"]):
+            graph.remove_node(record["id"])
+    elif op == "edge":
+        graph.add_edge(record["src"], record["tgt"])
+        data = record["data"]
+        graph._adj[record["src"]][record["tgt"]] = data
+        graph._adj[record["tgt"]][record["src"]] = data
+    elif op == "del_edge":
+        if graph.has_edge(record["src"], record["tgt"]):
+            graph.remove_edge(record["src"], record["tgt"])
@@ -1,20 +1,29 @@
+import asyncio
 from dataclasses import dataclass
 import os
-from typing import Any, Union, final
+from typing import Any, Literal, Union, final
 
 from lightrag.base import (
     DocProcessingStatus,
+    DocSortField,
     DocStatus,
     DocStatusStorage,
+    doc_sort_key,
 )
-from lightrag.utils import (
-    load_json,
-    logger,
-    write_json,
+from lightrag.utils import logger
+from .json_wal import JsonWriteAheadLog
+from .shared_kv import (
+    kv_clear,
+    kv_delete,
+    kv_get_many,
+    kv_items,
+    kv_keys,
+    kv_update,
 )
 from .shared_storage import (
     get_namespace_data,
     get_storage_lock,
+    get_storage_read_lock,
     get_data_init_lock,
     get_update_flag,
     set_all_update_flags,
@@ -22,91 +31,172 @@ from .shared_storage import (
     try_initialize_namespace,
 )
 
+# Seconds an upsert waits before its changes are appended to the WAL, so the
+# status transitions of a batch of documents are flushed together (0 = at once).
+# Upserts that move a document to a terminal status are flushed immediately.
+DOC_STATUS_FLUSH_INTERVAL = float(os.getenv("DOC_STATUS_FLUSH_INTERVAL", 1.0))
+
+TERMINAL_STATUSES = (DocStatus.PROCESSED.value, DocStatus.FAILED.value)
+
+# Record fields copied into the status indexes, enough to sort a page of
+# documents without reading their records
+STATUS_INDEX_FIELDS = ("created_at", "updated_at", "file_path")
+
+
+def _without_content(record: dict[str, Any]) -> dict[str, Any]:
+    # The document body lives in full_docs only
+    return {k: v for k, v in record.items() if k != "content"}
+
+
+def _to_doc_status(record: dict[str, Any]) -> DocProcessingStatus:
+    data = _without_content(record)
+    # If file_path is not in data, use document id as file path
+    if "file_path" not in data:
+        data["file_path"] = "no-file-path"
+    return DocProcessingStatus(**data)
+
 
 @final
 @dataclass
 class JsonDocStatusStorage(DocStatusStorage):
-    """JSON implementation of document status storage"""
+    """JSON implementation of document status storage, persisted through a write-ahead log
+
+    Records hold no document content. Each status has an index namespace
+    mapping its document ids to their sort fields, so status counts are O(1)
+    and listing a status reads only its own records. The indexes live in
+    shared namespace data next to the records and are rebuilt on load.
+    """
 
     def __post_init__(self):
         working_dir = self.global_config["working_dir"]
         self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
+        self._wal = JsonWriteAheadLog(self.namespace, self._file_name)
         self._data = None
         self._storage_lock = None
+        self._read_lock = None
+        self._status_index: dict[str, Any] = {}
+        self._flush_task: asyncio.Task | None = None
         self.storage_updated = None
 
     async def initialize(self):
         """Initialize storage data"""
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = get_storage_lock(self.namespace)
         self.storage_updated = await get_update_flag(self.namespace)
         async with get_data_init_lock():
             # check need_init must before get_namespace_data
             need_init = await try_initialize_namespace(self.namespace)
-            self._data = await get_namespace_data(self.namespace)
+            self._data = await get_namespace_data(self.namespace, kv_store=True)
+            self._read_lock = get_storage_read_lock(self.namespace, self._data)
+            for status in DocStatus:
+                self._status_index[status.value] = await get_namespace_data(
+                    f"{self.namespace}_status_{status.value}", kv_store=True
+                )
+            await self._wal.initialize()
             if need_init:
-                loaded_data = load_json(self._file_name) or {}
+                # Records written before content moved to full_docs keep it
+                # until their next upsert, the pipeline copies it over
+                loaded_data = await self._wal.load()
                 async with self._storage_lock:
-                    self._data.update(loaded_data)
+                    await kv_update(self._data, loaded_data)
+                    for index in self._status_index.values():
+                        await kv_clear(index)
+                    await self._index_records(loaded_data)
                     logger.info(
                         f"Process {os.getpid()} doc status load {self.namespace} with {len(loaded_data)} records"
                     )
 
+    async def _index_records(self, data: dict[str, dict[str, Any]]) -> None:
+        """Move the documents to the index of their new status (storage lock held)"""
+        entries: dict[str, dict[str, Any]] = {
+            status: {} for status in self._status_index
+        }
+        for doc_id, record in data.items():
+            status = DocStatus(record["status"]).value
+            entries[status][doc_id] = {
+                field: record.get(field) for field in STATUS_INDEX_FIELDS
+            }
+        for status, index in self._status_index.items():
+            moved_out = [
+                doc_id
+                for other, index_entries in entries.items()
+                if other != status
+                for doc_id in index_entries
+            ]
+            if moved_out:
+                await kv_delete(index, moved_out)
+            if entries[status]:
+                await kv_update(index, entries[status])
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         """Return keys that should be processed (not in storage or not successfully processed)"""
-        async with self._storage_lock:
-            return set(keys) - set(self._data.keys())
+        async with self._read_lock:
+            return set(keys) - set(await kv_keys(self._data))
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        result: list[dict[str, Any]] = []
-        async with self._storage_lock:
-            for id in ids:
-                data = self._data.get(id, None)
-                if data:
-                    result.append(data)
-        return result
+        async with self._read_lock:
+            records = await kv_get_many(self._data, ids)
+        return [record for record in records if record]
 
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
-        counts = {status.value: 0 for status in DocStatus}
-        async with self._storage_lock:
-            for doc in self._data.values():
-                counts[doc["status"]] += 1
-        return counts
+        async with self._read_lock:
+            return {status: len(index) for status, index in self._status_index.items()}
 
     async def get_docs_by_status(
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
         result = {}
-        async with self._storage_lock:
-            for k, v in self._data.items():
-                if v["status"] == status.value:
-                    try:
-                        # Make a copy of the data to avoid modifying the original
-                        data = v.copy()
-                        # If content is missing, use content_summary as content
-                        if "content" not in data and "content_summary" in data:
-                            data["content"] = data["content_summary"]
-                        # If file_path is not in data, use document id as file path
-                        if "file_path" not in data:
-                            data["file_path"] = "no-file-path"
-                        result[k] = DocProcessingStatus(**data)
-                    except KeyError as e:
-                        logger.error(f"Missing required field for document {k}: {e}")
-                        continue
+        async with self._read_lock:
+            doc_ids = await kv_keys(self._status_index[status.value])
+            records = await kv_get_many(self._data, doc_ids)
+        for doc_id, record in zip(doc_ids, records):
+            if record is not None:
+                try:
+                    result[doc_id] = _to_doc_status(record)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Missing required field for document {doc_id}: {e}")
         return result
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: DocSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Sort the index entries of the requested statuses and read only the
+        records of the page"""
+        statuses = [status_filter.value] if status_filter else list(self._status_index)
+        async with self._read_lock:
+            entries = []
+            for status in statuses:
+                entries.extend(await kv_items(self._status_index[status]))
+            entries.sort(
+                key=lambda item: doc_sort_key(item[0], item[1], sort_field),
+                reverse=sort_direction == "desc",
+            )
+            start = (page - 1) * page_size
+            doc_ids = [doc_id for doc_id, _ in entries[start : start + page_size]]
+            records = await kv_get_many(self._data, doc_ids)
+        docs = [
+            (doc_id, _to_doc_status(record))
+            for doc_id, record in zip(doc_ids, records)
+            if record is not None
+        ]
+        return docs, len(entries)
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             if self.storage_updated.value:
-                data_dict = (
-                    dict(self._data) if hasattr(self._data, "_getvalue") else self._data
-                )
+                record_count = await self._wal.flush()
                 logger.debug(
-                    f"Process {os.getpid()} doc status writting {len(data_dict)} records to {self.namespace}"
+                    f"Process {os.getpid()} doc status appended {record_count} records to {self.namespace} WAL"
                 )
-                write_json(data_dict, self._file_name)
                 await clear_all_update_flags(self.namespace)
+            if await self._wal.needs_compaction():
+                await self._wal.schedule_compaction(self._data, self._storage_lock)
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
@@ -117,14 +207,26 @@ class JsonDocStatusStorage(DocStatusStorage):
         if not data:
             return
         logger.debug(f"Inserting {len(data)} records to {self.namespace}")
+        data = {doc_id: _without_content(record) for doc_id, record in data.items()}
         async with self._storage_lock:
-            self._data.update(data)
+            await kv_update(self._data, data)
+            await self._index_records(data)
+            await self._wal.record_upsert(data)
             await set_all_update_flags(self.namespace)
 
+        if DOC_STATUS_FLUSH_INTERVAL <= 0 or any(
+            record.get("status") in TERMINAL_STATUSES for record in data.values()
+        ):
+            await self.index_done_callback()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(DOC_STATUS_FLUSH_INTERVAL)
         await self.index_done_callback()
 
     async def get_by_id(self, id: str) -> Union[dict[str, Any], None]:
-        async with self._storage_lock:
+        async with self._read_lock:
             return self._data.get(id)
 
     async def delete(self, doc_ids: list[str]) -> None:
@@ -141,13 +243,11 @@ class JsonDocStatusStorage(DocStatusStorage):
             None
         """
         async with self._storage_lock:
-            any_deleted = False
-            for doc_id in doc_ids:
-                result = self._data.pop(doc_id, None)
-                if result is not None:
-                    any_deleted = True
-
-            if any_deleted:
+            deleted_ids = await kv_delete(self._data, doc_ids)
+            for index in self._status_index.values():
+                await kv_delete(index, deleted_ids)
+            if deleted_ids:
+                await self._wal.record_delete(deleted_ids)
                 await set_all_update_flags(self.namespace)
 
     async def drop(self) -> dict[str, str]:
@@ -155,8 +255,8 @@ class JsonDocStatusStorage(DocStatusStorage):
 
         This method will:
         1. Clear all document status data from memory
-        2. Update flags to notify other processes
-        3. Trigger index_done_callback to save the empty state
+        2. Replace the snapshot and WAL segments with an empty snapshot
+        3. Clear flags, there is nothing left to persist
 
         Returns:
             dict[str, str]: Operation status and message
@@ -164,13 +264,24 @@ class JsonDocStatusStorage(DocStatusStorage):
             - On failure: {"status": "error", "message": "<error details>"}
         """
         try:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+            await self._wal.wait_for_compaction()
             async with self._storage_lock:
-                self._data.clear()
-                await set_all_update_flags(self.namespace)
+                await kv_clear(self._data)
+                for index in self._status_index.values():
+                    await kv_clear(index)
+                await self._wal.reset()
+                await clear_all_update_flags(self.namespace)
 
-            await self.index_done_callback()
             logger.info(f"Process {os.getpid()} drop {self.namespace}")
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
             logger.error(f"Error dropping {self.namespace}: {e}")
             return {"status": "error", "message": str(e)}
+
+    async def finalize(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await self.index_done_callback()
+        await self._wal.wait_for_compaction()
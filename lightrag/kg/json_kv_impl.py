@@ -1,18 +1,36 @@
 import os
+import time
 from dataclasses import dataclass
 from typing import Any, final
 
 from lightrag.base import (
     BaseKVStorage,
 )
+from lightrag.constants import (
+    LLM_CACHE_ACCESS_TIME_RESOLUTION,
+    LLM_CACHE_EVICTION_INTERVAL,
+)
+from lightrag.namespace import NameSpace, is_namespace
 from lightrag.utils import (
-    load_json,
+    flatten_llm_cache,
+    generate_cache_key,
+    is_cache_expired,
     logger,
-    write_json,
+)
+from .json_wal import JsonWriteAheadLog
+from .shared_kv import (
+    kv_clear,
+    kv_copy,
+    kv_delete,
+    kv_get_many,
+    kv_items,
+    kv_keys,
+    kv_update,
 )
 from .shared_storage import (
     get_namespace_data,
     get_storage_lock,
+    get_storage_read_lock,
     get_data_init_lock,
     get_update_flag,
     set_all_update_flags,
@@ -24,66 +42,84 @@ from .shared_storage import (
 @final
 @dataclass
 class JsonKVStorage(BaseKVStorage):
+    """In-memory KV storage persisted as a JSON snapshot plus a write-ahead log
+
+    Upserts and deletes are appended to the log in ``index_done_callback``; the
+    log is merged into ``kv_store_<namespace>.json`` by background compaction.
+    """
+
     def __post_init__(self):
         working_dir = self.global_config["working_dir"]
         self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
+        self._wal = JsonWriteAheadLog(self.namespace, self._file_name)
         self._data = None
         self._storage_lock = None
+        self._read_lock = None
         self.storage_updated = None
+        self._next_expiry_sweep = 0.0
+        # LLM cache hits not written back yet: cache key -> access time
+        self._access_times: dict[str, int] = {}
 
     async def initialize(self):
         """Initialize storage data"""
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = get_storage_lock(self.namespace)
         self.storage_updated = await get_update_flag(self.namespace)
         async with get_data_init_lock():
             # check need_init must before get_namespace_data
             need_init = await try_initialize_namespace(self.namespace)
-            self._data = await get_namespace_data(self.namespace)
+            self._data = await get_namespace_data(self.namespace, kv_store=True)
+            self._read_lock = get_storage_read_lock(self.namespace, self._data)
+            await self._wal.initialize()
             if need_init:
-                loaded_data = load_json(self._file_name) or {}
-                async with self._storage_lock:
-                    self._data.update(loaded_data)
-
-                    # Calculate data count based on namespace
-                    if self.namespace.endswith("cache"):
-                        # For cache namespaces, sum the cache entries across all cache types
-                        data_count = sum(
-                            len(first_level_dict)
-                            for first_level_dict in loaded_data.values()
-                            if isinstance(first_level_dict, dict)
+                loaded_data = await self._wal.load()
+                flat_entries, legacy_keys = {}, []
+                if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+                    # Migrate legacy {mode: {args_hash: entry}} buckets to flat keys
+                    flat_entries, legacy_keys = flatten_llm_cache(loaded_data)
+                    for key in legacy_keys:
+                        del loaded_data[key]
+                    loaded_data.update(flat_entries)
+                    if legacy_keys:
+                        logger.info(
+                            f"Migrated {len(flat_entries)} LLM cache entries of modes {legacy_keys} to flat keys"
                         )
-                    else:
-                        # For non-cache namespaces, use the original count method
-                        data_count = len(loaded_data)
+                async with self._storage_lock:
+                    await kv_update(self._data, loaded_data)
+                    if legacy_keys:
+                        await self._wal.record_delete(legacy_keys)
+                        await self._wal.record_upsert(flat_entries)
+                        await set_all_update_flags(self.namespace)
 
                     logger.info(
-                        f"Process {os.getpid()} KV load {self.namespace} with {data_count} records"
+                        f"Process {os.getpid()} KV load {self.namespace} with {len(loaded_data)} records"
                     )
 
+    async def _write_back_access_times(self) -> None:
+        """Store the access times of recent cache hits (storage lock held)"""
+        if not self._access_times:
+            return
+        access_times, self._access_times = self._access_times, {}
+        updates = {}
+        for key, access_time in access_times.items():
+            entry = self._data.get(key)
+            if isinstance(entry, dict) and entry.get("access_time", 0) < access_time:
+                updates[key] = {**entry, "access_time": access_time}
+        if updates:
+            await kv_update(self._data, updates)
+            await self._wal.record_upsert(updates)
+            await set_all_update_flags(self.namespace)
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
+            await self._write_back_access_times()
             if self.storage_updated.value:
-                data_dict = (
-                    dict(self._data) if hasattr(self._data, "_getvalue") else self._data
-                )
-
-                # Calculate data count based on namespace
-                if self.namespace.endswith("cache"):
-                    # # For cache namespaces, sum the cache entries across all cache types
-                    data_count = sum(
-                        len(first_level_dict)
-                        for first_level_dict in data_dict.values()
-                        if isinstance(first_level_dict, dict)
-                    )
-                else:
-                    # For non-cache namespaces, use the original count method
-                    data_count = len(data_dict)
-
+                record_count = await self._wal.flush()
                 logger.debug(
-                    f"Process {os.getpid()} KV writting {data_count} records to {self.namespace}"
+                    f"Process {os.getpid()} KV appended {record_count} records to {self.namespace} WAL"
                 )
-                write_json(data_dict, self._file_name)
                 await clear_all_update_flags(self.namespace)
+            if await self._wal.needs_compaction():
+                await self._wal.schedule_compaction(self._data, self._storage_lock)
 
     async def get_all(self) -> dict[str, Any]:
         """Get all data from storage
@@ -91,27 +127,44 @@ class JsonKVStorage(BaseKVStorage):
         Returns:
             Dictionary containing all stored data
         """
-        async with self._storage_lock:
-            return dict(self._data)
+        async with self._read_lock:
+            return await kv_copy(self._data)
 
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
-        async with self._storage_lock:
+        async with self._read_lock:
             return self._data.get(id)
 
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict[str, Any] | None:
+        cache_key = generate_cache_key(mode, id)
+        async with self._read_lock:
+            cache_entry = self._data.get(cache_key)
+        if not cache_entry:
+            return None
+        now = int(time.time())
+        if now - cache_entry.get("access_time", 0) >= LLM_CACHE_ACCESS_TIME_RESOLUTION:
+            # Recency for LRU eviction, written back in batches under the
+            # storage lock by index_done_callback and evict_cache
+            self._access_times[cache_key] = now
+            cache_entry = {**cache_entry, "access_time": now}
+        return {id: cache_entry}
+
+    async def get_cache_by_mode(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = generate_cache_key(mode, "")
+        async with self._read_lock:
+            return {
+                key[len(prefix) :]: value
+                for key, value in await kv_items(self._data)
+                if key.startswith(prefix)
+            }
+
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        async with self._storage_lock:
-            return [
-                (
-                    {k: v for k, v in self._data[id].items()}
-                    if self._data.get(id, None)
-                    else None
-                )
-                for id in ids
-            ]
+        async with self._read_lock:
+            records = await kv_get_many(self._data, ids)
+            return [dict(record) if record else None for record in records]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
-        async with self._storage_lock:
-            return set(keys) - set(self._data.keys())
+        async with self._read_lock:
+            return set(keys) - set(await kv_keys(self._data))
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
@@ -123,7 +176,8 @@ class JsonKVStorage(BaseKVStorage):
             return
         logger.debug(f"Inserting {len(data)} records to {self.namespace}")
         async with self._storage_lock:
-            self._data.update(data)
+            await kv_update(self._data, data)
+            await self._wal.record_upsert(data)
             await set_all_update_flags(self.namespace)
 
     async def delete(self, ids: list[str]) -> None:
@@ -140,13 +194,9 @@ class JsonKVStorage(BaseKVStorage):
             None
         """
         async with self._storage_lock:
-            any_deleted = False
-            for doc_id in ids:
-                result = self._data.pop(doc_id, None)
-                if result is not None:
-                    any_deleted = True
-
-            if any_deleted:
+            deleted_ids = await kv_delete(self._data, ids)
+            if deleted_ids:
+                await self._wal.record_delete(deleted_ids)
                 await set_all_update_flags(self.namespace)
 
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
@@ -167,19 +217,68 @@ class JsonKVStorage(BaseKVStorage):
             return False
 
         try:
-            await self.delete(modes)
+            prefixes = tuple(generate_cache_key(mode, "") for mode in modes)
+            async with self._storage_lock:
+                keys = [
+                    key for key in await kv_keys(self._data) if key.startswith(prefixes)
+                ]
+            # Legacy mode buckets are stored under the mode itself
+            await self.delete(keys + list(modes))
             return True
         except Exception:
             return False
 
+    async def evict_cache(self, max_entries: int, ttl: int) -> list[str]:
+        """Evict expired entries and least recently used entries beyond max_entries
+
+        The size check is O(1); once the cap is exceeded the storage is trimmed
+        to 90% of it, so the sort is amortized over many writes. Expired entries
+        are swept at most every LLM_CACHE_EVICTION_INTERVAL seconds.
+        """
+        now = time.time()
+        over_capacity = bool(max_entries) and len(self._data) > max_entries
+        sweep_expired = bool(ttl) and now >= self._next_expiry_sweep
+        if not over_capacity and not sweep_expired:
+            return []
+
+        async with self._storage_lock:
+            await self._write_back_access_times()
+            entries = await kv_items(self._data)
+            evicted = []
+            if sweep_expired:
+                self._next_expiry_sweep = now + min(ttl, LLM_CACHE_EVICTION_INTERVAL)
+                evicted = [
+                    key
+                    for key, value in entries
+                    if isinstance(value, dict) and is_cache_expired(value, ttl)
+                ]
+            if max_entries and len(entries) - len(evicted) > max_entries:
+                expired = set(evicted)
+                remaining = [
+                    (value.get("access_time", 0), key)
+                    for key, value in entries
+                    if key not in expired and isinstance(value, dict)
+                ]
+                excess = len(remaining) - int(max_entries * 0.9)
+                remaining.sort()
+                evicted.extend(key for _, key in remaining[:excess])
+            evicted = await kv_delete(self._data, evicted)
+            if evicted:
+                await self._wal.record_delete(evicted)
+                await set_all_update_flags(self.namespace)
+                logger.info(
+                    f"Evicted {len(evicted)} LLM cache entries from {self.namespace}"
+                )
+            return evicted
+
     async def drop(self) -> dict[str, str]:
         """Drop all data from storage and clean up resources
            This action will persistent the data to disk immediately.
 
         This method will:
         1. Clear all data from memory
-        2. Update flags to notify other processes
-        3. Trigger index_done_callback to save the empty state
+        2. Replace the snapshot and WAL segments with an empty snapshot
+        3. Clear flags, there is nothing left to persist
 
         Returns:
             dict[str, str]: Operation status and message
@@ -187,11 +286,12 @@ class JsonKVStorage(BaseKVStorage):
             - On failure: {"status": "error", "message": "<error details>"}
         """
         try:
+            await self._wal.wait_for_compaction()
             async with self._storage_lock:
-                self._data.clear()
-                await set_all_update_flags(self.namespace)
+                await kv_clear(self._data)
+                await self._wal.reset()
+                await clear_all_update_flags(self.namespace)
 
-            await self.index_done_callback()
             logger.info(f"Process {os.getpid()} drop {self.namespace}")
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
@@ -204,3 +304,4 @@ class JsonKVStorage(BaseKVStorage):
         """
         if self.namespace.endswith("cache"):
             await self.index_done_callback()
+        await self._wal.wait_for_compaction()
@@ -0,0 +1,227 @@
+import asyncio
+import glob
+import json
+import os
+from typing import Any
+
+from lightrag.utils import load_json, logger
+from .shared_kv import SharedKVDict, kv_clear, kv_copy, kv_update
+from .shared_storage import get_namespace_data
+
+# A new WAL segment is started once the current one exceeds this size
+WAL_SEGMENT_MAX_BYTES = int(os.getenv("JSON_WAL_SEGMENT_MAX_BYTES", 16 * 1024 * 1024))
+
+# Segments are merged into the snapshot once the log is larger than both this
+# size and the snapshot itself, which keeps compaction cost amortized O(1) per write
+WAL_COMPACTION_MIN_BYTES = int(
+    os.getenv("JSON_WAL_COMPACTION_MIN_BYTES", 64 * 1024 * 1024)
+)
+
+
+class JsonWriteAheadLog:
+    """Snapshot plus append-only log segments persisting an in-memory JSON store
+
+    ``<name>.json`` is the snapshot, written in the same format as ``write_json``.
+    ``<name>.wal.<seq>`` segments hold one JSON record per line: ``{"id", "data"}``
+    for an upsert and ``{"id", "deleted": true}`` for a delete. Startup replays the
+    snapshot and then every segment in order.
+
+    Changes are collected in a shared pending map (last write per key wins) and
+    appended to the current segment on ``flush``. Compaction writes a new snapshot
+    in a worker thread and removes the segments it covers. The pending map and the
+    log position live in shared namespace data, so every gunicorn worker appends
+    to the same segment. All methods except ``load`` must be called with the
+    storage lock held. The shared state is only accessed through the ``kv_*``
+    helpers, as every access of a shared KV store is a database round trip.
+    """
+
+    def __init__(self, namespace: str, snapshot_file: str):
+        self.namespace = namespace
+        self._snapshot_file = snapshot_file
+        self._wal_prefix = f"{os.path.splitext(snapshot_file)[0]}.wal."
+        self._pending = None
+        self._state = None
+        self._compaction_task: asyncio.Task | None = None
+
+    async def initialize(self) -> None:
+        self._pending = await get_namespace_data(
+            f"{self.namespace}_wal_pending", kv_store=True
+        )
+        self._state = await get_namespace_data(
+            f"{self.namespace}_wal_state", kv_store=True
+        )
+
+    def _segment_file(self, seq: int) -> str:
+        return f"{self._wal_prefix}{seq:08d}"
+
+    def _segments(self) -> list[tuple[int, str]]:
+        segments = []
+        for file_name in glob.glob(f"{glob.escape(self._wal_prefix)}*"):
+            suffix = file_name[len(self._wal_prefix) :]
+            if suffix.isdigit():
+                segments.append((int(suffix), file_name))
+        return sorted(segments)
+
+    def is_empty(self) -> bool:
+        """Whether neither a snapshot nor any segment exists"""
+        return not os.path.exists(self._snapshot_file) and not self._segments()
+
+    def replay(self) -> tuple[dict[str, Any], list[tuple[int, str]]]:
+        """Read the snapshot and every WAL segment, returns the data and the segments"""
+        data = load_json(self._snapshot_file) or {}
+        segments = self._segments()
+        replayed = 0
+        for _, file_name in segments:
+            with open(file_name, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the end of a segment
+                        logger.warning(f"Skipping incomplete WAL record in {file_name}")
+                        break
+                    if record.get("deleted"):
+                        data.pop(record["id"], None)
+                    else:
+                        data[record["id"]] = record["data"]
+                    replayed += 1
+        if replayed:
+            logger.info(
+                f"Process {os.getpid()} replayed {replayed} WAL records for {self.namespace}"
+            )
+        return data, segments
+
+    async def load(self) -> dict[str, Any]:
+        """Replay the snapshot and every WAL segment (initializing worker only)"""
+        data, segments = self.replay()
+        await kv_clear(self._pending)
+        # Always continue in a fresh segment, the last one may end with a torn write
+        await kv_update(
+            self._state,
+            {
+                "segment": segments[-1][0] + 1 if segments else 0,
+                "segment_bytes": 0,
+                "wal_bytes": sum(os.path.getsize(f) for _, f in segments),
+                "snapshot_bytes": os.path.getsize(self._snapshot_file)
+                if os.path.exists(self._snapshot_file)
+                else 0,
+                "compacting": False,
+            },
+        )
+        return data
+
+    async def record_upsert(self, data: dict[str, Any]) -> None:
+        await kv_update(self._pending, data)
+
+    async def record_delete(self, ids: list[str]) -> None:
+        await kv_update(self._pending, dict.fromkeys(ids))
+
+    async def flush(self) -> int:
+        """Append pending changes to the current segment, returns the record count"""
+        pending = await kv_copy(self._pending)
+        if not pending:
+            return 0
+        await kv_clear(self._pending)
+        payload = "".join(
+            json.dumps(
+                {"id": id, "deleted": True}
+                if value is None
+                else {"id": id, "data": value},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for id, value in pending.items()
+        ).encode("utf-8")
+        state = await kv_copy(self._state)
+        with open(self._segment_file(state["segment"]), "ab") as f:
+            f.write(payload)
+            f.flush()
+        segment = state["segment"]
+        segment_bytes = state["segment_bytes"] + len(payload)
+        if segment_bytes >= WAL_SEGMENT_MAX_BYTES:
+            segment += 1
+            segment_bytes = 0
+        await kv_update(
+            self._state,
+            {
+                "segment": segment,
+                "segment_bytes": segment_bytes,
+                "wal_bytes": state["wal_bytes"] + len(payload),
+            },
+        )
+        return len(pending)
+
+    async def needs_compaction(self) -> bool:
+        state = await kv_copy(self._state)
+        return not state["compacting"] and state["wal_bytes"] > max(
+            WAL_COMPACTION_MIN_BYTES, state["snapshot_bytes"]
+        )
+
+    async def schedule_compaction(self, data, storage_lock) -> None:
+        """Start a background compaction from the current contents of data"""
+        # Seal the current segment: everything up to it is covered by the snapshot
+        covered_segment = (await kv_copy(self._state))["segment"]
+        await kv_update(
+            self._state,
+            {"segment": covered_segment + 1, "segment_bytes": 0, "compacting": True},
+        )
+        # A dict is copied now; the shared KV store is read later, off the event
+        # loop, which is just as valid as it can only be ahead of the sealed log
+        source = data if isinstance(data, SharedKVDict) else data.copy()
+        self._compaction_task = asyncio.create_task(
+            self._compact(source, covered_segment, storage_lock)
+        )
+
+    async def _compact(self, source, covered_segment: int, storage_lock):
+        try:
+            data_copy = (
+                await kv_copy(source) if isinstance(source, SharedKVDict) else source
+            )
+            snapshot_bytes = await asyncio.to_thread(self._write_snapshot, data_copy)
+            async with storage_lock:
+                for seq, file_name in self._segments():
+                    if seq <= covered_segment:
+                        os.remove(file_name)
+                await kv_update(
+                    self._state,
+                    {
+                        "wal_bytes": sum(
+                            os.path.getsize(f) for _, f in self._segments()
+                        ),
+                        "snapshot_bytes": snapshot_bytes,
+                    },
+                )
+            logger.info(
+                f"Process {os.getpid()} compacted {self.namespace} WAL into a snapshot of {len(data_copy)} records"
+            )
+        except Exception as e:
+            logger.error(f"Error compacting {self.namespace} WAL: {e}")
+        finally:
+            await kv_update(self._state, {"compacting": False})
+
+    def _write_snapshot(self, data: dict[str, Any]) -> int:
+        tmp_file = f"{self._snapshot_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self._snapshot_file)
+        return os.path.getsize(self._snapshot_file)
+
+    async def wait_for_compaction(self) -> None:
+        if self._compaction_task is not None:
+            await self._compaction_task
+            self._compaction_task = None
+
+    async def reset(self) -> None:
+        """Remove every segment and write an empty snapshot"""
+        await kv_clear(self._pending)
+        for _, file_name in self._segments():
+            os.remove(file_name)
+        await kv_update(
+            self._state,
+            {
+                "segment": 0,
+                "segment_bytes": 0,
+                "wal_bytes": 0,
+                "snapshot_bytes": self._write_snapshot({}),
+            },
+        )
@@ -0,0 +1,911 @@
+import asyncio
+import base64
+import glob
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, final
+
+import numpy as np
+
+from lightrag.base import BaseVectorStorage
+from lightrag.utils import compute_mdhash_id, get_document_types, logger
+
+from .shared_storage import (
+    get_storage_lock,
+    get_storage_read_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+# Rows converted to float32 at a time during a query, bounds the scratch memory
+QUERY_BLOCK_ROWS = 65536
+
+# Tombstoned rows are compacted away once they exceed both this count and
+# COMPACTION_RATIO of all rows
+COMPACTION_MIN_ROWS = 1024
+COMPACTION_RATIO = 0.25
+
+MANIFEST_VERSION = 1
+
+
+def _value_hash(encoded: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little")
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Segment:
+    """Read-only view of the persisted rows, backed by memory-mapped files
+
+    Opening a segment only maps the files, so loading and reloading cost the same
+    regardless of the number of rows, and every worker shares the page cache.
+    """
+
+    def __init__(self, directory: str, manifest: dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+        self.rows: int = manifest["rows"]
+        self.dim: int = manifest["dim"]
+        self.dtype = np.dtype(manifest["dtype"])
+        data_gen = manifest["data_generation"]
+        gen = manifest["generation"]
+
+        self.vectors = self._map(
+            f"vectors.{data_gen}.bin", self.dtype, (self.rows, self.dim)
+        )
+        self.created_at = self._map(
+            f"created_at.{data_gen}.bin", np.int64, (self.rows,)
+        )
+        self.columns: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._partitions: dict[str, dict[Any, np.ndarray]] = {}
+        for name in manifest["columns"]:
+            offsets = self._map(
+                f"col.{name}.{data_gen}.offsets", np.int64, (self.rows + 1,)
+            )
+            blob = self._map(
+                f"col.{name}.{data_gen}.blob",
+                np.uint8,
+                (int(offsets[-1]) if self.rows else 0,),
+            )
+            hashes = self._map(f"col.{name}.{data_gen}.hash", np.uint64, (self.rows,))
+            self.columns[name] = (offsets, blob, hashes)
+
+        if self.rows:
+            self.deleted = np.load(
+                os.path.join(directory, f"deleted.{gen}.npy"), mmap_mode="r"
+            )
+            index = np.load(os.path.join(directory, f"index.{gen}.npy"), mmap_mode="r")
+            self.index_hashes, self.index_rows = index[0], index[1]
+        else:
+            self.deleted = np.zeros(0, dtype=bool)
+            self.index_hashes = self.index_rows = np.zeros(0, dtype=np.uint64)
+
+    def _map(self, file_name: str, dtype, shape: tuple[int, ...]) -> np.ndarray:
+        if not self.rows or not np.prod(shape):
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(
+            os.path.join(self.directory, file_name), dtype=dtype, mode="r", shape=shape
+        )
+
+    def value(self, name: str, row: int) -> tuple[bool, Any]:
+        """Decode a column value, returns (present, value)"""
+        column = self.columns.get(name)
+        if column is None:
+            return False, None
+        offsets, blob, _ = column
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        if start == end:
+            return False, None
+        return True, json.loads(blob[start:end].tobytes())
+
+    def record(self, row: int) -> dict[str, Any]:
+        record = {}
+        for name in self.columns:
+            present, value = self.value(name, row)
+            if present:
+                record[name] = value
+        record["__created_at__"] = int(self.created_at[row])
+        return record
+
+    def partition(self, name: str) -> dict[Any, np.ndarray]:
+        """Rows per value of a column holding values or lists of values
+
+        Rows are grouped by value hash, so each distinct value is decoded once.
+        """
+        partition = self._partitions.get(name)
+        if partition is not None:
+            return partition
+        partition = {}
+        column = self.columns.get(name)
+        if column is not None and self.rows:
+            hashes = np.asarray(column[2])
+            _, first, inverse = np.unique(
+                hashes, return_index=True, return_inverse=True
+            )
+            groups = np.split(
+                np.argsort(inverse, kind="stable"),
+                np.cumsum(np.bincount(inverse))[:-1],
+            )
+            for row, group_rows in zip(first, groups):
+                present, value = self.value(name, int(row))
+                if not present:
+                    continue
+                for item in value if isinstance(value, list) else [value]:
+                    partition.setdefault(item, []).append(group_rows)
+            partition = {
+                item: np.sort(np.concatenate(parts))
+                for item, parts in partition.items()
+            }
+        self._partitions[name] = partition
+        return partition
+
+    def find_rows(self, key_hash: int) -> np.ndarray:
+        """Rows whose id hashes to key_hash according to the persisted index"""
+        lo = np.searchsorted(self.index_hashes, np.uint64(key_hash), side="left")
+        hi = np.searchsorted(self.index_hashes, np.uint64(key_hash), side="right")
+        return np.asarray(self.index_rows[lo:hi], dtype=np.int64)
+
+
+@final
+@dataclass
+class MemmapVectorDBStorage(BaseVectorStorage):
+    """Local vector storage keeping its vectors in a memory-mapped matrix.
+
+    All files live in ``vdb_<namespace>.mmap/``:
+
+    - ``vectors.<d>.bin``: row-major float32/float16 matrix of normalized vectors
+    - ``col.<field>.<d>.{offsets,blob,hash}``: one column per metadata field, JSON
+      values concatenated in a blob plus a hash per row for vectorized matching
+    - ``created_at.<d>.bin``: creation timestamps
+    - ``deleted.<g>.npy`` and ``index.<g>.npy``: tombstones and the id hash index
+      (sorted hashes and their rows)
+    - ``manifest.json``: row count and the current generations
+
+    Queries restricted to document types only score the rows of those types,
+    grouped per type when first needed after the segment is mapped.
+
+    Data files are append-only between compactions and only rows listed in the
+    manifest are mapped, so readers in other workers are never disturbed by a
+    write. Deletes and replaced rows are tombstoned and compacted away once they
+    make up a sizeable part of the matrix. An existing ``vdb_<namespace>.json``
+    written by NanoVectorDBStorage is imported on first start.
+    """
+
+    def __post_init__(self):
+        # Initialize basic attributes
+        self._storage_lock = None
+        self._read_lock = None
+        self.storage_updated = None
+
+        # Use global config value if specified, otherwise use default
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = cosine_threshold
+        self._vector_dtype = np.dtype(kwargs.get("vector_dtype", "float32"))
+        if self._vector_dtype not in (np.float32, np.float16):
+            raise ValueError("vector_dtype must be float32 or float16")
+
+        working_dir = self.global_config["working_dir"]
+        self._dir = os.path.join(working_dir, f"vdb_{self.namespace}.mmap")
+        self._manifest_file = os.path.join(self._dir, "manifest.json")
+        self._legacy_file = os.path.join(working_dir, f"vdb_{self.namespace}.json")
+        self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._dim = self.embedding_func.embedding_dim
+
+        self._segment: _Segment | None = None
+        # Tombstones of persisted rows, copied on the first local delete
+        self._deleted: np.ndarray | None = None
+        # Rows written since the last index_done_callback: id -> (vector, record)
+        self._pending: dict[str, tuple[np.ndarray, dict[str, Any]]] = {}
+        self._pending_matrix: np.ndarray | None = None
+        self._dirty = False
+
+    async def initialize(self):
+        """Initialize storage data"""
+        # Get the update flag for cross-process update notification
+        self.storage_updated = await get_update_flag(self.namespace)
+        # Get the storage lock for use in other methods
+        self._storage_lock = get_storage_lock(self.namespace, enable_logging=False)
+        self._read_lock = get_storage_read_lock(self.namespace)
+        async with self._storage_lock:
+            os.makedirs(self._dir, exist_ok=True)
+            if not os.path.exists(self._manifest_file) and os.path.exists(
+                self._legacy_file
+            ):
+                self._import_nano_vectordb()
+            self._load()
+
+    def _load(self) -> None:
+        """Map the persisted rows and discard local changes"""
+        manifest = None
+        if os.path.exists(self._manifest_file):
+            with open(self._manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+        if manifest is None:
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "dim": self._dim,
+                "dtype": self._vector_dtype.name,
+                "rows": 0,
+                "data_generation": 0,
+                "generation": 0,
+                "columns": [],
+            }
+        elif manifest["dim"] != self._dim:
+            raise ValueError(
+                f"Embedding dim mismatch for {self.namespace}: storage has "
+                f"{manifest['dim']}, embedding function has {self._dim}"
+            )
+        self._segment = _Segment(self._dir, manifest)
+        self._deleted = None
+        self._pending = {}
+        self._pending_matrix = None
+        self._dirty = False
+        logger.info(
+            f"Process {os.getpid()} mapped {self.namespace} with {self._segment.rows} rows"
+        )
+
+    async def _get_segment(self) -> _Segment:
+        """Check if the storage should be reloaded"""
+        # Only a reload needs the lock, skip it while no other process wrote
+        if not self.storage_updated.value:
+            return self._segment
+        # Acquire lock to prevent concurrent read and write
+        async with self._storage_lock:
+            # Check if data needs to be reloaded
+            if self.storage_updated.value:
+                logger.info(
+                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                self._load()
+                # Reset update flag
+                self.storage_updated.value = False
+            return self._segment
+
+    # --------------------------------------------------------------------------------
+    # Row bookkeeping
+    # --------------------------------------------------------------------------------
+
+    def _deleted_mask(self) -> np.ndarray:
+        return self._segment.deleted if self._deleted is None else self._deleted
+
+    def _tombstone(self, rows) -> None:
+        if self._deleted is None:
+            self._deleted = np.array(self._segment.deleted, dtype=bool)
+        self._deleted[rows] = True
+        self._dirty = True
+
+    def _find_row(self, id: str) -> int | None:
+        """Row of a live persisted record, or None"""
+        segment = self._segment
+        deleted = self._deleted_mask()
+        for row in segment.find_rows(_value_hash(_encode(id))):
+            if not deleted[row] and segment.value("__id__", row)[1] == id:
+                return int(row)
+        return None
+
+    def _get_record(self, id: str) -> dict[str, Any] | None:
+        pending = self._pending.get(id)
+        if pending is not None:
+            return pending[1]
+        row = self._find_row(id)
+        return None if row is None else self._segment.record(row)
+
+    def _remove(self, ids: list[str]) -> int:
+        removed = 0
+        rows = []
+        for id in ids:
+            if self._pending.pop(id, None) is not None:
+                self._pending_matrix = None
+                self._dirty = True
+                removed += 1
+            row = self._find_row(id)
+            if row is not None:
+                rows.append(row)
+        if rows:
+            self._tombstone(rows)
+        return removed + len(rows)
+
+    @staticmethod
+    def _format(record: dict[str, Any], **extra) -> dict[str, Any]:
+        return {
+            **record,
+            "id": record.get("__id__"),
+            "created_at": record.get("__created_at__"),
+            **extra,
+        }
+
+    # --------------------------------------------------------------------------------
+    # BaseVectorStorage API
+    # --------------------------------------------------------------------------------
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        logger.debug(f"Inserting {len(data)} to {self.namespace}")
+        if not data:
+            return
+
+        current_time = int(time.time())
+        list_data = [
+            {
+                "__id__": k,
+                "__created_at__": current_time,
+                **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
+            }
+            for k, v in data.items()
+        ]
+        contents = [v["content"] for v in data.values()]
+        batches = [
+            contents[i : i + self._max_batch_size]
+            for i in range(0, len(contents), self._max_batch_size)
+        ]
+
+        # Execute embedding outside of lock to avoid long lock times
+        embedding_tasks = [self.embedding_func(batch) for batch in batches]
+        embeddings_list = await asyncio.gather(*embedding_tasks)
+
+        embeddings = np.concatenate(embeddings_list)
+        if len(embeddings) != len(list_data):
+            # sometimes the embedding is not returned correctly. just log it.
+            logger.error(
+                f"embedding is not 1-1 with data, {len(embeddings)} != {len(list_data)}"
+            )
+            return
+        embeddings = _normalize(embeddings)
+
+        await self._get_segment()
+        async with self._storage_lock:
+            replaced = [
+                row
+                for row in (self._find_row(d["__id__"]) for d in list_data)
+                if row is not None
+            ]
+            if replaced:
+                self._tombstone(replaced)
+            for d, vector in zip(list_data, embeddings):
+                self._pending[d["__id__"]] = (vector, d)
+            self._pending_matrix = None
+            self._dirty = True
+
+    def _filter_mask(self, ids: list[str]) -> np.ndarray:
+        """Persisted rows whose id or full_doc_id is listed in ids"""
+        hashes = np.array([_value_hash(_encode(id)) for id in ids], dtype=np.uint64)
+        mask = np.zeros(self._segment.rows, dtype=bool)
+        for name in ("__id__", "full_doc_id"):
+            column = self._segment.columns.get(name)
+            if column is not None:
+                mask |= np.isin(column[2], hashes)
+        return mask
+
+    def _document_type_rows(self, document_types: list[str]) -> np.ndarray:
+        """Persisted rows of the given document types"""
+        parts = [
+            self._segment.partition(name).get(document_type)
+            for name in ("document_type", "document_types")
+            for document_type in document_types
+        ]
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    async def query(
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Top-k rows by cosine similarity
+
+        ``ids`` restricts the search to rows whose id or ``full_doc_id`` is listed,
+        ``document_types`` to the rows of those document types.
+        """
+        # Execute embedding outside of lock to avoid improve cocurrent
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        query_vector = _normalize(embedding[0]).reshape(-1)
+
+        segment = await self._get_segment()
+        async with self._read_lock:
+            threshold = self.cosine_better_than_threshold
+            candidates: list[tuple[float, int, str | None]] = []
+
+            # Persisted rows: blocked matrix-vector product over the memmap
+            if segment.rows:
+                allowed = ~self._deleted_mask()
+                if ids is not None:
+                    allowed &= self._filter_mask(ids)
+                if document_types:
+                    rows = self._document_type_rows(document_types)
+                    rows = rows[allowed[rows]]
+                else:
+                    rows = None
+                total = segment.rows if rows is None else len(rows)
+                for start in range(0, total, QUERY_BLOCK_ROWS):
+                    stop = min(start + QUERY_BLOCK_ROWS, total)
+                    if rows is None:
+                        block_rows = np.arange(start, stop)
+                        scores = (
+                            segment.vectors[start:stop].astype(np.float32)
+                            @ query_vector
+                        )
+                        scores[~allowed[start:stop]] = -np.inf
+                    else:
+                        # Only rows of the document types, already filtered
+                        block_rows = rows[start:stop]
+                        scores = (
+                            segment.vectors[block_rows].astype(np.float32)
+                            @ query_vector
+                        )
+                    hits = np.flatnonzero(scores >= threshold)
+                    if len(hits) > top_k:
+                        hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+                    candidates.extend(
+                        (float(scores[i]), int(block_rows[i]), None) for i in hits
+                    )
+
+            # Rows not persisted yet
+            if self._pending:
+                if self._pending_matrix is None:
+                    self._pending_matrix = np.stack(
+                        [vector for vector, _ in self._pending.values()]
+                    )
+                scores = self._pending_matrix @ query_vector
+                id_filter = set(ids) if ids is not None else None
+                type_filter = set(document_types) if document_types else None
+                for (pending_id, (_, record)), score in zip(
+                    self._pending.items(), scores
+                ):
+                    if score < threshold:
+                        continue
+                    if id_filter is not None and not (
+                        pending_id in id_filter
+                        or record.get("full_doc_id") in id_filter
+                    ):
+                        continue
+                    if type_filter is not None and type_filter.isdisjoint(
+                        get_document_types(record)
+                    ):
+                        continue
+                    candidates.append((float(score), -1, pending_id))
+
+            candidates.sort(key=lambda c: c[0], reverse=True)
+            results = []
+            for score, row, pending_id in candidates[:top_k]:
+                record = (
+                    self._pending[pending_id][1]
+                    if pending_id is not None
+                    else segment.record(row)
+                )
+                results.append(self._format(record, distance=score))
+            return results
+
+    @property
+    async def client_storage(self):
+        segment = await self._get_segment()
+        async with self._read_lock:
+            deleted = self._deleted_mask()
+            data = [
+                segment.record(row) for row in range(segment.rows) if not deleted[row]
+            ]
+            data.extend(record for _, record in self._pending.values())
+            return {"data": data}
+
+    async def delete(self, ids: list[str]):
+        """Delete vectors with specified IDs
+
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+
+        Args:
+            ids: List of vector IDs to be deleted
+        """
+        try:
+            await self._get_segment()
+            async with self._storage_lock:
+                removed = self._remove(ids)
+            logger.debug(
+                f"Successfully deleted {removed} vectors from {self.namespace}"
+            )
+        except Exception as e:
+            logger.error(f"Error while deleting vectors from {self.namespace}: {e}")
+
+    async def delete_entity(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        try:
+            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+            logger.debug(
+                f"Attempting to delete entity {entity_name} with ID {entity_id}"
+            )
+            await self._get_segment()
+            async with self._storage_lock:
+                if self._remove([entity_id]):
+                    logger.debug(f"Successfully deleted entity {entity_name}")
+                else:
+                    logger.debug(f"Entity {entity_name} not found in storage")
+        except Exception as e:
+            logger.error(f"Error deleting entity {entity_name}: {e}")
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        try:
+            segment = await self._get_segment()
+            async with self._storage_lock:
+                # Vectorized match on the hashes of the src_id/tgt_id columns
+                name_hash = np.uint64(_value_hash(_encode(entity_name)))
+                mask = np.zeros(segment.rows, dtype=bool)
+                for name in ("src_id", "tgt_id"):
+                    column = segment.columns.get(name)
+                    if column is not None:
+                        mask |= column[2] == name_hash
+                rows = [
+                    int(row)
+                    for row in np.flatnonzero(mask & ~self._deleted_mask())
+                    if entity_name
+                    in (
+                        segment.value("src_id", row)[1],
+                        segment.value("tgt_id", row)[1],
+                    )
+                ]
+                if rows:
+                    self._tombstone(rows)
+                pending_ids = [
+                    pending_id
+                    for pending_id, (_, record) in self._pending.items()
+                    if record.get("src_id") == entity_name
+                    or record.get("tgt_id") == entity_name
+                ]
+                for pending_id in pending_ids:
+                    del self._pending[pending_id]
+                if pending_ids:
+                    self._pending_matrix = None
+                    self._dirty = True
+
+            removed = len(rows) + len(pending_ids)
+            if removed:
+                logger.debug(f"Deleted {removed} relations for {entity_name}")
+            else:
+                logger.debug(f"No relations found for entity {entity_name}")
+        except Exception as e:
+            logger.error(f"Error deleting relations for {entity_name}: {e}")
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        """Get vector data by its ID
+
+        Args:
+            id: The unique identifier of the vector
+
+        Returns:
+            The vector data if found, or None if not found
+        """
+        await self._get_segment()
+        async with self._read_lock:
+            record = self._get_record(id)
+        return None if record is None else self._format(record)
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        """Get multiple vector data by their IDs
+
+        Args:
+            ids: List of unique identifiers
+
+        Returns:
+            List of vector data objects that were found
+        """
+        if not ids:
+            return []
+
+        await self._get_segment()
+        async with self._read_lock:
+            records = [self._get_record(id) for id in ids]
+        return [self._format(record) for record in records if record is not None]
+
+    # --------------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    def _write_rows(
+        self,
+        manifest: dict[str, Any],
+        vectors: np.ndarray,
+        created_at: np.ndarray,
+        columns: dict[str, list[bytes | None]],
+        append: bool,
+    ) -> None:
+        """Append rows to (or create) the data files of manifest's data generation"""
+        data_gen = manifest["data_generation"]
+        rows = manifest["rows"] if append else 0
+        mode = "ab" if append else "wb"
+
+        def open_file(name: str, size: int):
+            path = self._file(name)
+            # Drop a tail left behind by an interrupted write
+            if append and os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+            return open(path, mode)
+
+        itemsize = np.dtype(manifest["dtype"]).itemsize
+        with open_file(
+            f"vectors.{data_gen}.bin", rows * manifest["dim"] * itemsize
+        ) as f:
+            f.write(np.ascontiguousarray(vectors, dtype=manifest["dtype"]).tobytes())
+        with open_file(f"created_at.{data_gen}.bin", rows * 8) as f:
+            f.write(np.asarray(created_at, dtype=np.int64).tobytes())
+
+        for name in manifest["columns"]:
+            values = columns.get(name) or [None] * len(vectors)
+            if append and name in self._segment.columns:
+                base = int(self._segment.columns[name][0][-1])
+            else:
+                # New column: rows written before it existed have no value
+                base = 0
+                if append and rows:
+                    with open(self._file(f"col.{name}.{data_gen}.offsets"), "wb") as f:
+                        f.write(np.zeros(rows + 1, dtype=np.int64).tobytes())
+                    with open(self._file(f"col.{name}.{data_gen}.hash"), "wb") as f:
+                        f.write(np.zeros(rows, dtype=np.uint64).tobytes())
+                    open(self._file(f"col.{name}.{data_gen}.blob"), "wb").close()
+            lengths = np.array([len(v) if v else 0 for v in values], dtype=np.int64)
+            offsets = base + np.cumsum(lengths)
+            if not rows:
+                offsets = np.concatenate([[0], offsets])
+            hashes = np.array(
+                [_value_hash(v) if v else 0 for v in values], dtype=np.uint64
+            )
+            offsets_size = (rows + 1) * 8 if rows else 0
+            with open_file(f"col.{name}.{data_gen}.offsets", offsets_size) as f:
+                f.write(offsets.astype(np.int64).tobytes())
+            with open_file(f"col.{name}.{data_gen}.blob", base) as f:
+                f.write(b"".join(v for v in values if v))
+            with open_file(f"col.{name}.{data_gen}.hash", rows * 8) as f:
+                f.write(hashes.tobytes())
+
+    def _write_generation(self, manifest: dict[str, Any], deleted: np.ndarray) -> None:
+        """Write tombstones, the id index and the manifest of a new generation"""
+        manifest["generation"] += 1
+        gen = manifest["generation"]
+        if manifest["rows"]:
+            id_hashes = np.memmap(
+                self._file(f"col.__id__.{manifest['data_generation']}.hash"),
+                dtype=np.uint64,
+                mode="r",
+                shape=(manifest["rows"],),
+            )
+            live_rows = np.flatnonzero(~deleted).astype(np.uint64)
+            live_hashes = np.asarray(id_hashes)[live_rows.astype(np.int64)]
+            order = np.argsort(live_hashes, kind="stable")
+            np.save(self._file(f"deleted.{gen}.npy"), deleted)
+            np.save(
+                self._file(f"index.{gen}.npy"),
+                np.stack([live_hashes[order], live_rows[order]]),
+            )
+            del id_hashes
+        tmp_file = f"{self._manifest_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, self._manifest_file)
+        self._remove_stale_files(manifest)
+
+    def _remove_stale_files(self, manifest: dict[str, Any]) -> None:
+        data_gen = str(manifest["data_generation"])
+        gen = str(manifest["generation"])
+        for path in glob.glob(os.path.join(glob.escape(self._dir), "*")):
+            parts = os.path.basename(path).split(".")
+            if parts[0] == "manifest":
+                continue
+            current = gen if parts[0] in ("deleted", "index") else data_gen
+            if parts[-2] != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Still mapped by another worker on platforms that forbid
+                    # removing open files, retried after the next write
+                    pass
+
+    def _encoded_value(self, name: str, row: int) -> bytes | None:
+        column = self._segment.columns.get(name)
+        if column is None:
+            return None
+        offsets, blob, _ = column
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        return blob[start:end].tobytes() if start != end else None
+
+    def _persist(self) -> None:
+        """Write local changes as a new generation (call with lock held)"""
+        segment = self._segment
+        manifest = dict(segment.manifest)
+        deleted = np.array(self._deleted_mask(), dtype=bool)
+        records = [record for _, record in self._pending.values()]
+        fields = {name for record in records for name in record} - {"__created_at__"}
+        columns = {
+            name: [_encode(r[name]) if name in r else None for r in records]
+            for name in fields
+        }
+        manifest["columns"] = sorted(set(manifest["columns"]) | fields)
+
+        dead = int(deleted.sum())
+        if dead > COMPACTION_MIN_ROWS and dead > COMPACTION_RATIO * segment.rows:
+            # Compaction: rewrite the live rows into a new data generation
+            live = np.flatnonzero(~deleted)
+            for name in manifest["columns"]:
+                columns[name] = [
+                    self._encoded_value(name, int(row)) for row in live
+                ] + columns.get(name, [None] * len(records))
+            vectors = [np.asarray(segment.vectors[live])]
+            created_at = [np.asarray(segment.created_at[live])]
+            manifest["data_generation"] += 1
+            manifest["rows"] = 0
+            deleted = np.zeros(0, dtype=bool)
+            append = False
+            logger.info(
+                f"Process {os.getpid()} compacting {self.namespace}: dropping {dead} deleted rows"
+            )
+        else:
+            vectors, created_at = [], []
+            append = True
+
+        if records:
+            vectors.append(np.stack([vector for vector, _ in self._pending.values()]))
+            created_at.append(
+                np.array([r["__created_at__"] for r in records], dtype=np.int64)
+            )
+        if vectors:
+            vectors = np.concatenate(vectors)
+            created_at = np.concatenate(created_at)
+            self._write_rows(manifest, vectors, created_at, columns, append)
+            manifest["rows"] += len(vectors)
+            deleted = np.concatenate([deleted, np.zeros(len(vectors), dtype=bool)])
+
+        self._write_generation(manifest, deleted)
+        self._segment = _Segment(self._dir, manifest)
+        self._deleted = None
+        self._pending = {}
+        self._pending_matrix = None
+        self._dirty = False
+
+    def _import_nano_vectordb(self) -> None:
+        """Convert a vdb_<namespace>.json written by NanoVectorDBStorage"""
+        with open(self._legacy_file, encoding="utf-8") as f:
+            storage = json.load(f)
+        data = storage.get("data", [])
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "dim": storage.get("embedding_dim", self._dim),
+            "dtype": self._vector_dtype.name,
+            "rows": 0,
+            "data_generation": 0,
+            "generation": 0,
+            "columns": [],
+        }
+        self._segment = _Segment(self._dir, manifest)
+        if data:
+            matrix = np.frombuffer(
+                base64.b64decode(storage["matrix"]), dtype=np.float32
+            ).reshape(-1, manifest["dim"])
+            # Keep the last occurrence of duplicated ids
+            last = {d["__id__"]: i for i, d in enumerate(data)}
+            keep = sorted(last.values())
+            records = [data[i] for i in keep]
+            fields = {name for r in records for name in r} - {"__created_at__"}
+            manifest["columns"] = sorted(fields)
+            columns = {
+                name: [_encode(r[name]) if name in r else None for r in records]
+                for name in fields
+            }
+            created_at = np.array(
+                [r.get("__created_at__", 0) for r in records], dtype=np.int64
+            )
+            self._write_rows(
+                manifest, _normalize(matrix[keep]), created_at, columns, append=False
+            )
+            manifest["rows"] = len(records)
+        self._write_generation(manifest, np.zeros(manifest["rows"], dtype=bool))
+        logger.info(
+            f"Imported {manifest['rows']} vectors for {self.namespace} from {self._legacy_file}"
+        )
+
+    async def index_done_callback(self) -> bool:
+        """Save data to disk"""
+        async with self._storage_lock:
+            # Check if storage was updated by another process
+            if self.storage_updated.value:
+                # Storage was updated by another process, reload data instead of saving
+                logger.warning(
+                    f"Storage for {self.namespace} was updated by another process, reloading..."
+                )
+                self._load()
+                # Reset update flag
+                self.storage_updated.value = False
+                return False  # Return error
+
+            if not self._dirty:
+                return True
+
+            try:
+                self._persist()
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+                return True  # Return success
+            except Exception as e:
+                logger.error(f"Error saving data for {self.namespace}: {e}")
+                return False  # Return error
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all vector data from storage and clean up resources
+
+        This method will:
+        1. Remove the memory-mapped storage files
+        2. Reset the in-memory state
+        3. Update flags to notify other processes
+        4. Changes is persisted to disk immediately
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._storage_lock:
+                manifest = {
+                    **self._segment.manifest,
+                    "rows": 0,
+                    "columns": [],
+                    "data_generation": self._segment.manifest["data_generation"] + 1,
+                }
+                self._write_generation(manifest, np.zeros(0, dtype=bool))
+                if os.path.exists(self._legacy_file):
+                    os.remove(self._legacy_file)
+                self._load()
+
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+
+                logger.info(
+                    f"Process {os.getpid()} drop {self.namespace}(dir:{self._dir})"
+                )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
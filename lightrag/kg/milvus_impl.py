@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 from typing import Any, final
 from dataclasses import dataclass
@@ -106,15 +107,35 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         results = self._client.upsert(collection_name=self.namespace, data=list_data)
         return results
 
+    def _document_type_filter(self, document_types: list[str]) -> str:
+        """Filter expression on the dynamic document type fields"""
+        values = json.dumps(list(document_types), ensure_ascii=False)
+        expressions = []
+        if "document_type" in self.meta_fields:
+            expressions.append(f"document_type in {values}")
+        if "document_types" in self.meta_fields:
+            expressions.append(f"json_contains_any(document_types, {values})")
+        return " or ".join(expressions)
+
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
+        expression = ""
+        if document_types:
+            expression = self._document_type_filter(document_types)
+            if not expression:
+                return []
         embedding = await self.embedding_func(
             [query], _priority=5
         )  # higher priority for query
         results = self._client.search(
             collection_name=self.namespace,
             data=embedding,
+            filter=expression,
             limit=top_k,
             output_fields=list(self.meta_fields) + ["created_at"],
             search_params={
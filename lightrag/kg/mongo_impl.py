@@ -1,21 +1,30 @@
 import os
+import re
+import time
 from dataclasses import dataclass, field
 import numpy as np
 import configparser
 import asyncio
 
-from typing import Any, List, Union, final
+from typing import Any, AsyncIterator, List, Literal, Union, final, get_args
 
 from ..base import (
     BaseGraphStorage,
     BaseKVStorage,
     BaseVectorStorage,
     DocProcessingStatus,
+    DocSortField,
     DocStatus,
     DocStatusStorage,
 )
+from ..constants import LLM_CACHE_EVICTION_INTERVAL
 from ..namespace import NameSpace, is_namespace
-from ..utils import logger, compute_mdhash_id
+from ..utils import (
+    logger,
+    compute_mdhash_id,
+    generate_cache_key,
+    record_storage_round_trip,
+)
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 import pipmaster as pm
 
@@ -30,7 +39,7 @@ from motor.motor_asyncio import (  # type: ignore
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection,
 )
-from pymongo.operations import SearchIndexModel  # type: ignore
+from pymongo.operations import SearchIndexModel, UpdateOne  # type: ignore
 from pymongo.errors import PyMongoError  # type: ignore
 
 config = configparser.ConfigParser()
@@ -82,11 +91,14 @@ class MongoKVStorage(BaseKVStorage):
 
     def __post_init__(self):
         self._collection_name = self.namespace
+        self._next_eviction_sweep = 0.0
 
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
+            if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+                await self._data.create_index("access_time")
             logger.debug(f"Use MongoDB as KV {self._collection_name}")
 
     async def finalize(self):
@@ -96,11 +108,16 @@ class MongoKVStorage(BaseKVStorage):
             self._data = None
 
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        record_storage_round_trip(self.namespace)
         return await self._data.find_one({"_id": id})
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        if not ids:
+            return []
+        record_storage_round_trip(self.namespace)
         cursor = self._data.find({"_id": {"$in": ids}})
-        return await cursor.to_list()
+        by_id = {doc["_id"]: doc async for doc in cursor}
+        return [by_id.get(id) for id in ids]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         cursor = self._data.find({"_id": {"$in": list(keys)}}, {"_id": 1})
@@ -112,39 +129,74 @@ class MongoKVStorage(BaseKVStorage):
         if not data:
             return
 
-        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            update_tasks: list[Any] = []
-            for mode, items in data.items():
-                for k, v in items.items():
-                    key = f"{mode}_{k}"
-                    data[mode][k]["_id"] = f"{mode}_{k}"
-                    update_tasks.append(
-                        self._data.update_one(
-                            {"_id": key}, {"$setOnInsert": v}, upsert=True
-                        )
-                    )
-            await asyncio.gather(*update_tasks)
-        else:
-            update_tasks = []
-            for k, v in data.items():
-                data[k]["_id"] = k
-                update_tasks.append(
-                    self._data.update_one({"_id": k}, {"$set": v}, upsert=True)
+        update_tasks: list[Any] = []
+        for k, v in data.items():
+            data[k]["_id"] = k
+            update_tasks.append(
+                self._data.update_one({"_id": k}, {"$set": v}, upsert=True)
+            )
+        await asyncio.gather(*update_tasks)
+
+    async def get_cache_by_mode(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = generate_cache_key(mode, "")
+        cursor = self._data.find({"_id": {"$regex": f"^{re.escape(prefix)}"}})
+        return {doc["_id"][len(prefix) :]: doc async for doc in cursor}
+
+    async def evict_cache(self, max_entries: int, ttl: int) -> list[str]:
+        """Evict expired and least recently written entries beyond max_entries
+
+        Runs at most every LLM_CACHE_EVICTION_INTERVAL seconds.
+        """
+        now = time.time()
+        if now < self._next_eviction_sweep:
+            return []
+        self._next_eviction_sweep = now + LLM_CACHE_EVICTION_INTERVAL
+
+        evicted = []
+        try:
+            if ttl:
+                cursor = self._data.find(
+                    {"create_time": {"$lt": int(now) - ttl}}, {"_id": 1}
                 )
-            await asyncio.gather(*update_tasks)
+                ids = [doc["_id"] async for doc in cursor]
+                if ids:
+                    await self._data.delete_many({"_id": {"$in": ids}})
+                    evicted.extend(ids)
+            if max_entries:
+                count = await self._data.count_documents({})
+                if count > max_entries:
+                    excess = count - int(max_entries * 0.9)
+                    cursor = (
+                        self._data.find({}, {"_id": 1})
+                        .sort("access_time", 1)
+                        .limit(excess)
+                    )
+                    ids = [doc["_id"] async for doc in cursor]
+                    await self._data.delete_many({"_id": {"$in": ids}})
+                    evicted.extend(ids)
+        except PyMongoError as e:
+            logger.error(f"Error evicting cache entries from {self.namespace}: {e}")
+        if evicted:
+            logger.info(
+                f"Evicted {len(evicted)} LLM cache entries from {self.namespace}"
+            )
+        return evicted
 
-    async def get_by_mode_and_id(self, mode: str, id: str) -> Union[dict, None]:
-        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            res = {}
-            v = await self._data.find_one({"_id": mode + "_" + id})
-            if v:
-                res[id] = v
-                logger.debug(f"llm_response_cache find one by:{id}")
-                return res
-            else:
-                return None
-        else:
-            return None
+    async def migrate_legacy_cache_ids(self, modes: list[str]) -> int:
+        """Rename cache documents from the legacy ``{mode}_{args_hash}`` ids to flat keys
+
+        Returns:
+            Number of migrated documents
+        """
+        pattern = f"^({'|'.join(re.escape(mode) for mode in modes)})_"
+        migrated = 0
+        async for doc in self._data.find({"_id": {"$regex": pattern}}):
+            mode, _, args_hash = doc["_id"].partition("_")
+            doc["_id"] = generate_cache_key(mode, args_hash)
+            await self._data.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+            await self._data.delete_one({"_id": f"{mode}_{args_hash}"})
+            migrated += 1
+        return migrated
 
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
@@ -180,8 +232,9 @@ class MongoKVStorage(BaseKVStorage):
             return False
 
         try:
-            # Build regex pattern to match documents with the specified modes
-            pattern = f"^({'|'.join(modes)})_"
+            # Build regex pattern to match documents with the specified modes,
+            # including the legacy {mode}_{args_hash} ids
+            pattern = f"^({'|'.join(re.escape(mode) for mode in modes)})[:_]"
             result = await self._data.delete_many({"_id": {"$regex": pattern}})
             logger.info(f"Deleted {result.deleted_count} documents by modes: {modes}")
             return True
@@ -224,6 +277,8 @@ class MongoDocStatusStorage(DocStatusStorage):
         if self.db is None:
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
+            # Status counts and paginated listings of documents filter by status
+            await self._data.create_index("status")
             logger.debug(f"Use MongoDB as DocStatus {self._collection_name}")
 
     async def finalize(self):
@@ -236,7 +291,7 @@ class MongoDocStatusStorage(DocStatusStorage):
         return await self._data.find_one({"_id": id})
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        cursor = self._data.find({"_id": {"$in": ids}})
+        cursor = self._data.find({"_id": {"$in": ids}}, {"content": 0})
         return await cursor.to_list()
 
     async def filter_keys(self, data: set[str]) -> set[str]:
@@ -250,7 +305,9 @@ class MongoDocStatusStorage(DocStatusStorage):
             return
         update_tasks: list[Any] = []
         for k, v in data.items():
-            data[k]["_id"] = k
+            # The document body lives in full_docs only
+            v = {field: value for field, value in v.items() if field != "content"}
+            v["_id"] = k
             update_tasks.append(
                 self._data.update_one({"_id": k}, {"$set": v}, upsert=True)
             )
@@ -270,21 +327,48 @@ class MongoDocStatusStorage(DocStatusStorage):
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
-        cursor = self._data.find({"status": status.value})
+        cursor = self._data.find({"status": status.value}, {"content": 0})
         result = await cursor.to_list()
-        return {
-            doc["_id"]: DocProcessingStatus(
-                content=doc["content"],
-                content_summary=doc.get("content_summary"),
-                content_length=doc["content_length"],
-                status=doc["status"],
-                created_at=doc.get("created_at"),
-                updated_at=doc.get("updated_at"),
-                chunks_count=doc.get("chunks_count", -1),
-                file_path=doc.get("file_path", doc["_id"]),
-            )
-            for doc in result
-        }
+        return {doc["_id"]: self._to_doc_status(doc) for doc in result}
+
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: DocSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Sort, count and page the documents in the collection"""
+        if sort_field not in get_args(DocSortField):
+            raise ValueError(f"Unsupported sort field: {sort_field}")
+        query = {"status": status_filter.value} if status_filter else {}
+        direction = 1 if sort_direction == "asc" else -1
+        sort = [("_id", direction)]
+        if sort_field != "id":
+            # _id breaks ties so pages never overlap
+            sort.insert(0, (sort_field, direction))
+        total_count = await self._data.count_documents(query)
+        cursor = (
+            self._data.find(query, {"content": 0})
+            .sort(sort)
+            .skip((page - 1) * page_size)
+            .limit(page_size)
+        )
+        result = await cursor.to_list()
+        return [(doc["_id"], self._to_doc_status(doc)) for doc in result], total_count
+
+    @staticmethod
+    def _to_doc_status(doc: dict[str, Any]) -> DocProcessingStatus:
+        return DocProcessingStatus(
+            content_summary=doc.get("content_summary"),
+            content_length=doc["content_length"],
+            status=doc["status"],
+            created_at=doc.get("created_at"),
+            updated_at=doc.get("updated_at"),
+            chunks_count=doc.get("chunks_count", -1),
+            file_path=doc.get("file_path", doc["_id"]),
+        )
 
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
@@ -553,6 +637,37 @@ class MongoGraphStorage(BaseGraphStorage):
         """
         return await self.collection.find_one({"_id": node_id})
 
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        """
+        Return the node documents of node_ids found, fetched in one query.
+        """
+        if not node_ids:
+            return {}
+        cursor = self.collection.find({"_id": {"$in": node_ids}})
+        return {doc["_id"]: doc async for doc in cursor}
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        """
+        Return the edges of the (src, tgt) pairs found, reading every source
+        document in one query.
+        """
+        if not pairs:
+            return {}
+        sources = list({pair["src"] for pair in pairs})
+        cursor = self.collection.find({"_id": {"$in": sources}}, {"edges": 1})
+        edges_by_source = {
+            doc["_id"]: {e.get("target"): e for e in doc.get("edges", [])}
+            async for doc in cursor
+        }
+        result = {}
+        for pair in pairs:
+            edge = edges_by_source.get(pair["src"], {}).get(pair["tgt"])
+            if edge is not None:
+                result[(pair["src"], pair["tgt"])] = edge
+        return result
+
     async def get_edge(
         self, source_node_id: str, target_node_id: str
     ) -> dict[str, str] | None:
@@ -646,6 +761,49 @@ class MongoGraphStorage(BaseGraphStorage):
             {"_id": source_node_id}, {"$push": {"edges": new_edge}}
         )
 
+    async def upsert_nodes(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Insert or update many node documents with a single bulk_write.
+        """
+        if not nodes:
+            return
+        operations = [
+            UpdateOne(
+                {"_id": node_id},
+                {"$set": {**node_data}, "$setOnInsert": {"edges": []}},
+                upsert=True,
+            )
+            for node_id, node_data in nodes.items()
+        ]
+        await self.collection.bulk_write(operations, ordered=False)
+
+    async def upsert_edges(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """
+        Upsert many edges with a single ordered bulk_write, replacing an edge
+        to the same target like upsert_edge does.
+        """
+        if not edges:
+            return
+        operations = []
+        for (source_node_id, target_node_id), edge_data in edges.items():
+            new_edge = {"target": target_node_id}
+            new_edge.update(edge_data)
+            operations.extend(
+                [
+                    UpdateOne(
+                        {"_id": source_node_id},
+                        {"$setOnInsert": {"edges": []}},
+                        upsert=True,
+                    ),
+                    UpdateOne(
+                        {"_id": source_node_id},
+                        {"$pull": {"edges": {"target": target_node_id}}},
+                    ),
+                    UpdateOne({"_id": source_node_id}, {"$push": {"edges": new_edge}}),
+                ]
+            )
+        await self.collection.bulk_write(operations, ordered=True)
+
     #
     # -------------------------------------------------------------------------
     # DELETION
@@ -687,6 +845,54 @@ class MongoGraphStorage(BaseGraphStorage):
             labels.append(doc["_id"])
         return labels
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """
+        Page over the node documents in _id order, without their edges.
+        """
+        after = ""
+        while True:
+            cursor = (
+                self.collection.find({"_id": {"$gt": after}}, {"edges": 0})
+                .sort("_id", 1)
+                .limit(batch_size)
+            )
+            nodes = [(doc["_id"], doc) async for doc in cursor]
+            if not nodes:
+                return
+            yield nodes
+            after = nodes[-1][0]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """
+        Page over the edges embedded in pages of source documents.
+        """
+        after = ""
+        while True:
+            cursor = (
+                self.collection.find({"_id": {"$gt": after}}, {"edges": 1})
+                .sort("_id", 1)
+                .limit(batch_size)
+            )
+            docs = [doc async for doc in cursor]
+            if not docs:
+                return
+            edges = [
+                (
+                    doc["_id"],
+                    edge["target"],
+                    {k: v for k, v in edge.items() if k != "target"},
+                )
+                for doc in docs
+                for edge in doc.get("edges", [])
+            ]
+            if edges:
+                yield edges
+            after = docs[-1]["_id"]
+
     async def get_knowledge_graph(
         self, node_label: str, max_depth: int = 5
     ) -> KnowledgeGraph:
@@ -945,6 +1151,11 @@ class MongoVectorDBStorage(BaseVectorStorage):
         self.cosine_better_than_threshold = cosine_threshold
         self._collection_name = self.namespace
         self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._document_type_fields = [
+            name
+            for name in ("document_type", "document_types")
+            if name in self.meta_fields
+        ]
 
     async def initialize(self):
         if self.db is None:
@@ -966,24 +1177,39 @@ class MongoVectorDBStorage(BaseVectorStorage):
         """Creates an Atlas Vector Search index."""
         try:
             index_name = "vector_knn_index"
+            # Document types are indexed as filter fields so that $vectorSearch
+            # can apply document type filters while searching
+            filter_fields = [
+                {"type": "filter", "path": name} for name in self._document_type_fields
+            ]
+            definition = {
+                "fields": [
+                    {
+                        "type": "vector",
+                        "numDimensions": self.embedding_func.embedding_dim,  # Ensure correct dimensions
+                        "path": "vector",
+                        "similarity": "cosine",  # Options: euclidean, cosine, dotProduct
+                    },
+                    *filter_fields,
+                ]
+            }
 
             indexes = await self._data.list_search_indexes().to_list(length=None)
             for index in indexes:
                 if index["name"] == index_name:
-                    logger.debug("vector index already exist")
+                    indexed_paths = {
+                        f.get("path")
+                        for f in index.get("latestDefinition", {}).get("fields", [])
+                    }
+                    if any(f["path"] not in indexed_paths for f in filter_fields):
+                        await self._data.update_search_index(index_name, definition)
+                        logger.info("Vector index updated with document type filters")
+                    else:
+                        logger.debug("vector index already exist")
                     return
 
             search_index_model = SearchIndexModel(
-                definition={
-                    "fields": [
-                        {
-                            "type": "vector",
-                            "numDimensions": self.embedding_func.embedding_dim,  # Ensure correct dimensions
-                            "path": "vector",
-                            "similarity": "cosine",  # Options: euclidean, cosine, dotProduct
-                        }
-                    ]
-                },
+                definition=definition,
                 name=index_name,
                 type="vectorSearch",
             )
@@ -1034,9 +1260,30 @@ class MongoVectorDBStorage(BaseVectorStorage):
         return list_data
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         """Queries the vector database using Atlas Vector Search."""
+        vector_search = {
+            "index": "vector_knn_index",  # Ensure this matches the created index name
+            "path": "vector",
+            "numCandidates": 100,  # Adjust for performance
+            "limit": top_k,
+        }
+        if document_types:
+            if not self._document_type_fields:
+                return []
+            # $in matches a single value as well as any element of a list
+            vector_search["filter"] = {
+                "$or": [
+                    {name: {"$in": list(document_types)}}
+                    for name in self._document_type_fields
+                ]
+            }
+
         # Generate the embedding
         embedding = await self.embedding_func(
             [query], _priority=5
@@ -1047,15 +1294,7 @@ class MongoVectorDBStorage(BaseVectorStorage):
 
         # Define the aggregation pipeline with the converted query vector
         pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "vector_knn_index",  # Ensure this matches the created index name
-                    "path": "vector",
-                    "queryVector": query_vector,
-                    "numCandidates": 100,  # Adjust for performance
-                    "limit": top_k,
-                }
-            },
+            {"$vectorSearch": {**vector_search, "queryVector": query_vector}},
             {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
             {"$match": {"score": {"$gte": self.cosine_better_than_threshold}}},
             {"$project": {"vector": 0}},
@@ -0,0 +1,329 @@
+"""Per-namespace reader/writer locks for storage data.
+
+Each storage namespace gets its own lock instead of sharing one global storage
+lock, so writes to one namespace no longer block readers of another, and
+readers of the same namespace run concurrently.
+
+Inside a process the lock is a writer-preferring asyncio reader/writer lock. In
+multiprocess mode the process that holds it additionally holds an ``flock`` on
+a per-namespace lock file, shared while it has readers and exclusive while it
+has a writer, which extends the same semantics across gunicorn workers without
+calls to the manager process. A writer first takes an intent file next to it:
+while a writer of another process waits, readers stop joining the shared hold
+of their process, so writers are preferred across processes too.
+
+Every lock records how long callers waited for it and how long they held it;
+``lock_metrics`` reports the figures of the current process.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows, which has no multiprocess mode
+    fcntl = None
+
+# Polling interval bounds while another process holds the lock file
+_POLL_MIN_SECONDS = 0.0005
+_POLL_MAX_SECONDS = 0.02
+
+
+def process_locks_supported() -> bool:
+    return fcntl is not None
+
+
+class _LockStats:
+    __slots__ = ("count", "wait_total", "wait_max", "hold_total", "hold_max")
+
+    def __init__(self):
+        self.count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.count += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def record_hold(self, seconds: float) -> None:
+        self.hold_total += seconds
+        self.hold_max = max(self.hold_max, seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        count = self.count or 1
+        return {
+            "acquisitions": self.count,
+            "wait_avg_ms": round(self.wait_total / count * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "hold_avg_ms": round(self.hold_total / count * 1000, 3),
+            "hold_max_ms": round(self.hold_max * 1000, 3),
+        }
+
+
+def _try_flock(fd: int, operation: int) -> bool:
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+async def _poll(attempt) -> None:
+    delay = _POLL_MIN_SECONDS
+    while not attempt():
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _POLL_MAX_SECONDS)
+
+
+class _FileLock:
+    """flock on a lock file plus a writer intent file, one descriptor each per process"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fd = None
+        self._intent_fd = None
+        self._pid = None
+
+    def _descriptors(self) -> tuple[int, int]:
+        if self._pid != os.getpid():
+            # A descriptor inherited through fork shares its lock with the parent
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._intent_fd = os.open(
+                f"{self._path}.intent", os.O_RDWR | os.O_CREAT, 0o600
+            )
+            self._pid = os.getpid()
+        return self._fd, self._intent_fd
+
+    def writer_pending(self) -> bool:
+        """Whether a writer, possibly of another process, waits for the lock"""
+        _, intent_fd = self._descriptors()
+        if not _try_flock(intent_fd, fcntl.LOCK_SH):
+            return True
+        fcntl.flock(intent_fd, fcntl.LOCK_UN)
+        return False
+
+    async def acquire_shared(self) -> None:
+        fd, _ = self._descriptors()
+        await _poll(lambda: not self.writer_pending() and _try_flock(fd, fcntl.LOCK_SH))
+
+    async def acquire_exclusive(self) -> None:
+        fd, intent_fd = self._descriptors()
+        await _poll(lambda: _try_flock(intent_fd, fcntl.LOCK_EX))
+        try:
+            await _poll(lambda: _try_flock(fd, fcntl.LOCK_EX))
+        finally:
+            # Holding the lock itself keeps readers out from here on
+            fcntl.flock(intent_fd, fcntl.LOCK_UN)
+
+    def release(self) -> None:
+        fd, _ = self._descriptors()
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class NamespaceRWLock:
+    """Reader/writer lock of one namespace"""
+
+    def __init__(self, namespace: str, lock_dir: str | None = None):
+        self.namespace = namespace
+        self._file_lock = None
+        if lock_dir is not None:
+            safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)[:64]
+            digest = hashlib.md5(namespace.encode("utf-8")).hexdigest()[:8]
+            self._file_lock = _FileLock(
+                os.path.join(lock_dir, f"{safe_name}.{digest}.lock")
+            )
+        self._cond: asyncio.Condition | None = None
+        self._loop = None
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        # A reader is taking the lock file for the process
+        self._file_pending = False
+        # A writer of another process waits: readers stop joining the hold
+        self._draining = False
+        self.stats = {"read": _LockStats(), "write": _LockStats()}
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            # A lock can only be held on the loop that created its condition
+            self._cond = asyncio.Condition()
+            self._loop = loop
+        return self._cond
+
+    def _read_blocked(self) -> bool:
+        return (
+            self._writer
+            or self._waiting_writers > 0
+            or self._file_pending
+            or self._draining
+        )
+
+    async def acquire_read(self) -> None:
+        cond = self._condition()
+        async with cond:
+            while True:
+                await cond.wait_for(lambda: not self._read_blocked())
+                if self._file_lock is None or not self._readers:
+                    break
+                if not self._file_lock.writer_pending():
+                    # Join the shared hold of the process
+                    self._readers += 1
+                    return
+                self._draining = True
+            if self._file_lock is None:
+                self._readers += 1
+                return
+            # The first local reader takes the lock file for the whole process,
+            # waiting for it without holding the condition
+            self._file_pending = True
+        try:
+            await self._file_lock.acquire_shared()
+        except BaseException:
+            async with cond:
+                self._file_pending = False
+                cond.notify_all()
+            raise
+        async with cond:
+            self._file_pending = False
+            self._readers += 1
+            cond.notify_all()
+
+    async def release_read(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._readers -= 1
+            if not self._readers:
+                if self._file_lock is not None:
+                    self._file_lock.release()
+                self._draining = False
+                cond.notify_all()
+
+    async def acquire_write(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._waiting_writers += 1
+            try:
+                await cond.wait_for(
+                    lambda: not self._writer
+                    and not self._readers
+                    and not self._file_pending
+                )
+                # Reserve the lock locally, then wait for the lock file without
+                # holding the condition
+                self._writer = True
+            finally:
+                self._waiting_writers -= 1
+                if not self._writer:
+                    # Cancelled while waiting: let blocked readers re-check
+                    cond.notify_all()
+        if self._file_lock is None:
+            return
+        try:
+            await self._file_lock.acquire_exclusive()
+        except BaseException:
+            async with cond:
+                self._writer = False
+                cond.notify_all()
+            raise
+
+    async def release_write(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._writer = False
+            if self._file_lock is not None:
+                self._file_lock.release()
+            cond.notify_all()
+
+    def read(self) -> "RWLockGuard":
+        return RWLockGuard(self, exclusive=False)
+
+    def write(self) -> "RWLockGuard":
+        return RWLockGuard(self, exclusive=True)
+
+
+class RWLockGuard:
+    """``async with`` guard for one side of a NamespaceRWLock
+
+    Storages keep one guard and use it from many tasks at once, so hold start
+    times are tracked per task.
+    """
+
+    def __init__(self, lock: NamespaceRWLock, exclusive: bool):
+        self._lock = lock
+        self._exclusive = exclusive
+        self._stats = lock.stats["write" if exclusive else "read"]
+        self._held_since: dict[Any, list[float]] = {}
+
+    async def __aenter__(self) -> "RWLockGuard":
+        start = time.perf_counter()
+        if self._exclusive:
+            await self._lock.acquire_write()
+        else:
+            await self._lock.acquire_read()
+        acquired = time.perf_counter()
+        self._stats.record_wait(acquired - start)
+        self._held_since.setdefault(asyncio.current_task(), []).append(acquired)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        task = asyncio.current_task()
+        starts = self._held_since.get(task)
+        if starts:
+            self._stats.record_hold(time.perf_counter() - starts.pop())
+            if not starts:
+                del self._held_since[task]
+        if self._exclusive:
+            await self._lock.release_write()
+        else:
+            await self._lock.release_read()
+        return False
+
+
+class KeyedLocks:
+    """asyncio locks created per key on demand and dropped once unused"""
+
+    def __init__(self):
+        self._locks: dict[Any, list] = {}  # key -> [lock, users]
+
+    @asynccontextmanager
+    async def lock(self, key: Any):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    @asynccontextmanager
+    async def lock_many(self, keys):
+        """Hold the locks of all keys, taken in sorted order so that callers
+        locking overlapping key sets cannot deadlock"""
+        async with AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                await stack.enter_async_context(self.lock(key))
+            yield
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+def lock_metrics(locks: dict[str, NamespaceRWLock]) -> dict[str, dict[str, Any]]:
+    """Wait and hold time figures of the given locks in the current process"""
+    return {
+        namespace: {mode: stats.as_dict() for mode, stats in lock.stats.items()}
+        for namespace, lock in sorted(locks.items())
+    }
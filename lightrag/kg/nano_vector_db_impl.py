@@ -8,6 +8,7 @@ import time
 from lightrag.utils import (
     logger,
     compute_mdhash_id,
+    get_document_types,
 )
 import pipmaster as pm
 from lightrag.base import BaseVectorStorage
@@ -41,6 +42,10 @@ class NanoVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
+        # Rows of each document type in the client they were computed for,
+        # rebuilt on first use after a write
+        self._partitions: tuple[NanoVectorDB, dict[str, np.ndarray]] | None = None
+
         self._client_file_name = os.path.join(
             self.global_config["working_dir"], f"vdb_{self.namespace}.json"
         )
@@ -56,10 +61,13 @@ class NanoVectorDBStorage(BaseVectorStorage):
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock(enable_logging=False)
+        self._storage_lock = get_storage_lock(self.namespace, enable_logging=False)
 
     async def _get_client(self):
         """Check if the storage should be reloaded"""
+        # Only a reload needs the lock, skip it while no other process wrote
+        if not self.storage_updated.value:
+            return self._client
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if data needs to be reloaded
@@ -114,6 +122,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 d["__vector__"] = embeddings[i]
             client = await self._get_client()
             results = client.upsert(datas=list_data)
+            self._partitions = None
             return results
         else:
             # sometimes the embedding is not returned correctly. just log it.
@@ -121,8 +130,49 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 f"embedding is not 1-1 with data, {len(embeddings)} != {len(list_data)}"
             )
 
+    def _partition(self, client: NanoVectorDB) -> dict[str, np.ndarray]:
+        """Rows of the client's matrix per document type"""
+        if self._partitions is None or self._partitions[0] is not client:
+            rows: dict[str, list[int]] = {}
+            storage = getattr(client, "_NanoVectorDB__storage")
+            for row, dp in enumerate(storage["data"]):
+                for document_type in get_document_types(dp):
+                    rows.setdefault(document_type, []).append(row)
+            self._partitions = (
+                client,
+                {k: np.array(v, dtype=np.int64) for k, v in rows.items()},
+            )
+        return self._partitions[1]
+
+    def _query_partition(
+        self,
+        client: NanoVectorDB,
+        embedding: np.ndarray,
+        top_k: int,
+        document_types: list[str],
+    ) -> list[dict[str, Any]]:
+        """Search only the rows of the given document types"""
+        partition = self._partition(client)
+        parts = [partition[t] for t in set(document_types) if t in partition]
+        if not parts:
+            return []
+        rows = np.unique(np.concatenate(parts))
+        storage = getattr(client, "_NanoVectorDB__storage")
+        query_vector = embedding / max(np.linalg.norm(embedding), 1e-12)
+        scores = storage["matrix"][rows] @ query_vector
+        order = np.argsort(-scores)[:top_k]
+        return [
+            {**storage["data"][rows[i]], "__metrics__": float(scores[i])}
+            for i in order
+            if scores[i] >= self.cosine_better_than_threshold
+        ]
+
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         # Execute embedding outside of lock to avoid improve cocurrent
         embedding = await self.embedding_func(
@@ -131,11 +181,14 @@ class NanoVectorDBStorage(BaseVectorStorage):
         embedding = embedding[0]
 
         client = await self._get_client()
-        results = client.query(
-            query=embedding,
-            top_k=top_k,
-            better_than_threshold=self.cosine_better_than_threshold,
-        )
+        if document_types:
+            results = self._query_partition(client, embedding, top_k, document_types)
+        else:
+            results = client.query(
+                query=embedding,
+                top_k=top_k,
+                better_than_threshold=self.cosine_better_than_threshold,
+            )
         results = [
             {
                 **dp,
@@ -166,6 +219,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
         try:
             client = await self._get_client()
             client.delete(ids)
+            self._partitions = None
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
             )
@@ -190,6 +244,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             client = await self._get_client()
             if client.get([entity_id]):
                 client.delete([entity_id])
+                self._partitions = None
                 logger.debug(f"Successfully deleted entity {entity_name}")
             else:
                 logger.debug(f"Entity {entity_name} not found in storage")
@@ -218,6 +273,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             if ids_to_delete:
                 client = await self._get_client()
                 client.delete(ids_to_delete)
+                self._partitions = None
                 logger.debug(
                     f"Deleted {len(ids_to_delete)} relations for {entity_name}"
                 )
@@ -2,7 +2,7 @@ import inspect
 import os
 import re
 from dataclasses import dataclass
-from typing import final
+from typing import AsyncIterator, final
 import configparser
 
 
@@ -838,6 +838,110 @@ class Neo4JStorage(BaseGraphStorage):
             logger.error(f"Error during edge upsert: {str(e)}")
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_nodes(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert multiple nodes in one transaction using UNWIND.
+
+        Labels cannot be parameterized, so one UNWIND ... MERGE statement runs
+        per entity type.
+
+        Args:
+            nodes: Mapping of node ID to its node properties
+        """
+        rows_by_type: dict[str, list[dict]] = {}
+        for node_id, properties in nodes.items():
+            if "entity_id" not in properties:
+                raise ValueError(
+                    "Neo4j: node properties must contain an 'entity_id' field"
+                )
+            rows_by_type.setdefault(properties["entity_type"], []).append(
+                {"entity_id": node_id, "properties": properties}
+            )
+        if not rows_by_type:
+            return
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    for entity_type, rows in rows_by_type.items():
+                        query = (
+                            """
+                        UNWIND $rows AS row
+                        MERGE (n:base {entity_id: row.entity_id})
+                        SET n += row.properties
+                        SET n:`%s`
+                        """
+                            % entity_type
+                        )
+                        result = await tx.run(query, rows=rows)
+                        await result.consume()  # Ensure result is fully consumed
+                    logger.debug(f"Upserted {len(nodes)} nodes")
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch upsert: {str(e)}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_edges(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """
+        Upsert multiple edges in one transaction using UNWIND.
+
+        Args:
+            edges: Mapping of (source, target) tuples to their edge properties
+        """
+        rows = [
+            {"src": src, "tgt": tgt, "properties": properties}
+            for (src, tgt), properties in edges.items()
+        ]
+        if not rows:
+            return
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    query = """
+                    UNWIND $rows AS row
+                    MATCH (source:base {entity_id: row.src})
+                    WITH source, row
+                    MATCH (target:base {entity_id: row.tgt})
+                    MERGE (source)-[r:DIRECTED]-(target)
+                    SET r += row.properties
+                    """
+                    result = await tx.run(query, rows=rows)
+                    await result.consume()  # Ensure result is fully consumed
+                    logger.debug(f"Upserted {len(rows)} edges")
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch edge upsert: {str(e)}")
+            raise
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -1232,6 +1336,70 @@ class Neo4JStorage(BaseGraphStorage):
                 )  # Ensure results are consumed even if processing fails
             return labels
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page over the nodes in entity_id order, seeking on the entity_id index"""
+        query = """
+        MATCH (n:base)
+        WHERE n.entity_id > $after
+        RETURN n.entity_id AS entity_id, n
+        ORDER BY n.entity_id
+        LIMIT $limit
+        """
+        after = ""
+        while True:
+            async with self._driver.session(
+                database=self._DATABASE, default_access_mode="READ"
+            ) as session:
+                result = await session.run(query, after=after, limit=batch_size)
+                nodes = []
+                async for record in result:
+                    node_dict = dict(record["n"])
+                    if "labels" in node_dict:
+                        node_dict["labels"] = [
+                            label for label in node_dict["labels"] if label != "base"
+                        ]
+                    nodes.append((record["entity_id"], node_dict))
+                await result.consume()
+            if not nodes:
+                return
+            yield nodes
+            after = nodes[-1][0]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page over the outgoing relationships of pages of source nodes, so every
+        relationship is read once"""
+        query = """
+        MATCH (a:base)
+        WHERE a.entity_id > $after
+        WITH a ORDER BY a.entity_id LIMIT $limit
+        OPTIONAL MATCH (a)-[r:DIRECTED]->(b:base)
+        RETURN a.entity_id AS src_id, b.entity_id AS tgt_id, properties(r) AS properties
+        """
+        after = ""
+        while True:
+            async with self._driver.session(
+                database=self._DATABASE, default_access_mode="READ"
+            ) as session:
+                result = await session.run(query, after=after, limit=batch_size)
+                edges = []
+                last_source = None
+                async for record in result:
+                    src_id = record["src_id"]
+                    if last_source is None or src_id > last_source:
+                        last_source = src_id
+                    if record["tgt_id"] is not None:
+                        edges.append((src_id, record["tgt_id"], record["properties"]))
+                await result.consume()
+            if last_source is None:
+                return
+            if edges:
+                yield edges
+            after = last_source
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from typing import final
+from typing import AsyncIterator, final
 
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 from lightrag.utils import logger
@@ -15,6 +15,14 @@ if not pm.is_installed("graspologic"):
     pm.install("graspologic")
 
 import networkx as nx
+from .graph_snapshot import (
+    GRAPH_DELTA_COMPACTION_MIN_BYTES,
+    GraphDeltaLog,
+    materialize,
+    read_snapshot,
+    snapshot_generation,
+    write_snapshot,
+)
 from .shared_storage import (
     get_storage_lock,
     get_update_flag,
@@ -34,6 +42,16 @@ MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 @final
 @dataclass
 class NetworkXStorage(BaseGraphStorage):
+    """In-memory NetworkX graph persisted as a binary snapshot plus a delta log
+
+    ``graph_<namespace>.snapshot.npz`` holds the graph as of the last compaction
+    (see graph_snapshot), ``graph_<namespace>.delta`` the nodes and edges changed
+    since. Each index_done_callback appends only the changed items to the delta
+    log, and other workers replay the new records instead of reloading the graph.
+    GraphML is only used to import a graph written by earlier versions and for
+    export_graphml.
+    """
+
     @staticmethod
     def load_nx_graph(file_name) -> nx.Graph:
         if os.path.exists(file_name):
@@ -48,32 +66,130 @@ class NetworkXStorage(BaseGraphStorage):
         nx.write_graphml(graph, file_name)
 
     def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
         self._graphml_xml_file = os.path.join(
-            self.global_config["working_dir"], f"graph_{self.namespace}.graphml"
+            working_dir, f"graph_{self.namespace}.graphml"
+        )
+        self._snapshot_file = os.path.join(
+            working_dir, f"graph_{self.namespace}.snapshot.npz"
+        )
+        self._delta_log = GraphDeltaLog(
+            os.path.join(working_dir, f"graph_{self.namespace}.delta")
         )
         self._storage_lock = None
         self.storage_updated = None
         self._graph = None
+        # Snapshot generation and delta log position reflected in self._graph
+        self._generation = 0
+        self._delta_offset = 0
+        self._snapshot_bytes = 0
+        # Nodes and edges changed since the last index_done_callback
+        self._dirty_nodes: set[str] = set()
+        self._dirty_edges: set[tuple[str, str]] = set()
 
         # Load initial graph
-        preloaded_graph = NetworkXStorage.load_nx_graph(self._graphml_xml_file)
-        if preloaded_graph is not None:
-            logger.info(
-                f"Loaded graph from {self._graphml_xml_file} with {preloaded_graph.number_of_nodes()} nodes, {preloaded_graph.number_of_edges()} edges"
+        self._load_graph()
+
+    def _load_graph(self):
+        """Load the snapshot and replay the delta log"""
+        self._dirty_nodes = set()
+        self._dirty_edges = set()
+        if not os.path.exists(self._snapshot_file):
+            preloaded_graph = NetworkXStorage.load_nx_graph(self._graphml_xml_file)
+            if preloaded_graph is not None:
+                logger.info(
+                    f"Importing graph from {self._graphml_xml_file} with {preloaded_graph.number_of_nodes()} nodes, {preloaded_graph.number_of_edges()} edges"
+                )
+            else:
+                logger.info("Created new empty graph")
+            self._graph = preloaded_graph or nx.Graph()
+            # The first snapshot is written by the next index_done_callback
+            self._generation = 0
+            self._delta_offset = 0
+            self._snapshot_bytes = 0
+            return
+
+        self._graph, self._generation = read_snapshot(self._snapshot_file)
+        self._snapshot_bytes = os.path.getsize(self._snapshot_file)
+        offset = self._delta_log.replay(self._graph, self._generation)
+        if offset is None:
+            # Interrupted compaction: the snapshot already covers the old log
+            offset = self._delta_log.reset(self._generation)
+        self._delta_offset = offset
+        logger.info(
+            f"Loaded graph from {self._snapshot_file} with {self._graph.number_of_nodes()} nodes, {self._graph.number_of_edges()} edges"
+        )
+
+    def _reload_graph(self):
+        """Catch up with changes persisted by another process"""
+        if snapshot_generation(self._snapshot_file) == self._generation:
+            offset = self._delta_log.replay(
+                self._graph, self._generation, self._delta_offset
             )
-        else:
-            logger.info("Created new empty graph")
-        self._graph = preloaded_graph or nx.Graph()
+            if offset is not None:
+                self._delta_offset = offset
+                self._dirty_nodes = set()
+                self._dirty_edges = set()
+                return
+        self._load_graph()
+
+    def _compact(self, generation: int):
+        """Write the whole graph as a new snapshot and start an empty delta log"""
+        logger.info(
+            f"Writing graph snapshot with {self._graph.number_of_nodes()} nodes, {self._graph.number_of_edges()} edges"
+        )
+        self._snapshot_bytes = write_snapshot(
+            self._graph, self._snapshot_file, generation
+        )
+        self._generation = generation
+        self._delta_offset = self._delta_log.reset(generation)
+
+    def _delta_records(self) -> list[dict]:
+        """Delta log records for the nodes and edges changed since the last flush"""
+        graph = self._graph
+        records = [
+            {"op": "node", "id": node_id, "data": materialize(graph._node[node_id])}
+            for node_id in self._dirty_nodes
+            if graph.has_node(node_id)
+        ]
+        for source, target in self._dirty_edges:
+            if graph.has_edge(source, target):
+                records.append(
+                    {
+                        "op": "edge",
+                        "src": source,
+                        "tgt": target,
+                        "data": materialize(graph._adj[source][target]),
+                    }
+                )
+            else:
+                records.append({"op": "del_edge", "src": source, "tgt": target})
+        records.extend(
+            {"op": "del_node", "id": node_id}
+            for node_id in self._dirty_nodes
+            if not graph.has_node(node_id)
+        )
+        return records
+
+    def _mark_node_removed(self, node_id: str):
+        # Incident edges go with the node; log them so a later re-insert of the
+        # node does not resurrect them on replay
+        for neighbor in self._graph.neighbors(node_id):
+            self._dirty_edges.add(tuple(sorted((node_id, neighbor))))
+        self._dirty_nodes.add(node_id)
 
     async def initialize(self):
         """Initialize storage data"""
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = get_storage_lock(self.namespace)
 
     async def _get_graph(self):
         """Check if the storage should be reloaded"""
+        # Only a reload needs the lock, skip it while no other process wrote
+        if not self.storage_updated.value:
+            return self._graph
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if data needs to be reloaded
@@ -82,9 +198,7 @@ class NetworkXStorage(BaseGraphStorage):
                     f"Process {os.getpid()} reloading graph {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                self._reload_graph()
                 # Reset update flag
                 self.storage_updated.value = False
 
@@ -100,7 +214,7 @@ class NetworkXStorage(BaseGraphStorage):
 
     async def get_node(self, node_id: str) -> dict[str, str] | None:
         graph = await self._get_graph()
-        return graph.nodes.get(node_id)
+        return materialize(graph.nodes.get(node_id))
 
     async def node_degree(self, node_id: str) -> int:
         graph = await self._get_graph()
@@ -114,7 +228,7 @@ class NetworkXStorage(BaseGraphStorage):
         self, source_node_id: str, target_node_id: str
     ) -> dict[str, str] | None:
         graph = await self._get_graph()
-        return graph.edges.get((source_node_id, target_node_id))
+        return materialize(graph.edges.get((source_node_id, target_node_id)))
 
     async def get_node_edges(self, source_node_id: str) -> list[tuple[str, str]] | None:
         graph = await self._get_graph()
@@ -131,6 +245,7 @@ class NetworkXStorage(BaseGraphStorage):
         """
         graph = await self._get_graph()
         graph.add_node(node_id, **node_data)
+        self._dirty_nodes.add(node_id)
 
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
@@ -143,6 +258,29 @@ class NetworkXStorage(BaseGraphStorage):
         """
         graph = await self._get_graph()
         graph.add_edge(source_node_id, target_node_id, **edge_data)
+        self._dirty_edges.add(tuple(sorted((source_node_id, target_node_id))))
+
+    async def upsert_nodes(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        graph = await self._get_graph()
+        graph.add_nodes_from(nodes.items())
+        self._dirty_nodes.update(nodes)
+
+    async def upsert_edges(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        graph = await self._get_graph()
+        graph.add_edges_from((src, tgt, data) for (src, tgt), data in edges.items())
+        self._dirty_edges.update(tuple(sorted(edge)) for edge in edges)
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -153,6 +291,7 @@ class NetworkXStorage(BaseGraphStorage):
         """
         graph = await self._get_graph()
         if graph.has_node(node_id):
+            self._mark_node_removed(node_id)
             graph.remove_node(node_id)
             logger.debug(f"Node {node_id} deleted from the graph.")
         else:
@@ -172,6 +311,7 @@ class NetworkXStorage(BaseGraphStorage):
         graph = await self._get_graph()
         for node in nodes:
             if graph.has_node(node):
+                self._mark_node_removed(node)
                 graph.remove_node(node)
 
     async def remove_edges(self, edges: list[tuple[str, str]]):
@@ -189,6 +329,7 @@ class NetworkXStorage(BaseGraphStorage):
         for source, target in edges:
             if graph.has_edge(source, target):
                 graph.remove_edge(source, target)
+                self._dirty_edges.add(tuple(sorted((source, target))))
 
     async def get_all_labels(self) -> list[str]:
         """
@@ -204,6 +345,34 @@ class NetworkXStorage(BaseGraphStorage):
         # Return sorted list
         return sorted(list(labels))
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page over a snapshot of the node ids; nodes removed meanwhile are skipped"""
+        graph = await self._get_graph()
+        node_ids = list(graph.nodes())
+        for start in range(0, len(node_ids), batch_size):
+            graph = await self._get_graph()
+            yield [
+                (str(node_id), dict(graph.nodes[node_id]))
+                for node_id in node_ids[start : start + batch_size]
+                if graph.has_node(node_id)
+            ]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page over a snapshot of the edges; edges removed meanwhile are skipped"""
+        graph = await self._get_graph()
+        edges = list(graph.edges())
+        for start in range(0, len(edges), batch_size):
+            graph = await self._get_graph()
+            yield [
+                (str(source), str(target), dict(graph.edges[source, target]))
+                for source, target in edges[start : start + batch_size]
+                if graph.has_edge(source, target)
+            ]
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -366,9 +535,7 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.info(
                     f"Graph for {self.namespace} was updated by another process, reloading..."
                 )
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                self._reload_graph()
                 # Reset update flag
                 self.storage_updated.value = False
                 return False  # Return error
@@ -377,7 +544,21 @@ class NetworkXStorage(BaseGraphStorage):
         async with self._storage_lock:
             try:
                 # Save data to disk
-                NetworkXStorage.write_nx_graph(self._graph, self._graphml_xml_file)
+                if not os.path.exists(self._snapshot_file):
+                    self._compact(self._generation + 1)
+                else:
+                    records = self._delta_records()
+                    if not records:
+                        return True
+                    self._delta_offset = self._delta_log.append(
+                        records, self._delta_offset
+                    )
+                    if self._delta_offset > max(
+                        GRAPH_DELTA_COMPACTION_MIN_BYTES, self._snapshot_bytes
+                    ):
+                        self._compact(self._generation + 1)
+                self._dirty_nodes = set()
+                self._dirty_edges = set()
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
@@ -405,18 +586,42 @@ class NetworkXStorage(BaseGraphStorage):
         """
         try:
             async with self._storage_lock:
-                # delete _client_file_name
-                if os.path.exists(self._graphml_xml_file):
-                    os.remove(self._graphml_xml_file)
+                for file_name in (
+                    self._snapshot_file,
+                    self._delta_log.file_name,
+                    self._graphml_xml_file,
+                ):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
                 self._graph = nx.Graph()
+                self._generation = 0
+                self._delta_offset = 0
+                self._snapshot_bytes = 0
+                self._dirty_nodes = set()
+                self._dirty_edges = set()
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
                 logger.info(
-                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._graphml_xml_file})"
+                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._snapshot_file})"
                 )
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
             logger.error(f"Error dropping graph {self.namespace}: {e}")
             return {"status": "error", "message": str(e)}
+
+    async def export_graphml(self, file_name: str | None = None) -> str:
+        """Write the current graph as GraphML, e.g. for external visualization tools
+
+        Args:
+            file_name: Target file, defaults to graph_<namespace>.graphml in the working dir
+
+        Returns:
+            The path of the written file
+        """
+        file_name = file_name or self._graphml_xml_file
+        graph = await self._get_graph()
+        async with self._storage_lock:
+            NetworkXStorage.write_nx_graph(graph, file_name)
+        return file_name
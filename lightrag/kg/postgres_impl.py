@@ -1,10 +1,12 @@
 import asyncio
 import json
 import os
+import struct
+import time
 import datetime
 from datetime import timezone
 from dataclasses import dataclass, field
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Literal, Union, final, get_args
 import numpy as np
 import configparser
 
@@ -22,11 +24,19 @@ from ..base import (
     BaseKVStorage,
     BaseVectorStorage,
     DocProcessingStatus,
+    DocSortField,
     DocStatus,
     DocStatusStorage,
 )
+from ..constants import LLM_CACHE_EVICTION_INTERVAL
 from ..namespace import NameSpace, is_namespace
-from ..utils import logger
+from ..utils import (
+    generate_cache_key,
+    get_document_types,
+    logger,
+    parse_cache_key,
+    record_storage_round_trip,
+)
 
 import pipmaster as pm
 
@@ -46,6 +56,33 @@ load_dotenv(dotenv_path=".env", override=False)
 # Get maximum number of graph nodes from environment variable, default is 1000
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
+# Rows written per Cypher statement by the batched graph upserts
+GRAPH_UPSERT_BATCH_SIZE = int(os.getenv("POSTGRES_GRAPH_UPSERT_BATCH_SIZE", 500))
+
+# Rows written per transaction by the bulk KV and vector upserts
+UPSERT_BATCH_SIZE = int(os.getenv("POSTGRES_UPSERT_BATCH_SIZE", 1000))
+
+# HNSW index build parameters and the default candidate list size of a search
+HNSW_M = int(os.getenv("POSTGRES_HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("POSTGRES_HNSW_EF_CONSTRUCTION", 64))
+HNSW_EF_SEARCH = int(os.getenv("POSTGRES_HNSW_EF_SEARCH", 40))
+
+# Document filters matching at most this share of all chunks are applied before
+# the similarity search, looser ones after an index scan
+VECTOR_PREFILTER_SELECTIVITY = float(
+    os.getenv("POSTGRES_VECTOR_PREFILTER_SELECTIVITY", 0.05)
+)
+
+
+def _encode_vector(value: Any) -> bytes:
+    """pgvector binary format: dimensions, unused, then big-endian float4 values"""
+    vector = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    return np.frombuffer(data, dtype=">f4", offset=4).tolist()
+
 
 class PostgreSQLDB:
     def __init__(self, config: dict[str, Any], **kwargs: Any):
@@ -58,6 +95,8 @@ class PostgreSQLDB:
         self.max = int(config["max_connections"])
         self.increment = 1
         self.pool: Pool | None = None
+        # Set once connections send vectors in pgvector's binary format
+        self.binary_vectors = False
 
         if self.user is None or self.password is None or self.database is None:
             raise ValueError("Missing database user, password, or database")
@@ -76,6 +115,7 @@ class PostgreSQLDB:
                 port=self.port,
                 min_size=1,
                 max_size=self.max,
+                init=self._init_connection,
             )
 
             logger.info(
@@ -91,6 +131,29 @@ class PostgreSQLDB:
             logger.error(f"Error: {e}")
             raise
 
+    async def _init_connection(self, connection: asyncpg.Connection) -> None:
+        """Exchange pgvector values in binary form instead of formatted text"""
+        schema = await connection.fetchval(
+            "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace"
+            " WHERE t.typname = 'vector' LIMIT 1"
+        )
+        if schema is None:
+            return  # pgvector is not installed in this database
+        await connection.set_type_codec(
+            "vector",
+            schema=schema,
+            encoder=_encode_vector,
+            decoder=_decode_vector,
+            format="binary",
+        )
+        self.binary_vectors = True
+
+    def vector_param(self, vector: np.ndarray) -> Any:
+        """Query parameter for a pgvector column"""
+        if self.binary_vectors:
+            return vector
+        return json.dumps(vector.tolist())
+
     @staticmethod
     async def configure_age(connection: asyncpg.Connection, graph_name: str) -> None:
         """Set the Apache AGE environment and creates a graph if it does not exist.
@@ -204,6 +267,45 @@ class PostgreSQLDB:
                     f"PostgreSQL, Failed to create index on table {k}, Got: {e}"
                 )
 
+        # Document type filters of similarity queries, the column was added
+        # after the tables
+        for table_name, _, _ in VECTOR_SEARCH_TABLES.values():
+            try:
+                await self.execute(
+                    f"ALTER TABLE {table_name}"
+                    " ADD COLUMN IF NOT EXISTS document_types VARCHAR(255)[] NULL"
+                )
+                await self.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table_name.lower()}_document_types"
+                    f" ON {table_name} USING GIN (document_types)"
+                )
+            except Exception as e:
+                logger.error(
+                    f"PostgreSQL, Failed to add document types to {table_name}, Got: {e}"
+                )
+
+        # Document filters of similarity queries look chunks up by document
+        try:
+            await self.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lightrag_doc_chunks_full_doc_id"
+                " ON LIGHTRAG_DOC_CHUNKS (workspace, full_doc_id)"
+            )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create index on LIGHTRAG_DOC_CHUNKS, Got: {e}"
+            )
+
+        # Status counts and paginated listings of documents filter by status
+        try:
+            await self.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lightrag_doc_status_status"
+                " ON LIGHTRAG_DOC_STATUS (workspace, status)"
+            )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create index on LIGHTRAG_DOC_STATUS, Got: {e}"
+            )
+
         # After all tables are created, attempt to migrate timestamp fields
         try:
             await self._migrate_timestamp_columns()
@@ -287,6 +389,66 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL database,\nsql:{sql},\ndata:{data},\nerror:{e}")
             raise
 
+    async def executemany(
+        self,
+        sql: str,
+        rows: list[tuple],
+        batch_size: int = UPSERT_BATCH_SIZE,
+    ) -> None:
+        """Run sql once per row, pipelined on one connection
+
+        Each batch of batch_size rows is written in its own transaction.
+        """
+        if not rows:
+            return
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                for start in range(0, len(rows), batch_size):
+                    async with connection.transaction():
+                        await connection.executemany(
+                            sql, rows[start : start + batch_size]
+                        )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL database,\nsql:{sql},\nrows:{len(rows)},\nerror:{e}"
+            )
+            raise
+
+    async def vector_search(
+        self, sql: str, params: list[Any], ef_search: int
+    ) -> list[dict[str, Any]]:
+        """Run a similarity query with hnsw.ef_search set for it alone"""
+        async with self.pool.acquire() as connection:  # type: ignore
+            try:
+                async with connection.transaction():
+                    await connection.execute(
+                        f"SET LOCAL hnsw.ef_search = {int(ef_search)}"
+                    )
+                    rows = await connection.fetch(sql, *params)
+                return [dict(row) for row in rows]
+            except Exception as e:
+                logger.error(f"PostgreSQL database, error:{e}")
+                raise
+
+    async def check_vector_index(self, table_name: str, dimension: int) -> None:
+        """Create the HNSW cosine index of a vector table for one dimension
+
+        content_vector has no fixed dimension, so the index covers the rows of
+        the embedding dimension in use through a partial expression index.
+        """
+        index_name = f"idx_{table_name.lower()}_hnsw_cosine_{dimension}"
+        sql = f"""CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                  ON {table_name} USING hnsw
+                  ((content_vector::vector({dimension})) vector_cosine_ops)
+                  WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})
+                  WHERE vector_dims(content_vector) = {dimension}"""
+        try:
+            await self.execute(sql)
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create HNSW index on table {table_name}, Got: {e}"
+            )
+
 
 class ClientManager:
     _instances: dict[str, Any] = {"db": None, "ref_count": 0}
@@ -399,6 +561,14 @@ class ClientManager:
                     await db.pool.close()
 
 
+def _unpack_index_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Return the JSON payload of a LIGHTRAG_DOC_GRAPH_INDEX row"""
+    data = row.get("data")
+    if isinstance(data, str):
+        data = json.loads(data)
+    return data or {}
+
+
 @final
 @dataclass
 class PGKVStorage(BaseKVStorage):
@@ -406,6 +576,7 @@ class PGKVStorage(BaseKVStorage):
 
     def __post_init__(self):
         self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._next_eviction_sweep = 0.0
 
     async def initialize(self):
         if self.db is None:
@@ -435,13 +606,9 @@ class PGKVStorage(BaseKVStorage):
             results = await self.db.query(sql, params, multirows=True)
 
             if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-                result_dict = {}
-                for row in results:
-                    mode = row["mode"]
-                    if mode not in result_dict:
-                        result_dict[mode] = {}
-                    result_dict[mode][row["id"]] = row
-                return result_dict
+                return {
+                    generate_cache_key(row["mode"], row["id"]): row for row in results
+                }
             else:
                 return {row["id"]: row for row in results}
         except Exception as e:
@@ -450,52 +617,70 @@ class PGKVStorage(BaseKVStorage):
 
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get doc_full data by id."""
+        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            cache_key = parse_cache_key(id)
+            if cache_key is None:
+                return None
+            res = await self.get_by_mode_and_id(*cache_key)
+            return res[cache_key[1]] if res else None
         sql = SQL_TEMPLATES["get_by_id_" + self.namespace]
         params = {"workspace": self.db.workspace, "id": id}
-        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            array_res = await self.db.query(sql, params, multirows=True)
-            res = {}
-            for row in array_res:
-                res[row["id"]] = row
-            return res if res else None
+        record_storage_round_trip(self.namespace)
+        if is_namespace(self.namespace, NameSpace.KV_STORE_DOC_GRAPH_INDEX):
+            response = await self.db.query(sql, params)
+            return _unpack_index_row(response) if response else None
         else:
             response = await self.db.query(sql, params)
             return response if response else None
 
     async def get_by_mode_and_id(self, mode: str, id: str) -> Union[dict, None]:
         """Specifically for llm_response_cache."""
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            return None
         sql = SQL_TEMPLATES["get_by_mode_id_" + self.namespace]
         params = {"workspace": self.db.workspace, "mode": mode, "id": id}
-        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            array_res = await self.db.query(sql, params, multirows=True)
-            res = {}
-            for row in array_res:
-                res[row["id"]] = row
-            return res
-        else:
-            return None
+        record_storage_round_trip(self.namespace)
+        array_res = await self.db.query(sql, params, multirows=True)
+        res = {}
+        for row in array_res:
+            res[row["id"]] = row
+        return res or None
+
+    async def get_cache_by_mode(self, mode: str) -> dict[str, dict[str, Any]]:
+        """Specifically for llm_response_cache."""
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            return {}
+        sql = SQL_TEMPLATES["get_by_mode_" + self.namespace]
+        params = {"workspace": self.db.workspace, "mode": mode}
+        record_storage_round_trip(self.namespace)
+        rows = await self.db.query(sql, params, multirows=True) or []
+        return {row["id"]: row for row in rows}
 
     # Query by id
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get doc_chunks data by id"""
-        sql = SQL_TEMPLATES["get_by_ids_" + self.namespace].format(
-            ids=",".join([f"'{id}'" for id in ids])
-        )
-        params = {"workspace": self.db.workspace}
+        """Get doc_chunks data by id, aligned with the requested ids"""
+        if not ids:
+            return []
+        sql = SQL_TEMPLATES["get_by_ids_" + self.namespace]
         if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            array_res = await self.db.query(sql, params, multirows=True)
-            modes = set()
-            dict_res: dict[str, dict] = {}
-            for row in array_res:
-                modes.add(row["mode"])
-            for mode in modes:
-                if mode not in dict_res:
-                    dict_res[mode] = {}
-            for row in array_res:
-                dict_res[row["mode"]][row["id"]] = row
-            return [{k: v} for k, v in dict_res.items()]
+            # Matched on (mode, id) pairs so the primary key index is used
+            cache_keys = [key for key in map(parse_cache_key, ids) if key is not None]
+            params = {
+                "workspace": self.db.workspace,
+                "modes": [mode for mode, _ in cache_keys],
+                "ids": [cache_id for _, cache_id in cache_keys],
+            }
         else:
-            return await self.db.query(sql, params, multirows=True)
+            params = {"workspace": self.db.workspace, "ids": ids}
+        record_storage_round_trip(self.namespace)
+        rows = await self.db.query(sql, params, multirows=True) or []
+        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            by_id = {generate_cache_key(row["mode"], row["id"]): row for row in rows}
+        elif is_namespace(self.namespace, NameSpace.KV_STORE_DOC_GRAPH_INDEX):
+            by_id = {row["id"]: _unpack_index_row(row) for row in rows}
+        else:
+            by_id = {row["id"]: row for row in rows}
+        return [by_id.get(id) for id in ids]
 
     async def get_by_status(self, status: str) -> Union[list[dict[str, Any]], None]:
         """Specifically for llm_response_cache."""
@@ -533,27 +718,32 @@ class PGKVStorage(BaseKVStorage):
         if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
             pass
         elif is_namespace(self.namespace, NameSpace.KV_STORE_FULL_DOCS):
-            for k, v in data.items():
-                upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
-                _data = {
-                    "id": k,
-                    "content": v["content"],
-                    "workspace": self.db.workspace,
-                }
-                await self.db.execute(upsert_sql, _data)
+            upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
+            rows = [(k, v["content"], self.db.workspace) for k, v in data.items()]
+            await self.db.executemany(upsert_sql, rows)
         elif is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            for mode, items in data.items():
-                for k, v in items.items():
-                    upsert_sql = SQL_TEMPLATES["upsert_llm_response_cache"]
-                    _data = {
-                        "workspace": self.db.workspace,
-                        "id": k,
-                        "original_prompt": v["original_prompt"],
-                        "return_value": v["return"],
-                        "mode": mode,
-                    }
-
-                    await self.db.execute(upsert_sql, _data)
+            upsert_sql = SQL_TEMPLATES["upsert_llm_response_cache"]
+            rows = []
+            for k, v in data.items():
+                cache_key = parse_cache_key(k)
+                if cache_key is None:
+                    logger.warning(f"Skipping LLM cache entry with invalid key: {k}")
+                    continue
+                mode, args_hash = cache_key
+                rows.append(
+                    (
+                        self.db.workspace,
+                        args_hash,
+                        v["original_prompt"],
+                        v["return"],
+                        mode,
+                    )
+                )
+            await self.db.executemany(upsert_sql, rows)
+        elif is_namespace(self.namespace, NameSpace.KV_STORE_DOC_GRAPH_INDEX):
+            upsert_sql = SQL_TEMPLATES["upsert_doc_graph_index"]
+            rows = [(self.db.workspace, k, json.dumps(v)) for k, v in data.items()]
+            await self.db.executemany(upsert_sql, rows)
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
@@ -588,6 +778,49 @@ class PGKVStorage(BaseKVStorage):
         except Exception as e:
             logger.error(f"Error while deleting records from {self.namespace}: {e}")
 
+    async def evict_cache(self, max_entries: int, ttl: int) -> list[str]:
+        """Evict expired and least recently written entries beyond max_entries
+
+        Runs at most every LLM_CACHE_EVICTION_INTERVAL seconds.
+        """
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            return []
+        now = time.time()
+        if now < self._next_eviction_sweep:
+            return []
+        self._next_eviction_sweep = now + LLM_CACHE_EVICTION_INTERVAL
+
+        rows = []
+        try:
+            if ttl:
+                rows += await self.db.query(
+                    SQL_TEMPLATES["evict_expired_llm_response_cache"],
+                    {"workspace": self.db.workspace, "ttl": float(ttl)},
+                    multirows=True,
+                )
+            if max_entries:
+                count = await self.db.query(
+                    SQL_TEMPLATES["count_llm_response_cache"],
+                    {"workspace": self.db.workspace},
+                )
+                if count and count["count"] > max_entries:
+                    rows += await self.db.query(
+                        SQL_TEMPLATES["evict_lru_llm_response_cache"],
+                        {
+                            "workspace": self.db.workspace,
+                            "keep": int(max_entries * 0.9),
+                        },
+                        multirows=True,
+                    )
+        except Exception as e:
+            logger.error(f"Error evicting cache entries from {self.namespace}: {e}")
+        evicted = [generate_cache_key(row["mode"], row["id"]) for row in rows]
+        if evicted:
+            logger.info(
+                f"Evicted {len(evicted)} LLM cache entries from {self.namespace}"
+            )
+        return evicted
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Delete specific records from storage by cache mode
 
@@ -654,10 +887,16 @@ class PGVectorStorage(BaseVectorStorage):
                 "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
             )
         self.cosine_better_than_threshold = cosine_threshold
+        self.ef_search = int(config.get("hnsw_ef_search", HNSW_EF_SEARCH))
 
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
+            table_name = namespace_to_table_name(self.namespace)
+            if table_name:
+                await self.db.check_vector_index(
+                    table_name, self.embedding_func.embedding_dim
+                )
 
     async def finalize(self):
         if self.db is not None:
@@ -676,8 +915,9 @@ class PGVectorStorage(BaseVectorStorage):
                 "chunk_order_index": item["chunk_order_index"],
                 "full_doc_id": item["full_doc_id"],
                 "content": item["content"],
-                "content_vector": json.dumps(item["__vector__"].tolist()),
+                "content_vector": self.db.vector_param(item["__vector__"]),
                 "file_path": item["file_path"],
+                "document_types": get_document_types(item) or None,
                 "create_time": current_time,
                 "update_time": current_time,
             }
@@ -702,9 +942,10 @@ class PGVectorStorage(BaseVectorStorage):
             "id": item["__id__"],
             "entity_name": item["entity_name"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": self.db.vector_param(item["__vector__"]),
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
+            "document_types": get_document_types(item) or None,
             "create_time": current_time,
             "update_time": current_time,
         }
@@ -726,9 +967,10 @@ class PGVectorStorage(BaseVectorStorage):
             "source_id": item["src_id"],
             "target_id": item["tgt_id"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": self.db.vector_param(item["__vector__"]),
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
+            "document_types": get_document_types(item) or None,
             "create_time": current_time,
             "update_time": current_time,
         }
@@ -760,37 +1002,126 @@ class PGVectorStorage(BaseVectorStorage):
         embeddings = np.concatenate(embeddings_list)
         for i, d in enumerate(list_data):
             d["__vector__"] = embeddings[i]
-        for item in list_data:
-            if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
-                upsert_sql, data = self._upsert_chunks(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
-                upsert_sql, data = self._upsert_entities(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
-                upsert_sql, data = self._upsert_relationships(item, current_time)
-            else:
-                raise ValueError(f"{self.namespace} is not supported")
 
-            await self.db.execute(upsert_sql, data)
+        if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
+            prepare = self._upsert_chunks
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
+            prepare = self._upsert_entities
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
+            prepare = self._upsert_relationships
+        else:
+            raise ValueError(f"{self.namespace} is not supported")
+
+        rows = []
+        for item in list_data:
+            upsert_sql, data = prepare(item, current_time)
+            rows.append(tuple(data.values()))
+        await self.db.executemany(upsert_sql, rows)
 
     #################### query method ###############
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
+        ef_search: int | None = None,
     ) -> list[dict[str, Any]]:
+        """Nearest neighbours of the query text by cosine distance
+
+        Args:
+            query: Text to embed and search for
+            top_k: Maximum number of results
+            ids: Optional document IDs limiting the search to their chunks
+            document_types: Optional document types limiting the search to their rows
+            ef_search: HNSW candidate list size for this query, defaults to the
+                storage's hnsw_ef_search
+        """
         embeddings = await self.embedding_func(
             [query], _priority=5
         )  # higher priority for query
-        embedding = embeddings[0]
-        embedding_string = ",".join(map(str, embedding))
-        # Use parameterized document IDs (None means search across all documents)
-        sql = SQL_TEMPLATES[self.namespace].format(embedding_string=embedding_string)
-        params = {
-            "workspace": self.db.workspace,
-            "doc_ids": ids,
-            "better_than_threshold": self.cosine_better_than_threshold,
-            "top_k": top_k,
+        embedding = self.db.vector_param(np.asarray(embeddings[0], dtype=np.float32))
+        ef_search = ef_search or self.ef_search
+        dimension = self.embedding_func.embedding_dim
+        table_name, columns, doc_filter = next(
+            v
+            for k, v in VECTOR_SEARCH_TABLES.items()
+            if is_namespace(self.namespace, k)
+        )
+        # Cosine similarity above the threshold is cosine distance below 1 - threshold
+        max_distance = 1 - self.cosine_better_than_threshold
+        params = [self.db.workspace, embedding, max_distance, top_k]
+
+        if ids is None and not document_types:
+            sql = SQL_TEMPLATES["vector_search"].format(
+                table_name=table_name, columns=columns, dimension=dimension
+            )
+            return await self.db.vector_search(sql, params, max(ef_search, top_k))
+
+        # Filter conditions with a {} placeholder for their parameter
+        conditions: list[str] = []
+        filter_values: list[Any] = []
+        if ids is not None:
+            # Chunks are filtered by document directly, entities and relations
+            # by the chunks of the documents
+            doc_chunks = await self.db.query(
+                SQL_TEMPLATES["vector_search_doc_chunks"],
+                {"workspace": self.db.workspace, "doc_ids": ids},
+            )
+            chunk_ids = doc_chunks["chunk_ids"] or []
+            if not chunk_ids:
+                return []
+            conditions.append(doc_filter)
+            filter_values.append(
+                ids
+                if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS)
+                else chunk_ids
+            )
+            matches, total = len(chunk_ids), doc_chunks["total"]
+        if document_types:
+            conditions.append("document_types && {}::varchar[]")
+            filter_values.append(list(document_types))
+            # Count the rows passing all filters, the GIN index answers it
+            counts = await self.db.query(
+                SQL_TEMPLATES["vector_search_filter_count"].format(
+                    table_name=table_name,
+                    relname=table_name.lower(),
+                    filter=_render_conditions(conditions, 2),
+                ),
+                {"workspace": self.db.workspace, **dict(enumerate(filter_values))},
+            )
+            matches, total = counts["matches"], counts["total"]
+            if not matches:
+                return []
+        # An unanalyzed table reports no rows: treat the filter as selective
+        total = total or 0
+        selectivity = min(matches / total, 1.0) if total > 0 else 0.0
+
+        template_args = {
+            "table_name": table_name,
+            "columns": columns,
+            "filter": _render_conditions(conditions, 5),
+            "dimension": dimension,
         }
-        results = await self.db.query(sql, params=params, multirows=True)
-        return results
+        params += filter_values
+
+        if selectivity > VECTOR_PREFILTER_SELECTIVITY:
+            # Loose filter: take enough nearest neighbours from the index that
+            # top_k of them are expected to pass it
+            candidates = min(int(top_k / selectivity * 2) + 1, top_k * 100)
+            sql = SQL_TEMPLATES["vector_search_postfilter"].format(
+                candidates=f"${len(params) + 1}", **template_args
+            )
+            results = await self.db.vector_search(
+                sql, params + [candidates], max(ef_search, candidates)
+            )
+            if len(results) >= top_k:
+                return results
+
+        # Selective filter, or too few neighbours passed it: exact search over
+        # the filtered rows
+        sql = SQL_TEMPLATES["vector_search_prefilter"].format(**template_args)
+        return await self.db.vector_search(sql, params, ef_search)
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
@@ -975,8 +1306,7 @@ class PGDocStatusStorage(DocStatusStorage):
         if result is None or result == []:
             return None
         else:
-            return dict(
-                content=result[0]["content"],
+            record = dict(
                 content_length=result[0]["content_length"],
                 content_summary=result[0]["content_summary"],
                 status=result[0]["status"],
@@ -985,13 +1315,17 @@ class PGDocStatusStorage(DocStatusStorage):
                 updated_at=result[0]["updated_at"],
                 file_path=result[0]["file_path"],
             )
+            # Documents enqueued before their content moved to full_docs
+            if result[0]["content"] is not None:
+                record["content"] = result[0]["content"]
+            return record
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         """Get doc_chunks data by multiple IDs."""
         if not ids:
             return []
 
-        sql = "SELECT * FROM LIGHTRAG_DOC_STATUS WHERE workspace=$1 AND id = ANY($2)"
+        sql = f"SELECT {DOC_STATUS_COLUMNS} FROM LIGHTRAG_DOC_STATUS WHERE workspace=$1 AND id = ANY($2)"
         params = {"workspace": self.db.workspace, "ids": ids}
 
         results = await self.db.query(sql, params, True)
@@ -1000,7 +1334,6 @@ class PGDocStatusStorage(DocStatusStorage):
             return []
         return [
             {
-                "content": row["content"],
                 "content_length": row["content_length"],
                 "content_summary": row["content_summary"],
                 "status": row["status"],
@@ -1028,24 +1361,57 @@ class PGDocStatusStorage(DocStatusStorage):
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
         """all documents with a specific status"""
-        sql = "select * from LIGHTRAG_DOC_STATUS where workspace=$1 and status=$2"
+        sql = f"select {DOC_STATUS_COLUMNS} from LIGHTRAG_DOC_STATUS where workspace=$1 and status=$2"
         params = {"workspace": self.db.workspace, "status": status.value}
         result = await self.db.query(sql, params, True)
         docs_by_status = {
-            element["id"]: DocProcessingStatus(
-                content=element["content"],
-                content_summary=element["content_summary"],
-                content_length=element["content_length"],
-                status=element["status"],
-                created_at=element["created_at"],
-                updated_at=element["updated_at"],
-                chunks_count=element["chunks_count"],
-                file_path=element["file_path"],
-            )
-            for element in result
+            element["id"]: self._to_doc_status(element) for element in result
         }
         return docs_by_status
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: DocSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Sort, count and page the documents in the database"""
+        if sort_field not in get_args(DocSortField):
+            raise ValueError(f"Unsupported sort field: {sort_field}")
+        direction = "ASC" if sort_direction == "asc" else "DESC"
+        where = "workspace=$1"
+        params: dict[str, Any] = {"workspace": self.db.workspace}
+        if status_filter is not None:
+            where += " AND status=$2"
+            params["status"] = status_filter.value
+
+        count_sql = f"SELECT COUNT(1) AS count FROM LIGHTRAG_DOC_STATUS WHERE {where}"
+        count_result = await self.db.query(count_sql, params)
+        total_count = count_result["count"] if count_result else 0
+
+        # id breaks ties so pages never overlap
+        page_sql = f"""SELECT {DOC_STATUS_COLUMNS} FROM LIGHTRAG_DOC_STATUS
+                       WHERE {where}
+                       ORDER BY {sort_field} {direction}, id {direction}
+                       LIMIT {int(page_size)} OFFSET {(int(page) - 1) * int(page_size)}"""
+        result = await self.db.query(page_sql, params, True)
+        docs = [(element["id"], self._to_doc_status(element)) for element in result]
+        return docs, total_count
+
+    @staticmethod
+    def _to_doc_status(element: dict[str, Any]) -> DocProcessingStatus:
+        return DocProcessingStatus(
+            content_summary=element["content_summary"],
+            content_length=element["content_length"],
+            status=element["status"],
+            created_at=element["created_at"],
+            updated_at=element["updated_at"],
+            chunks_count=element["chunks_count"],
+            file_path=element["file_path"],
+        )
+
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
         pass
@@ -1112,7 +1478,7 @@ class PGDocStatusStorage(DocStatusStorage):
         sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,created_at,updated_at)
                  values($1,$2,$3,$4,$5,$6,$7,$8,$9,$10)
                   on conflict(id,workspace) do update set
-                  content = EXCLUDED.content,
+                  content = COALESCE(EXCLUDED.content, LIGHTRAG_DOC_STATUS.content),
                   content_summary = EXCLUDED.content_summary,
                   content_length = EXCLUDED.content_length,
                   chunks_count = EXCLUDED.chunks_count,
@@ -1120,27 +1486,29 @@ class PGDocStatusStorage(DocStatusStorage):
                   file_path = EXCLUDED.file_path,
                   created_at = EXCLUDED.created_at,
                   updated_at = EXCLUDED.updated_at"""
+        rows = []
         for k, v in data.items():
             # Remove timezone information, store utc time in db
             created_at = parse_datetime(v.get("created_at"))
             updated_at = parse_datetime(v.get("updated_at"))
 
             # chunks_count is optional
-            await self.db.execute(
-                sql,
-                {
-                    "workspace": self.db.workspace,
-                    "id": k,
-                    "content": v["content"],
-                    "content_summary": v["content_summary"],
-                    "content_length": v["content_length"],
-                    "chunks_count": v["chunks_count"] if "chunks_count" in v else -1,
-                    "status": v["status"],
-                    "file_path": v["file_path"],
-                    "created_at": created_at,  # Use the converted datetime object
-                    "updated_at": updated_at,  # Use the converted datetime object
-                },
+            rows.append(
+                (
+                    self.db.workspace,
+                    k,
+                    # The document body lives in full_docs only
+                    None,
+                    v["content_summary"],
+                    v["content_length"],
+                    v["chunks_count"] if "chunks_count" in v else -1,
+                    v["status"],
+                    v["file_path"],
+                    created_at,  # Use the converted datetime object
+                    updated_at,  # Use the converted datetime object
+                )
             )
+        await self.db.executemany(sql, rows)
 
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
@@ -1609,6 +1977,88 @@ class PGGraphStorage(BaseGraphStorage):
             )
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert multiple nodes, each batch of rows in one Cypher statement.
+
+        Args:
+            nodes: Mapping of node ID to its node properties
+        """
+        items = list(nodes.items())
+        for node_id, node_data in items:
+            if "entity_id" not in node_data:
+                raise ValueError(
+                    "PostgreSQL: node properties must contain an 'entity_id' field"
+                )
+
+        for start in range(0, len(items), GRAPH_UPSERT_BATCH_SIZE):
+            rows = ", ".join(
+                '{id: "%s", props: %s}'
+                % (self._normalize_node_id(node_id), self._format_properties(data))
+                for node_id, data in items[start : start + GRAPH_UPSERT_BATCH_SIZE]
+            )
+            query = """SELECT * FROM cypher('%s', $$
+                         UNWIND [%s] AS row
+                         MERGE (n:base {entity_id: row.id})
+                         SET n += row.props
+                         RETURN count(n)
+                       $$) AS (n agtype)""" % (self.graph_name, rows)
+
+            try:
+                await self._query(query, readonly=False, upsert=True)
+            except Exception:
+                logger.error(
+                    f"POSTGRES, upsert_nodes error on batch of {len(items)} nodes"
+                )
+                raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """
+        Upsert multiple edges, each batch of rows in one Cypher statement.
+
+        Args:
+            edges: Mapping of (source, target) tuples to their edge properties
+        """
+        items = list(edges.items())
+        for start in range(0, len(items), GRAPH_UPSERT_BATCH_SIZE):
+            rows = ", ".join(
+                '{src: "%s", tgt: "%s", props: %s}'
+                % (
+                    self._normalize_node_id(src),
+                    self._normalize_node_id(tgt),
+                    self._format_properties(data),
+                )
+                for (src, tgt), data in items[start : start + GRAPH_UPSERT_BATCH_SIZE]
+            )
+            query = """SELECT * FROM cypher('%s', $$
+                         UNWIND [%s] AS row
+                         MATCH (source:base {entity_id: row.src})
+                         WITH source, row
+                         MATCH (target:base {entity_id: row.tgt})
+                         MERGE (source)-[r:DIRECTED]-(target)
+                         SET r += row.props
+                         SET r += row.props
+                         RETURN count(r)
+                       $$) AS (r agtype)""" % (self.graph_name, rows)
+
+            try:
+                await self._query(query, readonly=False, upsert=True)
+            except Exception:
+                logger.error(
+                    f"POSTGRES, upsert_edges error on batch of {len(items)} edges"
+                )
+                raise
+
     async def delete_node(self, node_id: str) -> None:
         """
         Delete a node from the graph.
@@ -1987,6 +2437,79 @@ class PGGraphStorage(BaseGraphStorage):
                 labels.append(result["label"])
         return labels
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page over the base vertex table in graphid order
+
+        Reads the AGE label table with plain SQL, as cypher cannot seek on
+        the graphid.
+        """
+        sql = f"""SELECT id::text AS id, properties::text AS properties
+                  FROM {self.graph_name}."base"
+                  WHERE id > $1::text::graphid
+                  ORDER BY id
+                  LIMIT $2"""
+        after = "0"
+        while True:
+            rows = await self.db.query(
+                sql,
+                {"after": after, "limit": batch_size},
+                multirows=True,
+                with_age=True,
+                graph_name=self.graph_name,
+            )
+            if not rows:
+                return
+            nodes = []
+            for row in rows:
+                node_dict = json.loads(row["properties"])
+                if "entity_id" in node_dict:
+                    nodes.append((node_dict["entity_id"], node_dict))
+            if nodes:
+                yield nodes
+            after = rows[-1]["id"]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page over the DIRECTED edge table in graphid order, joining the
+        entity ids of both endpoints"""
+        entity_id = "ag_catalog.agtype_access_operator({}.properties, '\"entity_id\"'::agtype)::text"
+        sql = f"""SELECT e.id::text AS id,
+                         {entity_id.format("s")} AS source,
+                         {entity_id.format("t")} AS target,
+                         e.properties::text AS properties
+                  FROM {self.graph_name}."DIRECTED" e
+                  JOIN {self.graph_name}."base" s ON s.id = e.start_id
+                  JOIN {self.graph_name}."base" t ON t.id = e.end_id
+                  WHERE e.id > $1::text::graphid
+                  ORDER BY e.id
+                  LIMIT $2"""
+        after = "0"
+        while True:
+            rows = await self.db.query(
+                sql,
+                {"after": after, "limit": batch_size},
+                multirows=True,
+                with_age=True,
+                graph_name=self.graph_name,
+            )
+            if not rows:
+                return
+            edges = [
+                (
+                    json.loads(row["source"]),
+                    json.loads(row["target"]),
+                    json.loads(row["properties"]),
+                )
+                for row in rows
+                if row["source"] and row["target"]
+            ]
+            if edges:
+                yield edges
+            after = rows[-1]["id"]
+
     async def _bfs_subgraph(
         self, node_label: str, max_depth: int, max_nodes: int
     ) -> KnowledgeGraph:
@@ -2330,6 +2853,12 @@ class PGGraphStorage(BaseGraphStorage):
             return {"status": "error", "message": str(e)}
 
 
+# Doc status columns read back, leaving out the legacy content column
+DOC_STATUS_COLUMNS = (
+    "id, content_summary, content_length, chunks_count, status, file_path,"
+    " created_at, updated_at"
+)
+
 NAMESPACE_TABLE_MAP = {
     NameSpace.KV_STORE_FULL_DOCS: "LIGHTRAG_DOC_FULL",
     NameSpace.KV_STORE_TEXT_CHUNKS: "LIGHTRAG_DOC_CHUNKS",
@@ -2338,9 +2867,38 @@ NAMESPACE_TABLE_MAP = {
     NameSpace.VECTOR_STORE_RELATIONSHIPS: "LIGHTRAG_VDB_RELATION",
     NameSpace.DOC_STATUS: "LIGHTRAG_DOC_STATUS",
     NameSpace.KV_STORE_LLM_RESPONSE_CACHE: "LIGHTRAG_LLM_CACHE",
+    NameSpace.KV_STORE_DOC_GRAPH_INDEX: "LIGHTRAG_DOC_GRAPH_INDEX",
 }
 
 
+# Vector namespace -> (table, result columns, document filter on the {} parameter)
+VECTOR_SEARCH_TABLES = {
+    NameSpace.VECTOR_STORE_CHUNKS: (
+        "LIGHTRAG_DOC_CHUNKS",
+        "id, content, file_path, document_types[1] as document_type",
+        "full_doc_id = ANY({}::varchar[])",
+    ),
+    NameSpace.VECTOR_STORE_ENTITIES: (
+        "LIGHTRAG_VDB_ENTITY",
+        "entity_name",
+        "chunk_ids && {}::varchar[]",
+    ),
+    NameSpace.VECTOR_STORE_RELATIONSHIPS: (
+        "LIGHTRAG_VDB_RELATION",
+        "source_id as src_id, target_id as tgt_id",
+        "chunk_ids && {}::varchar[]",
+    ),
+}
+
+
+def _render_conditions(conditions: list[str], first_param: int) -> str:
+    """AND the filter conditions, numbering their parameters from first_param"""
+    return " AND ".join(
+        condition.format(f"${i}")
+        for i, condition in enumerate(conditions, start=first_param)
+    )
+
+
 def namespace_to_table_name(namespace: str) -> str:
     for k, v in NAMESPACE_TABLE_MAP.items():
         if is_namespace(namespace, k):
@@ -2370,6 +2928,7 @@ TABLES = {
                     content TEXT,
                     content_vector VECTOR,
                     file_path VARCHAR(256),
+                    document_types VARCHAR(255)[] NULL,
                     create_time TIMESTAMP(0) WITH TIME ZONE,
                     update_time TIMESTAMP(0) WITH TIME ZONE,
 	                CONSTRAINT LIGHTRAG_DOC_CHUNKS_PK PRIMARY KEY (workspace, id)
@@ -2386,6 +2945,7 @@ TABLES = {
                     update_time TIMESTAMP(0) WITH TIME ZONE,
                     chunk_ids VARCHAR(255)[] NULL,
                     file_path TEXT NULL,
+                    document_types VARCHAR(255)[] NULL,
 	                CONSTRAINT LIGHTRAG_VDB_ENTITY_PK PRIMARY KEY (workspace, id)
                     )"""
     },
@@ -2401,6 +2961,7 @@ TABLES = {
                     update_time TIMESTAMP(0) WITH TIME ZONE,
                     chunk_ids VARCHAR(255)[] NULL,
                     file_path TEXT NULL,
+                    document_types VARCHAR(255)[] NULL,
 	                CONSTRAINT LIGHTRAG_VDB_RELATION_PK PRIMARY KEY (workspace, id)
                     )"""
     },
@@ -2431,6 +2992,15 @@ TABLES = {
 	               CONSTRAINT LIGHTRAG_DOC_STATUS_PK PRIMARY KEY (workspace, id)
 	              )"""
     },
+    "LIGHTRAG_DOC_GRAPH_INDEX": {
+        "ddl": """CREATE TABLE LIGHTRAG_DOC_GRAPH_INDEX (
+	               workspace varchar(255) NOT NULL,
+	               id varchar(255) NOT NULL,
+	               data JSONB NULL,
+	               update_time TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+	               CONSTRAINT LIGHTRAG_DOC_GRAPH_INDEX_PK PRIMARY KEY (workspace, id)
+	              )"""
+    },
 }
 
 
@@ -2443,28 +3013,55 @@ SQL_TEMPLATES = {
                                 chunk_order_index, full_doc_id, file_path
                                 FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id=$2
                             """,
-    "get_by_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
-                                FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2
-                               """,
     "get_by_mode_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
                            FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND id=$3
                           """,
     "get_by_ids_full_docs": """SELECT id, COALESCE(content, '') as content
-                                 FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id IN ({ids})
+                                 FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id = ANY($2)
                             """,
     "get_by_ids_text_chunks": """SELECT id, tokens, COALESCE(content, '') as content,
                                   chunk_order_index, full_doc_id, file_path
-                                   FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id IN ({ids})
+                                   FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id = ANY($2)
                                 """,
-    "get_by_ids_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
-                                 FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode= IN ({ids})
+    "get_by_ids_llm_response_cache": """SELECT c.id, c.original_prompt, COALESCE(c.return_value, '') as "return", c.mode
+                                 FROM LIGHTRAG_LLM_CACHE c
+                                 JOIN unnest($2::text[], $3::text[]) AS k(mode, id)
+                                   ON c.mode = k.mode AND c.id = k.id
+                                 WHERE c.workspace=$1
                                 """,
+    "get_by_mode_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
+                           FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2
+                          """,
+    "count_llm_response_cache": """SELECT COUNT(*) AS count FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1""",
+    "evict_expired_llm_response_cache": """DELETE FROM LIGHTRAG_LLM_CACHE
+                           WHERE workspace=$1
+                           AND COALESCE(update_time, create_time) < NOW() - make_interval(secs => $2)
+                           RETURNING mode, id
+                          """,
+    "evict_lru_llm_response_cache": """DELETE FROM LIGHTRAG_LLM_CACHE
+                           WHERE workspace=$1 AND (mode, id) IN (
+                               SELECT mode, id FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1
+                               ORDER BY COALESCE(update_time, create_time) DESC OFFSET $2
+                           )
+                           RETURNING mode, id
+                          """,
+    "get_by_id_doc_graph_index": """SELECT id, data FROM LIGHTRAG_DOC_GRAPH_INDEX
+                                     WHERE workspace=$1 AND id=$2
+                                  """,
+    "get_by_ids_doc_graph_index": """SELECT id, data FROM LIGHTRAG_DOC_GRAPH_INDEX
+                                      WHERE workspace=$1 AND id = ANY($2)
+                                   """,
     "filter_keys": "SELECT id FROM {table_name} WHERE workspace=$1 AND id IN ({ids})",
     "upsert_doc_full": """INSERT INTO LIGHTRAG_DOC_FULL (id, content, workspace)
                         VALUES ($1, $2, $3)
                         ON CONFLICT (workspace,id) DO UPDATE
                            SET content = $2, update_time = CURRENT_TIMESTAMP
                        """,
+    "upsert_doc_graph_index": """INSERT INTO LIGHTRAG_DOC_GRAPH_INDEX (workspace, id, data)
+                                 VALUES ($1, $2, $3::jsonb)
+                                 ON CONFLICT (workspace, id) DO UPDATE
+                                 SET data = EXCLUDED.data, update_time = CURRENT_TIMESTAMP
+                                """,
     "upsert_llm_response_cache": """INSERT INTO LIGHTRAG_LLM_CACHE(workspace,id,original_prompt,return_value,mode)
                                       VALUES ($1, $2, $3, $4, $5)
                                       ON CONFLICT (workspace,mode,id) DO UPDATE
@@ -2475,8 +3072,8 @@ SQL_TEMPLATES = {
                                      """,
     "upsert_chunk": """INSERT INTO LIGHTRAG_DOC_CHUNKS (workspace, id, tokens,
                       chunk_order_index, full_doc_id, content, content_vector, file_path,
-                      create_time, update_time)
-                      VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                      document_types, create_time, update_time)
+                      VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9::varchar[], $10, $11)
                       ON CONFLICT (workspace,id) DO UPDATE
                       SET tokens=EXCLUDED.tokens,
                       chunk_order_index=EXCLUDED.chunk_order_index,
@@ -2484,23 +3081,26 @@ SQL_TEMPLATES = {
                       content = EXCLUDED.content,
                       content_vector=EXCLUDED.content_vector,
                       file_path=EXCLUDED.file_path,
+                      document_types=EXCLUDED.document_types,
                       update_time = EXCLUDED.update_time
                      """,
     # SQL for VectorStorage
     "upsert_entity": """INSERT INTO LIGHTRAG_VDB_ENTITY (workspace, id, entity_name, content,
-                      content_vector, chunk_ids, file_path, create_time, update_time)
-                      VALUES ($1, $2, $3, $4, $5, $6::varchar[], $7, $8, $9)
+                      content_vector, chunk_ids, file_path, document_types, create_time, update_time)
+                      VALUES ($1, $2, $3, $4, $5, $6::varchar[], $7, $8::varchar[], $9, $10)
                       ON CONFLICT (workspace,id) DO UPDATE
                       SET entity_name=EXCLUDED.entity_name,
                       content=EXCLUDED.content,
                       content_vector=EXCLUDED.content_vector,
                       chunk_ids=EXCLUDED.chunk_ids,
                       file_path=EXCLUDED.file_path,
+                      document_types=EXCLUDED.document_types,
                       update_time=EXCLUDED.update_time
                      """,
     "upsert_relationship": """INSERT INTO LIGHTRAG_VDB_RELATION (workspace, id, source_id,
-                      target_id, content, content_vector, chunk_ids, file_path, create_time, update_time)
-                      VALUES ($1, $2, $3, $4, $5, $6, $7::varchar[], $8, $9, $10)
+                      target_id, content, content_vector, chunk_ids, file_path, document_types,
+                      create_time, update_time)
+                      VALUES ($1, $2, $3, $4, $5, $6, $7::varchar[], $8, $9::varchar[], $10, $11)
                       ON CONFLICT (workspace,id) DO UPDATE
                       SET source_id=EXCLUDED.source_id,
                       target_id=EXCLUDED.target_id,
@@ -2508,58 +3108,54 @@ SQL_TEMPLATES = {
                       content_vector=EXCLUDED.content_vector,
                       chunk_ids=EXCLUDED.chunk_ids,
                       file_path=EXCLUDED.file_path,
+                      document_types=EXCLUDED.document_types,
                       update_time = EXCLUDED.update_time
                      """,
-    "relationships": """
-    WITH relevant_chunks AS (
-        SELECT id as chunk_id
-        FROM LIGHTRAG_DOC_CHUNKS
-        WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
-    )
-    SELECT source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
-    FROM (
-        SELECT r.id, r.source_id, r.target_id, r.create_time, 1 - (r.content_vector <=> '[{embedding_string}]'::vector) as distance
-        FROM LIGHTRAG_VDB_RELATION r
-        JOIN relevant_chunks c ON c.chunk_id = ANY(r.chunk_ids)
-        WHERE r.workspace=$1
-    ) filtered
-    WHERE distance>$3
-    ORDER BY distance DESC
-    LIMIT $4
+    # Similarity search, $1 workspace, $2 query vector, $3 max cosine distance, $4 top_k.
+    # Orders by the expression of the partial HNSW index from check_vector_index
+    "vector_search": """SELECT {columns}, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+        FROM {table_name}
+        WHERE workspace=$1 AND vector_dims(content_vector) = {dimension}
+        AND (content_vector::vector({dimension}) <=> $2::vector) < $3
+        ORDER BY content_vector::vector({dimension}) <=> $2::vector
+        LIMIT $4
     """,
-    "entities": """
-        WITH relevant_chunks AS (
-            SELECT id as chunk_id
-            FROM LIGHTRAG_DOC_CHUNKS
-            WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
-        )
-        SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
-            (
-                SELECT e.id, e.entity_name, e.create_time, 1 - (e.content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_VDB_ENTITY e
-                JOIN relevant_chunks c ON c.chunk_id = ANY(e.chunk_ids)
-                WHERE e.workspace=$1
-            ) as chunk_distances
-            WHERE distance>$3
-            ORDER BY distance DESC
-            LIMIT $4
+    # Filter values from $5, the last parameter is the number of nearest
+    # neighbours taken from the index
+    "vector_search_postfilter": """SELECT {columns}, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+        FROM (
+            SELECT *, content_vector::vector({dimension}) <=> $2::vector AS distance
+            FROM {table_name}
+            WHERE workspace=$1 AND vector_dims(content_vector) = {dimension}
+            ORDER BY content_vector::vector({dimension}) <=> $2::vector
+            LIMIT {candidates}
+        ) nearest
+        WHERE distance < $3 AND {filter}
+        ORDER BY distance
+        LIMIT $4
     """,
-    "chunks": """
-        WITH relevant_chunks AS (
-            SELECT id as chunk_id
-            FROM LIGHTRAG_DOC_CHUNKS
-            WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
+    # Filter values from $5; the materialized CTE keeps the planner off the index
+    "vector_search_prefilter": """WITH candidates AS MATERIALIZED (
+            SELECT * FROM {table_name}
+            WHERE workspace=$1 AND {filter}
+            AND vector_dims(content_vector) = {dimension}
         )
-        SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
-            (
-                SELECT id, content, file_path, create_time, 1 - (content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_DOC_CHUNKS
-                WHERE workspace=$1
-                AND id IN (SELECT chunk_id FROM relevant_chunks)
-            ) as chunk_distances
-            WHERE distance>$3
-            ORDER BY distance DESC
-            LIMIT $4
+        SELECT {columns}, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+        FROM (
+            SELECT *, content_vector <=> $2::vector AS distance FROM candidates
+        ) scored
+        WHERE distance < $3
+        ORDER BY distance
+        LIMIT $4
+    """,
+    "vector_search_doc_chunks": """SELECT array_agg(id) AS chunk_ids,
+        (SELECT reltuples::BIGINT FROM pg_class WHERE relname = 'lightrag_doc_chunks') AS total
+        FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND full_doc_id = ANY($2::varchar[])
+    """,
+    # Filter values from $2
+    "vector_search_filter_count": """SELECT count(*) AS matches,
+        (SELECT reltuples::BIGINT FROM pg_class WHERE relname = '{relname}') AS total
+        FROM {table_name} WHERE workspace=$1 AND {filter}
     """,
     # DROP tables
     "drop_specifiy_table_workspace": """
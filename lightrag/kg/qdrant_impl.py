@@ -83,6 +83,18 @@ class QdrantVectorDBStorage(BaseVectorStorage):
                 size=self.embedding_func.embedding_dim, distance=models.Distance.COSINE
             ),
         )
+        # Keyword indexes let document type filters run inside the HNSW search
+        self._document_type_fields = [
+            name
+            for name in ("document_type", "document_types")
+            if name in self.meta_fields
+        ]
+        for name in self._document_type_fields:
+            self._client.create_payload_index(
+                collection_name=self.namespace,
+                field_name=name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         logger.info(f"Inserting {len(data)} to {self.namespace}")
@@ -128,17 +140,35 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         return results
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
+        if document_types and not self._document_type_fields:
+            return []
         embedding = await self.embedding_func(
             [query], _priority=5
         )  # higher priority for query
+        query_filter = None
+        if document_types:
+            # Matches a keyword payload as well as any element of a keyword list
+            query_filter = models.Filter(
+                should=[
+                    models.FieldCondition(
+                        key=name, match=models.MatchAny(any=list(document_types))
+                    )
+                    for name in self._document_type_fields
+                ]
+            )
         results = self._client.search(
             collection_name=self.namespace,
             query_vector=embedding[0],
             limit=top_k,
             with_payload=True,
             score_threshold=self.cosine_better_than_threshold,
+            query_filter=query_filter,
         )
 
         logger.debug(f"query result: {results}")
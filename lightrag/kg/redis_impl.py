@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Any, final
 from dataclasses import dataclass
 import pipmaster as pm
@@ -11,9 +12,10 @@ if not pm.is_installed("redis"):
 # aioredis is a depricated library, replaced with redis
 from redis.asyncio import Redis, ConnectionPool  # type: ignore
 from redis.exceptions import RedisError, ConnectionError  # type: ignore
-from lightrag.utils import logger
+from lightrag.utils import generate_cache_key, logger, record_storage_round_trip
 
 from lightrag.base import BaseKVStorage
+from lightrag.namespace import NameSpace, is_namespace
 import json
 
 
@@ -42,6 +44,13 @@ class RedisKVStorage(BaseKVStorage):
             socket_connect_timeout=SOCKET_CONNECT_TIMEOUT,
         )
         self._redis = Redis(connection_pool=self._pool)
+        # Sorted set of the LLM cache keys scored by their access time, the
+        # name cannot clash with a flat "mode:args_hash" cache key
+        self._is_llm_cache = is_namespace(
+            self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+        )
+        self._access_index = f"{self.namespace}:_access_index"
+        self._access_index_checked = False
         logger.info(
             f"Initialized Redis connection pool for {self.namespace} with max {MAX_CONNECTIONS} connections"
         )
@@ -81,6 +90,7 @@ class RedisKVStorage(BaseKVStorage):
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         async with self._get_redis_connection() as redis:
             try:
+                record_storage_round_trip(self.namespace)
                 data = await redis.get(f"{self.namespace}:{id}")
                 return json.loads(data) if data else None
             except json.JSONDecodeError as e:
@@ -88,17 +98,33 @@ class RedisKVStorage(BaseKVStorage):
                 return None
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        if not ids:
+            return []
         async with self._get_redis_connection() as redis:
             try:
-                pipe = redis.pipeline()
-                for id in ids:
-                    pipe.get(f"{self.namespace}:{id}")
-                results = await pipe.execute()
+                record_storage_round_trip(self.namespace)
+                results = await redis.mget([f"{self.namespace}:{id}" for id in ids])
                 return [json.loads(result) if result else None for result in results]
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error in batch get: {e}")
                 return [None] * len(ids)
 
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict[str, Any] | None:
+        cache_key = generate_cache_key(mode, id)
+        async with self._get_redis_connection() as redis:
+            record_storage_round_trip(self.namespace)
+            pipe = redis.pipeline()
+            pipe.get(f"{self.namespace}:{cache_key}")
+            if self._is_llm_cache:
+                # Recency for LRU eviction, only for entries already indexed
+                pipe.zadd(self._access_index, {cache_key: int(time.time())}, xx=True)
+            data = (await pipe.execute())[0]
+        try:
+            return {id: json.loads(data)} if data else None
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error for id {cache_key}: {e}")
+            return None
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         async with self._get_redis_connection() as redis:
             pipe = redis.pipeline()
@@ -114,11 +140,21 @@ class RedisKVStorage(BaseKVStorage):
             return
 
         logger.info(f"Inserting {len(data)} items to {self.namespace}")
+        # Cached LLM responses expire natively in Redis
+        ttl = None
+        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            ttl = self.global_config.get("llm_cache_ttl") or None
         async with self._get_redis_connection() as redis:
             try:
                 pipe = redis.pipeline()
                 for k, v in data.items():
-                    pipe.set(f"{self.namespace}:{k}", json.dumps(v))
+                    pipe.set(f"{self.namespace}:{k}", json.dumps(v), ex=ttl)
+                if self._is_llm_cache:
+                    now = int(time.time())
+                    pipe.zadd(
+                        self._access_index,
+                        {k: v.get("access_time") or now for k, v in data.items()},
+                    )
                 await pipe.execute()
 
                 for k in data:
@@ -140,9 +176,11 @@ class RedisKVStorage(BaseKVStorage):
             pipe = redis.pipeline()
             for id in ids:
                 pipe.delete(f"{self.namespace}:{id}")
+            if self._is_llm_cache:
+                pipe.zrem(self._access_index, *ids)
 
             results = await pipe.execute()
-            deleted_count = sum(results)
+            deleted_count = sum(results[: len(ids)])
             logger.info(
                 f"Deleted {deleted_count} of {len(ids)} entries from {self.namespace}"
             )
@@ -164,11 +202,94 @@ class RedisKVStorage(BaseKVStorage):
             return False
 
         try:
-            await self.delete(modes)
+            async with self._get_redis_connection() as redis:
+                keys = []
+                for mode in modes:
+                    pattern = f"{self.namespace}:{generate_cache_key(mode, '*')}"
+                    keys.extend([key async for key in redis.scan_iter(match=pattern)])
+                prefix_length = len(self.namespace) + 1
+                cache_keys = [key[prefix_length:] for key in keys]
+                # Legacy mode buckets are stored under the mode itself
+                keys.extend(f"{self.namespace}:{mode}" for mode in modes)
+                await redis.delete(*keys)
+                if cache_keys:
+                    await redis.zrem(self._access_index, *cache_keys)
             return True
         except Exception:
             return False
 
+    async def get_cache_by_mode(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = f"{self.namespace}:{generate_cache_key(mode, '')}"
+        async with self._get_redis_connection() as redis:
+            keys = [key async for key in redis.scan_iter(match=f"{prefix}*")]
+            if not keys:
+                return {}
+            values = await redis.mget(keys)
+            return {
+                key[len(prefix) :]: json.loads(value)
+                for key, value in zip(keys, values)
+                if value
+            }
+
+    async def _build_access_index(self, redis) -> None:
+        """Index entries written before the access index existed (once per process)"""
+        self._access_index_checked = True
+        if await redis.exists(self._access_index):
+            return
+        prefix_length = len(self.namespace) + 1
+        keys = [
+            key
+            async for key in redis.scan_iter(match=f"{self.namespace}:*")
+            if key != self._access_index
+        ]
+        for start in range(0, len(keys), 1000):
+            batch = keys[start : start + 1000]
+            scores = {}
+            for key, value in zip(batch, await redis.mget(batch)):
+                try:
+                    scores[key[prefix_length:]] = (
+                        json.loads(value).get("access_time", 0) if value else 0
+                    )
+                except (json.JSONDecodeError, AttributeError):
+                    scores[key[prefix_length:]] = 0
+            if scores:
+                await redis.zadd(self._access_index, scores)
+
+    async def evict_cache(self, max_entries: int, ttl: int) -> list[str]:
+        """Evict least recently used entries beyond max_entries
+
+        Expiry is handled by Redis through the TTL set on every write. The size
+        cap is enforced through the access index: its size is read in O(1) and
+        the oldest entries come from a range query, no key is scanned.
+        """
+        if not max_entries or not self._is_llm_cache:
+            return []
+
+        async with self._get_redis_connection() as redis:
+            if not self._access_index_checked:
+                await self._build_access_index(redis)
+            expired = []
+            if ttl:
+                # Entries not accessed for ttl seconds have expired
+                cutoff = time.time() - ttl
+                expired = await redis.zrangebyscore(self._access_index, "-inf", cutoff)
+                if expired:
+                    await redis.zremrangebyscore(self._access_index, "-inf", cutoff)
+            count = await redis.zcard(self._access_index)
+            if count <= max_entries:
+                return expired
+            evicted = await redis.zrange(
+                self._access_index, 0, count - int(max_entries * 0.9) - 1
+            )
+            pipe = redis.pipeline()
+            pipe.delete(*(f"{self.namespace}:{key}" for key in evicted))
+            pipe.zrem(self._access_index, *evicted)
+            await pipe.execute()
+            logger.info(
+                f"Evicted {len(evicted)} LLM cache entries from {self.namespace}"
+            )
+            return expired + evicted
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage by removing all keys under the current namespace.
 
@@ -0,0 +1,405 @@
+"""Shared-memory key-value store for multi-process (gunicorn) deployments.
+
+Namespaces holding JSON records (KV storages, doc status, their write-ahead log
+state) are kept in one SQLite database placed on tmpfs (``/dev/shm`` when
+available) instead of ``multiprocessing.Manager`` dicts. Every worker opens the
+file itself and reads it through SQLite's memory-mapped pages, so a read is a
+local B-tree lookup rather than a pickled round trip to the manager process.
+
+The database runs in WAL mode: readers see a consistent snapshot of the last
+committed write without taking any lock, while writers are serialized by
+SQLite and every mutating call commits as a single transaction. Durability is
+not its job: the storages still persist their data to their own files, so the
+database skips fsync entirely.
+
+Async code reaches the database through the ``kv_*`` helpers, which run batch
+writes and whole-namespace reads in a dedicated thread of each process instead
+of on the event loop.
+"""
+
+import asyncio
+import atexit
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+_MISSING = object()
+
+# Directory for the database file; tmpfs keeps it in shared memory
+SHARED_KV_DIR = os.getenv("LIGHTRAG_SHARED_KV_DIR")
+
+# Bytes of the database each process maps into memory for reads
+SHARED_KV_MMAP_BYTES = int(os.getenv("LIGHTRAG_SHARED_KV_MMAP_BYTES", 1 << 30))
+
+# Seconds SQLite itself waits for the write lock before a write backs off and
+# retries, and seconds after which a write gives up
+SHARED_KV_BUSY_TIMEOUT = float(os.getenv("LIGHTRAG_SHARED_KV_BUSY_TIMEOUT", 0.05))
+SHARED_KV_WRITE_TIMEOUT = float(os.getenv("LIGHTRAG_SHARED_KV_WRITE_TIMEOUT", 60))
+
+_DIR_PREFIX = "lightrag_shared_kv_"
+
+# Keys per query of a batched read, below SQLite's bound parameter limit
+_GET_MANY_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS kv_count (
+    ns TEXT PRIMARY KEY,
+    n INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS kv_count_insert AFTER INSERT ON kv BEGIN
+    INSERT INTO kv_count (ns, n) VALUES (NEW.ns, 1)
+        ON CONFLICT (ns) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS kv_count_delete AFTER DELETE ON kv BEGIN
+    UPDATE kv_count SET n = n - 1 WHERE ns = OLD.ns;
+END;
+"""
+
+# Updates an existing row in place, so only real inserts fire kv_count_insert
+_UPSERT = (
+    "INSERT INTO kv (ns, key, value) VALUES (?, ?, ?) "
+    "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value"
+)
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove_stale_dirs(base: str | None) -> None:
+    """Remove databases left behind by creators that died without cleaning up"""
+    base = base or tempfile.gettempdir()
+    for directory in glob.glob(os.path.join(glob.escape(base), f"{_DIR_PREFIX}*")):
+        owner = os.path.basename(directory)[len(_DIR_PREFIX) :].split("_", 1)[0]
+        if owner.isdigit() and not _pid_alive(int(owner)):
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class SharedKVStore:
+    """SQLite database shared by all processes forked from its creator
+
+    The creator only sets up the schema; each process opens its own connection
+    and worker thread on first use, as neither must cross a fork. A directory
+    created here carries the creator's pid in its name: it is removed when the
+    creator exits, or by the next creator if it died without cleaning up.
+    """
+
+    def __init__(self, directory: str | None = None):
+        if directory is None:
+            base = SHARED_KV_DIR
+            if base is None and os.access("/dev/shm", os.W_OK):
+                base = "/dev/shm"
+            _remove_stale_dirs(base)
+            directory = tempfile.mkdtemp(
+                prefix=f"{_DIR_PREFIX}{os.getpid()}_", dir=base
+            )
+            atexit.register(self.destroy)
+        self.directory = directory
+        self.path = os.path.join(directory, "shared_kv.sqlite")
+        self._owner_pid = os.getpid()
+        self._pid = None
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid = None
+
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # A connection inherited through fork is dropped without closing it
+            self._conn = sqlite3.connect(
+                self.path,
+                timeout=SHARED_KV_BUSY_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(f"PRAGMA mmap_size={SHARED_KV_MMAP_BYTES}")
+            self._pid = os.getpid()
+        return self._conn
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on this process's database thread"""
+        if self._executor_pid != os.getpid():
+            # The thread of an inherited executor does not exist after fork
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="lightrag_shared_kv"
+            )
+            self._executor_pid = os.getpid()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def _begin(self, conn: sqlite3.Connection) -> None:
+        """Take the write lock, backing off while other processes hold it"""
+        deadline = time.monotonic() + SHARED_KV_WRITE_TIMEOUT
+        delay = 0.001
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                if time.monotonic() >= deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def write(self, statements: list[tuple[str, Any]]) -> list[int]:
+        """Run statements in one transaction, returns the rows each one changed
+
+        A statement whose parameters are a list runs once per parameter tuple.
+        """
+        with self._lock:
+            conn = self._connection()
+            self._begin(conn)
+            try:
+                changed = []
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        changed.append(conn.executemany(sql, params).rowcount)
+                    else:
+                        changed.append(conn.execute(sql, params).rowcount)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return changed
+
+    def namespace(self, namespace: str) -> "SharedKVDict":
+        return SharedKVDict(self, namespace)
+
+    def destroy(self) -> None:
+        """Remove the database (creator process only)"""
+        if os.getpid() != self._owner_pid:
+            return
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class SharedKVDict(MutableMapping):
+    """Dict view of one namespace of a SharedKVStore
+
+    Values are stored JSON-encoded, so like a Manager dict every read returns a
+    fresh copy and changing a returned value does not change the store.
+    Iteration helpers return lists read in a single snapshot.
+    """
+
+    def __init__(self, store: SharedKVStore, namespace: str):
+        self._store = store
+        self._ns = namespace
+
+    def __getitem__(self, key: str) -> Any:
+        rows = self._store.query(
+            "SELECT value FROM kv WHERE ns = ? AND key = ?", (self._ns, key)
+        )
+        if not rows:
+            raise KeyError(key)
+        return json.loads(rows[0][0])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        """Values of keys in one read, None for missing keys"""
+        found = {}
+        with self._store._lock:
+            for start in range(0, len(keys), _GET_MANY_BATCH):
+                batch = keys[start : start + _GET_MANY_BATCH]
+                rows = self._store.query(
+                    "SELECT key, value FROM kv WHERE ns = ? AND key IN "
+                    f"({', '.join('?' * len(batch))})",
+                    (self._ns, *batch),
+                )
+                found.update(rows)
+        return [json.loads(found[key]) if key in found else None for key in keys]
+
+    def __contains__(self, key: object) -> bool:
+        return bool(
+            self._store.query(
+                "SELECT 1 FROM kv WHERE ns = ? AND key = ?", (self._ns, key)
+            )
+        )
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._store.write([(_UPSERT, (self._ns, key, _encode(value)))])
+
+    def __delitem__(self, key: str) -> None:
+        (deleted,) = self._store.write(
+            [("DELETE FROM kv WHERE ns = ? AND key = ?", (self._ns, key))]
+        )
+        if not deleted:
+            raise KeyError(key)
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        with self._store._lock:
+            try:
+                value = self[key]
+            except KeyError:
+                if default is _MISSING:
+                    raise
+                return default
+            del self[key]
+            return value
+
+    def update(self, other=(), /, **kwargs) -> None:
+        items = (
+            dict(other, **kwargs) if kwargs or not isinstance(other, dict) else other
+        )
+        if not items:
+            return
+        self._store.write(
+            [
+                (
+                    _UPSERT,
+                    [(self._ns, key, _encode(value)) for key, value in items.items()],
+                )
+            ]
+        )
+
+    def delete_many(self, keys: list[str]) -> list[str]:
+        """Delete keys in one transaction, returns those that existed"""
+        with self._store._lock:
+            deleted = [key for key in keys if key in self]
+            if deleted:
+                self._store.write(
+                    [
+                        (
+                            "DELETE FROM kv WHERE ns = ? AND key = ?",
+                            [(self._ns, key) for key in deleted],
+                        )
+                    ]
+                )
+            return deleted
+
+    def clear(self) -> None:
+        self._store.write([("DELETE FROM kv WHERE ns = ?", (self._ns,))])
+
+    def __len__(self) -> int:
+        rows = self._store.query("SELECT n FROM kv_count WHERE ns = ?", (self._ns,))
+        return rows[0][0] if rows else 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> list[str]:
+        return [
+            key
+            for (key,) in self._store.query(
+                "SELECT key FROM kv WHERE ns = ?", (self._ns,)
+            )
+        ]
+
+    def values(self) -> list[Any]:
+        return [
+            json.loads(value)
+            for (value,) in self._store.query(
+                "SELECT value FROM kv WHERE ns = ?", (self._ns,)
+            )
+        ]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [
+            (key, json.loads(value))
+            for key, value in self._store.query(
+                "SELECT key, value FROM kv WHERE ns = ?", (self._ns,)
+            )
+        ]
+
+    def copy(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"SharedKVDict({self._ns!r}, {len(self)} records)"
+
+
+# Async access to namespace data that is either a SharedKVDict or a plain dict.
+# SharedKVDict calls run on the database thread; dicts are used directly, as
+# they are only changed on the event loop.
+
+
+async def kv_copy(data: MutableMapping) -> dict[str, Any]:
+    if isinstance(data, SharedKVDict):
+        return await data._store.run(data.copy)
+    return data.copy()
+
+
+async def kv_items(data: MutableMapping) -> list[tuple[str, Any]]:
+    if isinstance(data, SharedKVDict):
+        return await data._store.run(data.items)
+    return list(data.items())
+
+
+async def kv_keys(data: MutableMapping) -> list[str]:
+    if isinstance(data, SharedKVDict):
+        return await data._store.run(data.keys)
+    return list(data.keys())
+
+
+async def kv_get_many(data: MutableMapping, keys: list[str]) -> list[Any]:
+    """Values of keys, None for missing keys"""
+    if isinstance(data, SharedKVDict):
+        return await data._store.run(data.get_many, keys)
+    return [data.get(key) for key in keys]
+
+
+async def kv_update(data: MutableMapping, items: dict[str, Any]) -> None:
+    if isinstance(data, SharedKVDict):
+        await data._store.run(data.update, items)
+    else:
+        data.update(items)
+
+
+async def kv_delete(data: MutableMapping, keys: list[str]) -> list[str]:
+    """Delete keys, returns those that existed"""
+    if isinstance(data, SharedKVDict):
+        return await data._store.run(data.delete_many, keys)
+    return [key for key in keys if data.pop(key, _MISSING) is not _MISSING]
+
+
+async def kv_clear(data: MutableMapping) -> None:
+    if isinstance(data, SharedKVDict):
+        await data._store.run(data.clear)
+    else:
+        data.clear()
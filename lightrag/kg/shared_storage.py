@@ -5,6 +5,15 @@ from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
 from typing import Any, Dict, Optional, Union, TypeVar, Generic
 
+from .namespace_locks import (
+    KeyedLocks,
+    NamespaceRWLock,
+    RWLockGuard,
+    lock_metrics,
+    process_locks_supported,
+)
+from .shared_kv import SharedKVDict, SharedKVStore
+
 
 # Define a direct print function for critical logs that must be visible in all processes
 def direct_log(message, level="INFO", enable_output: bool = True):
@@ -34,16 +43,32 @@ _shared_dicts: Optional[Dict[str, Any]] = None
 _init_flags: Optional[Dict[str, bool]] = None  # namespace -> initialized
 _update_flags: Optional[Dict[str, bool]] = None  # namespace -> updated
 
+# shared-memory store for KV namespaces in multiprocess mode, and this process's
+# views of it
+_shared_kv: Optional[SharedKVStore] = None
+_kv_namespaces: Dict[str, SharedKVDict] = {}
+
 # locks for mutex access
 _storage_lock: Optional[LockType] = None
 _internal_lock: Optional[LockType] = None
 _pipeline_status_lock: Optional[LockType] = None
 _graph_db_lock: Optional[LockType] = None
+_graph_flush_lock: Optional[LockType] = None
 _data_init_lock: Optional[LockType] = None
 
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
+# per-namespace reader/writer storage locks of this process
+_namespace_locks: Dict[str, NamespaceRWLock] = {}
+
+# per entity / relation locks for graph merges of this process
+_graph_key_locks = KeyedLocks()
+
+# namespaces of the graph database lock and of the merge result flush lock
+GRAPH_DB_LOCK_NS = "graph_db"
+GRAPH_FLUSH_LOCK_NS = "graph_db_flush"
+
 
 class UnifiedLock(Generic[T]):
     """Provide a unified lock interface type for asyncio.Lock and multiprocessing.Lock"""
@@ -223,8 +248,28 @@ def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
-def get_storage_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified storage lock for data consistency"""
+def _get_namespace_lock(namespace: str) -> Optional[NamespaceRWLock]:
+    if _is_multiprocess and not process_locks_supported():
+        return None
+    if namespace not in _namespace_locks:
+        lock_dir = _shared_kv.directory if _is_multiprocess else None
+        _namespace_locks[namespace] = NamespaceRWLock(namespace, lock_dir)
+    return _namespace_locks[namespace]
+
+
+def get_storage_lock(
+    namespace: Optional[str] = None, enable_logging: bool = False
+) -> Union[UnifiedLock, RWLockGuard]:
+    """return the storage lock for data consistency
+
+    With a namespace, this is the exclusive (writer) side of the namespace's
+    reader/writer lock, which only serializes against users of the same
+    namespace. Without one it is the global storage lock.
+    """
+    if namespace is not None:
+        namespace_lock = _get_namespace_lock(namespace)
+        if namespace_lock is not None:
+            return namespace_lock.write()
     async_lock = _async_locks.get("storage_lock") if _is_multiprocess else None
     return UnifiedLock(
         lock=_storage_lock,
@@ -247,8 +292,19 @@ def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
-def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified graph database lock for ensuring atomic operations"""
+def get_graph_db_lock(
+    enable_logging: bool = False, shared: bool = False
+) -> Union[UnifiedLock, RWLockGuard]:
+    """return unified graph database lock for ensuring atomic operations
+
+    The lock is exclusive by default. Entity and relation merges take its
+    shared side: they coordinate among themselves through get_graph_key_locks
+    and get_graph_flush_lock, and only exclude whole-graph operations such as
+    entity edits and document deletion.
+    """
+    namespace_lock = _get_namespace_lock(GRAPH_DB_LOCK_NS)
+    if namespace_lock is not None:
+        return namespace_lock.read() if shared else namespace_lock.write()
     async_lock = _async_locks.get("graph_db_lock") if _is_multiprocess else None
     return UnifiedLock(
         lock=_graph_db_lock,
@@ -259,6 +315,32 @@ def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
+def get_graph_key_locks(keys):
+    """Locks for merging entities (``("node", name)``) and relations (``("edge", src, tgt)``)
+
+    All keys are held together until the context exits. Only the worker
+    running the indexing pipeline merges, so the locks are local to the
+    process; hold the shared graph database lock alongside them.
+    """
+    return _graph_key_locks.lock_many(keys)
+
+
+def get_graph_flush_lock(enable_logging: bool = False):
+    """Lock serializing the vector database flushes of graph merges"""
+    namespace_lock = _get_namespace_lock(GRAPH_FLUSH_LOCK_NS)
+    if namespace_lock is not None:
+        return namespace_lock.write()
+    # Not the graph database lock: merges hold that one while they flush
+    async_lock = _async_locks.get("graph_flush_lock") if _is_multiprocess else None
+    return UnifiedLock(
+        lock=_graph_flush_lock,
+        is_async=not _is_multiprocess,
+        name="graph_flush_lock",
+        enable_logging=enable_logging,
+        async_lock=async_lock,
+    )
+
+
 def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified data initialization lock for ensuring atomic data initialization"""
     async_lock = _async_locks.get("data_init_lock") if _is_multiprocess else None
@@ -283,7 +365,8 @@ def initialize_share_data(workers: int = 1):
 
     The function determines whether to use cross-process shared variables for data storage
     based on the number of workers. If workers=1, it uses thread locks and local dictionaries.
-    If workers>1, it uses process locks and shared dictionaries managed by multiprocessing.Manager.
+    If workers>1, it uses process locks and shared dictionaries managed by multiprocessing.Manager,
+    and KV namespaces live in a shared-memory SQLite store every worker reads directly.
 
     Args:
         workers (int): Number of worker processes. If 1, single-process mode is used.
@@ -297,11 +380,13 @@ def initialize_share_data(workers: int = 1):
         _internal_lock, \
         _pipeline_status_lock, \
         _graph_db_lock, \
+        _graph_flush_lock, \
         _data_init_lock, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
         _update_flags, \
+        _shared_kv, \
         _async_locks
 
     # Check if already initialized
@@ -320,10 +405,12 @@ def initialize_share_data(workers: int = 1):
         _storage_lock = _manager.Lock()
         _pipeline_status_lock = _manager.Lock()
         _graph_db_lock = _manager.Lock()
+        _graph_flush_lock = _manager.Lock()
         _data_init_lock = _manager.Lock()
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
+        _shared_kv = SharedKVStore()
 
         # Initialize async locks for multiprocess mode
         _async_locks = {
@@ -331,6 +418,7 @@ def initialize_share_data(workers: int = 1):
             "storage_lock": asyncio.Lock(),
             "pipeline_status_lock": asyncio.Lock(),
             "graph_db_lock": asyncio.Lock(),
+            "graph_flush_lock": asyncio.Lock(),
             "data_init_lock": asyncio.Lock(),
         }
 
@@ -343,6 +431,7 @@ def initialize_share_data(workers: int = 1):
         _storage_lock = asyncio.Lock()
         _pipeline_status_lock = asyncio.Lock()
         _graph_db_lock = asyncio.Lock()
+        _graph_flush_lock = asyncio.Lock()
         _data_init_lock = asyncio.Lock()
         _shared_dicts = {}
         _init_flags = {}
@@ -494,8 +583,16 @@ async def try_initialize_namespace(namespace: str) -> bool:
     return False
 
 
-async def get_namespace_data(namespace: str) -> Dict[str, Any]:
-    """get the shared data reference for specific namespace"""
+async def get_namespace_data(namespace: str, kv_store: bool = False) -> Dict[str, Any]:
+    """get the shared data reference for specific namespace
+
+    Args:
+        namespace: The namespace name
+        kv_store: The namespace maps string keys to JSON-serializable values that
+            are replaced, never modified in place. In multiprocess mode such a
+            namespace is served from the shared-memory KV store, which workers read
+            without inter-process calls.
+    """
     if _shared_dicts is None:
         direct_log(
             f"Error: try to getnanmespace before it is initialized, pid={os.getpid()}",
@@ -503,6 +600,11 @@ async def get_namespace_data(namespace: str) -> Dict[str, Any]:
         )
         raise ValueError("Shared dictionaries not initialized")
 
+    if kv_store and _shared_kv is not None:
+        if namespace not in _kv_namespaces:
+            _kv_namespaces[namespace] = _shared_kv.namespace(namespace)
+        return _kv_namespaces[namespace]
+
     async with get_internal_lock():
         if namespace not in _shared_dicts:
             if _is_multiprocess and _manager is not None:
@@ -513,6 +615,41 @@ async def get_namespace_data(namespace: str) -> Dict[str, Any]:
     return _shared_dicts[namespace]
 
 
+class _NoLock:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+def get_storage_read_lock(
+    namespace: str, namespace_data: Any = None, enable_logging: bool = False
+):
+    """Lock to hold while only reading the storage data of namespace
+
+    Readers share the namespace's reader/writer lock and run concurrently.
+    Readers of the shared-memory KV store always see a consistent snapshot, so
+    they take no lock at all.
+    """
+    if isinstance(namespace_data, SharedKVDict):
+        return _NoLock()
+    namespace_lock = _get_namespace_lock(namespace)
+    if namespace_lock is None:
+        return get_storage_lock(enable_logging=enable_logging)
+    return namespace_lock.read()
+
+
+def get_lock_metrics() -> Dict[str, Dict[str, Any]]:
+    """Wait and hold times of this process's namespace storage locks
+
+    Returns:
+        Dict mapping namespaces to "read" and "write" figures: acquisitions and
+        average/maximum wait and hold times in milliseconds
+    """
+    return lock_metrics(_namespace_locks)
+
+
 def finalize_share_data():
     """
     Release shared resources and clean up.
@@ -530,11 +667,13 @@ def finalize_share_data():
         _internal_lock, \
         _pipeline_status_lock, \
         _graph_db_lock, \
+        _graph_flush_lock, \
         _data_init_lock, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
         _update_flags, \
+        _shared_kv, \
         _async_locks
 
     # Check if already initialized
@@ -588,8 +727,21 @@ def finalize_share_data():
                 f"Process {os.getpid()} Error shutting down Manager: {e}", level="ERROR"
             )
 
+    # Remove the shared-memory KV store (only its creator does)
+    if _shared_kv is not None:
+        try:
+            _shared_kv.destroy()
+        except Exception as e:
+            direct_log(
+                f"Process {os.getpid()} Error removing shared KV store: {e}",
+                level="ERROR",
+            )
+    _kv_namespaces.clear()
+    _namespace_locks.clear()
+
     # Reset global variables
     _manager = None
+    _shared_kv = None
     _initialized = None
     _is_multiprocess = None
     _shared_dicts = None
@@ -598,6 +750,7 @@ def finalize_share_data():
     _internal_lock = None
     _pipeline_status_lock = None
     _graph_db_lock = None
+    _graph_flush_lock = None
     _data_init_lock = None
     _update_flags = None
     _async_locks = None
@@ -10,7 +10,7 @@ from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdg
 
 from ..base import BaseGraphStorage, BaseKVStorage, BaseVectorStorage
 from ..namespace import NameSpace, is_namespace
-from ..utils import logger
+from ..utils import logger, record_storage_round_trip
 
 import pipmaster as pm
 import configparser
@@ -225,16 +225,22 @@ class TiDBKVStorage(BaseKVStorage):
         """Fetch doc_full data by id."""
         SQL = SQL_TEMPLATES["get_by_id_" + self.namespace]
         params = {"id": id}
+        record_storage_round_trip(self.namespace)
         response = await self.db.query(SQL, params)
         return response if response else None
 
     # Query by id
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Fetch doc_chunks data by id"""
+        """Fetch doc_chunks data by id, aligned with the requested ids"""
+        if not ids:
+            return []
         SQL = SQL_TEMPLATES["get_by_ids_" + self.namespace].format(
             ids=",".join([f"'{id}'" for id in ids])
         )
-        return await self.db.query(SQL, multirows=True)
+        record_storage_round_trip(self.namespace)
+        rows = await self.db.query(SQL, multirows=True) or []
+        by_id = {row["id"]: row for row in rows}
+        return [by_id.get(id) for id in ids]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         SQL = SQL_TEMPLATES["filter_keys"].format(
@@ -429,9 +435,16 @@ class TiDBVectorDBStorage(BaseVectorStorage):
             self.db = None
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        document_types: list[str] | None = None,
     ) -> list[dict[str, Any]]:
-        """Search from tidb vector"""
+        """Search from tidb vector
+
+        The TiDB tables store no document types, ``document_types`` is not applied.
+        """
         embeddings = await self.embedding_func(
             [query], _priority=5
         )  # higher priority for query
@@ -6,7 +6,7 @@ import configparser
 import os
 import time
 import warnings
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from functools import partial
 from typing import (
@@ -39,6 +39,7 @@ from lightrag.kg import (
 from lightrag.kg.shared_storage import (
     get_namespace_data,
     get_pipeline_status_lock,
+    get_graph_db_lock,
 )
 
 from .base import (
@@ -46,12 +47,17 @@ from .base import (
     BaseKVStorage,
     BaseVectorStorage,
     DocProcessingStatus,
+    DocSortField,
     DocStatus,
     DocStatusStorage,
     QueryParam,
     StorageNameSpace,
     StoragesStatus,
 )
+from .llm.client_pool import close_client_pools, configure_client_pools
+from .graph_analytics import DocumentConnectivityCache, GraphAnalyticsStore
+from .semantic_cache import SemanticCacheIndex
+from .persistence import PersistenceScheduler
 from .namespace import NameSpace, make_namespace
 from .operate import (
     chunking_by_token_size,
@@ -66,6 +72,7 @@ from .utils import (
     Tokenizer,
     TiktokenTokenizer,
     EmbeddingFunc,
+    GlobalConfig,
     always_get_an_event_loop,
     compute_mdhash_id,
     convert_response_to_json,
@@ -75,6 +82,7 @@ from .utils import (
     clean_text,
     check_storage_env_vars,
     logger,
+    track_storage_round_trips,
 )
 from .types import KnowledgeGraph
 from dotenv import load_dotenv
@@ -189,6 +197,11 @@ class LightRAG:
     Defaults to `chunking_by_token_size` if not specified.
     """
 
+    chunk_fetch_batch_size: int = field(
+        default=int(os.getenv("CHUNK_FETCH_BATCH_SIZE", 500))
+    )
+    """Maximum number of chunk ids requested per `get_by_ids` call when building query context."""
+
     # Embedding
     # ---
 
@@ -250,6 +263,22 @@ class LightRAG:
     enable_llm_cache_for_entity_extract: bool = field(default=True)
     """If True, enables caching for entity extraction steps to reduce LLM costs."""
 
+    llm_cache_max_entries: int = field(
+        default=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 0))
+    )
+    """Maximum number of cached LLM responses, least recently used entries are evicted beyond it (0 = unlimited)."""
+
+    llm_cache_ttl: int = field(default=int(os.getenv("LLM_CACHE_TTL", 0)))
+    """Seconds after which a cached LLM response expires (0 = never)."""
+
+    persist_interval: float = field(default=float(os.getenv("PERSIST_INTERVAL", 5.0)))
+    """Seconds between background flushes of the LLM cache written by queries (0 = flush after every query)."""
+
+    persist_dirty_threshold: int = field(
+        default=int(os.getenv("PERSIST_DIRTY_THRESHOLD", 100))
+    )
+    """Queries after which the LLM cache is flushed before the interval has passed (0 = no threshold)."""
+
     # Extensions
     # ---
 
@@ -354,6 +383,9 @@ class LightRAG:
         _print_config = ",\n  ".join([f"{k} = {v}" for k, v in global_config.items()])
         logger.debug(f"LightRAG init with param:\n  {_print_config}\n")
 
+        # Size the shared LLM/embedding HTTP connection pools for our concurrency
+        configure_client_pools(self.llm_model_max_async, self.embedding_func_max_async)
+
         # Init Embedding
         self.embedding_func = priority_limit_async_func_call(
             self.embedding_func_max_async
@@ -392,6 +424,17 @@ class LightRAG:
             embedding_func=self.embedding_func,
         )
 
+        # Nearest-neighbour index over the cached query embeddings
+        self.llm_cache_index: SemanticCacheIndex | None = None
+        if self.embedding_cache_config.get("enabled", False):
+            self.llm_cache_index = SemanticCacheIndex(
+                namespace=make_namespace(
+                    self.namespace_prefix, NameSpace.LLM_RESPONSE_CACHE_SEMANTIC_INDEX
+                ),
+                global_config=global_config,
+                hashing_kv=self.llm_response_cache,
+            )
+
         self.full_docs: BaseKVStorage = self.key_string_value_json_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.KV_STORE_FULL_DOCS
@@ -406,6 +449,13 @@ class LightRAG:
             ),
             embedding_func=self.embedding_func,
         )
+        # Reverse index: doc_id -> chunk ids, chunk_id -> extracted entities/relations
+        self.doc_graph_index: BaseKVStorage = self.key_string_value_json_storage_cls(  # type: ignore
+            namespace=make_namespace(
+                self.namespace_prefix, NameSpace.KV_STORE_DOC_GRAPH_INDEX
+            ),
+            embedding_func=self.embedding_func,
+        )
         self.chunk_entity_relation_graph: BaseGraphStorage = self.graph_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION
@@ -418,14 +468,27 @@ class LightRAG:
                 self.namespace_prefix, NameSpace.VECTOR_STORE_ENTITIES
             ),
             embedding_func=self.embedding_func,
-            meta_fields={"entity_name", "source_id", "content", "file_path"},
+            meta_fields={
+                "entity_name",
+                "source_id",
+                "content",
+                "file_path",
+                "document_types",
+            },
         )
         self.relationships_vdb: BaseVectorStorage = self.vector_db_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.VECTOR_STORE_RELATIONSHIPS
             ),
             embedding_func=self.embedding_func,
-            meta_fields={"src_id", "tgt_id", "source_id", "content", "file_path"},
+            meta_fields={
+                "src_id",
+                "tgt_id",
+                "source_id",
+                "content",
+                "file_path",
+                "document_types",
+            },
         )
         self.chunks_vdb: BaseVectorStorage = self.vector_db_storage_cls(  # type: ignore
             namespace=make_namespace(
@@ -455,6 +518,16 @@ class LightRAG:
             embedding_func=None,
         )
 
+        # Materialized graph analytics backing the insights API
+        self.graph_analytics = GraphAnalyticsStore(
+            namespace=make_namespace(self.namespace_prefix, NameSpace.GRAPH_ANALYTICS),
+            global_config=global_config,
+            graph=self.chunk_entity_relation_graph,
+        )
+        self.document_connectivity = DocumentConnectivityCache(
+            make_namespace(self.namespace_prefix, NameSpace.DOCUMENT_CONNECTIVITY)
+        )
+
         try:
             self.standards_processor = StandardsDocumentProcessor(
                 tokenizer=self.tokenizer,
@@ -468,6 +541,11 @@ class LightRAG:
             )
             self.standards_processor = None
 
+        # Persists the LLM cache written by queries in the background
+        self.persistence = PersistenceScheduler(
+            self.persist_interval, self.persist_dirty_threshold
+        )
+
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
@@ -484,6 +562,30 @@ class LightRAG:
         if self.auto_manage_storages_states:
             self._run_async_safely(self.initialize_storages, "Storage Initialization")
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # A reassigned field makes the configuration snapshot stale
+        if name in self.__dataclass_fields__:
+            self.__dict__.pop("_global_config", None)
+
+    @property
+    def global_config(self) -> GlobalConfig:
+        """Configuration snapshot passed to queries and the indexing pipeline
+
+        Built on first use and rebuilt only after a field is reassigned, instead
+        of deep copying the configuration with asdict for every query and
+        document.
+        """
+        snapshot = self.__dict__.get("_global_config")
+        if snapshot is None:
+            version = self.__dict__.get("_global_config_version", 0) + 1
+            snapshot = GlobalConfig(
+                {f.name: getattr(self, f.name) for f in fields(self)}, version
+            )
+            self.__dict__["_global_config"] = snapshot
+            self.__dict__["_global_config_version"] = version
+        return snapshot
+
     def __del__(self):
         if self.auto_manage_storages_states:
             self._run_async_safely(self.finalize_storages, "Storage Finalization")
@@ -515,17 +617,22 @@ class LightRAG:
             for storage in (
                 self.full_docs,
                 self.text_chunks,
+                self.doc_graph_index,
                 self.entities_vdb,
                 self.relationships_vdb,
                 self.chunks_vdb,
                 self.chunk_entity_relation_graph,
                 self.llm_response_cache,
+                self.llm_cache_index,
                 self.doc_status,
             ):
                 if storage:
                     tasks.append(storage.initialize())
+            tasks.append(self.document_connectivity.initialize())
 
             await asyncio.gather(*tasks)
+            # May rebuild from the graph, which must be initialized first
+            await self.graph_analytics.initialize()
 
             self._storages_status = StoragesStatus.INITIALIZED
             logger.debug("Initialized Storages")
@@ -533,22 +640,27 @@ class LightRAG:
     async def finalize_storages(self):
         """Asynchronously finalize the storages"""
         if self._storages_status == StoragesStatus.INITIALIZED:
+            await self.persistence.stop()
             tasks = []
 
             for storage in (
                 self.full_docs,
                 self.text_chunks,
+                self.doc_graph_index,
                 self.entities_vdb,
                 self.relationships_vdb,
                 self.chunks_vdb,
                 self.chunk_entity_relation_graph,
                 self.llm_response_cache,
+                self.llm_cache_index,
                 self.doc_status,
+                self.graph_analytics,
             ):
                 if storage:
                     tasks.append(storage.finalize())
 
             await asyncio.gather(*tasks)
+            await close_client_pools()
 
             self._storages_status = StoragesStatus.FINALIZED
             logger.debug("Finalized Storages")
@@ -798,7 +910,6 @@ class LightRAG:
         new_docs: dict[str, Any] = {
             id_: {
                 "status": DocStatus.PENDING,
-                "content": content_data["content"],
                 "content_summary": get_content_summary(content_data["content"]),
                 "content_length": len(content_data["content"]),
                 "created_at": datetime.now(timezone.utc).isoformat(),
@@ -838,8 +949,15 @@ class LightRAG:
             logger.info("No new unique documents were found.")
             return
 
-        # 5. Store status document
+        # 5. Store document content, then status document
+        # The content lives in full_docs only and must be persisted before
+        # the status announces the document as pending
+        await self.full_docs.upsert(
+            {doc_id: {"content": contents[doc_id]["content"]} for doc_id in new_docs}
+        )
+        await self.full_docs.index_done_callback()
         await self.doc_status.upsert(new_docs)
+        await self.doc_status.index_done_callback()
         logger.info(f"Stored {len(new_docs)} new unique documents")
 
     async def apipeline_process_enqueue_documents(
@@ -974,6 +1092,24 @@ class LightRAG:
                                 pipeline_status["latest_message"] = log_message
                                 pipeline_status["history_messages"].append(log_message)
 
+                            content_data = await self.full_docs.get_by_id(doc_id)
+                            content = content_data["content"] if content_data else None
+                            if content is None:
+                                # Documents enqueued before their content moved to full_docs
+                                legacy_status = await self.doc_status.get_by_id(doc_id)
+                                content = (legacy_status or {}).get("content")
+                                if content is not None:
+                                    # Persist it in full_docs before any status
+                                    # upsert drops it from the status record
+                                    await self.full_docs.upsert(
+                                        {doc_id: {"content": content}}
+                                    )
+                                    await self.full_docs.index_done_callback()
+                            if content is None:
+                                raise ValueError(
+                                    f"Content of document {doc_id} not found in full_docs"
+                                )
+
                             # Generate chunks from document (specialised standards pipeline if available)
                             doc_metadata: dict[str, Any] = dict(
                                 getattr(status_doc, "metadata", {}) or {}
@@ -985,7 +1121,7 @@ class LightRAG:
                                 try:
                                     processed_document = (
                                         self.standards_processor.process_document(
-                                            status_doc.content, file_path
+                                            content, file_path
                                         )
                                     )
                                     if processed_document:
@@ -1022,7 +1158,7 @@ class LightRAG:
                             else:
                                 default_chunks = self.chunking_func(
                                     self.tokenizer,
-                                    status_doc.content,
+                                    content,
                                     split_by_character,
                                     split_by_character_only,
                                     self.chunk_overlap_token_size,
@@ -1062,7 +1198,6 @@ class LightRAG:
                                         doc_id: {
                                             "status": DocStatus.PROCESSING,
                                             "chunks_count": len(chunks),
-                                            "content": status_doc.content,
                                             "content_summary": status_doc.content_summary,
                                             "content_length": status_doc.content_length,
                                             "created_at": status_doc.created_at,
@@ -1083,20 +1218,20 @@ class LightRAG:
                                     chunks, pipeline_status, pipeline_status_lock
                                 )
                             )
-                            full_docs_task = asyncio.create_task(
-                                self.full_docs.upsert(
-                                    {doc_id: {"content": status_doc.content}}
-                                )
-                            )
                             text_chunks_task = asyncio.create_task(
                                 self.text_chunks.upsert(chunks)
                             )
+                            doc_graph_index_task = asyncio.create_task(
+                                self.doc_graph_index.upsert(
+                                    {doc_id: {"chunk_ids": list(chunks.keys())}}
+                                )
+                            )
                             tasks = [
                                 doc_status_task,
                                 chunks_vdb_task,
                                 entity_relation_task,
-                                full_docs_task,
                                 text_chunks_task,
+                                doc_graph_index_task,
                             ]
                             await asyncio.gather(*tasks)
                             file_extraction_stage_ok = True
@@ -1117,8 +1252,8 @@ class LightRAG:
                                 for task in [
                                     chunks_vdb_task,
                                     entity_relation_task,
-                                    full_docs_task,
                                     text_chunks_task,
+                                    doc_graph_index_task,
                                 ]:
                                     if not task.done():
                                         task.cancel()
@@ -1133,7 +1268,6 @@ class LightRAG:
                                     doc_id: {
                                         "status": DocStatus.FAILED,
                                         "error": str(e),
-                                        "content": status_doc.content,
                                         "content_summary": status_doc.content_summary,
                                         "content_length": status_doc.content_length,
                                         "created_at": status_doc.created_at,
@@ -1146,7 +1280,7 @@ class LightRAG:
                                 }
                             )
 
-                    # Semphore released, concurrency controlled by graph_db_lock in merge_nodes_and_edges instead
+                    # Semaphore released, merge_nodes_and_edges coordinates through per entity / relation locks instead
 
                     if file_extraction_stage_ok:
                         try:
@@ -1157,13 +1291,15 @@ class LightRAG:
                                 knowledge_graph_inst=self.chunk_entity_relation_graph,
                                 entity_vdb=self.entities_vdb,
                                 relationships_vdb=self.relationships_vdb,
-                                global_config=asdict(self),
+                                global_config=self.global_config,
                                 pipeline_status=pipeline_status,
                                 pipeline_status_lock=pipeline_status_lock,
                                 llm_response_cache=self.llm_response_cache,
                                 current_file_number=current_file_number,
                                 total_files=total_files,
                                 file_path=file_path,
+                                graph_analytics=self.graph_analytics,
+                                doc_graph_index=self.doc_graph_index,
                             )
 
                             await self.doc_status.upsert(
@@ -1171,7 +1307,6 @@ class LightRAG:
                                     doc_id: {
                                         "status": DocStatus.PROCESSED,
                                         "chunks_count": len(chunks),
-                                        "content": status_doc.content,
                                         "content_summary": status_doc.content_summary,
                                         "content_length": status_doc.content_length,
                                         "created_at": status_doc.created_at,
@@ -1215,7 +1350,6 @@ class LightRAG:
                                     doc_id: {
                                         "status": DocStatus.FAILED,
                                         "error": str(e),
-                                        "content": status_doc.content,
                                         "content_summary": status_doc.content_summary,
                                         "content_length": status_doc.content_length,
                                         "created_at": status_doc.created_at,
@@ -1243,6 +1377,7 @@ class LightRAG:
 
                 # Wait for all document processing to complete
                 await asyncio.gather(*doc_tasks)
+                await self.document_connectivity.invalidate()
 
                 # Check if there's a pending request to process more documents (with lock)
                 has_pending_request = False
@@ -1287,7 +1422,7 @@ class LightRAG:
         try:
             chunk_results = await extract_entities(
                 chunk,
-                global_config=asdict(self),
+                global_config=self.global_config,
                 pipeline_status=pipeline_status,
                 pipeline_status_lock=pipeline_status_lock,
                 llm_response_cache=self.llm_response_cache,
@@ -1309,11 +1444,13 @@ class LightRAG:
             for storage_inst in [  # type: ignore
                 self.full_docs,
                 self.text_chunks,
+                self.doc_graph_index,
                 self.llm_response_cache,
                 self.entities_vdb,
                 self.relationships_vdb,
                 self.chunks_vdb,
                 self.chunk_entity_relation_graph,
+                self.graph_analytics,
             ]
             if storage_inst is not None
         ]
@@ -1501,6 +1638,9 @@ class LightRAG:
             }
             await self.relationships_vdb.upsert(data_for_vdb)
 
+            await self.graph_analytics.record_entities(all_entities_data)
+            await self.graph_analytics.record_relations(all_relationships_data)
+
         except Exception as e:
             logger.error(f"Error in ainsert_custom_kg: {e}")
             raise
@@ -1547,48 +1687,57 @@ class LightRAG:
         Returns:
             str: The result of the query execution.
         """
-        # If a custom model is provided in param, temporarily update global config
-        global_config = asdict(self)
+        # If a custom model is provided in param, layer it over the global config
+        global_config = self.global_config
+        if param.model_func:
+            global_config = global_config.with_overrides(
+                llm_model_func=param.model_func
+            )
         # Save original query for vector search
         param.original_query = query
 
-        if param.mode in ["local", "global", "hybrid", "mix"]:
-            response = await kg_query(
-                query.strip(),
-                self.chunk_entity_relation_graph,
-                self.entities_vdb,
-                self.relationships_vdb,
-                self.text_chunks,
-                param,
-                global_config,
-                hashing_kv=self.llm_response_cache,
-                system_prompt=system_prompt,
-                chunks_vdb=self.chunks_vdb,
-            )
-        elif param.mode == "naive":
-            response = await naive_query(
-                query.strip(),
-                self.chunks_vdb,
-                param,
-                global_config,
-                hashing_kv=self.llm_response_cache,
-                system_prompt=system_prompt,
-            )
-        elif param.mode == "bypass":
-            # Bypass mode: directly use LLM without knowledge retrieval
-            use_llm_func = param.model_func or global_config["llm_model_func"]
-            # Apply higher priority (8) to entity/relation summary tasks
-            use_llm_func = partial(use_llm_func, _priority=8)
-
-            param.stream = True if param.stream is None else param.stream
-            response = await use_llm_func(
-                query.strip(),
-                system_prompt=system_prompt,
-                history_messages=param.conversation_history,
-                stream=param.stream,
-            )
-        else:
-            raise ValueError(f"Unknown mode {param.mode}")
+        with track_storage_round_trips() as round_trips:
+            if param.mode in ["local", "global", "hybrid", "mix"]:
+                response = await kg_query(
+                    query.strip(),
+                    self.chunk_entity_relation_graph,
+                    self.entities_vdb,
+                    self.relationships_vdb,
+                    self.text_chunks,
+                    param,
+                    global_config,
+                    hashing_kv=self.llm_response_cache,
+                    system_prompt=system_prompt,
+                    chunks_vdb=self.chunks_vdb,
+                )
+            elif param.mode == "naive":
+                response = await naive_query(
+                    query.strip(),
+                    self.chunks_vdb,
+                    param,
+                    global_config,
+                    hashing_kv=self.llm_response_cache,
+                    system_prompt=system_prompt,
+                )
+            elif param.mode == "bypass":
+                # Bypass mode: directly use LLM without knowledge retrieval
+                use_llm_func = global_config["llm_model_func"]
+                # Apply higher priority (8) to entity/relation summary tasks
+                use_llm_func = partial(use_llm_func, _priority=8)
+
+                param.stream = True if param.stream is None else param.stream
+                response = await use_llm_func(
+                    query.strip(),
+                    system_prompt=system_prompt,
+                    history_messages=param.conversation_history,
+                    stream=param.stream,
+                )
+            else:
+                raise ValueError(f"Unknown mode {param.mode}")
+        if round_trips:
+            logger.debug(f"Storage round trips for query: {dict(round_trips)}")
+        if param.trace is not None:
+            param.trace["storage_round_trips"] = dict(round_trips)
         await self._query_done()
         return response
 
@@ -1638,7 +1787,7 @@ class LightRAG:
             relationships_vdb=self.relationships_vdb,
             chunks_vdb=self.chunks_vdb,
             text_chunks_db=self.text_chunks,
-            global_config=asdict(self),
+            global_config=self.global_config,
             hashing_kv=self.llm_response_cache,
         )
 
@@ -1646,7 +1795,7 @@ class LightRAG:
         return response
 
     async def _query_done(self):
-        await self.llm_response_cache.index_done_callback()
+        await self.persistence.mark_dirty(self.llm_response_cache, self.llm_cache_index)
 
     async def aclear_cache(self, modes: list[str] | None = None) -> None:
         """Clear cache data from the LLM response cache storage.
@@ -1694,6 +1843,10 @@ class LightRAG:
 
             await self.llm_response_cache.index_done_callback()
 
+            if self.llm_cache_index:
+                await self.llm_cache_index.drop_modes(modes or valid_modes)
+                await self.llm_cache_index.index_done_callback()
+
         except Exception as e:
             logger.error(f"Error while clearing cache: {e}")
 
@@ -1711,6 +1864,24 @@ class LightRAG:
         """
         return await self.doc_status.get_docs_by_status(status)
 
+    async def aget_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: DocSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Get one page of documents, sorted, optionally of a single status
+
+        Returns:
+            The (document id, status) pairs of the page and the total number
+            of documents matching the filter
+        """
+        return await self.doc_status.get_docs_paginated(
+            status_filter, page, page_size, sort_field, sort_direction
+        )
+
     async def aget_docs_by_ids(
         self, ids: str | list[str]
     ) -> dict[str, DocProcessingStatus]:
@@ -1783,255 +1954,233 @@ class LightRAG:
         Args:
             doc_id: Document ID to delete
         """
+        await self.adelete_by_doc_ids([doc_id])
+
+    async def adelete_by_doc_ids(self, doc_ids: list[str]) -> None:
+        """Delete several documents and all their related data in one pass
+
+        Affected chunks, entities and relations are resolved through the
+        doc→chunks and chunk→(entities, relations) index, so only the objects
+        touched by these documents are read and written. Graph and vector
+        storage calls are batched across all documents.
+
+        Args:
+            doc_ids: Document IDs to delete
+        """
         try:
-            # 1. Get the document status and related data
-            if not await self.doc_status.get_by_id(doc_id):
+            # 1. Keep only documents that actually exist. get_by_ids skips
+            # missing ids in some storages, so look each one up to keep the
+            # records aligned with doc_ids
+            status_records = await asyncio.gather(
+                *(self.doc_status.get_by_id(doc_id) for doc_id in doc_ids)
+            )
+            existing_doc_ids = [
+                doc_id
+                for doc_id, record in zip(doc_ids, status_records)
+                if record is not None
+            ]
+            for doc_id in set(doc_ids) - set(existing_doc_ids):
                 logger.warning(f"Document {doc_id} not found")
+            if not existing_doc_ids:
                 return
 
-            logger.debug(f"Starting deletion for document {doc_id}")
-
-            # 2. Get all chunks related to this document
-            # Find all chunks where full_doc_id equals the current doc_id
-            all_chunks = await self.text_chunks.get_all()
-            related_chunks = {
-                chunk_id: chunk_data
-                for chunk_id, chunk_data in all_chunks.items()
-                if isinstance(chunk_data, dict)
-                and chunk_data.get("full_doc_id") == doc_id
-            }
+            logger.debug(f"Starting deletion for {len(existing_doc_ids)} documents")
 
-            if not related_chunks:
-                logger.warning(f"No chunks found for document {doc_id}")
-                return
+            # 2. Resolve chunks, entities and relations touched by these documents
+            chunk_ids, entity_names, relation_pairs = await self._collect_doc_refs(
+                existing_doc_ids
+            )
+            logger.debug(
+                f"Found {len(chunk_ids)} chunks, {len(entity_names)} entities, "
+                f"{len(relation_pairs)} relations referenced by deleted documents"
+            )
 
-            # Get all related chunk IDs
-            chunk_ids = set(related_chunks.keys())
-            logger.debug(f"Found {len(chunk_ids)} chunks to delete")
-
-            # TODO: self.entities_vdb.client_storage only works for local storage, need to fix this
-
-            # 3. Before deleting, check the related entities and relationships for these chunks
-            for chunk_id in chunk_ids:
-                # Check entities
-                entities_storage = await self.entities_vdb.client_storage
-                entities = [
-                    dp
-                    for dp in entities_storage["data"]
-                    if chunk_id in dp.get("source_id")
-                ]
-                logger.debug(f"Chunk {chunk_id} has {len(entities)} related entities")
-
-                # Check relationships
-                relationships_storage = await self.relationships_vdb.client_storage
-                relations = [
-                    dp
-                    for dp in relationships_storage["data"]
-                    if chunk_id in dp.get("source_id")
-                ]
-                logger.debug(f"Chunk {chunk_id} has {len(relations)} related relations")
-
-            # Continue with the original deletion process...
-
-            # 4. Delete chunks from vector database
-            if chunk_ids:
-                await self.chunks_vdb.delete(chunk_ids)
-                await self.text_chunks.delete(chunk_ids)
-
-            # 5. Find and process entities and relationships that have these chunks as source
-            # Get all nodes and edges from the graph storage using storage-agnostic methods
             entities_to_delete = set()
-            entities_to_update = {}  # entity_name -> new_source_id
+            entities_to_update = {}  # entity_name -> node data with new source_id
             relationships_to_delete = set()
-            relationships_to_update = {}  # (src, tgt) -> new_source_id
-
-            # Process entities - use storage-agnostic methods
-            all_labels = await self.chunk_entity_relation_graph.get_all_labels()
-            for node_label in all_labels:
-                node_data = await self.chunk_entity_relation_graph.get_node(node_label)
-                if node_data and "source_id" in node_data:
-                    # Split source_id using GRAPH_FIELD_SEP
+            relationships_to_update = {}  # (src, tgt) -> edge data with new source_id
+
+            graph_db_lock = get_graph_db_lock(enable_logging=False)
+            async with graph_db_lock:
+                # 3. Work out which entities and relations lose all their sources
+                nodes = await self.chunk_entity_relation_graph.get_nodes_batch(
+                    list(entity_names)
+                )
+                for entity, node_data in nodes.items():
+                    if not node_data or "source_id" not in node_data:
+                        continue
                     sources = set(node_data["source_id"].split(GRAPH_FIELD_SEP))
+                    if not sources & chunk_ids:
+                        continue
                     sources.difference_update(chunk_ids)
                     if not sources:
-                        entities_to_delete.add(node_label)
-                        logger.debug(
-                            f"Entity {node_label} marked for deletion - no remaining sources"
-                        )
+                        entities_to_delete.add(entity)
                     else:
-                        new_source_id = GRAPH_FIELD_SEP.join(sources)
-                        entities_to_update[node_label] = new_source_id
-                        logger.debug(
-                            f"Entity {node_label} will be updated with new source_id: {new_source_id}"
-                        )
+                        entities_to_update[entity] = {
+                            **node_data,
+                            "source_id": GRAPH_FIELD_SEP.join(sources),
+                        }
 
-            # Process relationships
-            for node_label in all_labels:
-                node_edges = await self.chunk_entity_relation_graph.get_node_edges(
-                    node_label
+                edges = await self.chunk_entity_relation_graph.get_edges_batch(
+                    [{"src": src, "tgt": tgt} for src, tgt in relation_pairs]
                 )
-                if node_edges:
-                    for src, tgt in node_edges:
-                        edge_data = await self.chunk_entity_relation_graph.get_edge(
-                            src, tgt
+                for (src, tgt), edge_data in edges.items():
+                    if not edge_data or "source_id" not in edge_data:
+                        continue
+                    sources = set(edge_data["source_id"].split(GRAPH_FIELD_SEP))
+                    if not sources & chunk_ids:
+                        continue
+                    sources.difference_update(chunk_ids)
+                    if not sources:
+                        relationships_to_delete.add((src, tgt))
+                    else:
+                        relationships_to_update[(src, tgt)] = {
+                            **edge_data,
+                            "source_id": GRAPH_FIELD_SEP.join(sources),
+                        }
+
+                # Relations attached to deleted entities disappear with them
+                if entities_to_delete:
+                    nodes_edges = (
+                        await self.chunk_entity_relation_graph.get_nodes_edges_batch(
+                            list(entities_to_delete)
                         )
-                        if edge_data and "source_id" in edge_data:
-                            # Split source_id using GRAPH_FIELD_SEP
-                            sources = set(edge_data["source_id"].split(GRAPH_FIELD_SEP))
-                            sources.difference_update(chunk_ids)
-                            if not sources:
+                    )
+                    for node_edges in nodes_edges.values():
+                        for src, tgt in node_edges or []:
+                            if (tgt, src) not in relationships_to_delete:
                                 relationships_to_delete.add((src, tgt))
-                                logger.debug(
-                                    f"Relationship {src}-{tgt} marked for deletion - no remaining sources"
-                                )
-                            else:
-                                new_source_id = GRAPH_FIELD_SEP.join(sources)
-                                relationships_to_update[(src, tgt)] = new_source_id
-                                logger.debug(
-                                    f"Relationship {src}-{tgt} will be updated with new source_id: {new_source_id}"
-                                )
-
-            # Delete entities
-            if entities_to_delete:
-                for entity in entities_to_delete:
-                    await self.entities_vdb.delete_entity(entity)
-                    logger.debug(f"Deleted entity {entity} from vector DB")
-                await self.chunk_entity_relation_graph.remove_nodes(
-                    list(entities_to_delete)
-                )
-                logger.debug(f"Deleted {len(entities_to_delete)} entities from graph")
-
-            # Update entities
-            for entity, new_source_id in entities_to_update.items():
-                node_data = await self.chunk_entity_relation_graph.get_node(entity)
-                if node_data:
-                    node_data["source_id"] = new_source_id
-                    await self.chunk_entity_relation_graph.upsert_node(
-                        entity, node_data
+                    for src, tgt in list(relationships_to_update):
+                        if src in entities_to_delete or tgt in entities_to_delete:
+                            del relationships_to_update[(src, tgt)]
+
+                # 4. Delete chunks
+                if chunk_ids:
+                    await self.chunks_vdb.delete(list(chunk_ids))
+                    await self.text_chunks.delete(list(chunk_ids))
+
+                # 5. Delete relationships
+                if relationships_to_delete:
+                    rel_ids = []
+                    for src, tgt in relationships_to_delete:
+                        rel_ids.append(compute_mdhash_id(src + tgt, prefix="rel-"))
+                        rel_ids.append(compute_mdhash_id(tgt + src, prefix="rel-"))
+                    await self.relationships_vdb.delete(rel_ids)
+                    await self.chunk_entity_relation_graph.remove_edges(
+                        list(relationships_to_delete)
+                    )
+                    await self.graph_analytics.remove_relations(
+                        list(relationships_to_delete)
                     )
                     logger.debug(
-                        f"Updated entity {entity} with new source_id: {new_source_id}"
+                        f"Deleted {len(relationships_to_delete)} relationships"
                     )
 
-            # Delete relationships
-            if relationships_to_delete:
-                for src, tgt in relationships_to_delete:
-                    rel_id_0 = compute_mdhash_id(src + tgt, prefix="rel-")
-                    rel_id_1 = compute_mdhash_id(tgt + src, prefix="rel-")
-                    await self.relationships_vdb.delete([rel_id_0, rel_id_1])
-                    logger.debug(f"Deleted relationship {src}-{tgt} from vector DB")
-                await self.chunk_entity_relation_graph.remove_edges(
-                    list(relationships_to_delete)
-                )
-                logger.debug(
-                    f"Deleted {len(relationships_to_delete)} relationships from graph"
-                )
+                # 6. Delete entities
+                if entities_to_delete:
+                    await self.entities_vdb.delete(
+                        [
+                            compute_mdhash_id(entity, prefix="ent-")
+                            for entity in entities_to_delete
+                        ]
+                    )
+                    await self.chunk_entity_relation_graph.remove_nodes(
+                        list(entities_to_delete)
+                    )
+                    await self.graph_analytics.remove_entities(list(entities_to_delete))
+                    logger.debug(f"Deleted {len(entities_to_delete)} entities")
 
-            # Update relationships
-            for (src, tgt), new_source_id in relationships_to_update.items():
-                edge_data = await self.chunk_entity_relation_graph.get_edge(src, tgt)
-                if edge_data:
-                    edge_data["source_id"] = new_source_id
+                # 7. Update entities and relationships that keep other sources
+                for entity, node_data in entities_to_update.items():
+                    await self.chunk_entity_relation_graph.upsert_node(
+                        entity, node_data
+                    )
+                for (src, tgt), edge_data in relationships_to_update.items():
                     await self.chunk_entity_relation_graph.upsert_edge(
                         src, tgt, edge_data
                     )
-                    logger.debug(
-                        f"Updated relationship {src}-{tgt} with new source_id: {new_source_id}"
-                    )
 
-            # 6. Delete original document and status
-            await self.full_docs.delete([doc_id])
-            await self.doc_status.delete([doc_id])
+            # 8. Delete original documents, status and index entries
+            await self.doc_graph_index.delete(existing_doc_ids + list(chunk_ids))
+            await self.full_docs.delete(existing_doc_ids)
+            await self.doc_status.delete(existing_doc_ids)
 
-            # 7. Ensure all indexes are updated
+            # 9. Ensure all indexes are updated
             await self._insert_done()
+            await self.document_connectivity.invalidate()
 
             logger.info(
-                f"Successfully deleted document {doc_id} and related data. "
+                f"Successfully deleted {len(existing_doc_ids)} documents and related data. "
                 f"Deleted {len(entities_to_delete)} entities and {len(relationships_to_delete)} relationships. "
                 f"Updated {len(entities_to_update)} entities and {len(relationships_to_update)} relationships."
             )
 
-            async def process_data(data_type, vdb, chunk_id):
-                # Check data (entities or relationships)
-                storage = await vdb.client_storage
-                data_with_chunk = [
-                    dp
-                    for dp in storage["data"]
-                    if chunk_id in (dp.get("source_id") or "").split(GRAPH_FIELD_SEP)
-                ]
-
-                data_for_vdb = {}
-                if data_with_chunk:
-                    logger.warning(
-                        f"found {len(data_with_chunk)} {data_type} still referencing chunk {chunk_id}"
-                    )
+        except Exception as e:
+            logger.error(f"Error while deleting documents {doc_ids}: {e}")
 
-                    for item in data_with_chunk:
-                        old_sources = item["source_id"].split(GRAPH_FIELD_SEP)
-                        new_sources = [src for src in old_sources if src != chunk_id]
+    async def _collect_doc_refs(
+        self, doc_ids: list[str]
+    ) -> tuple[set[str], set[str], set[tuple[str, str]]]:
+        """Resolve the chunks, entity names and relation pairs of documents
 
-                        if not new_sources:
-                            logger.info(
-                                f"{data_type} {item.get('entity_name', 'N/A')} is deleted because source_id is not exists"
-                            )
-                            await vdb.delete_entity(item)
-                        else:
-                            item["source_id"] = GRAPH_FIELD_SEP.join(new_sources)
-                            item_id = item["__id__"]
-                            data_for_vdb[item_id] = item.copy()
-                            if data_type == "entities":
-                                data_for_vdb[item_id]["content"] = data_for_vdb[
-                                    item_id
-                                ].get("content") or (
-                                    item.get("entity_name", "")
-                                    + (item.get("description") or "")
-                                )
-                            else:  # relationships
-                                data_for_vdb[item_id]["content"] = data_for_vdb[
-                                    item_id
-                                ].get("content") or (
-                                    (item.get("keywords") or "")
-                                    + (item.get("src_id") or "")
-                                    + (item.get("tgt_id") or "")
-                                    + (item.get("description") or "")
-                                )
+        Uses the doc→chunks and chunk→(entities, relations) index. Documents
+        ingested before the index existed fall back to a single scan of the
+        text chunks and the graph, shared by all of them.
 
-                    if data_for_vdb:
-                        await vdb.upsert(data_for_vdb)
-                        logger.info(f"Successfully updated {data_type} in vector DB")
-
-            # Add verification step
-            async def verify_deletion():
-                # Verify if the document has been deleted
-                if await self.full_docs.get_by_id(doc_id):
-                    logger.warning(f"Document {doc_id} still exists in full_docs")
-
-                # Verify if chunks have been deleted
-                all_remaining_chunks = await self.text_chunks.get_all()
-                remaining_related_chunks = {
-                    chunk_id: chunk_data
-                    for chunk_id, chunk_data in all_remaining_chunks.items()
-                    if isinstance(chunk_data, dict)
-                    and chunk_data.get("full_doc_id") == doc_id
-                }
+        Returns:
+            Tuple of (chunk ids, entity names, relation (src, tgt) pairs)
+        """
+        chunk_ids: set[str] = set()
+        entity_names: set[str] = set()
+        relation_pairs: set[tuple[str, str]] = set()
 
-                if remaining_related_chunks:
-                    logger.warning(
-                        f"Found {len(remaining_related_chunks)} remaining chunks"
-                    )
+        # Per id, as get_by_ids skips missing ids in some storages
+        doc_entries = await asyncio.gather(
+            *(self.doc_graph_index.get_by_id(doc_id) for doc_id in doc_ids)
+        )
+        unindexed_doc_ids = set()
+        for doc_id, entry in zip(doc_ids, doc_entries):
+            if entry and entry.get("chunk_ids"):
+                chunk_ids.update(entry["chunk_ids"])
+            else:
+                unindexed_doc_ids.add(doc_id)
+
+        if chunk_ids:
+            chunk_entries = await self.doc_graph_index.get_by_ids(list(chunk_ids))
+            for entry in chunk_entries:
+                if not entry:
+                    continue
+                entity_names.update(entry.get("entities", []))
+                relation_pairs.update(
+                    tuple(pair) for pair in entry.get("relations", [])
+                )
 
-                # Verify entities and relationships
-                for chunk_id in chunk_ids:
-                    await process_data("entities", self.entities_vdb, chunk_id)
-                    await process_data(
-                        "relationships", self.relationships_vdb, chunk_id
+        if unindexed_doc_ids:
+            logger.info(
+                f"{len(unindexed_doc_ids)} documents have no graph index entry, scanning storages"
+            )
+            legacy_chunk_ids = {
+                chunk_id
+                for chunk_id, chunk_data in (await self.text_chunks.get_all()).items()
+                if isinstance(chunk_data, dict)
+                and chunk_data.get("full_doc_id") in unindexed_doc_ids
+            }
+            chunk_ids.update(legacy_chunk_ids)
+            if legacy_chunk_ids:
+                all_labels = await self.chunk_entity_relation_graph.get_all_labels()
+                # Every node is a candidate; step 3 checks source_id against chunk_ids
+                entity_names.update(all_labels)
+                nodes_edges = (
+                    await self.chunk_entity_relation_graph.get_nodes_edges_batch(
+                        all_labels
                     )
+                )
+                for node_edges in nodes_edges.values():
+                    for src, tgt in node_edges or []:
+                        if (tgt, src) not in relation_pairs:
+                            relation_pairs.add((src, tgt))
 
-            await verify_deletion()
-
-        except Exception as e:
-            logger.error(f"Error while deleting document {doc_id}: {e}")
+        return chunk_ids, entity_names, relation_pairs
 
     async def adelete_by_entity(self, entity_name: str) -> None:
         """Asynchronously delete an entity and all its relationships.
@@ -2046,6 +2195,7 @@ class LightRAG:
             self.entities_vdb,
             self.relationships_vdb,
             entity_name,
+            graph_analytics=self.graph_analytics,
         )
 
     def delete_by_entity(self, entity_name: str) -> None:
@@ -2066,6 +2216,7 @@ class LightRAG:
             self.relationships_vdb,
             source_entity,
             target_entity,
+            graph_analytics=self.graph_analytics,
         )
 
     def delete_by_relation(self, source_entity: str, target_entity: str) -> None:
@@ -2133,6 +2284,8 @@ class LightRAG:
             entity_name,
             updated_data,
             allow_rename,
+            graph_analytics=self.graph_analytics,
+            doc_graph_index=self.doc_graph_index,
         )
 
     def edit_entity(
@@ -2167,6 +2320,7 @@ class LightRAG:
             source_entity,
             target_entity,
             updated_data,
+            graph_analytics=self.graph_analytics,
         )
 
     def edit_relation(
@@ -2199,6 +2353,7 @@ class LightRAG:
             self.relationships_vdb,
             entity_name,
             entity_data,
+            graph_analytics=self.graph_analytics,
         )
 
     def create_entity(
@@ -2231,6 +2386,7 @@ class LightRAG:
             source_entity,
             target_entity,
             relation_data,
+            graph_analytics=self.graph_analytics,
         )
 
     def create_relation(
@@ -2278,6 +2434,8 @@ class LightRAG:
             target_entity,
             merge_strategy,
             target_entity_data,
+            graph_analytics=self.graph_analytics,
+            doc_graph_index=self.doc_graph_index,
         )
 
     def merge_entities(
@@ -2297,22 +2455,23 @@ class LightRAG:
     async def aexport_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "excel", "md", "txt", "parquet", "jsonl"] = "csv",
         include_vector_data: bool = False,
     ) -> None:
         """
-        Asynchronously exports all entities, relations, and relationships to various formats.
+        Asynchronously exports all entities and relations to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "excel", "md", "txt", "parquet", "jsonl".
                 - csv: Comma-separated values file
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
+                - parquet: Single Parquet table, rows tagged with their type
+                - jsonl: One JSON object per line, tagged with its type
             include_vector_data: Whether to include data from the vector database.
         """
-        from .utils import aexport_data as utils_aexport_data
+        from .utils_export import aexport_data as utils_aexport_data
 
         await utils_aexport_data(
             self.chunk_entity_relation_graph,
@@ -2326,19 +2485,20 @@ class LightRAG:
     def export_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "excel", "md", "txt", "parquet", "jsonl"] = "csv",
         include_vector_data: bool = False,
     ) -> None:
         """
-        Synchronously exports all entities, relations, and relationships to various formats.
+        Synchronously exports all entities and relations to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "excel", "md", "txt", "parquet", "jsonl".
                 - csv: Comma-separated values file
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
+                - parquet: Single Parquet table, rows tagged with their type
+                - jsonl: One JSON object per line, tagged with its type
             include_vector_data: Whether to include data from the vector database.
         """
         try:
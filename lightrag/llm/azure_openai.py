@@ -7,6 +7,7 @@ if not pm.is_installed("openai"):
 
 from openai import (
     AsyncAzureOpenAI,
+    DefaultAsyncHttpxClient,
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
@@ -23,10 +24,35 @@ from lightrag.utils import (
     locate_json_string_body_from_string,
     safe_unicode_decode,
 )
+from lightrag.llm.client_pool import get_pooled_client, http2_available, httpx_limits
 
 import numpy as np
 
 
+def _get_azure_openai_client(model: str, kind: str = "llm") -> AsyncAzureOpenAI:
+    """Shared AsyncAzureOpenAI client for a deployment, configured from the environment"""
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+    return get_pooled_client(
+        "azure_openai",
+        lambda: AsyncAzureOpenAI(
+            azure_endpoint=endpoint,
+            azure_deployment=model,
+            api_key=api_key,
+            api_version=api_version,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx_limits(kind), http2=http2_available()
+            ),
+        ),
+        endpoint,
+        model,
+        api_key,
+        api_version,
+        kind=kind,
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -51,12 +77,7 @@ async def azure_openai_complete_if_cache(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = _get_azure_openai_client(model)
     kwargs.pop("hashing_kv", None)
     messages = []
     if system_prompt:
@@ -133,12 +154,7 @@ async def azure_openai_embed(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = _get_azure_openai_client(model, kind="embedding")
 
     response = await openai_async_client.embeddings.create(
         model=model, input=texts, encoding_format="float"
@@ -0,0 +1,162 @@
+"""Process-wide registry of long-lived LLM and embedding API clients.
+
+Creating a client per call pays a new connection pool, TLS handshake and
+HTTP/2 negotiation on every request. Bindings instead fetch their client from
+this registry, keyed by binding, endpoint, credentials and client options, so
+consecutive calls reuse keep-alive connections.
+
+Pools are sized for the concurrency LightRAG allows: ``llm`` clients from
+``llm_model_max_async`` and ``embedding`` clients from
+``embedding_func_max_async`` (see ``configure_client_pools``). Clients are
+bound to the event loop they were created on and are closed by
+``close_client_pools``, which LightRAG calls from ``finalize_storages``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import inspect
+from typing import Any, Callable, TypeVar
+
+from lightrag.utils import logger
+
+T = TypeVar("T")
+
+# Connections kept per client when LightRAG did not configure the pools
+DEFAULT_MAX_CONNECTIONS = 16
+
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_EXPIRY = 60.0
+
+_max_connections: dict[str, int] = {}
+
+# (kind, binding, key, loop id) -> (loop, client)
+_clients: dict[tuple, tuple[asyncio.AbstractEventLoop | None, Any]] = {}
+
+
+def configure_client_pools(
+    llm_max_connections: int | None = None,
+    embedding_max_connections: int | None = None,
+) -> None:
+    """Size the connection pools of clients created from now on
+
+    Several LightRAG instances may share a process, so a pool is sized for the
+    largest concurrency configured so far.
+    """
+    for kind, value in (
+        ("llm", llm_max_connections),
+        ("embedding", embedding_max_connections),
+    ):
+        if value:
+            _max_connections[kind] = max(_max_connections.get(kind, 0), int(value))
+
+
+def max_connections(kind: str) -> int:
+    """Connection limit for clients of the given kind ("llm" or "embedding")"""
+    return _max_connections.get(kind, DEFAULT_MAX_CONNECTIONS)
+
+
+def http2_available() -> bool:
+    """httpx only negotiates HTTP/2 when the h2 package is installed"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def httpx_limits(kind: str):
+    """httpx connection limits for a pooled client of the given kind"""
+    import httpx
+
+    limit = max_connections(kind)
+    return httpx.Limits(
+        max_connections=limit,
+        max_keepalive_connections=limit,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable representation of client options used in registry keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return value
+
+
+def get_pooled_client(
+    binding: str,
+    factory: Callable[[], T],
+    *key: Any,
+    kind: str = "llm",
+) -> T:
+    """Return the shared client for binding and key, creating it with factory
+
+    Args:
+        binding: Name of the binding, e.g. "openai" or "ollama"
+        factory: Creates the client; called at most once per key and event loop
+        *key: Everything the client depends on (endpoint, credentials, options)
+        kind: "llm" or "embedding", selects the connection limit
+
+    Returns:
+        The pooled client
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Synchronous clients are not bound to a loop
+        loop = None
+    registry_key = (kind, binding, _freeze(key), id(loop) if loop else None)
+    entry = _clients.get(registry_key)
+    if entry is not None and (entry[0] is None or not entry[0].is_closed()):
+        return entry[1]
+
+    # Forget clients whose event loop has been closed, they can no longer be used
+    for stale_key in [k for k, (lp, _) in _clients.items() if lp and lp.is_closed()]:
+        del _clients[stale_key]
+
+    client = factory()
+    _clients[registry_key] = (loop, client)
+    logger.debug(
+        f"Created pooled {kind} client for {binding} "
+        f"(max connections: {max_connections(kind)})"
+    )
+    return client
+
+
+async def _close_client(client: Any) -> None:
+    for owner, name in (
+        (client, "aclose"),
+        (client, "close"),
+        # ollama.AsyncClient only exposes its httpx client
+        (getattr(client, "_client", None), "aclose"),
+    ):
+        close = getattr(owner, name, None) if owner is not None else None
+        if callable(close):
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+            return
+
+
+async def close_client_pools() -> None:
+    """Close every pooled client owned by the running event loop
+
+    Clients are recreated on demand, so other LightRAG instances in the process
+    keep working after one of them is finalized.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    for registry_key, (client_loop, client) in list(_clients.items()):
+        if client_loop is not None and client_loop is not loop:
+            continue
+        del _clients[registry_key]
+        try:
+            await _close_client(client)
+        except Exception as e:
+            logger.warning(f"Failed to close pooled {registry_key[1]} client: {e}")
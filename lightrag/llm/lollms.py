@@ -22,11 +22,31 @@ from lightrag.exceptions import (
     RateLimitError,
     APITimeoutError,
 )
+from lightrag.llm.client_pool import (
+    KEEPALIVE_EXPIRY,
+    get_pooled_client,
+    max_connections,
+)
 
 from typing import Union, List
 import numpy as np
 
 
+def _get_lollms_session(headers: dict[str, str], kind: str) -> aiohttp.ClientSession:
+    """Shared aiohttp session for the given headers"""
+    return get_pooled_client(
+        "lollms",
+        lambda: aiohttp.ClientSession(
+            headers=headers,
+            connector=aiohttp.TCPConnector(
+                limit=max_connections(kind), keepalive_timeout=KEEPALIVE_EXPIRY
+            ),
+        ),
+        headers,
+        kind=kind,
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -79,22 +99,23 @@ async def lollms_model_if_cache(
     request_data["prompt"] = full_prompt
     timeout = aiohttp.ClientTimeout(total=kwargs.get("timeout", None))
 
-    async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-        if stream:
-
-            async def inner():
-                async with session.post(
-                    f"{base_url}/lollms_generate", json=request_data
-                ) as response:
-                    async for line in response.content:
-                        yield line.decode().strip()
+    # The session is shared, so a stream can still be consumed after returning
+    session = _get_lollms_session(headers, "llm")
+    if stream:
 
-            return inner()
-        else:
+        async def inner():
             async with session.post(
-                f"{base_url}/lollms_generate", json=request_data
+                f"{base_url}/lollms_generate", json=request_data, timeout=timeout
             ) as response:
-                return await response.text()
+                async for line in response.content:
+                    yield line.decode().strip()
+
+        return inner()
+    else:
+        async with session.post(
+            f"{base_url}/lollms_generate", json=request_data, timeout=timeout
+        ) as response:
+            return await response.text()
 
 
 async def lollms_model_complete(
@@ -144,16 +165,16 @@ async def lollms_embed(
         if api_key
         else {"Content-Type": "application/json"}
     )
-    async with aiohttp.ClientSession(headers=headers) as session:
-        embeddings = []
-        for text in texts:
-            request_data = {"text": text}
-
-            async with session.post(
-                f"{base_url}/lollms_embed",
-                json=request_data,
-            ) as response:
-                result = await response.json()
-                embeddings.append(result["vector"])
-
-        return np.array(embeddings)
+    session = _get_lollms_session(headers, "embedding")
+    embeddings = []
+    for text in texts:
+        request_data = {"text": text}
+
+        async with session.post(
+            f"{base_url}/lollms_embed",
+            json=request_data,
+        ) as response:
+            result = await response.json()
+            embeddings.append(result["vector"])
+
+    return np.array(embeddings)
@@ -14,6 +14,7 @@ if not pm.is_installed("openai"):
 
 from openai import (
     AsyncOpenAI,
+    DefaultAsyncHttpxClient,
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
@@ -28,6 +29,7 @@ from tenacity import (
 from lightrag.utils import (
     wrap_embedding_func_with_attrs,
 )
+from lightrag.llm.client_pool import get_pooled_client, http2_available, httpx_limits
 
 
 import numpy as np
@@ -54,8 +56,17 @@ async def nvidia_openai_embed(
     if api_key:
         os.environ["OPENAI_API_KEY"] = api_key
 
-    openai_async_client = (
-        AsyncOpenAI() if base_url is None else AsyncOpenAI(base_url=base_url)
+    openai_async_client = get_pooled_client(
+        "nvidia_openai",
+        lambda: AsyncOpenAI(
+            base_url=base_url,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx_limits("embedding"), http2=http2_available()
+            ),
+        ),
+        base_url,
+        os.environ.get("OPENAI_API_KEY"),
+        kind="embedding",
     )
     response = await openai_async_client.embeddings.create(
         model=model,
@@ -31,6 +31,7 @@ from lightrag.utils import (
 )
 
 from lightrag.types import GPTKeywordExtractionFormat
+from lightrag.llm.client_pool import get_pooled_client
 
 import numpy as np
 from typing import Union, List, Optional, Dict
@@ -57,12 +58,10 @@ async def zhipu_complete_if_cache(
     except ImportError:
         raise ImportError("Please install zhipuai before initialize zhipuai backend.")
 
-    if api_key:
-        client = ZhipuAI(api_key=api_key)
-    else:
-        # please set ZHIPUAI_API_KEY in your environment
-        # os.environ["ZHIPUAI_API_KEY"]
-        client = ZhipuAI()
+    # please set ZHIPUAI_API_KEY in your environment if api_key is not given
+    client = get_pooled_client(
+        "zhipu", lambda: ZhipuAI(api_key=api_key) if api_key else ZhipuAI(), api_key
+    )
 
     messages = []
 
@@ -183,12 +182,13 @@ async def zhipu_embedding(
         from zhipuai import ZhipuAI
     except ImportError:
         raise ImportError("Please install zhipuai before initialize zhipuai backend.")
-    if api_key:
-        client = ZhipuAI(api_key=api_key)
-    else:
-        # please set ZHIPUAI_API_KEY in your environment
-        # os.environ["ZHIPUAI_API_KEY"]
-        client = ZhipuAI()
+    # please set ZHIPUAI_API_KEY in your environment if api_key is not given
+    client = get_pooled_client(
+        "zhipu",
+        lambda: ZhipuAI(api_key=api_key) if api_key else ZhipuAI(),
+        api_key,
+        kind="embedding",
+    )
 
     # Convert single text to list if needed
     if isinstance(texts, str):
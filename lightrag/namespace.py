@@ -7,6 +7,8 @@ class NameSpace:
     KV_STORE_FULL_DOCS = "full_docs"
     KV_STORE_TEXT_CHUNKS = "text_chunks"
     KV_STORE_LLM_RESPONSE_CACHE = "llm_response_cache"
+    LLM_RESPONSE_CACHE_SEMANTIC_INDEX = "llm_response_cache_semantic_index"
+    KV_STORE_DOC_GRAPH_INDEX = "doc_graph_index"
 
     VECTOR_STORE_ENTITIES = "entities"
     VECTOR_STORE_RELATIONSHIPS = "relationships"
@@ -16,6 +18,9 @@ class NameSpace:
 
     DOC_STATUS = "doc_status"
 
+    GRAPH_ANALYTICS = "graph_analytics"
+    DOCUMENT_CONNECTIVITY = "document_connectivity"
+
 
 def make_namespace(prefix: str, base_namespace: str):
     return prefix + base_namespace
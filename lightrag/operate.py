@@ -240,22 +240,22 @@ async def _handle_single_relationship_extraction(
     )
 
 
-async def _merge_nodes_then_upsert(
+async def _merge_node_data(
     entity_name: str,
     nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_node: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    """Get existing nodes from knowledge graph use name,if exists, merge data, else create, then upsert."""
+) -> dict:
+    """Merge extracted entity data into the existing node, if any, and return the node properties"""
     already_entity_types = []
     already_source_ids = []
     already_description = []
     already_file_paths = []
+    already_document_types = []
 
-    already_node = await knowledge_graph_inst.get_node(entity_name)
     if already_node:
         already_entity_types.append(already_node["entity_type"])
         already_source_ids.extend(
@@ -265,6 +265,11 @@ async def _merge_nodes_then_upsert(
             split_string_by_multi_markers(already_node["file_path"], [GRAPH_FIELD_SEP])
         )
         already_description.append(already_node["description"])
+        already_document_types.extend(
+            split_string_by_multi_markers(
+                already_node.get("document_type"), [GRAPH_FIELD_SEP]
+            )
+        )
 
     entity_type = sorted(
         Counter(
@@ -282,6 +287,14 @@ async def _merge_nodes_then_upsert(
     file_path = GRAPH_FIELD_SEP.join(
         set([dp["file_path"] for dp in nodes_data] + already_file_paths)
     )
+    document_type = GRAPH_FIELD_SEP.join(
+        sorted(
+            set(
+                [dp["document_type"] for dp in nodes_data if dp.get("document_type")]
+                + already_document_types
+            )
+        )
+    )
 
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
@@ -320,67 +333,67 @@ async def _merge_nodes_then_upsert(
         file_path=file_path,
         created_at=int(time.time()),
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
-    )
-    node_data["entity_name"] = entity_name
+    if document_type:
+        node_data["document_type"] = document_type
     return node_data
 
 
-async def _merge_edges_then_upsert(
+async def _merge_edge_data(
     src_id: str,
     tgt_id: str,
     edges_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_edge: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    if src_id == tgt_id:
-        return None
-
+) -> dict:
+    """Merge extracted relation data into the existing edge, if any, and return the edge properties"""
     already_weights = []
     already_source_ids = []
     already_description = []
     already_keywords = []
     already_file_paths = []
-
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
-        # Handle the case where get_edge returns None or missing fields
-        if already_edge:
-            # Get weight with default 0.0 if missing
-            already_weights.append(already_edge.get("weight", 0.0))
-
-            # Get source_id with empty string default if missing or None
-            if already_edge.get("source_id") is not None:
-                already_source_ids.extend(
-                    split_string_by_multi_markers(
-                        already_edge["source_id"], [GRAPH_FIELD_SEP]
-                    )
+    already_document_types = []
+
+    # Handle the case where the stored edge is missing fields
+    if already_edge:
+        # Get weight with default 0.0 if missing
+        already_weights.append(already_edge.get("weight", 0.0))
+
+        # Get source_id with empty string default if missing or None
+        if already_edge.get("source_id") is not None:
+            already_source_ids.extend(
+                split_string_by_multi_markers(
+                    already_edge["source_id"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get file_path with empty string default if missing or None
-            if already_edge.get("file_path") is not None:
-                already_file_paths.extend(
-                    split_string_by_multi_markers(
-                        already_edge["file_path"], [GRAPH_FIELD_SEP]
-                    )
+        # Get file_path with empty string default if missing or None
+        if already_edge.get("file_path") is not None:
+            already_file_paths.extend(
+                split_string_by_multi_markers(
+                    already_edge["file_path"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get description with empty string default if missing or None
-            if already_edge.get("description") is not None:
-                already_description.append(already_edge["description"])
+        # Get description with empty string default if missing or None
+        if already_edge.get("description") is not None:
+            already_description.append(already_edge["description"])
 
-            # Get keywords with empty string default if missing or None
-            if already_edge.get("keywords") is not None:
-                already_keywords.extend(
-                    split_string_by_multi_markers(
-                        already_edge["keywords"], [GRAPH_FIELD_SEP]
-                    )
+        # Get keywords with empty string default if missing or None
+        if already_edge.get("keywords") is not None:
+            already_keywords.extend(
+                split_string_by_multi_markers(
+                    already_edge["keywords"], [GRAPH_FIELD_SEP]
                 )
+            )
+
+        already_document_types.extend(
+            split_string_by_multi_markers(
+                already_edge.get("document_type"), [GRAPH_FIELD_SEP]
+            )
+        )
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
@@ -420,30 +433,14 @@ async def _merge_edges_then_upsert(
             + already_file_paths
         )
     )
-
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            # # Discard this edge if the node does not exist
-            # if need_insert_id == src_id:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Source node missing"
-            #     )
-            # else:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Target node missing"
-            #     )
-            # return None
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
+    document_type = GRAPH_FIELD_SEP.join(
+        sorted(
+            set(
+                [dp["document_type"] for dp in edges_data if dp.get("document_type")]
+                + already_document_types
             )
+        )
+    )
 
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
@@ -476,29 +473,16 @@ async def _merge_edges_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
-    )
-
     edge_data = dict(
-        src_id=src_id,
-        tgt_id=tgt_id,
+        weight=weight,
         description=description,
         keywords=keywords,
         source_id=source_id,
         file_path=file_path,
         created_at=int(time.time()),
     )
-
+    if document_type:
+        edge_data["document_type"] = document_type
     return edge_data
 
 
@@ -514,6 +498,8 @@ async def merge_nodes_and_edges(
     current_file_number: int = 0,
     total_files: int = 0,
     file_path: str = "unknown_source",
+    graph_analytics=None,
+    doc_graph_index: BaseKVStorage | None = None,
 ) -> None:
     """Merge nodes and edges from extraction results
 
@@ -526,31 +512,104 @@ async def merge_nodes_and_edges(
         pipeline_status: Pipeline status dictionary
         pipeline_status_lock: Lock for pipeline status
         llm_response_cache: LLM response cache
+        graph_analytics: Optional GraphAnalyticsStore updated with the merged entities and relations
+        doc_graph_index: Optional KV storage receiving the chunk -> (entities, relations) index
     """
     # Get lock manager from shared storage
-    from .kg.shared_storage import get_graph_db_lock
+    from .kg.shared_storage import (
+        get_graph_db_lock,
+        get_graph_flush_lock,
+        get_graph_key_locks,
+    )
 
     # Collect all nodes and edges from all chunks
     all_nodes = defaultdict(list)
     all_edges = defaultdict(list)
+    # chunk_id -> entity names / sorted edge keys extracted from it
+    chunk_entities = defaultdict(set)
+    chunk_relations = defaultdict(set)
 
     for maybe_nodes, maybe_edges in chunk_results:
         # Collect nodes
         for entity_name, entities in maybe_nodes.items():
             all_nodes[entity_name].extend(entities)
+            for dp in entities:
+                chunk_entities[dp["source_id"]].add(entity_name)
 
         # Collect edges with sorted keys for undirected graph
         for edge_key, edges in maybe_edges.items():
             sorted_edge_key = tuple(sorted(edge_key))
             all_edges[sorted_edge_key].extend(edges)
+            if sorted_edge_key[0] != sorted_edge_key[1]:
+                for dp in edges:
+                    if dp.get("source_id"):
+                        chunk_relations[dp["source_id"]].add(sorted_edge_key)
+
+    # Each entity and relation is read, merged and written back under the lock
+    # of its own key, so documents merged concurrently only wait for each
+    # other on the entities and relations they share, and only for the time
+    # one of them takes to merge that key. Up to llm_model_max_async merges of
+    # this document run at once; their LLM summaries share the LLM function's
+    # own limit
+    merge_limit = asyncio.Semaphore(max(1, global_config.get("llm_model_max_async", 1)))
+
+    edge_keys = [edge_key for edge_key in all_edges if edge_key[0] != edge_key[1]]
+    # Relation endpoints that are not entities of this document may be missing
+    # and get a placeholder node
+    endpoints = {node for edge_key in edge_keys for node in edge_key} - all_nodes.keys()
+
+    async def merge_entity(entity_name, entities):
+        async with merge_limit:
+            async with get_graph_key_locks([("node", entity_name)]):
+                already_node = await knowledge_graph_inst.get_node(entity_name)
+                node_data = await _merge_node_data(
+                    entity_name,
+                    entities,
+                    already_node,
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                )
+                await knowledge_graph_inst.upsert_node(entity_name, node_data)
+
+    async def merge_relation(edge_key, edges):
+        missing_endpoints = [node for node in edge_key if node in endpoints]
+        # lock_many takes the edge and endpoint locks in sorted order
+        keys = [("edge", *edge_key)] + [("node", node) for node in missing_endpoints]
+        async with merge_limit:
+            async with get_graph_key_locks(keys):
+                already_edge = await knowledge_graph_inst.get_edge(*edge_key)
+                edge_data = await _merge_edge_data(
+                    edge_key[0],
+                    edge_key[1],
+                    edges,
+                    already_edge,
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                )
+                for need_insert_id in missing_endpoints:
+                    if not await knowledge_graph_inst.has_node(need_insert_id):
+                        await knowledge_graph_inst.upsert_node(
+                            need_insert_id,
+                            {
+                                "entity_id": need_insert_id,
+                                "source_id": edge_data["source_id"],
+                                "description": edge_data["description"],
+                                "entity_type": "UNKNOWN",
+                                "file_path": edge_data["file_path"],
+                                "created_at": int(time.time()),
+                            },
+                        )
+                await knowledge_graph_inst.upsert_edge(
+                    edge_key[0], edge_key[1], edge_data
+                )
 
-    # Centralized processing of all nodes and edges
-    entities_data = []
-    relationships_data = []
-
-    # Merge nodes and edges
-    # Use graph database lock to ensure atomic merges and updates
-    graph_db_lock = get_graph_db_lock(enable_logging=False)
+    # The shared graph database lock only keeps whole-graph operations (entity
+    # edits, document deletion) out while merges are running
+    graph_db_lock = get_graph_db_lock(enable_logging=False, shared=True)
     async with graph_db_lock:
         async with pipeline_status_lock:
             log_message = (
@@ -560,79 +619,105 @@ async def merge_nodes_and_edges(
             pipeline_status["latest_message"] = log_message
             pipeline_status["history_messages"].append(log_message)
 
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        # Entities first, relations create placeholders for missing entities
+        await asyncio.gather(
+            *(
+                merge_entity(entity_name, entities)
+                for entity_name, entities in all_nodes.items()
             )
-            entities_data.append(entity_data)
-
-        # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        )
+        await asyncio.gather(
+            *(merge_relation(edge_key, all_edges[edge_key]) for edge_key in edge_keys)
+        )
+
+        # Another document may merge the same entities concurrently: under the
+        # flush lock, write what the graph holds now rather than this merge's
+        # results, so a slower flush can never overwrite a newer merge
+        async with get_graph_flush_lock(enable_logging=False):
+            nodes = await knowledge_graph_inst.get_nodes_batch(list(all_nodes))
+            entities_data = [
+                {**node, "entity_name": entity_name}
+                for entity_name, node in nodes.items()
+                if node
+            ]
+            edges = await knowledge_graph_inst.get_edges_batch(
+                [{"src": src, "tgt": tgt} for src, tgt in edge_keys]
             )
-            if edge_data is not None:
-                relationships_data.append(edge_data)
+            relationships_data = [
+                {**edge, "src_id": src, "tgt_id": tgt}
+                for (src, tgt), edge in edges.items()
+                if edge
+            ]
 
-        # Update total counts
-        total_entities_count = len(entities_data)
-        total_relations_count = len(relationships_data)
+            # Update total counts
+            total_entities_count = len(entities_data)
+            total_relations_count = len(relationships_data)
 
-        log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
-        logger.info(log_message)
-        if pipeline_status is not None:
-            async with pipeline_status_lock:
-                pipeline_status["latest_message"] = log_message
-                pipeline_status["history_messages"].append(log_message)
+            log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
+            logger.info(log_message)
+            if pipeline_status is not None:
+                async with pipeline_status_lock:
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+
+            # Update vector databases with all collected data
+            if entity_vdb is not None and entities_data:
+                data_for_vdb = {
+                    compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
+                        "entity_name": dp["entity_name"],
+                        "entity_type": dp.get("entity_type", "UNKNOWN"),
+                        "content": f"{dp['entity_name']}\n{dp.get('description', '')}",
+                        "source_id": dp.get("source_id", ""),
+                        "file_path": dp.get("file_path", "unknown_source"),
+                        "document_types": split_string_by_multi_markers(
+                            dp.get("document_type"), [GRAPH_FIELD_SEP]
+                        ),
+                    }
+                    for dp in entities_data
+                }
+                await entity_vdb.upsert(data_for_vdb)
 
-        # Update vector databases with all collected data
-        if entity_vdb is not None and entities_data:
-            data_for_vdb = {
-                compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
-                    "entity_name": dp["entity_name"],
-                    "entity_type": dp["entity_type"],
-                    "content": f"{dp['entity_name']}\n{dp['description']}",
-                    "source_id": dp["source_id"],
-                    "file_path": dp.get("file_path", "unknown_source"),
+            log_message = f"Updating {total_relations_count} relations {current_file_number}/{total_files}: {file_path}"
+            logger.info(log_message)
+            if pipeline_status is not None:
+                async with pipeline_status_lock:
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+
+            if relationships_vdb is not None and relationships_data:
+                data_for_vdb = {
+                    compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
+                        "src_id": dp["src_id"],
+                        "tgt_id": dp["tgt_id"],
+                        "keywords": dp.get("keywords", ""),
+                        "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp.get('keywords', '')}\n{dp.get('description', '')}",
+                        "source_id": dp.get("source_id", ""),
+                        "file_path": dp.get("file_path", "unknown_source"),
+                        "document_types": split_string_by_multi_markers(
+                            dp.get("document_type"), [GRAPH_FIELD_SEP]
+                        ),
+                    }
+                    for dp in relationships_data
                 }
-                for dp in entities_data
-            }
-            await entity_vdb.upsert(data_for_vdb)
+                await relationships_vdb.upsert(data_for_vdb)
 
-        log_message = f"Updating {total_relations_count} relations {current_file_number}/{total_files}: {file_path}"
-        logger.info(log_message)
-        if pipeline_status is not None:
-            async with pipeline_status_lock:
-                pipeline_status["latest_message"] = log_message
-                pipeline_status["history_messages"].append(log_message)
+            if graph_analytics is not None:
+                await graph_analytics.record_entities(entities_data)
+                await graph_analytics.record_relations(relationships_data)
 
-        if relationships_vdb is not None and relationships_data:
-            data_for_vdb = {
-                compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
-                    "src_id": dp["src_id"],
-                    "tgt_id": dp["tgt_id"],
-                    "keywords": dp["keywords"],
-                    "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp['keywords']}\n{dp['description']}",
-                    "source_id": dp["source_id"],
-                    "file_path": dp.get("file_path", "unknown_source"),
+    if doc_graph_index is not None:
+        await doc_graph_index.upsert(
+            {
+                chunk_id: {
+                    "entities": sorted(chunk_entities.get(chunk_id, ())),
+                    "relations": [
+                        list(edge_key)
+                        for edge_key in sorted(chunk_relations.get(chunk_id, ()))
+                    ],
                 }
-                for dp in relationships_data
+                for chunk_id in chunk_entities.keys() | chunk_relations.keys()
             }
-            await relationships_vdb.upsert(data_for_vdb)
+        )
 
 
 async def extract_entities(
@@ -808,6 +893,14 @@ async def extract_entities(
             if if_loop_result != "yes":
                 break
 
+        # Entities and relations remember the document type of their chunk, so
+        # that queries restricted to document types can search them too
+        document_type = chunk_dp.get("document_type")
+        if document_type:
+            for records in (*maybe_nodes.values(), *maybe_edges.values()):
+                for dp in records:
+                    dp["document_type"] = document_type
+
         processed_chunks += 1
         entities_count = len(maybe_nodes)
         relations_count = len(maybe_edges)
@@ -887,9 +980,34 @@ async def kg_query(
     if cached_response is not None:
         return cached_response
 
-    hl_keywords, ll_keywords = await get_keywords_from_query(
-        query, query_param, global_config, hashing_kv
-    )
+    trace = query_param.trace
+    # Mix mode's chunk search only needs the original query, so it runs while
+    # the LLM extracts the keywords
+    vector_task = None
+    if query_param.mode == "mix" and chunks_vdb is not None:
+        vector_task = asyncio.create_task(
+            _timed(
+                trace,
+                "vector_context",
+                _get_vector_context(
+                    getattr(query_param, "original_query", query),
+                    chunks_vdb,
+                    query_param,
+                    global_config["tokenizer"],
+                ),
+            )
+        )
+
+    try:
+        hl_keywords, ll_keywords = await _timed(
+            trace,
+            "keywords",
+            get_keywords_from_query(query, query_param, global_config, hashing_kv),
+        )
+    except BaseException:
+        if vector_task is not None:
+            vector_task.cancel()
+        raise
 
     logger.debug(f"High-level keywords: {hl_keywords}")
     logger.debug(f"Low-level  keywords: {ll_keywords}")
@@ -897,6 +1015,8 @@ async def kg_query(
     # Handle empty keywords
     if hl_keywords == [] and ll_keywords == []:
         logger.warning("low_level_keywords and high_level_keywords is empty")
+        if vector_task is not None:
+            vector_task.cancel()
         return PROMPTS["fail_response"]
     if ll_keywords == [] and query_param.mode in ["local", "hybrid"]:
         logger.warning(
@@ -915,15 +1035,20 @@ async def kg_query(
     hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
 
     # Build context
-    context = await _build_query_context(
-        ll_keywords_str,
-        hl_keywords_str,
-        knowledge_graph_inst,
-        entities_vdb,
-        relationships_vdb,
-        text_chunks_db,
-        query_param,
-        chunks_vdb,
+    context = await _timed(
+        trace,
+        "context",
+        _build_query_context(
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+            vector_task=vector_task,
+        ),
     )
 
     if query_param.only_need_context:
@@ -959,10 +1084,14 @@ async def kg_query(
     len_of_prompts = len(tokenizer.encode(query + sys_prompt))
     logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
 
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
+    response = await _timed(
+        trace,
+        "response",
+        use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        ),
     )
     if isinstance(response, str) and len(response) > len(sys_prompt):
         response = (
@@ -1130,6 +1259,34 @@ async def extract_keywords_only(
     return hl_keywords, ll_keywords
 
 
+async def _query_vector_storage(
+    vdb: BaseVectorStorage, query: str, query_param: QueryParam
+) -> list[dict[str, Any]]:
+    """Search a vector storage within the document types of the query lens
+
+    The storage applies the document type filter while searching, so a narrow
+    lens still gets top_k results. When nothing of those types matches, e.g. for
+    entities indexed before they recorded their document types, the whole
+    storage is searched instead.
+    """
+    document_types = [
+        doc_type for doc_type in (query_param.include_document_types or []) if doc_type
+    ]
+    if document_types:
+        results = await vdb.query(
+            query,
+            top_k=query_param.top_k,
+            ids=query_param.ids,
+            document_types=document_types,
+        )
+        if results:
+            return results
+        logger.info(
+            f"No {vdb.namespace} of document types {document_types}, searching all"
+        )
+    return await vdb.query(query, top_k=query_param.top_k, ids=query_param.ids)
+
+
 async def _get_vector_context(
     query: str,
     chunks_vdb: BaseVectorStorage,
@@ -1153,24 +1310,10 @@ async def _get_vector_context(
         compatible with _get_edge_data and _get_node_data format
     """
     try:
-        results = await chunks_vdb.query(
-            query, top_k=query_param.top_k, ids=query_param.ids
-        )
+        results = await _query_vector_storage(chunks_vdb, query, query_param)
         if not results:
             return [], [], []
 
-        allowed_types = {
-            doc_type
-            for doc_type in (query_param.include_document_types or [])
-            if doc_type
-        }
-        if allowed_types:
-            filtered_results = [
-                dp for dp in results if dp.get("document_type") in allowed_types
-            ]
-            if filtered_results:
-                results = filtered_results
-
         valid_chunks = []
         for result in results:
             if "content" in result:
@@ -1239,6 +1382,16 @@ async def _get_vector_context(
         return [], [], []
 
 
+async def _timed(trace: dict[str, float] | None, stage: str, awaitable):
+    """Await a query stage, recording its duration in the trace if there is one"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        if trace is not None:
+            trace[stage] = time.perf_counter() - start
+
+
 async def _build_query_context(
     ll_keywords: str,
     hl_keywords: str,
@@ -1248,41 +1401,98 @@ async def _build_query_context(
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
     chunks_vdb: BaseVectorStorage = None,  # Add chunks_vdb parameter for mix mode
+    vector_task: asyncio.Task | None = None,
 ):
+    """Retrieve the entities, relations and text units of a query
+
+    The retrieval stages of hybrid and mix mode share no inputs and run
+    concurrently. vector_task is mix mode's chunk search when the caller has
+    already started it; it is cancelled if the mode does not use it.
+    """
     logger.info(f"Process {os.getpid()} building query context...")
+    trace = query_param.trace
+
+    if vector_task is not None and query_param.mode != "mix":
+        vector_task.cancel()
+        vector_task = None
 
     # Handle local and global modes as before
     if query_param.mode == "local":
-        entities_context, relations_context, text_units_context = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
+        entities_context, relations_context, text_units_context = await _timed(
+            trace,
+            "node_data",
+            _get_node_data(
+                ll_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                text_chunks_db,
+                query_param,
+            ),
         )
     elif query_param.mode == "global":
-        entities_context, relations_context, text_units_context = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
+        entities_context, relations_context, text_units_context = await _timed(
+            trace,
+            "edge_data",
+            _get_edge_data(
+                hl_keywords,
+                knowledge_graph_inst,
+                relationships_vdb,
+                text_chunks_db,
+                query_param,
+            ),
         )
     else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
+        stages = [
+            _timed(
+                trace,
+                "node_data",
+                _get_node_data(
+                    ll_keywords,
+                    knowledge_graph_inst,
+                    entities_vdb,
+                    text_chunks_db,
+                    query_param,
+                ),
+            ),
+            _timed(
+                trace,
+                "edge_data",
+                _get_edge_data(
+                    hl_keywords,
+                    knowledge_graph_inst,
+                    relationships_vdb,
+                    text_chunks_db,
+                    query_param,
+                ),
+            ),
+        ]
+
+        # Only get vector data if in mix mode
+        if vector_task is not None:
+            stages.append(vector_task)
+        elif query_param.mode == "mix" and hasattr(query_param, "original_query"):
+            # Get tokenizer from text_chunks_db
+            tokenizer = text_chunks_db.global_config.get("tokenizer")
+            stages.append(
+                _timed(
+                    trace,
+                    "vector_context",
+                    _get_vector_context(
+                        query_param.original_query,  # We need to pass the original query
+                        chunks_vdb,
+                        query_param,
+                        tokenizer,
+                    ),
+                )
+            )
+
+        try:
+            results = await asyncio.gather(*stages)
+        except BaseException:
+            if vector_task is not None:
+                vector_task.cancel()
+            raise
+        ll_data, hl_data = results[0], results[1]
 
         (
             ll_entities_context,
@@ -1303,26 +1513,13 @@ async def _build_query_context(
             [],
         )
 
-        # Only get vector data if in mix mode
-        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
-            # Get tokenizer from text_chunks_db
-            tokenizer = text_chunks_db.global_config.get("tokenizer")
-
-            # Get vector context in triple format
-            vector_data = await _get_vector_context(
-                query_param.original_query,  # We need to pass the original query
-                chunks_vdb,
-                query_param,
-                tokenizer,
-            )
-
-            # If vector_data is not None, unpack it
-            if vector_data is not None:
-                (
-                    vector_entities_context,
-                    vector_relations_context,
-                    vector_text_units_context,
-                ) = vector_data
+        # If vector_data is not None, unpack it
+        if len(results) > 2 and results[2] is not None:
+            (
+                vector_entities_context,
+                vector_relations_context,
+                vector_text_units_context,
+            ) = results[2]
 
         # Combine and deduplicate the entities, relationships, and sources
         entities_context = process_combine_contexts(
@@ -1377,9 +1574,7 @@ async def _get_node_data(
         f"Query nodes: {query}, top_k: {query_param.top_k}, cosine: {entities_vdb.cosine_better_than_threshold}"
     )
 
-    results = await entities_vdb.query(
-        query, top_k=query_param.top_k, ids=query_param.ids
-    )
+    results = await _query_vector_storage(entities_vdb, query, query_param)
 
     if not len(results):
         return "", "", ""
@@ -1497,6 +1692,31 @@ async def _get_node_data(
     return entities_context, relations_context, text_units_context
 
 
+async def _get_text_chunks_by_ids(
+    text_chunks_db: BaseKVStorage, chunk_ids: list[str]
+) -> dict[str, dict]:
+    """Fetch text chunks with batched `get_by_ids` calls
+
+    Args:
+        text_chunks_db: Text chunk storage
+        chunk_ids: Deduplicated chunk ids to fetch
+
+    Returns:
+        Mapping of chunk id to chunk data, missing chunks are omitted
+    """
+    batch_size = max(
+        1, int(text_chunks_db.global_config.get("chunk_fetch_batch_size", 500))
+    )
+    chunks_data: dict[str, dict] = {}
+    for i in range(0, len(chunk_ids), batch_size):
+        batch_ids = chunk_ids[i : i + batch_size]
+        batch_results = await text_chunks_db.get_by_ids(batch_ids)
+        for c_id, data in zip(batch_ids, batch_results):
+            if data is not None:
+                chunks_data[c_id] = data
+    return chunks_data
+
+
 async def _find_most_related_text_unit_from_entities(
     node_datas: list[dict],
     query_param: QueryParam,
@@ -1538,28 +1758,21 @@ async def _find_most_related_text_unit_from_entities(
     }
 
     all_text_units_lookup = {}
-    tasks = []
+    chunk_refs = []
 
     for index, (this_text_units, this_edges) in enumerate(zip(text_units, edges)):
         for c_id in this_text_units:
             if c_id not in all_text_units_lookup:
                 all_text_units_lookup[c_id] = index
-                tasks.append((c_id, index, this_edges))
+                chunk_refs.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(
-            *[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks]
-        )
-        results.extend(batch_results)
+    chunks_data = await _get_text_chunks_by_ids(
+        text_chunks_db, [c_id for c_id, _, _ in chunk_refs]
+    )
 
-    for (c_id, index, this_edges), data in zip(tasks, results):
+    for c_id, index, this_edges in chunk_refs:
         all_text_units_lookup[c_id] = {
-            "data": data,
+            "data": chunks_data.get(c_id),
             "order": index,
             "relation_counts": 0,
         }
@@ -1680,9 +1893,7 @@ async def _get_edge_data(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
     )
 
-    results = await relationships_vdb.query(
-        keywords, top_k=query_param.top_k, ids=query_param.ids
-    )
+    results = await _query_vector_storage(relationships_vdb, keywords, query_param)
 
     if not len(results):
         return "", "", ""
@@ -1866,24 +2077,19 @@ async def _find_related_text_unit_from_relationships(
         for dp in edge_datas
         if dp["source_id"] is not None
     ]
-    all_text_units_lookup = {}
-
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
-            # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
-                all_text_units_lookup[c_id] = {
-                    "data": chunk_data,
-                    "order": index,
-                }
-
-    tasks = []
+    chunk_orders: dict[str, int] = {}
     for index, unit_list in enumerate(text_units):
         for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
+            chunk_orders.setdefault(c_id, index)
 
-    await asyncio.gather(*tasks)
+    chunks_data = await _get_text_chunks_by_ids(text_chunks_db, list(chunk_orders))
+
+    # Only keep valid data
+    all_text_units_lookup = {
+        c_id: {"data": chunk_data, "order": chunk_orders[c_id]}
+        for c_id, chunk_data in chunks_data.items()
+        if chunk_data is not None and "content" in chunk_data
+    }
 
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from .base import StorageNameSpace
+from .utils import logger
+
+
+class PersistenceScheduler:
+    """Persists in-memory storages in the background instead of after every write
+
+    Callers mark storages dirty after writing to them. Marks are coalesced per
+    namespace, and the dirty storages are persisted with index_done_callback
+    once the interval has passed since the previous flush, as soon as
+    dirty_threshold marks are pending, or when the scheduler stops.
+
+    Args:
+        interval: Seconds between two flushes, 0 persists on every mark
+        dirty_threshold: Pending marks that trigger a flush before the interval
+            has passed, 0 for no threshold
+    """
+
+    def __init__(self, interval: float, dirty_threshold: int = 0):
+        self.interval = interval
+        self.dirty_threshold = dirty_threshold
+        self._dirty: dict[str, StorageNameSpace] = {}
+        self._pending = 0
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self.flush_count = 0
+        self.last_flush_time: float | None = None
+        self.last_flush_duration: float | None = None
+        self.last_error: str | None = None
+
+    async def mark_dirty(self, *storages: StorageNameSpace | None) -> None:
+        """Schedule the storages to be persisted with the next flush"""
+        for storage in storages:
+            if storage is not None:
+                self._dirty[storage.namespace] = storage
+        self._pending += 1
+
+        if self.interval <= 0:
+            await self.flush()
+            return
+        self._ensure_running()
+        if self.dirty_threshold > 0 and self._pending >= self.dirty_threshold:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        """Persist every dirty storage now"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            storages = list(self._dirty.values())
+            self._dirty.clear()
+            self._pending = 0
+
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(storage.index_done_callback() for storage in storages),
+                return_exceptions=True,
+            )
+            for storage, result in zip(storages, results):
+                if isinstance(result, Exception):
+                    # Keep it dirty, the next flush retries it
+                    self._dirty.setdefault(storage.namespace, storage)
+                    self.last_error = f"{storage.namespace}: {result}"
+                    logger.error(f"Failed to persist {storage.namespace}: {result}")
+            self.flush_count += 1
+            self.last_flush_time = time.time()
+            self.last_flush_duration = time.perf_counter() - start
+
+    async def stop(self) -> None:
+        """Stop the background task and persist what is still dirty"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except RuntimeError:
+                # The task belongs to an event loop that is no longer running
+                pass
+            self._task = None
+        await self.flush()
+
+    def status(self) -> dict[str, Any]:
+        """Flush statistics, for health reporting"""
+        last_flush = (
+            datetime.fromtimestamp(self.last_flush_time, timezone.utc).isoformat()
+            if self.last_flush_time is not None
+            else None
+        )
+        return {
+            "interval": self.interval,
+            "dirty_threshold": self.dirty_threshold,
+            "pending_dirty_count": self._pending,
+            "dirty_namespaces": sorted(self._dirty),
+            "flush_count": self.flush_count,
+            "last_flush_time": last_flush,
+            "last_flush_duration": self.last_flush_duration,
+            "last_error": self.last_error,
+        }
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is loop
+        ):
+            return
+        # Events and locks are bound to the loop they are first used in
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Background persistence failed: {e}")
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import asyncio
+import glob
+import os
+from dataclasses import dataclass, field
+from typing import Any, final
+
+import numpy as np
+
+from .base import BaseKVStorage, StorageNameSpace
+from .utils import dequantize_embedding, logger
+from .kg.shared_storage import (
+    get_storage_lock,
+    get_storage_read_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+# Rows converted to float32 at a time during a search, bounds the scratch memory
+SEARCH_BLOCK_ROWS = 16384
+
+# Initial number of rows allocated for a mode matrix, grown by doubling
+INITIAL_CAPACITY = 1024
+
+# Delta files are merged into the base index once there are this many of them,
+# or once they are larger than both this size and the base index
+DELTA_COMPACTION_COUNT = 64
+DELTA_COMPACTION_MIN_BYTES = 4 * 1024 * 1024
+
+# Semantic indexes registered by LightRAG, keyed by the id of their LLM cache storage
+_indexes: dict[int, SemanticCacheIndex] = {}
+
+
+def get_semantic_cache(hashing_kv: BaseKVStorage | None) -> SemanticCacheIndex | None:
+    """Return the semantic index attached to an LLM cache storage, if any"""
+    if hashing_kv is None:
+        return None
+    return _indexes.get(id(hashing_kv))
+
+
+class _ModeIndex:
+    """Contiguous matrix of unit-normalized float16 embeddings for one cache mode"""
+
+    def __init__(self, dim: int, capacity: int = INITIAL_CAPACITY):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float16)
+        self.cache_types = np.zeros(capacity, dtype=np.int16)
+        self.ids: list[str] = []
+        self.rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_arrays(
+        cls, ids: list[str], vectors: np.ndarray, cache_types: np.ndarray
+    ) -> _ModeIndex:
+        index = cls(vectors.shape[1], max(len(ids), INITIAL_CAPACITY))
+        index.vectors[: len(ids)] = vectors
+        index.cache_types[: len(ids)] = cache_types
+        index.ids = list(ids)
+        index.rows = {cache_id: row for row, cache_id in enumerate(ids)}
+        return index
+
+    def _grow(self) -> None:
+        capacity = max(INITIAL_CAPACITY, 2 * self.vectors.shape[0])
+        vectors = np.zeros((capacity, self.dim), dtype=np.float16)
+        vectors[: len(self.ids)] = self.vectors[: len(self.ids)]
+        cache_types = np.zeros(capacity, dtype=np.int16)
+        cache_types[: len(self.ids)] = self.cache_types[: len(self.ids)]
+        self.vectors, self.cache_types = vectors, cache_types
+
+    def put(self, cache_id: str, vector: np.ndarray, cache_type: int) -> None:
+        row = self.rows.get(cache_id)
+        if row is None:
+            if len(self.ids) == self.vectors.shape[0]:
+                self._grow()
+            row = len(self.ids)
+            self.ids.append(cache_id)
+            self.rows[cache_id] = row
+        self.vectors[row] = vector
+        self.cache_types[row] = cache_type
+
+    def remove(self, cache_id: str) -> None:
+        row = self.rows.pop(cache_id, None)
+        if row is None:
+            return
+        # Move the last row into the freed slot to keep the matrix dense
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.vectors[row] = self.vectors[last]
+            self.cache_types[row] = self.cache_types[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+        self.ids.pop()
+
+    def search(self, query: np.ndarray, cache_type: int | None) -> tuple[int, float]:
+        """Return (row, similarity) of the best match, row is -1 when nothing matches"""
+        best_row, best_similarity = -1, -1.0
+        size = len(self.ids)
+        for start in range(0, size, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, size)
+            scores = self.vectors[start:stop].astype(np.float32) @ query
+            if cache_type is not None:
+                scores[self.cache_types[start:stop] != cache_type] = -np.inf
+            row = int(np.argmax(scores))
+            if scores[row] > best_similarity:
+                best_row, best_similarity = start + row, float(scores[row])
+        return best_row, best_similarity
+
+
+def _normalize(embedding: np.ndarray | list[float]) -> np.ndarray | None:
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    if not np.isfinite(norm) or norm == 0:
+        return None
+    return vector / norm
+
+
+@final
+@dataclass
+class SemanticCacheIndex(StorageNameSpace):
+    """Nearest-neighbour index over the embeddings of the LLM response cache.
+
+    Each cache mode keeps its embeddings in one contiguous float16 matrix, so a
+    lookup is a blocked matrix-vector product instead of decoding and comparing
+    every cache entry in Python. Entries are added as responses are saved.
+
+    The index is persisted next to the LLM cache as a base file
+    (``<namespace>.npz``) plus delta files (``<namespace>.delta.<seq>.npz``)
+    holding the changes of one flush each. Processes catch up by applying the
+    deltas they have not seen, on top of which their own unflushed changes are
+    replayed; deltas are merged into the base file once they pile up.
+
+    Modes missing from the persisted index are bootstrapped once from the cache
+    storage the first time they are searched.
+    """
+
+    hashing_kv: BaseKVStorage = field(default=None)
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        self._file_name = os.path.join(working_dir, f"{self.namespace}.npz")
+        self._delta_prefix = os.path.join(working_dir, f"{self.namespace}.delta.")
+        # Process-local lock: bootstrapping reads the cache storage, which takes
+        # the shared storage lock itself
+        self._lock = asyncio.Lock()
+        self.storage_updated = None
+        self._modes: dict[str, _ModeIndex] = {}
+        self._cache_type_codes: dict[str, int] = {}
+        # Sequence number of the last delta reflected in memory
+        self._applied_seq = 0
+        # Changes not written yet: entries (None for a removal), dropped modes
+        # and modes created without entries
+        self._pending: dict[tuple[str, str], tuple[np.ndarray, str] | None] = {}
+        self._dropped_modes: set[str] = set()
+        self._new_modes: set[str] = set()
+
+    def _cache_type_code(self, cache_type: str | None) -> int:
+        return self._cache_type_codes.setdefault(
+            cache_type or "", len(self._cache_type_codes) + 1
+        )
+
+    @property
+    def _dirty(self) -> bool:
+        return bool(self._pending or self._dropped_modes or self._new_modes)
+
+    async def initialize(self):
+        """Load the persisted index and register it for the LLM cache storage"""
+        self.storage_updated = await get_update_flag(self.namespace)
+        async with self._lock:
+            async with get_storage_read_lock(self.namespace):
+                self._load()
+        _indexes[id(self.hashing_kv)] = self
+
+    async def finalize(self):
+        if _indexes.get(id(self.hashing_kv)) is self:
+            del _indexes[id(self.hashing_kv)]
+
+    def _delta_file(self, seq: int) -> str:
+        return f"{self._delta_prefix}{seq:08d}.npz"
+
+    def _deltas(self) -> list[tuple[int, str]]:
+        deltas = []
+        for file_name in glob.glob(f"{glob.escape(self._delta_prefix)}*.npz"):
+            seq = file_name[len(self._delta_prefix) : -len(".npz")]
+            if seq.isdigit():
+                deltas.append((int(seq), file_name))
+        return sorted(deltas)
+
+    def _base_seq(self) -> int:
+        """Last delta merged into the base file"""
+        if not os.path.exists(self._file_name):
+            return 0
+        with np.load(self._file_name, allow_pickle=False) as data:
+            return int(data["delta_seq"]) if "delta_seq" in data.files else 0
+
+    def _load(self) -> None:
+        """Rebuild the index from the base file and every delta (index locks held)"""
+        self._modes = {}
+        self._cache_type_codes = {}
+        self._applied_seq = 0
+        try:
+            if os.path.exists(self._file_name):
+                self._applied_seq = self._apply_file(self._file_name)
+            self._apply_deltas()
+        except Exception as e:
+            logger.warning(
+                f"Failed to load semantic cache index {self._file_name}: {e}"
+            )
+            self._modes = {}
+            self._cache_type_codes = {}
+        self._apply_pending()
+        logger.info(
+            f"Process {os.getpid()} semantic cache {self.namespace} loaded with "
+            f"{sum(len(index) for index in self._modes.values())} entries"
+        )
+
+    def _apply_deltas(self) -> None:
+        for seq, file_name in self._deltas():
+            if seq > self._applied_seq:
+                self._apply_file(file_name)
+                self._applied_seq = seq
+
+    def _apply_file(self, file_name: str) -> int:
+        """Apply a base or delta file to the index, returns its delta_seq"""
+        with np.load(file_name, allow_pickle=False) as data:
+            files = set(data.files)
+            for mode in data["dropped_modes"] if "dropped_modes" in files else []:
+                self._modes.pop(str(mode), None)
+            if "removed_ids" in files:
+                for mode, cache_id in zip(data["removed_modes"], data["removed_ids"]):
+                    index = self._modes.get(str(mode))
+                    if index is not None:
+                        index.remove(str(cache_id))
+            # File type codes are positions in its cache_types list, plus one
+            type_codes = np.array(
+                [0] + [self._cache_type_code(str(n)) for n in data["cache_types"]],
+                dtype=np.int16,
+            )
+            for mode in data["modes"]:
+                mode = str(mode)
+                vectors = data[f"{mode}.vectors"]
+                ids = [str(cache_id) for cache_id in data[f"{mode}.ids"]]
+                cache_types = type_codes[data[f"{mode}.types"]]
+                index = self._modes.get(mode)
+                if index is None or (ids and index.dim != vectors.shape[1]):
+                    self._modes[mode] = _ModeIndex.from_arrays(
+                        ids, vectors, cache_types
+                    )
+                    continue
+                for row, cache_id in enumerate(ids):
+                    index.put(cache_id, vectors[row], cache_types[row])
+            return int(data["delta_seq"]) if "delta_seq" in files else 0
+
+    def _apply_pending(self) -> None:
+        """Replay the unflushed changes of this process over the loaded state"""
+        for mode in self._dropped_modes:
+            self._modes.pop(mode, None)
+        for mode in self._new_modes:
+            self._modes.setdefault(mode, _ModeIndex(0))
+        for (mode, cache_id), entry in self._pending.items():
+            if entry is None:
+                index = self._modes.get(mode)
+                if index is not None:
+                    index.remove(cache_id)
+            else:
+                self._put_vector(mode, cache_id, entry[0], entry[1])
+
+    async def _check_reload(self) -> None:
+        """Apply the changes flushed by other processes (call with lock held)"""
+        if self.storage_updated.value:
+            logger.info(
+                f"Process {os.getpid()} updating semantic cache {self.namespace} with changes of another process"
+            )
+            async with get_storage_read_lock(self.namespace):
+                self.storage_updated.value = False
+                self._catch_up()
+
+    def _catch_up(self) -> None:
+        """Apply deltas written since the last one seen (index locks held)"""
+        if self._base_seq() > self._applied_seq:
+            # Deltas this process has not seen were merged into the base file
+            self._load()
+            return
+        self._apply_deltas()
+        self._apply_pending()
+
+    def _put_vector(
+        self, mode: str, cache_id: str, vector: np.ndarray, cache_type: str
+    ) -> None:
+        index = self._modes.get(mode)
+        if index is None or index.dim != vector.shape[0]:
+            # First entry of the mode, or the embedding model changed
+            index = self._modes[mode] = _ModeIndex(vector.shape[0])
+        index.put(cache_id, vector, self._cache_type_code(cache_type))
+
+    def _put(
+        self,
+        mode: str,
+        cache_id: str,
+        embedding: np.ndarray | list[float],
+        cache_type: str | None,
+    ) -> None:
+        vector = _normalize(embedding)
+        if vector is None:
+            return
+        vector = vector.astype(np.float16)
+        self._put_vector(mode, cache_id, vector, cache_type or "")
+        self._pending[(mode, cache_id)] = (vector, cache_type or "")
+
+    async def _ensure_mode(self, mode: str) -> None:
+        """Bootstrap a mode from the cache storage (call with lock held)"""
+        if mode in self._modes or self.hashing_kv is None:
+            return
+        mode_cache = await self.hashing_kv.get_cache_by_mode(mode)
+        self._modes[mode] = _ModeIndex(0)
+        for cache_id, cache_data in mode_cache.items():
+            if not isinstance(cache_data, dict) or cache_data.get("embedding") is None:
+                continue
+            embedding_min = cache_data.get("embedding_min")
+            embedding_max = cache_data.get("embedding_max")
+            if embedding_min is None or embedding_max is None:
+                continue
+            try:
+                quantized = np.frombuffer(
+                    bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
+                ).reshape(cache_data["embedding_shape"])
+            except Exception as e:
+                logger.warning(f"Error processing cached embedding: {str(e)}")
+                continue
+            self._put(
+                mode,
+                cache_id,
+                dequantize_embedding(quantized, embedding_min, embedding_max),
+                cache_data.get("cache_type"),
+            )
+        # Remember the mode even when it has no embeddings yet
+        self._new_modes.add(mode)
+        logger.info(
+            f"Semantic cache {self.namespace} bootstrapped mode {mode} with {len(self._modes[mode])} entries"
+        )
+
+    async def add(
+        self,
+        mode: str,
+        cache_id: str,
+        embedding: np.ndarray | list[float],
+        cache_type: str | None = None,
+    ) -> None:
+        """Add or replace the embedding of a cache entry"""
+        async with self._lock:
+            await self._check_reload()
+            await self._ensure_mode(mode)
+            self._put(mode, cache_id, embedding, cache_type)
+
+    async def remove(self, mode: str, cache_id: str) -> None:
+        """Remove a cache entry, e.g. when it no longer exists in the cache storage"""
+        await self.remove_entries([(mode, cache_id)])
+
+    async def remove_entries(self, entries: list[tuple[str, str]]) -> None:
+        """Remove several (mode, cache_id) entries, e.g. after a cache eviction"""
+        async with self._lock:
+            await self._check_reload()
+            for mode, cache_id in entries:
+                index = self._modes.get(mode)
+                if index is not None and cache_id in index.rows:
+                    index.remove(cache_id)
+                    self._pending[(mode, cache_id)] = None
+
+    async def search(
+        self,
+        mode: str,
+        embedding: np.ndarray | list[float],
+        cache_type: str | None = None,
+    ) -> tuple[str, float] | None:
+        """Find the most similar cache entry of a mode
+
+        Returns:
+            (cache_id, cosine similarity) of the best match, or None if the mode
+            has no entry of the requested cache type
+        """
+        query = _normalize(embedding)
+        if query is None:
+            return None
+        async with self._lock:
+            await self._check_reload()
+            await self._ensure_mode(mode)
+            index = self._modes.get(mode)
+            if not index or index.dim != query.shape[0]:
+                return None
+            type_code = self._cache_type_codes.get(cache_type) if cache_type else None
+            if cache_type and type_code is None:
+                return None
+            row, similarity = index.search(query, type_code)
+            if row < 0 or not np.isfinite(similarity):
+                return None
+            return index.ids[row], similarity
+
+    async def drop_modes(self, modes: list[str]) -> None:
+        """Forget the given modes, mirroring a cache clear"""
+        async with self._lock:
+            await self._check_reload()
+            for mode in modes:
+                self._modes.pop(mode, None)
+                self._dropped_modes.add(mode)
+                self._new_modes.discard(mode)
+                self._pending = {
+                    key: entry for key, entry in self._pending.items() if key[0] != mode
+                }
+
+    def _write(self, file_name: str, arrays: dict[str, Any]) -> int:
+        arrays["cache_types"] = np.array(list(self._cache_type_codes), dtype=str)
+        tmp_file_name = f"{file_name}.tmp"
+        with open(tmp_file_name, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file_name, file_name)
+        return os.path.getsize(file_name)
+
+    def _delta_arrays(self) -> dict[str, Any]:
+        """Arrays of a delta file holding the unflushed changes"""
+        puts: dict[str, list[tuple[str, np.ndarray, str]]] = {
+            mode: [] for mode in self._new_modes
+        }
+        removed = []
+        for (mode, cache_id), entry in self._pending.items():
+            if entry is None:
+                removed.append((mode, cache_id))
+            else:
+                puts.setdefault(mode, []).append((cache_id, *entry))
+        arrays: dict[str, Any] = {
+            "modes": np.array(list(puts), dtype=str),
+            "dropped_modes": np.array(sorted(self._dropped_modes), dtype=str),
+            "removed_modes": np.array([mode for mode, _ in removed], dtype=str),
+            "removed_ids": np.array([cache_id for _, cache_id in removed], dtype=str),
+        }
+        for mode, entries in puts.items():
+            dim = entries[0][1].shape[0] if entries else 0
+            arrays[f"{mode}.ids"] = np.array([e[0] for e in entries], dtype=str)
+            arrays[f"{mode}.vectors"] = np.array(
+                [e[1] for e in entries], dtype=np.float16
+            ).reshape(len(entries), dim)
+            arrays[f"{mode}.types"] = np.array(
+                [self._cache_type_code(e[2]) for e in entries], dtype=np.int16
+            )
+        return arrays
+
+    def _compact(self, deltas: list[tuple[int, str]]) -> None:
+        """Merge every delta into a new base file (index locks held, all applied)"""
+        arrays: dict[str, Any] = {
+            "modes": np.array(list(self._modes), dtype=str),
+            "delta_seq": np.array(self._applied_seq),
+        }
+        for mode, index in self._modes.items():
+            arrays[f"{mode}.vectors"] = index.vectors[: len(index)]
+            arrays[f"{mode}.types"] = index.cache_types[: len(index)]
+            arrays[f"{mode}.ids"] = np.array(index.ids, dtype=str)
+        self._write(self._file_name, arrays)
+        for _, file_name in deltas:
+            os.remove(file_name)
+        logger.info(
+            f"Process {os.getpid()} merged {len(deltas)} semantic cache deltas into {self._file_name}"
+        )
+
+    async def index_done_callback(self) -> None:
+        async with self._lock:
+            if not self._dirty:
+                return
+            async with get_storage_lock(self.namespace):
+                # Write on top of every delta, so sequence numbers stay ordered
+                self.storage_updated.value = False
+                self._catch_up()
+                seq = self._applied_seq + 1
+                self._write(self._delta_file(seq), self._delta_arrays())
+                self._applied_seq = seq
+                self._pending = {}
+                self._dropped_modes = set()
+                self._new_modes = set()
+
+                deltas = self._deltas()
+                base_bytes = (
+                    os.path.getsize(self._file_name)
+                    if os.path.exists(self._file_name)
+                    else 0
+                )
+                delta_bytes = sum(os.path.getsize(f) for _, f in deltas)
+                if len(deltas) >= DELTA_COMPACTION_COUNT or delta_bytes > max(
+                    DELTA_COMPACTION_MIN_BYTES, base_bytes
+                ):
+                    self._compact(deltas)
+                # Notify other processes that the index has changed
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            async with self._lock:
+                async with get_storage_lock(self.namespace):
+                    deltas = self._deltas()
+                    # An empty base file past every delta seen so far makes
+                    # other processes reload instead of applying later deltas
+                    self._applied_seq = 1 + max(
+                        [self._applied_seq, self._base_seq()]
+                        + [seq for seq, _ in deltas]
+                    )
+                    self._modes = {}
+                    self._cache_type_codes = {}
+                    self._compact(deltas)
+                    self._pending = {}
+                    self._dropped_modes = set()
+                    self._new_modes = set()
+                    await set_all_update_flags(self.namespace)
+                    self.storage_updated.value = False
+            logger.info(
+                f"Process {os.getpid()} drop semantic cache {self.namespace} (file:{self._file_name})"
+            )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping semantic cache {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
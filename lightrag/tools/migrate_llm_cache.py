@@ -0,0 +1,104 @@
+"""Migrate the LLM response cache from mode buckets to flat per-entry keys.
+
+Older versions stored every cached response of a mode under a single key
+(``{mode: {args_hash: entry}}``), so each save rewrote the whole bucket. Cached
+responses are now stored one per ``{mode}:{args_hash}`` key. JsonKVStorage
+migrates automatically on load; this tool migrates Redis and MongoDB caches
+(PostgreSQL already stores one row per entry).
+
+Usage::
+
+    lightrag-migrate-llm-cache --storage RedisKVStorage --working-dir ./rag_storage
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+
+from lightrag.base import BaseKVStorage
+from lightrag.kg import STORAGES
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.namespace import NameSpace, make_namespace
+from lightrag.utils import exists_func, flatten_llm_cache, logger, setup_logger
+
+# Modes under which the legacy format kept its buckets
+LEGACY_CACHE_MODES = ["default", "naive", "local", "global", "hybrid", "mix"]
+
+
+async def migrate_llm_cache(
+    storage: BaseKVStorage, modes: list[str] = LEGACY_CACHE_MODES
+) -> int:
+    """Move legacy cache entries of an initialized storage to flat keys
+
+    Returns:
+        Number of migrated cache entries
+    """
+    migrated = 0
+    if exists_func(storage, "migrate_legacy_cache_ids"):
+        migrated += await storage.migrate_legacy_cache_ids(modes)
+
+    buckets = await storage.get_by_ids(modes)
+    legacy = {mode: bucket for mode, bucket in zip(modes, buckets) if bucket}
+    flat_entries, legacy_keys = flatten_llm_cache(legacy)
+    if flat_entries:
+        await storage.upsert(flat_entries)
+    if legacy_keys:
+        await storage.delete(legacy_keys)
+    await storage.index_done_callback()
+    return migrated + len(flat_entries)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    storage_cls = getattr(
+        importlib.import_module(STORAGES[args.storage], package="lightrag"),
+        args.storage,
+    )
+    storage = storage_cls(
+        namespace=make_namespace(
+            args.namespace_prefix, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+        ),
+        global_config={"working_dir": args.working_dir, "embedding_batch_num": 32},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    try:
+        return await migrate_llm_cache(storage)
+    finally:
+        await storage.finalize()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate the LLM response cache to flat per-entry keys"
+    )
+    parser.add_argument(
+        "--storage",
+        default="JsonKVStorage",
+        help="KV storage implementation holding the cache (default: JsonKVStorage)",
+    )
+    parser.add_argument(
+        "--working-dir",
+        default="./rag_storage",
+        help="LightRAG working directory (default: ./rag_storage)",
+    )
+    parser.add_argument(
+        "--namespace-prefix", default="", help="Namespace prefix of the instance"
+    )
+    args = parser.parse_args()
+
+    if args.storage not in STORAGES:
+        parser.error(f"Unknown storage: {args.storage}")
+
+    setup_logger("lightrag", level="INFO")
+    initialize_share_data()
+    try:
+        migrated = asyncio.run(_run(args))
+    finally:
+        finalize_share_data()
+    logger.info(f"Migrated {migrated} LLM cache entries")
+
+
+if __name__ == "__main__":
+    main()
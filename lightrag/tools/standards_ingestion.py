@@ -54,6 +54,9 @@ class Section:
         line = line.rstrip()
         if line:
             self.content.append(line)
+        elif self.content and self.content[-1]:
+            # Keep a single blank line as the paragraph break
+            self.content.append("")
 
     @property
     def text(self) -> str:
@@ -85,6 +88,12 @@ class ProcessedDocument:
     document_metadata: Dict[str, Any]
 
 
+# Joins paragraphs within a chunk and the header to the chunk
+CHUNK_SEPARATOR = "\n\n"
+
+# Paragraphs handed to the tokenizer's encode_batch at once
+TOKENIZE_BATCH_SIZE = 1024
+
 STOPWORDS: set[str] = {
     "the",
     "and",
@@ -428,40 +437,58 @@ class StandardsDocumentProcessor:
         chunks: List[ProcessedChunk] = []
         order_index = 0
 
-        for section in sections:
-            paragraphs = self._split_into_paragraphs(section.text)
+        section_paragraphs = [
+            [p for p in self._split_into_paragraphs(section.text) if p]
+            for section in sections
+        ]
+        headers = [self._chunk_header(section, document_type) for section in sections]
+
+        # Every header and paragraph is tokenized exactly once; chunk sizes are
+        # running sums of these counts, so chunking stays linear in the length
+        # of a section
+        token_counts = self._count_tokens(
+            [*headers, *itertools.chain.from_iterable(section_paragraphs)]
+        )
+        header_tokens = token_counts[: len(sections)]
+        paragraph_tokens = iter(token_counts[len(sections) :])
+        separator_tokens = len(self.tokenizer.encode(CHUNK_SEPARATOR))
+
+        for section, paragraphs, header, section_header_tokens in zip(
+            sections, section_paragraphs, headers, header_tokens
+        ):
             buffer: List[str] = []
+            buffer_tokens = 0
             for paragraph in paragraphs:
-                if not paragraph:
-                    continue
+                if buffer:
+                    buffer_tokens += separator_tokens
                 buffer.append(paragraph)
-                candidate = "\n\n".join(buffer)
-                tokens = len(self.tokenizer.encode(candidate))
+                buffer_tokens += next(paragraph_tokens)
 
-                if tokens >= self.chunk_token_size:
-                    chunk_content = candidate
-                    chunk_tokens = tokens
+                if buffer_tokens >= self.chunk_token_size:
                     chunk = self._build_chunk(
                         section,
-                        chunk_content,
-                        chunk_tokens,
+                        CHUNK_SEPARATOR.join(buffer),
+                        buffer_tokens,
                         order_index,
                         document_type,
+                        header,
+                        section_header_tokens + separator_tokens,
                     )
                     if chunk:
                         chunks.append(chunk)
                         order_index += 1
                     buffer = []
+                    buffer_tokens = 0
 
             if buffer:
-                chunk_content = "\n\n".join(buffer)
-                chunk_tokens = len(self.tokenizer.encode(chunk_content))
                 chunk = self._build_chunk(
                     section,
-                    chunk_content,
-                    chunk_tokens,
+                    CHUNK_SEPARATOR.join(buffer),
+                    buffer_tokens,
                     order_index,
                     document_type,
+                    header,
+                    section_header_tokens + separator_tokens,
                 )
                 if chunk:
                     chunks.append(chunk)
@@ -476,7 +503,11 @@ class StandardsDocumentProcessor:
         chunk_tokens: int,
         order_index: int,
         document_type: DocumentType,
+        header: str,
+        header_tokens: int,
     ) -> Optional[ProcessedChunk]:
+        """Enrich a chunk with its header; header_tokens counts the header and
+        the separator following it"""
         min_tokens = (
             10 if document_type is DocumentType.PIPELINE else self.min_chunk_tokens
         )
@@ -488,10 +519,8 @@ class StandardsDocumentProcessor:
         references = self._extract_references(chunk_content, document_type)
         topics = self._derive_topics(section, chunk_labels, keywords)
 
-        enriched_header = f"{document_type.value.upper()} | {section.path}".strip()
-        enriched_header = enriched_header or document_type.value.upper()
-        enriched_content = f"{enriched_header}\n\n{chunk_content}".strip()
-        enriched_tokens = len(self.tokenizer.encode(enriched_content))
+        enriched_content = f"{header}{CHUNK_SEPARATOR}{chunk_content}".strip()
+        enriched_tokens = header_tokens + chunk_tokens
 
         metadata = {
             "document_type": document_type.value,
@@ -515,6 +544,22 @@ class StandardsDocumentProcessor:
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
+    @staticmethod
+    def _chunk_header(section: Section, document_type: DocumentType) -> str:
+        header = f"{document_type.value.upper()} | {section.path}".strip()
+        return header or document_type.value.upper()
+
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        """Token counts of the texts, encoded in batches when the tokenizer can"""
+        encode_batch = getattr(self.tokenizer, "encode_batch", None)
+        if encode_batch is None:
+            return [len(self.tokenizer.encode(text)) for text in texts]
+        counts: List[int] = []
+        for start in range(0, len(texts), TOKENIZE_BATCH_SIZE):
+            batch = texts[start : start + TOKENIZE_BATCH_SIZE]
+            counts.extend(len(tokens) for tokens in encode_batch(batch))
+        return counts
+
     def _split_into_paragraphs(self, text: str) -> List[str]:
         paragraphs: List[str] = []
         buffer: List[str] = []
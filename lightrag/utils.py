@@ -3,16 +3,21 @@ import weakref
 
 import asyncio
 import html
-import csv
 import json
 import logging
 import logging.handlers
 import os
 import re
+import time
+from collections import ChainMap, Counter
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from functools import wraps
 from hashlib import md5
-from typing import Any, Protocol, Callable, TYPE_CHECKING, List
+from types import MappingProxyType
+from typing import Any, Protocol, Callable, TYPE_CHECKING, Iterator, List
 import numpy as np
 from lightrag.prompt import PROMPTS
 from dotenv import load_dotenv
@@ -99,6 +104,38 @@ def set_verbose_debug(enabled: bool):
 
 statistic_data = {"llm_call": 0, "llm_cache": 0, "embed_call": 0}
 
+# Storage round trips of the current query, keyed by storage namespace
+_storage_round_trips: ContextVar[Counter | None] = ContextVar(
+    "storage_round_trips", default=None
+)
+
+
+@contextmanager
+def track_storage_round_trips() -> Iterator[Counter]:
+    """Count storage round trips made inside the block, keyed by namespace
+
+    Tasks spawned inside the block inherit the counter, so every storage call
+    made while answering a query is accounted for.
+    """
+    outer = _storage_round_trips.get()
+    counter: Counter = Counter()
+    token = _storage_round_trips.set(counter)
+    try:
+        yield counter
+    finally:
+        _storage_round_trips.reset(token)
+        # Nested blocks also report to the enclosing counter
+        if outer is not None:
+            outer.update(counter)
+
+
+def record_storage_round_trip(namespace: str, count: int = 1) -> None:
+    """Record round trips to a remote storage backend for the current query"""
+    counter = _storage_round_trips.get()
+    if counter is not None:
+        counter[namespace] += count
+
+
 # Initialize logger
 logger = logging.getLogger("lightrag")
 logger.propagate = False  # prevent log message send to root loggger
@@ -220,6 +257,42 @@ def setup_logger(
         logger_instance.addFilter(path_filter)
 
 
+class GlobalConfig(Mapping):
+    """Read-only snapshot of the LightRAG configuration, passed to operate.py
+
+    Holds the configuration fields by reference instead of deep copying them
+    like dataclasses.asdict, so it is cheap to build, and LightRAG keeps one
+    until a field is reassigned. version counts the rebuilds.
+
+    Per-query settings are layered on top with with_overrides, which leaves
+    the snapshot itself untouched.
+    """
+
+    __slots__ = ("_values", "version")
+
+    def __init__(self, values: Mapping[str, Any], version: int = 0):
+        self._values = MappingProxyType(values)
+        self.version = version
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"GlobalConfig(version={self.version}, fields={len(self)})"
+
+    def with_overrides(self, **overrides: Any) -> GlobalConfig:
+        """A view of this snapshot with some values replaced"""
+        if not overrides:
+            return self
+        return GlobalConfig(ChainMap(overrides, self._values), self.version)
+
+
 class UnlimitedSemaphore:
     """A context manager that allows unlimited access."""
 
@@ -297,6 +370,51 @@ def compute_args_hash(*args: Any, cache_type: str | None = None) -> str:
     return hashlib.md5(args_str.encode()).hexdigest()
 
 
+def generate_cache_key(mode: str, args_hash: str) -> str:
+    """Flat key of a cached LLM response in the LLM cache storage"""
+    return f"{mode}:{args_hash}"
+
+
+def parse_cache_key(cache_key: str) -> tuple[str, str] | None:
+    """Split a flat LLM cache key into (mode, args_hash), None for other keys"""
+    mode, sep, args_hash = cache_key.partition(":")
+    if not sep or not mode or not args_hash:
+        return None
+    return mode, args_hash
+
+
+def flatten_llm_cache(data: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """Convert legacy mode buckets ({mode: {args_hash: entry}}) to flat entries
+
+    Returns:
+        (entries keyed by generate_cache_key, keys of the legacy mode buckets)
+    """
+    now = int(time.time())
+    flat: dict[str, Any] = {}
+    legacy_keys = []
+    for key, bucket in data.items():
+        if parse_cache_key(key) is not None or not isinstance(bucket, dict):
+            continue
+        if not all(
+            isinstance(entry, dict) and "return" in entry for entry in bucket.values()
+        ):
+            continue
+        for args_hash, entry in bucket.items():
+            flat[generate_cache_key(key, args_hash)] = {
+                "create_time": now,
+                "access_time": now,
+                **entry,
+            }
+        legacy_keys.append(key)
+    return flat, legacy_keys
+
+
+def is_cache_expired(cache_entry: dict[str, Any], ttl: int) -> bool:
+    """Check whether a cached LLM response is older than ttl seconds (0 = never)"""
+    create_time = cache_entry.get("create_time")
+    return bool(ttl) and create_time is not None and create_time + ttl < time.time()
+
+
 def compute_mdhash_id(content: str, prefix: str = "") -> str:
     """
     Compute a unique ID for a given content string.
@@ -659,6 +777,22 @@ class Tokenizer:
         """
         return self.tokenizer.encode(content)
 
+    def encode_batch(self, contents: List[str]) -> List[List[int]]:
+        """
+        Encodes several strings, in parallel when the underlying tokenizer
+        provides an ``encode_batch`` method (such as tiktoken).
+
+        Args:
+            contents: The strings to encode.
+
+        Returns:
+            A list of integer tokens per string.
+        """
+        encode_batch = getattr(self.tokenizer, "encode_batch", None)
+        if encode_batch is not None:
+            return encode_batch(contents)
+        return [self.tokenizer.encode(content) for content in contents]
+
     def decode(self, tokens: List[int]) -> str:
         """
         Decodes a list of tokens into a string using the underlying tokenizer.
@@ -718,6 +852,19 @@ def split_string_by_multi_markers(content: str, markers: list[str]) -> list[str]
     return [r.strip() for r in results if r.strip()]
 
 
+def get_document_types(record: dict[str, Any]) -> list[str]:
+    """Document types of a vector storage record
+
+    Chunks carry the ``document_type`` of their document, entities and relations
+    the ``document_types`` of every chunk they were extracted from.
+    """
+    document_types = record.get("document_types")
+    if document_types is not None:
+        return list(document_types)
+    document_type = record.get("document_type")
+    return [document_type] if document_type else []
+
+
 # Refer the utils functions of the official GraphRAG implementation:
 # https://github.com/microsoft/graphrag
 def clean_str(input: Any) -> str:
@@ -783,23 +930,14 @@ def process_combine_contexts(*context_lists):
     return combined_data
 
 
-async def get_best_cached_response(
-    hashing_kv,
-    current_embedding,
-    similarity_threshold=0.95,
-    mode="default",
-    use_llm_check=False,
-    llm_func=None,
-    original_prompt=None,
-    cache_type=None,
-) -> str | None:
-    logger.debug(
-        f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
-    )
-    mode_cache = await hashing_kv.get_by_id(mode)
-    if not mode_cache:
-        return None
+def _scan_mode_cache(
+    mode_cache: dict[str, Any], current_embedding, cache_type=None
+) -> tuple[float, str | None, str | None, str | None]:
+    """Linear scan over a mode cache, used when no semantic index is attached
 
+    Returns:
+        (best_similarity, best_response, best_prompt, best_cache_id)
+    """
     best_similarity = -1
     best_response = None
     best_prompt = None
@@ -812,7 +950,7 @@ async def get_best_cached_response(
             continue
 
         # Check if cache data is valid
-        if cache_data["embedding"] is None:
+        if cache_data.get("embedding") is None:
             continue
 
         try:
@@ -851,6 +989,50 @@ async def get_best_cached_response(
             best_prompt = cache_data["original_prompt"]
             best_cache_id = cache_id
 
+    return best_similarity, best_response, best_prompt, best_cache_id
+
+
+async def get_best_cached_response(
+    hashing_kv,
+    current_embedding,
+    similarity_threshold=0.95,
+    mode="default",
+    use_llm_check=False,
+    llm_func=None,
+    original_prompt=None,
+    cache_type=None,
+) -> str | None:
+    logger.debug(
+        f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
+    )
+    from lightrag.semantic_cache import get_semantic_cache
+
+    semantic_cache = get_semantic_cache(hashing_kv)
+    if semantic_cache is not None:
+        match = await semantic_cache.search(mode, current_embedding, cache_type)
+        if match is None:
+            return None
+        best_cache_id, best_similarity = match
+        if best_similarity <= similarity_threshold:
+            return None
+        mode_cache = await hashing_kv.get_by_mode_and_id(mode, best_cache_id) or {}
+        cache_data = mode_cache.get(best_cache_id)
+        if cache_data is None or is_cache_expired(
+            cache_data, hashing_kv.global_config.get("llm_cache_ttl", 0)
+        ):
+            # Entry was removed from the cache storage, e.g. by a cache clear
+            await semantic_cache.remove(mode, best_cache_id)
+            return None
+        best_response = cache_data["return"]
+        best_prompt = cache_data["original_prompt"]
+    else:
+        mode_cache = await hashing_kv.get_cache_by_mode(mode)
+        if not mode_cache:
+            return None
+        best_similarity, best_response, best_prompt, best_cache_id = _scan_mode_cache(
+            mode_cache, current_embedding, cache_type
+        )
+
     if best_similarity > similarity_threshold:
         # If LLM check is enabled and all required parameters are provided
         if (
@@ -968,14 +1150,44 @@ async def handle_cache(
         if not hashing_kv.global_config.get("enable_llm_cache_for_entity_extract"):
             return None, None, None, None
 
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = await hashing_kv.get_by_mode_and_id(mode, args_hash) or {}
-    else:
-        mode_cache = await hashing_kv.get_by_id(mode) or {}
-    if args_hash in mode_cache:
+    mode_cache = await hashing_kv.get_by_mode_and_id(mode, args_hash) or {}
+    if args_hash in mode_cache and not is_cache_expired(
+        mode_cache[args_hash], hashing_kv.global_config.get("llm_cache_ttl", 0)
+    ):
         logger.debug(f"Non-embedding cached hit(mode:{mode} type:{cache_type})")
         return mode_cache[args_hash]["return"], None, None, None
 
+    embedding_cache_config = (
+        hashing_kv.global_config.get("embedding_cache_config") or {}
+    )
+    if (
+        mode != "default"
+        and embedding_cache_config.get("enabled", False)
+        and hashing_kv.embedding_func is not None
+    ):
+        current_embedding = (await hashing_kv.embedding_func([prompt]))[0]
+        quantized, min_val, max_val = quantize_embedding(current_embedding)
+        use_llm_check = embedding_cache_config.get("use_llm_check", False)
+        best_cached_response = await get_best_cached_response(
+            hashing_kv,
+            current_embedding,
+            similarity_threshold=embedding_cache_config.get(
+                "similarity_threshold", 0.95
+            ),
+            mode=mode,
+            use_llm_check=use_llm_check,
+            llm_func=hashing_kv.global_config.get("llm_model_func")
+            if use_llm_check
+            else None,
+            original_prompt=prompt,
+            cache_type=cache_type,
+        )
+        if best_cached_response is not None:
+            logger.debug(f"Embedding cached hit(mode:{mode} type:{cache_type})")
+            return best_cached_response, None, None, None
+        logger.debug(f"Embedding cached missed(mode:{mode} type:{cache_type})")
+        return None, quantized, min_val, max_val
+
     logger.debug(f"Non-embedding cached missed(mode:{mode} type:{cache_type})")
     return None, None, None, None
 
@@ -1008,26 +1220,28 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         logger.debug("Streaming response detected, skipping cache")
         return
 
+    ttl = hashing_kv.global_config.get("llm_cache_ttl", 0)
+    max_entries = hashing_kv.global_config.get("llm_cache_max_entries", 0)
+
     # Get existing cache data
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = (
-            await hashing_kv.get_by_mode_and_id(cache_data.mode, cache_data.args_hash)
-            or {}
-        )
-    else:
-        mode_cache = await hashing_kv.get_by_id(cache_data.mode) or {}
+    mode_cache = (
+        await hashing_kv.get_by_mode_and_id(cache_data.mode, cache_data.args_hash) or {}
+    )
 
     # Check if we already have identical content cached
     if cache_data.args_hash in mode_cache:
-        existing_content = mode_cache[cache_data.args_hash].get("return")
-        if existing_content == cache_data.content:
+        existing_entry = mode_cache[cache_data.args_hash]
+        if existing_entry.get("return") == cache_data.content and not is_cache_expired(
+            existing_entry, ttl
+        ):
             logger.info(
                 f"Cache content unchanged for {cache_data.args_hash}, skipping update"
             )
             return
 
-    # Update cache with new content
-    mode_cache[cache_data.args_hash] = {
+    # Only the entry of this call is written, the rest of the mode is untouched
+    now = int(time.time())
+    cache_entry = {
         "return": cache_data.content,
         "cache_type": cache_data.cache_type,
         "embedding": cache_data.quantized.tobytes().hex()
@@ -1039,12 +1253,36 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         "embedding_min": cache_data.min_val,
         "embedding_max": cache_data.max_val,
         "original_prompt": cache_data.prompt,
+        "create_time": now,
+        "access_time": now,
     }
 
     logger.info(f" == LLM cache == saving {cache_data.mode}: {cache_data.args_hash}")
 
-    # Only upsert if there's actual new content
-    await hashing_kv.upsert({cache_data.mode: mode_cache})
+    await hashing_kv.upsert(
+        {generate_cache_key(cache_data.mode, cache_data.args_hash): cache_entry}
+    )
+    evicted = (
+        await hashing_kv.evict_cache(max_entries, ttl) if max_entries or ttl else []
+    )
+
+    from lightrag.semantic_cache import get_semantic_cache
+
+    semantic_cache = get_semantic_cache(hashing_kv)
+    if semantic_cache is not None and evicted:
+        # Evicted entries would otherwise stay in the index and win searches
+        await semantic_cache.remove_entries(
+            [entry for entry in map(parse_cache_key, evicted) if entry is not None]
+        )
+    if semantic_cache is not None and cache_data.quantized is not None:
+        await semantic_cache.add(
+            cache_data.mode,
+            cache_data.args_hash,
+            dequantize_embedding(
+                cache_data.quantized, cache_data.min_val, cache_data.max_val
+            ),
+            cache_data.cache_type,
+        )
 
 
 def safe_unicode_decode(content):
@@ -1163,350 +1401,6 @@ def always_get_an_event_loop() -> asyncio.AbstractEventLoop:
         return new_loop
 
 
-async def aexport_data(
-    chunk_entity_relation_graph,
-    entities_vdb,
-    relationships_vdb,
-    output_path: str,
-    file_format: str = "csv",
-    include_vector_data: bool = False,
-) -> None:
-    """
-    Asynchronously exports all entities, relations, and relationships to various formats.
-
-    Args:
-        chunk_entity_relation_graph: Graph storage instance for entities and relations
-        entities_vdb: Vector database storage for entities
-        relationships_vdb: Vector database storage for relationships
-        output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
-            - csv: Comma-separated values file
-            - excel: Microsoft Excel file with multiple sheets
-            - md: Markdown tables
-            - txt: Plain text formatted output
-        include_vector_data: Whether to include data from the vector database.
-    """
-    # Collect data
-    entities_data = []
-    relations_data = []
-    relationships_data = []
-
-    # --- Entities ---
-    all_entities = await chunk_entity_relation_graph.get_all_labels()
-    for entity_name in all_entities:
-        # Get entity information from graph
-        node_data = await chunk_entity_relation_graph.get_node(entity_name)
-        source_id = node_data.get("source_id") if node_data else None
-
-        entity_info = {
-            "graph_data": node_data,
-            "source_id": source_id,
-        }
-
-        # Optional: Get vector database information
-        if include_vector_data:
-            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
-            vector_data = await entities_vdb.get_by_id(entity_id)
-            entity_info["vector_data"] = vector_data
-
-        entity_row = {
-            "entity_name": entity_name,
-            "source_id": source_id,
-            "graph_data": str(
-                entity_info["graph_data"]
-            ),  # Convert to string to ensure compatibility
-        }
-        if include_vector_data and "vector_data" in entity_info:
-            entity_row["vector_data"] = str(entity_info["vector_data"])
-        entities_data.append(entity_row)
-
-    # --- Relations ---
-    for src_entity in all_entities:
-        for tgt_entity in all_entities:
-            if src_entity == tgt_entity:
-                continue
-
-            edge_exists = await chunk_entity_relation_graph.has_edge(
-                src_entity, tgt_entity
-            )
-            if edge_exists:
-                # Get edge information from graph
-                edge_data = await chunk_entity_relation_graph.get_edge(
-                    src_entity, tgt_entity
-                )
-                source_id = edge_data.get("source_id") if edge_data else None
-
-                relation_info = {
-                    "graph_data": edge_data,
-                    "source_id": source_id,
-                }
-
-                # Optional: Get vector database information
-                if include_vector_data:
-                    rel_id = compute_mdhash_id(src_entity + tgt_entity, prefix="rel-")
-                    vector_data = await relationships_vdb.get_by_id(rel_id)
-                    relation_info["vector_data"] = vector_data
-
-                relation_row = {
-                    "src_entity": src_entity,
-                    "tgt_entity": tgt_entity,
-                    "source_id": relation_info["source_id"],
-                    "graph_data": str(relation_info["graph_data"]),  # Convert to string
-                }
-                if include_vector_data and "vector_data" in relation_info:
-                    relation_row["vector_data"] = str(relation_info["vector_data"])
-                relations_data.append(relation_row)
-
-    # --- Relationships (from VectorDB) ---
-    all_relationships = await relationships_vdb.client_storage
-    for rel in all_relationships["data"]:
-        relationships_data.append(
-            {
-                "relationship_id": rel["__id__"],
-                "data": str(rel),  # Convert to string for compatibility
-            }
-        )
-
-    # Export based on format
-    if file_format == "csv":
-        # CSV export
-        with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-            # Entities
-            if entities_data:
-                csvfile.write("# ENTITIES\n")
-                writer = csv.DictWriter(csvfile, fieldnames=entities_data[0].keys())
-                writer.writeheader()
-                writer.writerows(entities_data)
-                csvfile.write("\n\n")
-
-            # Relations
-            if relations_data:
-                csvfile.write("# RELATIONS\n")
-                writer = csv.DictWriter(csvfile, fieldnames=relations_data[0].keys())
-                writer.writeheader()
-                writer.writerows(relations_data)
-                csvfile.write("\n\n")
-
-            # Relationships
-            if relationships_data:
-                csvfile.write("# RELATIONSHIPS\n")
-                writer = csv.DictWriter(
-                    csvfile, fieldnames=relationships_data[0].keys()
-                )
-                writer.writeheader()
-                writer.writerows(relationships_data)
-
-    elif file_format == "excel":
-        # Excel export
-        import pandas as pd
-
-        entities_df = pd.DataFrame(entities_data) if entities_data else pd.DataFrame()
-        relations_df = (
-            pd.DataFrame(relations_data) if relations_data else pd.DataFrame()
-        )
-        relationships_df = (
-            pd.DataFrame(relationships_data) if relationships_data else pd.DataFrame()
-        )
-
-        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-            if not entities_df.empty:
-                entities_df.to_excel(writer, sheet_name="Entities", index=False)
-            if not relations_df.empty:
-                relations_df.to_excel(writer, sheet_name="Relations", index=False)
-            if not relationships_df.empty:
-                relationships_df.to_excel(
-                    writer, sheet_name="Relationships", index=False
-                )
-
-    elif file_format == "md":
-        # Markdown export
-        with open(output_path, "w", encoding="utf-8") as mdfile:
-            mdfile.write("# LightRAG Data Export\n\n")
-
-            # Entities
-            mdfile.write("## Entities\n\n")
-            if entities_data:
-                # Write header
-                mdfile.write("| " + " | ".join(entities_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(entities_data[0].keys())) + " |\n"
-                )
-
-                # Write rows
-                for entity in entities_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in entity.values()) + " |\n"
-                    )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No entity data available*\n\n")
-
-            # Relations
-            mdfile.write("## Relations\n\n")
-            if relations_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relations_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(relations_data[0].keys())) + " |\n"
-                )
-
-                # Write rows
-                for relation in relations_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in relation.values()) + " |\n"
-                    )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No relation data available*\n\n")
-
-            # Relationships
-            mdfile.write("## Relationships\n\n")
-            if relationships_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relationships_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| "
-                    + " | ".join(["---"] * len(relationships_data[0].keys()))
-                    + " |\n"
-                )
-
-                # Write rows
-                for relationship in relationships_data:
-                    mdfile.write(
-                        "| "
-                        + " | ".join(str(v) for v in relationship.values())
-                        + " |\n"
-                    )
-            else:
-                mdfile.write("*No relationship data available*\n\n")
-
-    elif file_format == "txt":
-        # Plain text export
-        with open(output_path, "w", encoding="utf-8") as txtfile:
-            txtfile.write("LIGHTRAG DATA EXPORT\n")
-            txtfile.write("=" * 80 + "\n\n")
-
-            # Entities
-            txtfile.write("ENTITIES\n")
-            txtfile.write("-" * 80 + "\n")
-            if entities_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(e[k])) for e in entities_data))
-                    for k in entities_data[0]
-                }
-                header = "  ".join(k.ljust(col_widths[k]) for k in entities_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for entity in entities_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in entity.items()
-                    )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No entity data available\n\n")
-
-            # Relations
-            txtfile.write("RELATIONS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relations_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relations_data))
-                    for k in relations_data[0]
-                }
-                header = "  ".join(k.ljust(col_widths[k]) for k in relations_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for relation in relations_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relation.items()
-                    )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No relation data available\n\n")
-
-            # Relationships
-            txtfile.write("RELATIONSHIPS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relationships_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relationships_data))
-                    for k in relationships_data[0]
-                }
-                header = "  ".join(
-                    k.ljust(col_widths[k]) for k in relationships_data[0]
-                )
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for relationship in relationships_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relationship.items()
-                    )
-                    txtfile.write(row + "\n")
-            else:
-                txtfile.write("No relationship data available\n\n")
-
-    else:
-        raise ValueError(
-            f"Unsupported file format: {file_format}. Choose from: csv, excel, md, txt"
-        )
-    if file_format is not None:
-        print(f"Data exported to: {output_path} with format: {file_format}")
-    else:
-        print("Data displayed as table format")
-
-
-def export_data(
-    chunk_entity_relation_graph,
-    entities_vdb,
-    relationships_vdb,
-    output_path: str,
-    file_format: str = "csv",
-    include_vector_data: bool = False,
-) -> None:
-    """
-    Synchronously exports all entities, relations, and relationships to various formats.
-
-    Args:
-        chunk_entity_relation_graph: Graph storage instance for entities and relations
-        entities_vdb: Vector database storage for entities
-        relationships_vdb: Vector database storage for relationships
-        output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
-            - csv: Comma-separated values file
-            - excel: Microsoft Excel file with multiple sheets
-            - md: Markdown tables
-            - txt: Plain text formatted output
-        include_vector_data: Whether to include data from the vector database.
-    """
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    loop.run_until_complete(
-        aexport_data(
-            chunk_entity_relation_graph,
-            entities_vdb,
-            relationships_vdb,
-            output_path,
-            file_format,
-            include_vector_data,
-        )
-    )
-
-
 def lazy_external_import(module_name: str, class_name: str) -> Callable[..., Any]:
     """Lazily import a class from an external module based on the package of the caller."""
     # Get the caller's module and package
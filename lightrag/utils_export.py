@@ -0,0 +1,396 @@
+"""Streaming export of the knowledge graph
+
+Entities and relations are read page by page with BaseGraphStorage.iter_nodes
+and iter_edges, their vector records fetched with one get_by_ids call per page,
+and every page is written to the output file before the next one is read.
+Memory use is bounded by the page size and runtime is linear in the size of
+the graph.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import tempfile
+from typing import Any, AsyncIterator
+
+import pipmaster as pm
+
+from .utils import always_get_an_event_loop, compute_mdhash_id
+
+# Nodes or edges read, and rows written, at a time
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = ("csv", "excel", "md", "txt", "parquet", "jsonl")
+
+
+async def _entity_rows(
+    graph, entities_vdb, include_vector_data: bool, batch_size: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    async for page in graph.iter_nodes(batch_size):
+        vector_data = {}
+        if include_vector_data:
+            ids = [compute_mdhash_id(name, prefix="ent-") for name, _ in page]
+            vector_data = _by_id(await entities_vdb.get_by_ids(ids))
+        rows = []
+        for entity_name, node_data in page:
+            row = {
+                "entity_name": entity_name,
+                "source_id": node_data.get("source_id"),
+                "graph_data": node_data,
+            }
+            if include_vector_data:
+                row["vector_data"] = vector_data.get(
+                    compute_mdhash_id(entity_name, prefix="ent-")
+                )
+            rows.append(row)
+        yield rows
+
+
+async def _relation_rows(
+    graph, relationships_vdb, include_vector_data: bool, batch_size: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    async for page in graph.iter_edges(batch_size):
+        vector_data = {}
+        if include_vector_data:
+            # Relations are stored under either orientation of the pair
+            ids = []
+            for src_entity, tgt_entity, _ in page:
+                ids.append(compute_mdhash_id(src_entity + tgt_entity, prefix="rel-"))
+                ids.append(compute_mdhash_id(tgt_entity + src_entity, prefix="rel-"))
+            vector_data = _by_id(await relationships_vdb.get_by_ids(ids))
+        rows = []
+        for src_entity, tgt_entity, edge_data in page:
+            row = {
+                "src_entity": src_entity,
+                "tgt_entity": tgt_entity,
+                "source_id": edge_data.get("source_id") if edge_data else None,
+                "graph_data": edge_data,
+            }
+            if include_vector_data:
+                row["vector_data"] = vector_data.get(
+                    compute_mdhash_id(src_entity + tgt_entity, prefix="rel-")
+                ) or vector_data.get(
+                    compute_mdhash_id(tgt_entity + src_entity, prefix="rel-")
+                )
+            rows.append(row)
+        yield rows
+
+
+def _by_id(records: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    return {
+        record.get("id", record.get("__id__")): record
+        for record in records
+        if record is not None
+    }
+
+
+class _ExportWriter:
+    """Writes sections of rows to the output file as they arrive"""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+
+    def begin_section(self, title: str, record_type: str) -> None:
+        self.title = title
+        self.record_type = record_type
+        self.row_count = 0
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def end_section(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _CsvWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, "w", newline="", encoding="utf-8")
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self.row_count == 0:
+            self.file.write(f"# {self.title.upper()}\n")
+            self.writer = csv.DictWriter(self.file, fieldnames=list(rows[0]))
+            self.writer.writeheader()
+        self.writer.writerows({k: _text(v) for k, v in row.items()} for row in rows)
+        self.row_count += len(rows)
+
+    def end_section(self):
+        if self.row_count:
+            self.file.write("\n\n")
+
+    def close(self):
+        self.file.close()
+
+
+class _MarkdownWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, "w", encoding="utf-8")
+        self.file.write("# LightRAG Data Export\n\n")
+
+    def begin_section(self, title, record_type):
+        super().begin_section(title, record_type)
+        self.file.write(f"## {title}\n\n")
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self.row_count == 0:
+            self.file.write("| " + " | ".join(rows[0]) + " |\n")
+            self.file.write("| " + " | ".join(["---"] * len(rows[0])) + " |\n")
+        for row in rows:
+            self.file.write("| " + " | ".join(_text(v) for v in row.values()) + " |\n")
+        self.row_count += len(rows)
+
+    def end_section(self):
+        if self.row_count:
+            self.file.write("\n\n")
+        else:
+            self.file.write(f"*No {self.record_type} data available*\n\n")
+
+    def close(self):
+        self.file.close()
+
+
+class _TextWriter(_ExportWriter):
+    """Fixed width columns need the widest value of each column, so rows are
+    spooled to a temporary file and formatted when the section ends"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, "w", encoding="utf-8")
+        self.file.write("LIGHTRAG DATA EXPORT\n")
+        self.file.write("=" * 80 + "\n\n")
+
+    def begin_section(self, title, record_type):
+        super().begin_section(title, record_type)
+        self.spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.widths: dict[str, int] = {}
+
+    def write_rows(self, rows):
+        for row in rows:
+            values = {k: _text(v) for k, v in row.items()}
+            for k, v in values.items():
+                self.widths[k] = max(self.widths.get(k, len(k)), len(v))
+            self.spool.write(json.dumps(values) + "\n")
+        self.row_count += len(rows)
+
+    def end_section(self):
+        self.file.write(f"{self.title.upper()}\n")
+        self.file.write("-" * 80 + "\n")
+        if self.row_count:
+            header = "  ".join(k.ljust(w) for k, w in self.widths.items())
+            self.file.write(header + "\n")
+            self.file.write("-" * len(header) + "\n")
+            self.spool.seek(0)
+            for line in self.spool:
+                values = json.loads(line)
+                self.file.write(
+                    "  ".join(v.ljust(self.widths[k]) for k, v in values.items()) + "\n"
+                )
+            self.file.write("\n\n")
+        else:
+            self.file.write(f"No {self.record_type} data available\n\n")
+        self.spool.close()
+
+    def close(self):
+        self.file.close()
+
+
+class _ExcelWriter(_ExportWriter):
+    """One sheet per section, written row by row in constant memory mode"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        if not pm.is_installed("xlsxwriter"):
+            pm.install("xlsxwriter")
+        import xlsxwriter  # type: ignore
+
+        self.workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self.row_count == 0:
+            self.sheet = self.workbook.add_worksheet(self.title)
+            self.sheet.write_row(0, 0, list(rows[0]))
+        for i, row in enumerate(rows, start=self.row_count + 1):
+            self.sheet.write_row(i, 0, [_text(v) for v in row.values()])
+        self.row_count += len(rows)
+
+    def close(self):
+        self.workbook.close()
+
+
+class _JsonlWriter(_ExportWriter):
+    """One JSON object per line, tagged with its type, keeping graph and
+    vector data as objects"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, "w", encoding="utf-8")
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.file.write(
+                json.dumps(
+                    {"type": self.record_type, **row}, ensure_ascii=False, default=str
+                )
+                + "\n"
+            )
+        self.row_count += len(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter(_ExportWriter):
+    """A single table holding both sections, written one row group per page;
+    columns that do not apply to a row are null"""
+
+    COLUMNS = [
+        "type",
+        "entity_name",
+        "src_entity",
+        "tgt_entity",
+        "source_id",
+        "graph_data",
+        "vector_data",
+    ]
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        if not pm.is_installed("pyarrow"):
+            pm.install("pyarrow")
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        self.pa = pa
+        self.schema = pa.schema([(column, pa.string()) for column in self.COLUMNS])
+        self.writer = pq.ParquetWriter(output_path, self.schema)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        columns = {column: [] for column in self.COLUMNS}
+        for row in rows:
+            row = {"type": self.record_type, **row}
+            for column in self.COLUMNS:
+                value = row.get(column)
+                if isinstance(value, dict):
+                    value = json.dumps(value, ensure_ascii=False, default=str)
+                columns[column].append(None if value is None else str(value))
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+        self.row_count += len(rows)
+
+    def close(self):
+        self.writer.close()
+
+
+_WRITERS = {
+    "csv": _CsvWriter,
+    "excel": _ExcelWriter,
+    "md": _MarkdownWriter,
+    "txt": _TextWriter,
+    "parquet": _ParquetWriter,
+    "jsonl": _JsonlWriter,
+}
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+async def aexport_data(
+    chunk_entity_relation_graph,
+    entities_vdb,
+    relationships_vdb,
+    output_path: str,
+    file_format: str = "csv",
+    include_vector_data: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> None:
+    """
+    Asynchronously exports all entities and relations to various formats.
+
+    Args:
+        chunk_entity_relation_graph: Graph storage instance for entities and relations
+        entities_vdb: Vector database storage for entities
+        relationships_vdb: Vector database storage for relationships
+        output_path: The path to the output file (including extension).
+        file_format: Output format - "csv", "excel", "md", "txt", "parquet", "jsonl".
+            - csv: Comma-separated values file
+            - excel: Microsoft Excel file with multiple sheets
+            - md: Markdown tables
+            - txt: Plain text formatted output
+            - parquet: Single Parquet table, rows tagged with their type
+            - jsonl: One JSON object per line, tagged with its type
+        include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read and written at a time.
+    """
+    if file_format not in _WRITERS:
+        raise ValueError(
+            f"Unsupported file format: {file_format}. Choose from: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    writer = _WRITERS[file_format](output_path)
+    try:
+        writer.begin_section("Entities", "entity")
+        async for rows in _entity_rows(
+            chunk_entity_relation_graph, entities_vdb, include_vector_data, batch_size
+        ):
+            writer.write_rows(rows)
+        writer.end_section()
+
+        writer.begin_section("Relations", "relation")
+        async for rows in _relation_rows(
+            chunk_entity_relation_graph,
+            relationships_vdb,
+            include_vector_data,
+            batch_size,
+        ):
+            writer.write_rows(rows)
+        writer.end_section()
+    finally:
+        writer.close()
+
+    print(f"Data exported to: {output_path} with format: {file_format}")
+
+
+def export_data(
+    chunk_entity_relation_graph,
+    entities_vdb,
+    relationships_vdb,
+    output_path: str,
+    file_format: str = "csv",
+    include_vector_data: bool = False,
+) -> None:
+    """
+    Synchronously exports all entities and relations to various formats.
+
+    Args:
+        chunk_entity_relation_graph: Graph storage instance for entities and relations
+        entities_vdb: Vector database storage for entities
+        relationships_vdb: Vector database storage for relationships
+        output_path: The path to the output file (including extension).
+        file_format: Output format - "csv", "excel", "md", "txt", "parquet", "jsonl".
+        include_vector_data: Whether to include data from the vector database.
+    """
+    loop = always_get_an_event_loop()
+    loop.run_until_complete(
+        aexport_data(
+            chunk_entity_relation_graph,
+            entities_vdb,
+            relationships_vdb,
+            output_path,
+            file_format,
+            include_vector_data,
+        )
+    )
@@ -6,12 +6,16 @@ from typing import Any, cast
 
 from .kg.shared_storage import get_graph_db_lock
 from .prompt import GRAPH_FIELD_SEP
-from .utils import compute_mdhash_id, logger
+from .utils import compute_mdhash_id, logger, split_string_by_multi_markers
 from .base import StorageNameSpace
 
 
 async def adelete_by_entity(
-    chunk_entity_relation_graph, entities_vdb, relationships_vdb, entity_name: str
+    chunk_entity_relation_graph,
+    entities_vdb,
+    relationships_vdb,
+    entity_name: str,
+    graph_analytics=None,
 ) -> None:
     """Asynchronously delete an entity and all its relationships.
 
@@ -20,6 +24,7 @@ async def adelete_by_entity(
         entities_vdb: Vector database storage for entities
         relationships_vdb: Vector database storage for relationships
         entity_name: Name of the entity to delete
+        graph_analytics: Optional graph analytics store to keep in sync
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
     # Use graph database lock to ensure atomic graph and vector db operations
@@ -28,19 +33,24 @@ async def adelete_by_entity(
             await entities_vdb.delete_entity(entity_name)
             await relationships_vdb.delete_entity_relation(entity_name)
             await chunk_entity_relation_graph.delete_node(entity_name)
+            if graph_analytics is not None:
+                await graph_analytics.remove_entities([entity_name])
 
             logger.info(
                 f"Entity '{entity_name}' and its relationships have been deleted."
             )
             await _delete_by_entity_done(
-                entities_vdb, relationships_vdb, chunk_entity_relation_graph
+                entities_vdb,
+                relationships_vdb,
+                chunk_entity_relation_graph,
+                graph_analytics,
             )
         except Exception as e:
             logger.error(f"Error while deleting entity '{entity_name}': {e}")
 
 
 async def _delete_by_entity_done(
-    entities_vdb, relationships_vdb, chunk_entity_relation_graph
+    entities_vdb, relationships_vdb, chunk_entity_relation_graph, graph_analytics=None
 ) -> None:
     """Callback after entity deletion is complete, ensures updates are persisted"""
     await asyncio.gather(
@@ -50,7 +60,9 @@ async def _delete_by_entity_done(
                 entities_vdb,
                 relationships_vdb,
                 chunk_entity_relation_graph,
+                graph_analytics,
             ]
+            if storage_inst is not None
         ]
     )
 
@@ -60,6 +72,7 @@ async def adelete_by_relation(
     relationships_vdb,
     source_entity: str,
     target_entity: str,
+    graph_analytics=None,
 ) -> None:
     """Asynchronously delete a relation between two entities.
 
@@ -68,6 +81,7 @@ async def adelete_by_relation(
         relationships_vdb: Vector database storage for relationships
         source_entity: Name of the source entity
         target_entity: Name of the target entity
+        graph_analytics: Optional graph analytics store to keep in sync
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
     # Use graph database lock to ensure atomic graph and vector db operations
@@ -93,18 +107,24 @@ async def adelete_by_relation(
             await chunk_entity_relation_graph.remove_edges(
                 [(source_entity, target_entity)]
             )
+            if graph_analytics is not None:
+                await graph_analytics.remove_relations([(source_entity, target_entity)])
 
             logger.info(
                 f"Successfully deleted relation from '{source_entity}' to '{target_entity}'"
             )
-            await _delete_relation_done(relationships_vdb, chunk_entity_relation_graph)
+            await _delete_relation_done(
+                relationships_vdb, chunk_entity_relation_graph, graph_analytics
+            )
         except Exception as e:
             logger.error(
                 f"Error while deleting relation from '{source_entity}' to '{target_entity}': {e}"
             )
 
 
-async def _delete_relation_done(relationships_vdb, chunk_entity_relation_graph) -> None:
+async def _delete_relation_done(
+    relationships_vdb, chunk_entity_relation_graph, graph_analytics=None
+) -> None:
     """Callback after relation deletion is complete, ensures updates are persisted"""
     await asyncio.gather(
         *[
@@ -112,11 +132,58 @@ async def _delete_relation_done(relationships_vdb, chunk_entity_relation_graph)
             for storage_inst in [  # type: ignore
                 relationships_vdb,
                 chunk_entity_relation_graph,
+                graph_analytics,
             ]
+            if storage_inst is not None
         ]
     )
 
 
+def _source_chunk_ids(records: list[dict[str, Any] | None]) -> set[str]:
+    """Chunk ids listed in the source_id fields of node or edge records"""
+    chunk_ids = set()
+    for record in records:
+        if record and record.get("source_id"):
+            chunk_ids.update(
+                split_string_by_multi_markers(record["source_id"], [GRAPH_FIELD_SEP])
+            )
+    return chunk_ids
+
+
+async def _rename_in_doc_graph_index(
+    doc_graph_index, chunk_ids: set[str], renames: dict[str, str]
+) -> None:
+    """Rewrite the chunk -> (entities, relations) index entries of renamed entities
+
+    Document deletion resolves entities through this index, so entries still
+    naming the old entities would leave the renamed ones behind.
+    """
+    if doc_graph_index is None or not chunk_ids:
+        return
+    chunk_ids = sorted(chunk_ids)
+    entries = await asyncio.gather(
+        *(doc_graph_index.get_by_id(chunk_id) for chunk_id in chunk_ids)
+    )
+    updates = {}
+    for chunk_id, entry in zip(chunk_ids, entries):
+        if not entry:
+            continue
+        entities = sorted(
+            {renames.get(name, name) for name in entry.get("entities", [])}
+        )
+        relations = set()
+        for src, tgt in entry.get("relations", []):
+            src, tgt = renames.get(src, src), renames.get(tgt, tgt)
+            # Relations between merged entities are dropped with them
+            if src != tgt:
+                relations.add(tuple(sorted((src, tgt))))
+        relations = [list(pair) for pair in sorted(relations)]
+        if entities != entry.get("entities") or relations != entry.get("relations"):
+            updates[chunk_id] = {**entry, "entities": entities, "relations": relations}
+    if updates:
+        await doc_graph_index.upsert(updates)
+
+
 async def aedit_entity(
     chunk_entity_relation_graph,
     entities_vdb,
@@ -124,6 +191,8 @@ async def aedit_entity(
     entity_name: str,
     updated_data: dict[str, str],
     allow_rename: bool = True,
+    graph_analytics=None,
+    doc_graph_index=None,
 ) -> dict[str, Any]:
     """Asynchronously edit entity information.
 
@@ -136,6 +205,8 @@ async def aedit_entity(
         entity_name: Name of the entity to edit
         updated_data: Dictionary containing updated attributes, e.g. {"description": "new description", "entity_type": "new type"}
         allow_rename: Whether to allow entity renaming, defaults to True
+        graph_analytics: Optional graph analytics store to keep in sync
+        doc_graph_index: Optional chunk -> (entities, relations) index to keep in sync
 
     Returns:
         Dictionary containing updated entity information
@@ -259,12 +330,35 @@ async def aedit_entity(
                             "description": description,
                             "keywords": keywords,
                             "weight": weight,
+                            "document_types": split_string_by_multi_markers(
+                                edge_data.get("document_type"), [GRAPH_FIELD_SEP]
+                            ),
                         }
                     }
 
                     # Update vector database
                     await relationships_vdb.upsert(relation_data)
 
+                if graph_analytics is not None:
+                    await graph_analytics.remove_entities([entity_name])
+                    await graph_analytics.record_entities(
+                        [{**new_node_data, "entity_name": new_entity_name}]
+                    )
+                    await graph_analytics.record_relations(
+                        [
+                            {**edge_data, "src_id": src, "tgt_id": tgt}
+                            for src, tgt, edge_data in relations_to_update
+                        ]
+                    )
+
+                await _rename_in_doc_graph_index(
+                    doc_graph_index,
+                    _source_chunk_ids(
+                        [node_data] + [data for _, _, data in relations_to_update]
+                    ),
+                    {entity_name: new_entity_name},
+                )
+
                 # Update working entity name to new name
                 entity_name = new_entity_name
             else:
@@ -272,6 +366,10 @@ async def aedit_entity(
                 await chunk_entity_relation_graph.upsert_node(
                     entity_name, new_node_data
                 )
+                if graph_analytics is not None:
+                    await graph_analytics.record_entities(
+                        [{**new_node_data, "entity_name": entity_name}]
+                    )
 
             # 3. Recalculate entity's vector representation and update vector database
             description = new_node_data.get("description", "")
@@ -290,6 +388,9 @@ async def aedit_entity(
                     "source_id": source_id,
                     "description": description,
                     "entity_type": entity_type,
+                    "document_types": split_string_by_multi_markers(
+                        new_node_data.get("document_type"), [GRAPH_FIELD_SEP]
+                    ),
                 }
             }
 
@@ -298,7 +399,11 @@ async def aedit_entity(
 
             # 4. Save changes
             await _edit_entity_done(
-                entities_vdb, relationships_vdb, chunk_entity_relation_graph
+                entities_vdb,
+                relationships_vdb,
+                chunk_entity_relation_graph,
+                graph_analytics,
+                doc_graph_index,
             )
 
             logger.info(f"Entity '{entity_name}' successfully updated")
@@ -314,7 +419,11 @@ async def aedit_entity(
 
 
 async def _edit_entity_done(
-    entities_vdb, relationships_vdb, chunk_entity_relation_graph
+    entities_vdb,
+    relationships_vdb,
+    chunk_entity_relation_graph,
+    graph_analytics=None,
+    doc_graph_index=None,
 ) -> None:
     """Callback after entity editing is complete, ensures updates are persisted"""
     await asyncio.gather(
@@ -324,7 +433,10 @@ async def _edit_entity_done(
                 entities_vdb,
                 relationships_vdb,
                 chunk_entity_relation_graph,
+                graph_analytics,
+                doc_graph_index,
             ]
+            if storage_inst is not None
         ]
     )
 
@@ -336,6 +448,7 @@ async def aedit_relation(
     source_entity: str,
     target_entity: str,
     updated_data: dict[str, Any],
+    graph_analytics=None,
 ) -> dict[str, Any]:
     """Asynchronously edit relation information.
 
@@ -348,6 +461,7 @@ async def aedit_relation(
         source_entity: Name of the source entity
         target_entity: Name of the target entity
         updated_data: Dictionary containing updated attributes, e.g. {"description": "new description", "keywords": "new keywords"}
+        graph_analytics: Optional graph analytics store to keep in sync
 
     Returns:
         Dictionary containing updated relation information
@@ -406,14 +520,30 @@ async def aedit_relation(
                     "description": description,
                     "keywords": keywords,
                     "weight": weight,
+                    "document_types": split_string_by_multi_markers(
+                        new_edge_data.get("document_type"), [GRAPH_FIELD_SEP]
+                    ),
                 }
             }
 
             # Update vector database
             await relationships_vdb.upsert(relation_data)
 
+            if graph_analytics is not None:
+                await graph_analytics.record_relations(
+                    [
+                        {
+                            **new_edge_data,
+                            "src_id": source_entity,
+                            "tgt_id": target_entity,
+                        }
+                    ]
+                )
+
             # 4. Save changes
-            await _edit_relation_done(relationships_vdb, chunk_entity_relation_graph)
+            await _edit_relation_done(
+                relationships_vdb, chunk_entity_relation_graph, graph_analytics
+            )
 
             logger.info(
                 f"Relation from '{source_entity}' to '{target_entity}' successfully updated"
@@ -432,7 +562,9 @@ async def aedit_relation(
             raise
 
 
-async def _edit_relation_done(relationships_vdb, chunk_entity_relation_graph) -> None:
+async def _edit_relation_done(
+    relationships_vdb, chunk_entity_relation_graph, graph_analytics=None
+) -> None:
     """Callback after relation editing is complete, ensures updates are persisted"""
     await asyncio.gather(
         *[
@@ -440,7 +572,9 @@ async def _edit_relation_done(relationships_vdb, chunk_entity_relation_graph) ->
             for storage_inst in [  # type: ignore
                 relationships_vdb,
                 chunk_entity_relation_graph,
+                graph_analytics,
             ]
+            if storage_inst is not None
         ]
     )
 
@@ -451,6 +585,7 @@ async def acreate_entity(
     relationships_vdb,
     entity_name: str,
     entity_data: dict[str, Any],
+    graph_analytics=None,
 ) -> dict[str, Any]:
     """Asynchronously create a new entity.
 
@@ -462,6 +597,7 @@ async def acreate_entity(
         relationships_vdb: Vector database storage for relationships
         entity_name: Name of the new entity
         entity_data: Dictionary containing entity attributes, e.g. {"description": "description", "entity_type": "type"}
+        graph_analytics: Optional graph analytics store to keep in sync
 
     Returns:
         Dictionary containing created entity information
@@ -506,15 +642,26 @@ async def acreate_entity(
                     "description": description,
                     "entity_type": entity_type,
                     "file_path": entity_data.get("file_path", "manual_creation"),
+                    "document_types": split_string_by_multi_markers(
+                        node_data.get("document_type"), [GRAPH_FIELD_SEP]
+                    ),
                 }
             }
 
             # Update vector database
             await entities_vdb.upsert(entity_data_for_vdb)
 
+            if graph_analytics is not None:
+                await graph_analytics.record_entities(
+                    [{**node_data, "entity_name": entity_name}]
+                )
+
             # Save changes
             await _edit_entity_done(
-                entities_vdb, relationships_vdb, chunk_entity_relation_graph
+                entities_vdb,
+                relationships_vdb,
+                chunk_entity_relation_graph,
+                graph_analytics,
             )
 
             logger.info(f"Entity '{entity_name}' successfully created")
@@ -536,6 +683,7 @@ async def acreate_relation(
     source_entity: str,
     target_entity: str,
     relation_data: dict[str, Any],
+    graph_analytics=None,
 ) -> dict[str, Any]:
     """Asynchronously create a new relation between entities.
 
@@ -548,6 +696,7 @@ async def acreate_relation(
         source_entity: Name of the source entity
         target_entity: Name of the target entity
         relation_data: Dictionary containing relation attributes, e.g. {"description": "description", "keywords": "keywords"}
+        graph_analytics: Optional graph analytics store to keep in sync
 
     Returns:
         Dictionary containing created relation information
@@ -614,14 +763,24 @@ async def acreate_relation(
                     "keywords": keywords,
                     "weight": weight,
                     "file_path": relation_data.get("file_path", "manual_creation"),
+                    "document_types": split_string_by_multi_markers(
+                        edge_data.get("document_type"), [GRAPH_FIELD_SEP]
+                    ),
                 }
             }
 
             # Update vector database
             await relationships_vdb.upsert(relation_data_for_vdb)
 
+            if graph_analytics is not None:
+                await graph_analytics.record_relations(
+                    [{**edge_data, "src_id": source_entity, "tgt_id": target_entity}]
+                )
+
             # Save changes
-            await _edit_relation_done(relationships_vdb, chunk_entity_relation_graph)
+            await _edit_relation_done(
+                relationships_vdb, chunk_entity_relation_graph, graph_analytics
+            )
 
             logger.info(
                 f"Relation from '{source_entity}' to '{target_entity}' successfully created"
@@ -648,6 +807,8 @@ async def amerge_entities(
     target_entity: str,
     merge_strategy: dict[str, str] = None,
     target_entity_data: dict[str, Any] = None,
+    graph_analytics=None,
+    doc_graph_index=None,
 ) -> dict[str, Any]:
     """Asynchronously merge multiple entities into one entity.
 
@@ -668,6 +829,8 @@ async def amerge_entities(
             - "join_unique": Join all unique values (for fields separated by delimiter)
         target_entity_data: Dictionary of specific values to set for the target entity,
             overriding any merged values, e.g. {"description": "custom description", "entity_type": "PERSON"}
+        graph_analytics: Optional graph analytics store to keep in sync
+        doc_graph_index: Optional chunk -> (entities, relations) index to keep in sync
 
     Returns:
         Dictionary containing the merged entity information
@@ -681,6 +844,7 @@ async def amerge_entities(
                 "description": "concatenate",
                 "entity_type": "keep_first",
                 "source_id": "join_unique",
+                "document_type": "join_unique",
             }
 
             merge_strategy = (
@@ -778,6 +942,7 @@ async def amerge_entities(
                             "description": "concatenate",
                             "keywords": "join_unique",
                             "source_id": "join_unique",
+                            "document_type": "join_unique",
                             "weight": "max",
                         },
                     )
@@ -821,6 +986,9 @@ async def amerge_entities(
                     "source_id": source_id,
                     "description": description,
                     "entity_type": entity_type,
+                    "document_types": split_string_by_multi_markers(
+                        merged_entity_data.get("document_type"), [GRAPH_FIELD_SEP]
+                    ),
                 }
             }
 
@@ -849,6 +1017,9 @@ async def amerge_entities(
                         "description": description,
                         "keywords": keywords,
                         "weight": weight,
+                        "document_types": split_string_by_multi_markers(
+                            edge_data.get("document_type"), [GRAPH_FIELD_SEP]
+                        ),
                     }
                 }
 
@@ -873,9 +1044,40 @@ async def amerge_entities(
                     f"Deleted source entity '{entity_name}' and its vector embedding from database"
                 )
 
+            if graph_analytics is not None:
+                await graph_analytics.remove_entities(
+                    [name for name in source_entities if name != target_entity]
+                )
+                await graph_analytics.record_entities(
+                    [{**merged_entity_data, "entity_name": target_entity}]
+                )
+                await graph_analytics.record_relations(
+                    [
+                        {
+                            **rel_data["data"],
+                            "src_id": rel_data["src"],
+                            "tgt_id": rel_data["tgt"],
+                        }
+                        for rel_data in relation_updates.values()
+                    ]
+                )
+
+            await _rename_in_doc_graph_index(
+                doc_graph_index,
+                _source_chunk_ids(
+                    list(source_entities_data.values())
+                    + [edge_data for _, _, edge_data in all_relations]
+                ),
+                {name: target_entity for name in source_entities},
+            )
+
             # 10. Save changes
             await _merge_entities_done(
-                entities_vdb, relationships_vdb, chunk_entity_relation_graph
+                entities_vdb,
+                relationships_vdb,
+                chunk_entity_relation_graph,
+                graph_analytics,
+                doc_graph_index,
             )
 
             logger.info(
@@ -1002,7 +1204,11 @@ def _merge_relation_attributes(
 
 
 async def _merge_entities_done(
-    entities_vdb, relationships_vdb, chunk_entity_relation_graph
+    entities_vdb,
+    relationships_vdb,
+    chunk_entity_relation_graph,
+    graph_analytics=None,
+    doc_graph_index=None,
 ) -> None:
     """Callback after entity merging is complete, ensures updates are persisted"""
     await asyncio.gather(
@@ -1012,7 +1218,10 @@ async def _merge_entities_done(
                 entities_vdb,
                 relationships_vdb,
                 chunk_entity_relation_graph,
+                graph_analytics,
+                doc_graph_index,
             ]
+            if storage_inst is not None
         ]
     )
 
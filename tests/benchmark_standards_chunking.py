@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Benchmark of the standards ingestion chunker
+
+Chunks synthetic IFRS compilations of growing size with
+StandardsDocumentProcessor and reports the time per MB. Chunking is linear when
+the time per MB stays flat as the documents grow; the program exits with an
+error when the largest document takes more than twice as long per MB as the
+smallest one.
+
+Each standard holds a few very long sections, the case that made the previous
+chunker, which re-encoded the growing chunk after every paragraph, quadratic.
+
+Usage:
+    python tests/benchmark_standards_chunking.py [--max-mb 10]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from ascii_colors import ASCIIColors
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.tools.standards_ingestion import StandardsDocumentProcessor
+from lightrag.utils import TiktokenTokenizer, logger, setup_logger
+
+WORDS = (
+    "entity shall recognise revenue when control of goods or services transfers "
+    "to the customer measurement of the transaction price allocation performance "
+    "obligation disclosure lease liability right-of-use asset impairment fair "
+    "value hierarchy financial instrument classification amortised cost hedge "
+    "accounting objective principle example guidance"
+).split()
+
+
+class RegexTokenizer:
+    """Word and punctuation tokenizer used when tiktoken data cannot be loaded
+
+    Token ids index a vocabulary grown while encoding; decoding joins the
+    tokens with single spaces, so whitespace is normalized.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._tokens: list[str] = []
+
+    def encode(self, content: str) -> list[int]:
+        ids = []
+        for token in re.findall(r"\w+|[^\w\s]", content):
+            token_id = self._ids.get(token)
+            if token_id is None:
+                token_id = self._ids[token] = len(self._tokens)
+                self._tokens.append(token)
+            ids.append(token_id)
+        return ids
+
+    def decode(self, tokens: list[int]) -> str:
+        return " ".join(self._tokens[token_id] for token_id in tokens)
+
+
+def make_tokenizer():
+    try:
+        tokenizer = TiktokenTokenizer()
+        tokenizer.encode("warm up")
+        return tokenizer, "tiktoken"
+    except Exception as e:
+        ASCIIColors.yellow(f"tiktoken unavailable ({e}), using a regex tokenizer")
+        return RegexTokenizer(), "regex"
+
+
+def synthetic_ifrs_document(size_bytes: int, seed: int = 0) -> str:
+    """IFRS-style document of about size_bytes, with long numbered sections"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    standard = 1
+    while size < size_bytes:
+        parts.append(f"IFRS {standard} Synthetic Standard {standard}")
+        for section in range(1, 4):
+            parts.append(f"{standard}.{section} Requirements of part {section}")
+            # Long sections: a few hundred paragraphs each
+            for _ in range(rng.randint(200, 400)):
+                sentence = " ".join(rng.choices(WORDS, k=rng.randint(30, 90)))
+                parts.append(f"{sentence.capitalize()} (see IAS {standard}).\n")
+        size = sum(len(p) + 1 for p in parts)
+        standard += 1
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-mb", type=float, default=10.0)
+    args = parser.parse_args()
+    setup_logger("lightrag", level="INFO", enable_file_logging=False)
+
+    tokenizer, tokenizer_name = make_tokenizer()
+    processor = StandardsDocumentProcessor(
+        tokenizer, chunk_token_size=1200, chunk_overlap_token_size=100
+    )
+    ASCIIColors.cyan(f"Chunking synthetic IFRS documents ({tokenizer_name} tokens)")
+
+    sizes_mb = [args.max_mb / 8, args.max_mb / 4, args.max_mb / 2, args.max_mb]
+    seconds_per_mb = []
+    for size_mb in sizes_mb:
+        content = synthetic_ifrs_document(int(size_mb * 1024 * 1024))
+        start = time.perf_counter()
+        document = processor.process_document(content, "synthetic_ifrs.txt")
+        elapsed = time.perf_counter() - start
+        actual_mb = len(content) / (1024 * 1024)
+        seconds_per_mb.append(elapsed / actual_mb)
+        logger.info(
+            f"{actual_mb:7.2f} MB  {len(document.chunks):6d} chunks  "
+            f"{elapsed:8.2f} s  {seconds_per_mb[-1]:6.3f} s/MB"
+        )
+
+    growth = seconds_per_mb[-1] / seconds_per_mb[0]
+    if growth > 2.0:
+        ASCIIColors.red(
+            f"Time per MB grew {growth:.2f}x from the smallest to the largest document"
+        )
+        sys.exit(1)
+    ASCIIColors.green(f"Linear scaling: time per MB changed {growth:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
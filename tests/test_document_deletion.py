@@ -0,0 +1,147 @@
+"""Tests for deleting documents through the doc→chunks→graph index
+
+A mock LLM extracts fixed entities from each document, so the graph built by
+the pipeline is known without a model.
+
+Run with: python -m pytest tests/test_document_deletion.py
+"""
+
+import asyncio
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import LightRAG
+from lightrag.kg.shared_storage import (
+    finalize_share_data,
+    initialize_pipeline_status,
+    initialize_share_data,
+)
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+# Document text -> (entities, relations) the mock LLM extracts from it
+DOCUMENTS = {
+    "Zorblax met Quintara.": (["ZORBLAX", "QUINTARA"], [("ZORBLAX", "QUINTARA")]),
+    "Vexmoor met Plimbo.": (["VEXMOOR", "PLIMBO"], [("VEXMOOR", "PLIMBO")]),
+}
+
+
+class ByteTokenizer:
+    def encode(self, content: str) -> list[int]:
+        return list(content.encode("utf-8"))
+
+    def decode(self, tokens: list[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="ignore")
+
+
+async def mock_embedding(texts: list[str], **kwargs) -> np.ndarray:
+    return np.stack(
+        [
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).random(8)
+            for text in texts
+        ]
+    )
+
+
+async def mock_llm(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
+    for text, (entities, relations) in DOCUMENTS.items():
+        if re.search(re.escape(text), prompt):
+            records = [
+                f'("entity"<|>"{name}"<|>"person"<|>"{name} is a person.")'
+                for name in entities
+            ] + [
+                f'("relationship"<|>"{src}"<|>"{tgt}"<|>"{src} met {tgt}."<|>"meeting"<|>1.0)'
+                for src, tgt in relations
+            ]
+            return "##".join(records) + "<|COMPLETE|>"
+    return ""
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+async def open_rag(working_dir) -> LightRAG:
+    """LightRAG instance holding the graph of DOCUMENTS as doc-1 and doc-2"""
+    rag = LightRAG(
+        working_dir=str(working_dir),
+        llm_model_func=mock_llm,
+        embedding_func=EmbeddingFunc(
+            embedding_dim=8, max_token_size=8192, func=mock_embedding
+        ),
+        tokenizer=Tokenizer("bytes", ByteTokenizer()),
+        entity_extract_max_gleaning=0,
+        enable_llm_cache=False,
+        auto_manage_storages_states=False,
+    )
+    await rag.initialize_storages()
+    await initialize_pipeline_status()
+    await rag.ainsert(list(DOCUMENTS), ids=["doc-1", "doc-2"])
+    return rag
+
+
+def test_delete_skips_missing_ids(tmp_path, shared_data):
+    async def run():
+        rag = await open_rag(tmp_path)
+        graph = rag.chunk_entity_relation_graph
+        assert await graph.has_node("ZORBLAX")
+
+        # A missing id in front must not shift the lookup of the real one
+        await rag.adelete_by_doc_ids(["missing", "doc-1"])
+
+        assert await rag.doc_status.get_by_id("doc-1") is None
+        assert await rag.full_docs.get_by_id("doc-1") is None
+        assert not await graph.has_node("ZORBLAX")
+        assert not await graph.has_node("QUINTARA")
+        assert await graph.has_node("VEXMOOR")
+        assert await graph.has_edge("VEXMOOR", "PLIMBO")
+        assert await rag.doc_status.get_by_id("doc-2") is not None
+        await rag.finalize_storages()
+
+    asyncio.run(run())
+
+
+def test_delete_after_rename(tmp_path, shared_data):
+    async def run():
+        rag = await open_rag(tmp_path)
+        await rag.aedit_entity("ZORBLAX", {"entity_name": "ZORBLAX PRIME"})
+
+        await rag.adelete_by_doc_ids(["doc-1"])
+
+        graph = rag.chunk_entity_relation_graph
+        assert not await graph.has_node("ZORBLAX PRIME")
+        assert not await graph.has_node("QUINTARA")
+        assert await graph.has_edge("VEXMOOR", "PLIMBO")
+        await rag.finalize_storages()
+
+    asyncio.run(run())
+
+
+def test_delete_after_merge(tmp_path, shared_data):
+    async def run():
+        rag = await open_rag(tmp_path)
+        await rag.amerge_entities(["ZORBLAX", "QUINTARA"], "DUO")
+        # The target also takes over the relation to an entity of doc-2
+        await rag.amerge_entities(["VEXMOOR"], "VEX")
+
+        await rag.adelete_by_doc_ids(["doc-1"])
+
+        graph = rag.chunk_entity_relation_graph
+        assert not await graph.has_node("DUO")
+        assert await graph.has_edge("VEX", "PLIMBO")
+
+        await rag.adelete_by_doc_ids(["doc-2"])
+        assert not await graph.has_node("VEX")
+        assert not await graph.has_node("PLIMBO")
+        await rag.finalize_storages()
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+"""Tests for the incrementally maintained graph analytics
+
+Run with: python -m pytest tests/test_graph_analytics.py
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import graph_analytics
+from lightrag.graph_analytics import GraphAnalyticsStore
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+async def open_store(working_dir) -> GraphAnalyticsStore:
+    store = GraphAnalyticsStore(
+        namespace="graph_analytics", global_config={"working_dir": str(working_dir)}
+    )
+    await store.initialize()
+    return store
+
+
+def relation(src: str, tgt: str, weight: float) -> dict:
+    return {"src_id": src, "tgt_id": tgt, "weight": weight, "description": "rel"}
+
+
+def test_strongest_relationships_survive_repeated_merges(
+    tmp_path, shared_data, monkeypatch
+):
+    monkeypatch.setattr(graph_analytics, "STRONGEST_EDGES_CAPACITY", 20)
+
+    async def run():
+        store = await open_store(tmp_path)
+        await store.record_relations(
+            [relation(f"A{i}", f"B{i}", 10.0) for i in range(50)]
+        )
+        # Re-merging one edge, with growing and then unchanged weights, must
+        # not crowd the other edges out of the heap
+        for step in range(30):
+            await store.record_relations([relation("A0", "B0", 11.0 + step)])
+        for _ in range(30):
+            await store.record_relations([relation("A0", "B0", 40.0)])
+
+        assert len(store._strongest_edges) == 20
+        summary = await store.get_summary(top_k=10)
+        strongest = summary["strongest_relationships"]
+        assert len(strongest) == 10
+        assert (strongest[0]["source"], strongest[0]["weight"]) == ("A0", 40.0)
+        assert all(r["weight"] == 10.0 for r in strongest[1:])
+
+        # A weight drop of an edge in the heap is picked up on the next read
+        await store.record_relations([relation("A0", "B0", 1.0)])
+        strongest = (await store.get_summary(top_k=50))["strongest_relationships"]
+        assert len(strongest) == 20
+        assert ("A0", "B0") not in {(r["source"], r["target"]) for r in strongest}
+
+    asyncio.run(run())
+
+
+def test_strongest_relationships_after_removal(tmp_path, shared_data):
+    async def run():
+        store = await open_store(tmp_path)
+        await store.record_relations(
+            [relation("A", "B", 5.0), relation("B", "C", 3.0), relation("C", "D", 1.0)]
+        )
+        await store.remove_relations([("A", "B")])
+        strongest = (await store.get_summary(top_k=10))["strongest_relationships"]
+        assert [r["weight"] for r in strongest] == [3.0, 1.0]
+
+    asyncio.run(run())
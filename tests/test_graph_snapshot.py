@@ -0,0 +1,170 @@
+"""Round-trip tests for the NetworkXStorage binary snapshot and delta log:
+write, reload and replay, compaction, a torn delta tail and importing a
+GraphML file.
+
+Run with: python -m pytest tests/test_graph_snapshot.py
+"""
+
+import asyncio
+import os
+import sys
+
+import networkx as nx
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg import networkx_impl
+from lightrag.kg.graph_snapshot import read_snapshot, snapshot_generation
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def restart():
+    """Drop the shared namespace data, as a server restart would"""
+    finalize_share_data()
+    initialize_share_data(1)
+
+
+async def open_storage(working_dir) -> NetworkXStorage:
+    storage = NetworkXStorage(
+        namespace="chunk_entity_relation",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+def node(description: str) -> dict[str, str]:
+    return {"entity_type": "person", "description": description, "source_id": "c-1"}
+
+
+def edge(weight: float) -> dict[str, str]:
+    return {"weight": weight, "description": "knows", "source_id": "c-1"}
+
+
+async def graph_state(storage: NetworkXStorage) -> tuple[dict, dict]:
+    graph = await storage._get_graph()
+    nodes = {n: dict(graph.nodes[n]) for n in graph.nodes}
+    edges = {tuple(sorted((u, v))): dict(d) for u, v, d in graph.edges(data=True)}
+    return nodes, edges
+
+
+def test_write_reload_replay(tmp_path, shared_data):
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert_nodes({"A": node("a"), "B": node("b"), "C": node("c")})
+        await storage.upsert_edges({("A", "B"): edge(1.0), ("B", "C"): edge(2.0)})
+        # The first flush writes the snapshot, later ones append to the delta log
+        await storage.index_done_callback()
+        assert os.path.exists(storage._snapshot_file)
+        snapshot_size = os.path.getsize(storage._snapshot_file)
+
+        await storage.upsert_node("A", node("a2"))
+        await storage.delete_node("C")
+        await storage.upsert_edge("A", "D", edge(3.0))
+        await storage.index_done_callback()
+        assert os.path.getsize(storage._snapshot_file) == snapshot_size
+        expected = await graph_state(storage)
+
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await graph_state(storage) == expected
+        nodes, edges = expected
+        assert sorted(nodes) == ["A", "B", "D"]
+        assert nodes["A"]["description"] == "a2"
+        assert sorted(edges) == [("A", "B"), ("A", "D")]
+
+    asyncio.run(run())
+
+
+def test_compaction_rewrites_snapshot(tmp_path, shared_data, monkeypatch):
+    monkeypatch.setattr(networkx_impl, "GRAPH_DELTA_COMPACTION_MIN_BYTES", 0)
+
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert_nodes({f"N{i}": node(str(i)) for i in range(20)})
+        await storage.index_done_callback()
+        assert snapshot_generation(storage._snapshot_file) == 1
+
+        # Once the delta log outgrows the snapshot it is folded into a new one
+        await storage.remove_nodes([f"N{i}" for i in range(10)])
+        for i in range(10, 20):
+            await storage.upsert_node(f"N{i}", node("x" * 2000))
+        await storage.index_done_callback()
+        assert snapshot_generation(storage._snapshot_file) == 2
+        graph, _ = read_snapshot(storage._snapshot_file)
+        assert sorted(graph.nodes) == sorted(f"N{i}" for i in range(10, 20))
+        with open(storage._delta_log.file_name, "rb") as f:
+            assert len(f.readlines()) == 1  # only the header
+
+        restart()
+        storage = await open_storage(tmp_path)
+        nodes, _ = await graph_state(storage)
+        assert sorted(nodes) == sorted(f"N{i}" for i in range(10, 20))
+        assert nodes["N15"]["description"] == "x" * 2000
+
+    asyncio.run(run())
+
+
+def test_torn_delta_tail(tmp_path, shared_data):
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert_nodes({"A": node("a"), "B": node("b")})
+        await storage.index_done_callback()
+        await storage.upsert_edge("A", "B", edge(1.0))
+        await storage.index_done_callback()
+        # A crash in the middle of an append leaves a partial last line
+        with open(storage._delta_log.file_name, "ab") as f:
+            f.write(b'{"op": "node", "id": "C", "da')
+
+        restart()
+        storage = await open_storage(tmp_path)
+        nodes, edges = await graph_state(storage)
+        assert sorted(nodes) == ["A", "B"]
+        assert list(edges) == [("A", "B")]
+
+        # The next append replaces the torn line instead of extending it
+        await storage.upsert_node("C", node("c"))
+        await storage.index_done_callback()
+        restart()
+        storage = await open_storage(tmp_path)
+        nodes, edges = await graph_state(storage)
+        assert sorted(nodes) == ["A", "B", "C"]
+        assert list(edges) == [("A", "B")]
+
+    asyncio.run(run())
+
+
+def test_imports_graphml_file(tmp_path, shared_data):
+    legacy = nx.Graph()
+    legacy.add_node("A", **node("a"))
+    legacy.add_node("B", **node("b"))
+    legacy.add_edge("A", "B", **edge(1.5))
+    nx.write_graphml(legacy, tmp_path / "graph_chunk_entity_relation.graphml")
+
+    async def run():
+        storage = await open_storage(tmp_path)
+        assert (await storage.get_node("A"))["description"] == "a"
+        assert (await storage.get_edge("A", "B"))["weight"] == 1.5
+
+        # The first flush converts the graph to a snapshot
+        await storage.upsert_node("C", node("c"))
+        await storage.index_done_callback()
+        assert os.path.exists(storage._snapshot_file)
+
+        restart()
+        storage = await open_storage(tmp_path)
+        nodes, edges = await graph_state(storage)
+        assert sorted(nodes) == ["A", "B", "C"]
+        assert edges[("A", "B")]["weight"] == 1.5
+
+    asyncio.run(run())
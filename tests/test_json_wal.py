@@ -0,0 +1,236 @@
+"""Round-trip tests for the JSON write-ahead log behind JsonKVStorage and
+JsonDocStatusStorage: write, reload and replay, compaction, torn tails and
+files written before the log existed.
+
+Run with: python -m pytest tests/test_json_wal.py
+"""
+
+import asyncio
+import glob
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.base import DocStatus
+from lightrag.kg import json_wal
+from lightrag.kg.json_doc_status_impl import JsonDocStatusStorage
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def restart():
+    """Drop the shared namespace data, as a server restart would"""
+    finalize_share_data()
+    initialize_share_data(1)
+
+
+async def open_kv(working_dir, namespace="full_docs") -> JsonKVStorage:
+    storage = JsonKVStorage(
+        namespace=namespace,
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+async def open_doc_status(working_dir) -> JsonDocStatusStorage:
+    storage = JsonDocStatusStorage(
+        namespace="doc_status",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+def doc_status_record(status: DocStatus, file_path: str) -> dict:
+    return {
+        "status": status.value,
+        "content_summary": "summary",
+        "content_length": 7,
+        "file_path": file_path,
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-01T00:00:00+00:00",
+    }
+
+
+def segments(working_dir, namespace="full_docs") -> list[str]:
+    return sorted(glob.glob(os.path.join(working_dir, f"kv_store_{namespace}.wal.*")))
+
+
+def test_kv_write_reload_replay(tmp_path, shared_data):
+    async def run():
+        storage = await open_kv(tmp_path)
+        await storage.upsert({"a": {"content": "1"}, "b": {"content": "2"}})
+        await storage.index_done_callback()
+        await storage.upsert({"a": {"content": "3"}})
+        await storage.delete(["b"])
+        await storage.index_done_callback()
+
+        # Nothing is compacted yet: the snapshot does not exist, the log holds all
+        assert not os.path.exists(tmp_path / "kv_store_full_docs.json")
+        assert segments(tmp_path)
+
+        restart()
+        storage = await open_kv(tmp_path)
+        assert await storage.get_all() == {"a": {"content": "3"}}
+
+    asyncio.run(run())
+
+
+def test_kv_compaction_drops_deleted_records(tmp_path, shared_data, monkeypatch):
+    monkeypatch.setattr(json_wal, "WAL_COMPACTION_MIN_BYTES", 0)
+
+    async def run():
+        storage = await open_kv(tmp_path)
+        await storage.upsert({f"doc-{i}": {"content": str(i)} for i in range(10)})
+        await storage.delete([f"doc-{i}" for i in range(5)])
+        # The log is now larger than the snapshot, so the flush compacts it
+        await storage.index_done_callback()
+        await storage._wal.wait_for_compaction()
+
+        with open(tmp_path / "kv_store_full_docs.json", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        assert sorted(snapshot) == [f"doc-{i}" for i in range(5, 10)]
+        assert segments(tmp_path) == []
+
+        # Changes after the compaction go to a new segment on top of the snapshot
+        await storage.delete(["doc-5"])
+        await storage.index_done_callback()
+        assert len(segments(tmp_path)) == 1
+
+        restart()
+        storage = await open_kv(tmp_path)
+        assert sorted(await storage.get_all()) == [f"doc-{i}" for i in range(6, 10)]
+
+    asyncio.run(run())
+
+
+def test_kv_torn_tail_is_skipped(tmp_path, shared_data):
+    async def run():
+        storage = await open_kv(tmp_path)
+        await storage.upsert({"a": {"content": "1"}})
+        await storage.index_done_callback()
+        # A crash in the middle of an append leaves a partial last line
+        with open(segments(tmp_path)[-1], "ab") as f:
+            f.write(b'{"id": "b", "data": {"cont')
+
+        restart()
+        storage = await open_kv(tmp_path)
+        assert await storage.get_all() == {"a": {"content": "1"}}
+
+        # Writing continues in a fresh segment, so the torn line stays isolated
+        await storage.upsert({"c": {"content": "2"}})
+        await storage.index_done_callback()
+        assert len(segments(tmp_path)) == 2
+
+        restart()
+        storage = await open_kv(tmp_path)
+        assert await storage.get_all() == {
+            "a": {"content": "1"},
+            "c": {"content": "2"},
+        }
+
+    asyncio.run(run())
+
+
+def test_kv_imports_legacy_file(tmp_path, shared_data):
+    with open(tmp_path / "kv_store_full_docs.json", "w", encoding="utf-8") as f:
+        json.dump({"a": {"content": "1"}, "b": {"content": "2"}}, f)
+
+    async def run():
+        storage = await open_kv(tmp_path)
+        assert await storage.get_by_id("b") == {"content": "2"}
+        await storage.delete(["a"])
+        await storage.index_done_callback()
+
+        restart()
+        storage = await open_kv(tmp_path)
+        assert await storage.get_all() == {"b": {"content": "2"}}
+
+    asyncio.run(run())
+
+
+def test_kv_migrates_legacy_llm_cache(tmp_path, shared_data):
+    legacy = {
+        "default": {
+            "hash-1": {
+                "return": "answer",
+                "cache_type": "query",
+                "original_prompt": "q",
+            }
+        }
+    }
+    with open(
+        tmp_path / "kv_store_llm_response_cache.json", "w", encoding="utf-8"
+    ) as f:
+        json.dump(legacy, f)
+
+    async def run():
+        storage = await open_kv(tmp_path, "llm_response_cache")
+        entry = await storage.get_by_mode_and_id("default", "hash-1")
+        assert entry["hash-1"]["return"] == "answer"
+        await storage.index_done_callback()
+
+        # The flat keys replace the mode bucket in the log as well
+        restart()
+        storage = await open_kv(tmp_path, "llm_response_cache")
+        data = await storage.get_all()
+        assert "default" not in data
+        assert (await storage.get_by_mode_and_id("default", "hash-1")) is not None
+
+    asyncio.run(run())
+
+
+def test_doc_status_write_reload_replay(tmp_path, shared_data):
+    async def run():
+        storage = await open_doc_status(tmp_path)
+        await storage.upsert(
+            {
+                "doc-1": doc_status_record(DocStatus.PENDING, "a.txt"),
+                "doc-2": doc_status_record(DocStatus.PENDING, "b.txt"),
+            }
+        )
+        await storage.upsert({"doc-1": doc_status_record(DocStatus.PROCESSED, "a.txt")})
+        await storage.delete(["doc-2"])
+        await storage.index_done_callback()
+
+        restart()
+        storage = await open_doc_status(tmp_path)
+        counts = await storage.get_status_counts()
+        assert counts[DocStatus.PROCESSED.value] == 1
+        assert counts[DocStatus.PENDING.value] == 0
+        processed = await storage.get_docs_by_status(DocStatus.PROCESSED)
+        assert list(processed) == ["doc-1"]
+        assert processed["doc-1"].file_path == "a.txt"
+
+    asyncio.run(run())
+
+
+def test_doc_status_imports_legacy_file(tmp_path, shared_data):
+    # Records written before content moved to full_docs still carry it
+    legacy = {
+        "doc-1": {**doc_status_record(DocStatus.FAILED, "a.txt"), "content": "text"}
+    }
+    with open(tmp_path / "kv_store_doc_status.json", "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    async def run():
+        storage = await open_doc_status(tmp_path)
+        failed = await storage.get_docs_by_status(DocStatus.FAILED)
+        assert list(failed) == ["doc-1"]
+        assert failed["doc-1"].content is None
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+"""Tests for the LLM response cache and its semantic index
+
+Run with: python -m pytest tests/test_llm_cache.py
+"""
+
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.semantic_cache import SemanticCacheIndex
+from lightrag.utils import CacheData, quantize_embedding, save_to_cache
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def embedding(i: int) -> np.ndarray:
+    vector = np.zeros(8)
+    vector[i] = 1.0
+    return vector
+
+
+def test_evicted_entries_leave_semantic_index(tmp_path, shared_data):
+    async def run():
+        global_config = {"working_dir": str(tmp_path), "llm_cache_max_entries": 3}
+        cache = JsonKVStorage(
+            namespace="llm_response_cache",
+            global_config=global_config,
+            embedding_func=None,
+        )
+        await cache.initialize()
+        index = SemanticCacheIndex(
+            namespace="llm_cache_semantic",
+            global_config=global_config,
+            hashing_kv=cache,
+        )
+        await index.initialize()
+
+        for i in range(4):
+            quantized, min_val, max_val = quantize_embedding(embedding(i))
+            await save_to_cache(
+                cache,
+                CacheData(
+                    args_hash=f"h{i}",
+                    content=f"answer {i}",
+                    prompt=f"question {i}",
+                    quantized=quantized,
+                    min_val=min_val,
+                    max_val=max_val,
+                    mode="local",
+                ),
+            )
+
+        # The fourth write trims the cache to 90% of the cap
+        kept = sorted(await cache.get_cache_by_mode("local"))
+        assert kept == ["h2", "h3"]
+        assert sorted(index._modes["local"].rows) == kept
+        # An evicted entry must not be the best match of its own query
+        best_id, _ = await index.search("local", embedding(0))
+        assert best_id in kept
+
+    asyncio.run(run())
@@ -0,0 +1,200 @@
+"""Round-trip tests for MemmapVectorDBStorage: write, reload, compaction of
+deleted rows, an interrupted append and importing a NanoVectorDB file.
+
+Run with: python -m pytest tests/test_memmap_vector_db.py
+"""
+
+import asyncio
+import base64
+import glob
+import json
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg import memmap_vector_db_impl
+from lightrag.kg.memmap_vector_db_impl import MemmapVectorDBStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.utils import EmbeddingFunc
+
+EMBEDDING_DIM = 16
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Deterministic pseudo-random vector per text"""
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+    return rng.standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+async def mock_embedding(texts: list[str], **kwargs) -> np.ndarray:
+    return np.stack([embed_text(text) for text in texts])
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def restart():
+    """Drop the shared namespace data, as a server restart would"""
+    finalize_share_data()
+    initialize_share_data(1)
+
+
+async def open_storage(working_dir) -> MemmapVectorDBStorage:
+    storage = MemmapVectorDBStorage(
+        namespace="chunks",
+        global_config={
+            "working_dir": str(working_dir),
+            "embedding_batch_num": 4,
+            "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+        },
+        embedding_func=EmbeddingFunc(
+            embedding_dim=EMBEDDING_DIM, max_token_size=8192, func=mock_embedding
+        ),
+        meta_fields={"content", "full_doc_id"},
+    )
+    await storage.initialize()
+    return storage
+
+
+def chunks(start: int, stop: int) -> dict[str, dict]:
+    return {
+        f"chunk-{i}": {"content": f"text {i}", "full_doc_id": f"doc-{i % 3}"}
+        for i in range(start, stop)
+    }
+
+
+async def stored_ids(storage: MemmapVectorDBStorage) -> list[str]:
+    data = (await storage.client_storage)["data"]
+    return sorted(record["__id__"] for record in data)
+
+
+def test_write_reload_query(tmp_path, shared_data):
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert(chunks(0, 10))
+        await storage.index_done_callback()
+        await storage.upsert({"chunk-3": {"content": "replaced", "full_doc_id": "x"}})
+        await storage.delete(["chunk-4"])
+        await storage.index_done_callback()
+
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == sorted(
+            f"chunk-{i}" for i in range(10) if i != 4
+        )
+        assert (await storage.get_by_id("chunk-3"))["content"] == "replaced"
+        assert await storage.get_by_id("chunk-4") is None
+
+        results = await storage.query("text 7", top_k=1)
+        assert results[0]["id"] == "chunk-7"
+        assert results[0]["distance"] == pytest.approx(1.0, abs=1e-5)
+        # chunk-6 belongs to doc-0, chunk-7 does not
+        results = await storage.query("text 6", top_k=10, ids=["doc-0"])
+        assert results[0]["id"] == "chunk-6"
+        assert {r["full_doc_id"] for r in results} == {"doc-0"}
+        results = await storage.query("text 7", top_k=10, ids=["doc-0"])
+        assert "chunk-7" not in {r["id"] for r in results}
+
+    asyncio.run(run())
+
+
+def test_compaction_drops_deleted_rows(tmp_path, shared_data, monkeypatch):
+    monkeypatch.setattr(memmap_vector_db_impl, "COMPACTION_MIN_ROWS", 0)
+
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert(chunks(0, 8))
+        await storage.index_done_callback()
+        await storage.delete([f"chunk-{i}" for i in range(4)])
+        await storage.index_done_callback()
+
+        with open(tmp_path / "vdb_chunks.mmap" / "manifest.json") as f:
+            manifest = json.load(f)
+        assert manifest["rows"] == 4
+        assert manifest["data_generation"] == 1
+        # Files of the previous data generation are removed
+        assert not glob.glob(str(tmp_path / "vdb_chunks.mmap" / "*.0.*"))
+
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == [f"chunk-{i}" for i in range(4, 8)]
+        assert (await storage.query("text 5", top_k=1))[0]["id"] == "chunk-5"
+
+    asyncio.run(run())
+
+
+def test_interrupted_append_is_ignored(tmp_path, shared_data):
+    async def run():
+        storage = await open_storage(tmp_path)
+        await storage.upsert(chunks(0, 4))
+        await storage.index_done_callback()
+        # A crash after appending rows but before the manifest was replaced
+        # leaves data files longer than the manifest says
+        for path in glob.glob(str(tmp_path / "vdb_chunks.mmap" / "*.0.*")):
+            with open(path, "ab") as f:
+                f.write(b"\x01" * 24)
+
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == [f"chunk-{i}" for i in range(4)]
+
+        # The next append overwrites the stale tail
+        await storage.upsert(chunks(4, 6))
+        await storage.index_done_callback()
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == [f"chunk-{i}" for i in range(6)]
+        assert (await storage.get_by_id("chunk-5"))["content"] == "text 5"
+        assert (await storage.query("text 5", top_k=1))[0]["id"] == "chunk-5"
+
+    asyncio.run(run())
+
+
+def test_imports_nano_vectordb_file(tmp_path, shared_data):
+    records = [
+        {
+            "__id__": f"chunk-{i}",
+            "__created_at__": 1700000000 + i,
+            "content": f"text {i}",
+        }
+        for i in range(3)
+    ]
+    # A duplicated id keeps its last occurrence
+    records.append(
+        {"__id__": "chunk-1", "__created_at__": 1800000000, "content": "new"}
+    )
+    matrix = np.stack([embed_text(r["content"]) for r in records])
+    with open(tmp_path / "vdb_chunks.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "embedding_dim": EMBEDDING_DIM,
+                "data": records,
+                "matrix": base64.b64encode(matrix.tobytes()).decode("ascii"),
+            },
+            f,
+        )
+
+    async def run():
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == ["chunk-0", "chunk-1", "chunk-2"]
+        record = await storage.get_by_id("chunk-1")
+        assert record["content"] == "new"
+        assert record["created_at"] == 1800000000
+        assert (await storage.query("text 2", top_k=1))[0]["id"] == "chunk-2"
+
+        # Once imported, the mapped files are used even if the legacy file changes
+        os.remove(tmp_path / "vdb_chunks.json")
+        restart()
+        storage = await open_storage(tmp_path)
+        assert await stored_ids(storage) == ["chunk-0", "chunk-1", "chunk-2"]
+
+    asyncio.run(run())
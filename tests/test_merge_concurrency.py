@@ -0,0 +1,122 @@
+"""Tests for merging the graphs of documents concurrently
+
+Run with: python -m pytest tests/test_merge_concurrency.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import LightRAG
+from lightrag.kg.shared_storage import (
+    finalize_share_data,
+    get_namespace_data,
+    get_pipeline_status_lock,
+    initialize_pipeline_status,
+    initialize_share_data,
+)
+from lightrag.operate import merge_nodes_and_edges
+from lightrag.prompt import GRAPH_FIELD_SEP
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+SLOW_SUMMARY_SECONDS = 1.0
+
+
+class ByteTokenizer:
+    def encode(self, content: str) -> list[int]:
+        return list(content.encode("utf-8"))
+
+    def decode(self, tokens: list[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="ignore")
+
+
+async def mock_embedding(texts: list[str], **kwargs) -> np.ndarray:
+    return np.ones((len(texts), 8))
+
+
+async def mock_llm(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
+    # Summaries of the SLOW entity stand for a long LLM call
+    if "SLOW" in prompt:
+        await asyncio.sleep(SLOW_SUMMARY_SECONDS)
+    return "summary"
+
+
+def entity(name: str, description: str, chunk_id: str) -> dict:
+    return {
+        "entity_name": name,
+        "entity_type": "thing",
+        "description": description,
+        "source_id": chunk_id,
+        "file_path": f"{chunk_id}.txt",
+    }
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def test_shared_entity_does_not_wait_for_other_summaries(tmp_path, shared_data):
+    async def run():
+        rag = LightRAG(
+            working_dir=str(tmp_path),
+            llm_model_func=mock_llm,
+            embedding_func=EmbeddingFunc(
+                embedding_dim=8, max_token_size=8192, func=mock_embedding
+            ),
+            tokenizer=Tokenizer("bytes", ByteTokenizer()),
+            force_llm_summary_on_merge=2,
+            enable_llm_cache=False,
+            auto_manage_storages_states=False,
+        )
+        await rag.initialize_storages()
+        await initialize_pipeline_status()
+        pipeline_status = await get_namespace_data("pipeline_status")
+
+        async def merge(chunk_results):
+            await merge_nodes_and_edges(
+                chunk_results=chunk_results,
+                knowledge_graph_inst=rag.chunk_entity_relation_graph,
+                entity_vdb=rag.entities_vdb,
+                relationships_vdb=rag.relationships_vdb,
+                global_config=rag.global_config,
+                pipeline_status=pipeline_status,
+                pipeline_status_lock=get_pipeline_status_lock(),
+                doc_graph_index=rag.doc_graph_index,
+            )
+            return time.perf_counter()
+
+        # Document A shares HOT with document B and needs a slow summary of SLOW
+        doc_a = (
+            {
+                "HOT": [entity("HOT", "hot from a", "chunk-a")],
+                "SLOW": [
+                    entity("SLOW", "slow one", "chunk-a"),
+                    entity("SLOW", "slow two", "chunk-a"),
+                ],
+            },
+            {},
+        )
+        doc_b = ({"HOT": [entity("HOT", "hot from b", "chunk-b")]}, {})
+
+        start = time.perf_counter()
+        merge_a = asyncio.create_task(merge([doc_a]))
+        await asyncio.sleep(0.05)
+        b_done = await merge([doc_b])
+        a_done = await merge_a
+
+        assert a_done - start >= SLOW_SUMMARY_SECONDS
+        assert b_done - start < SLOW_SUMMARY_SECONDS / 2
+        hot = await rag.chunk_entity_relation_graph.get_node("HOT")
+        assert set(hot["source_id"].split(GRAPH_FIELD_SEP)) == {"chunk-a", "chunk-b"}
+        await rag.finalize_storages()
+
+    asyncio.run(run())
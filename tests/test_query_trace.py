@@ -0,0 +1,117 @@
+"""Tests for the stage durations and storage round trips reported in a query trace
+
+A mock LLM extracts fixed entities from each document, so the graph built by
+the pipeline is known without a model.
+
+Run with: python -m pytest tests/test_query_trace.py
+"""
+
+import asyncio
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import LightRAG, QueryParam
+from lightrag.kg.shared_storage import (
+    finalize_share_data,
+    initialize_pipeline_status,
+    initialize_share_data,
+)
+from lightrag.utils import EmbeddingFunc, Tokenizer, record_storage_round_trip
+
+# Document text -> (entities, relations) the mock LLM extracts from it
+DOCUMENTS = {
+    "Zorblax met Quintara.": (["ZORBLAX", "QUINTARA"], [("ZORBLAX", "QUINTARA")]),
+    "Vexmoor met Plimbo.": (["VEXMOOR", "PLIMBO"], [("VEXMOOR", "PLIMBO")]),
+}
+
+
+class ByteTokenizer:
+    def encode(self, content: str) -> list[int]:
+        return list(content.encode("utf-8"))
+
+    def decode(self, tokens: list[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="ignore")
+
+
+async def mock_embedding(texts: list[str], **kwargs) -> np.ndarray:
+    return np.stack(
+        [
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).random(8)
+            for text in texts
+        ]
+    )
+
+
+async def mock_llm(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
+    for text, (entities, relations) in DOCUMENTS.items():
+        if re.search(re.escape(text), prompt):
+            records = [
+                f'("entity"<|>"{name}"<|>"person"<|>"{name} is a person.")'
+                for name in entities
+            ] + [
+                f'("relationship"<|>"{src}"<|>"{tgt}"<|>"{src} met {tgt}."<|>"meeting"<|>1.0)'
+                for src, tgt in relations
+            ]
+            return "##".join(records) + "<|COMPLETE|>"
+    return ""
+
+
+@pytest.fixture
+def shared_data():
+    initialize_share_data(1)
+    yield
+    finalize_share_data()
+
+
+def count_round_trips(storage, method: str) -> None:
+    """Record each call of a storage method as a round trip, like a remote backend"""
+    call = getattr(storage, method)
+
+    async def counted(*args, **kwargs):
+        record_storage_round_trip(storage.namespace)
+        return await call(*args, **kwargs)
+
+    setattr(storage, method, counted)
+
+
+def test_local_query_fetches_chunks_in_one_round_trip(tmp_path, shared_data):
+    async def run():
+        rag = LightRAG(
+            working_dir=str(tmp_path),
+            llm_model_func=mock_llm,
+            embedding_func=EmbeddingFunc(
+                embedding_dim=8, max_token_size=8192, func=mock_embedding
+            ),
+            tokenizer=Tokenizer("bytes", ByteTokenizer()),
+            entity_extract_max_gleaning=0,
+            enable_llm_cache=False,
+            auto_manage_storages_states=False,
+        )
+        await rag.initialize_storages()
+        await initialize_pipeline_status()
+        await rag.ainsert(list(DOCUMENTS), ids=["doc-1", "doc-2"])
+        count_round_trips(rag.text_chunks, "get_by_id")
+        count_round_trips(rag.text_chunks, "get_by_ids")
+
+        param = QueryParam(
+            mode="local",
+            only_need_context=True,
+            ll_keywords=["Zorblax", "Vexmoor"],
+            trace={},
+        )
+        context = await rag.aquery("Who met whom?", param=param)
+
+        assert "Zorblax met Quintara." in context
+        assert "Vexmoor met Plimbo." in context
+        assert param.trace["storage_round_trips"] == {rag.text_chunks.namespace: 1}
+        assert {"keywords", "node_data", "context"} <= set(param.trace)
+        await rag.finalize_storages()
+
+    asyncio.run(run())